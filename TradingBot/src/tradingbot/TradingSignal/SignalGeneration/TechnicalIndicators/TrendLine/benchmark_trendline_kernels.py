@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+benchmark_trendline_kernels.py — micro-benchmarks of trendline_kernels
+-----------------------------------------------------------------------
+Times each kernel against the per-element loop it replaced (kept below as the
+reference), after checking both return the same result.
+
+Usage
+-----
+  python benchmark_trendline_kernels.py                      # synthetic 300 / 2,000 / 20,000 bars
+  python benchmark_trendline_kernels.py --csv HAVELLS.csv    # a price file (date, open, high, low, close)
+  python benchmark_trendline_kernels.py --bars 500 --repeat 7 --window 180
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .trendline_kernels import (
+        SCIPY_AVAILABLE, wilder_atr, pivot_points, hough_accumulator, hough_peaks, hough_lines,
+    )
+except ImportError:  # run as a script
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from trendline_kernels import (
+        SCIPY_AVAILABLE, wilder_atr, pivot_points, hough_accumulator, hough_peaks, hough_lines,
+    )
+
+
+# -------------------------
+# Reference loops (previous implementations)
+# -------------------------
+
+def loop_wilder_atr(high, low, close, length=14):
+    h, l, c = map(np.asarray, (high, low, close))
+    prev_c = np.roll(c, 1)
+    tr = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
+    tr[0] = h[0] - l[0]
+    atr = np.zeros_like(tr, dtype=float)
+    atr[:length] = tr[:length].mean()
+    alpha = 1.0 / length
+    for i in range(length, len(tr)):
+        atr[i] = atr[i-1] + alpha * (tr[i] - atr[i-1])
+    return atr
+
+
+def loop_pivot_points(series, span=10, kind="max"):
+    y = np.asarray(series, float); n = len(y); out = []
+    for i in range(span, n-span):
+        w = y[i-span:i+span+1]
+        if (kind=="max" and y[i]==w.max()) or (kind=="min" and y[i]==w.min()):
+            out.append(i)
+    return np.asarray(out, int)
+
+
+def loop_hough_accumulator(bj, intercept_bins):
+    slope_bins = bj.shape[1]
+    acc = np.zeros((slope_bins, intercept_bins), dtype=np.int32)
+    for i in range(len(bj)):
+        acc[np.arange(slope_bins), bj[i]] += 1
+    return acc
+
+
+def loop_hough_peaks(acc, max_peaks):
+    peaks=[]; A=acc.copy()
+    for _ in range(max_peaks):
+        si, jj = np.unravel_index(np.argmax(A), A.shape)
+        votes = int(A[si, jj])
+        if votes <= 1: break
+        peaks.append((si, jj, votes))
+        A[max(0,si-3):min(A.shape[0],si+4), max(0,jj-6):min(A.shape[1],jj+7)] = 0
+    return peaks
+
+
+def loop_hough_lines(x, y, piv_idxs, slope_bins=101, intercept_bins=201, top_k=1,
+                     tol_abs=1.0, min_touches=3):
+    if len(piv_idxs) < min_touches:
+        return []
+    xs = x[piv_idxs].astype(float); ys = y[piv_idxs].astype(float)
+    xr = float(x[-1]-x[0]) if len(x)>1 else 1.0
+    yr = float(np.nanmax(y) - np.nanmin(y))
+    max_slope = 2.0 * (yr / max(1.0, xr))
+    m_grid = np.linspace(-max_slope, max_slope, slope_bins)
+    b_min = float(np.nanmin(y) - max_slope * x[-1])
+    b_max = float(np.nanmax(y) - (-max_slope) * x[-1])
+    b_grid = np.linspace(b_min, b_max, intercept_bins)
+    b_vals = ys[:,None] - m_grid[None,:] * xs[:,None]
+    bj = np.floor((b_vals - b_min) / (b_max - b_min) * (intercept_bins-1)).astype(int)
+    bj = np.clip(bj, 0, intercept_bins-1)
+    acc = loop_hough_accumulator(bj, intercept_bins)
+    lines = []
+    for (si, jj, votes) in loop_hough_peaks(acc, top_k*6):
+        m = float(m_grid[si]); b = float(b_grid[jj])
+        touches = int(np.sum(np.abs(ys - (m*xs + b)) <= tol_abs))
+        if touches >= min_touches:
+            lines.append(dict(m=m, b=b, touches=touches, votes=votes))
+    return sorted(lines, key=lambda d:(-d["votes"], -d["touches"]))[:top_k]
+
+
+# -------------------------
+# Inputs
+# -------------------------
+
+def synthetic_ohlc(n, seed=0):
+    """Random-walk OHLC rounded to 0.05 ticks (equal highs/lows occur, as in real data)."""
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, n)))
+    tick = lambda a: np.round(a / 0.05) * 0.05
+    return pd.DataFrame({"open": tick(open_), "high": tick(high), "low": tick(low), "close": tick(close)})
+
+
+def load_ohlc(path):
+    df = pd.read_csv(path)
+    df.columns = [c.lower() for c in df.columns]
+    return df[["open", "high", "low", "close"]].astype(float).reset_index(drop=True)
+
+
+def hough_inputs(high, window, span, slope_bins, intercept_bins):
+    """Last `window` highs, their pivots and the intercept bins hough_lines() votes with."""
+    y = high[-window:]
+    x = np.arange(len(high) - len(y), len(high))
+    piv = pivot_points(y, span=span, kind="max")
+    xs = x[piv].astype(float); ys = y[piv]
+    max_slope = 2.0 * (float(np.nanmax(y) - np.nanmin(y)) / max(1.0, float(x[-1] - x[0])))
+    m_grid = np.linspace(-max_slope, max_slope, slope_bins)
+    b_min = float(np.nanmin(y) - max_slope * x[-1]); b_max = float(np.nanmax(y) + max_slope * x[-1])
+    bj = np.floor((ys[:, None] - m_grid[None, :] * xs[:, None] - b_min) / (b_max - b_min) * (intercept_bins - 1)).astype(int)
+    return x, y, piv, np.clip(bj, 0, intercept_bins - 1)
+
+
+# -------------------------
+# Runner
+# -------------------------
+
+def _best_us(fn, repeat):
+    number = max(1, int(0.05 / max(1e-7, min(timeit.repeat(fn, number=1, repeat=3)))))
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def run_benchmarks(df, repeat=5, window=180, span=10, slope_bins=121, intercept_bins=241, top_k=2):
+    """
+    Check and time every kernel on one OHLC frame.
+
+    Returns
+    -------
+    pd.DataFrame with kernel, bars, loop_us, kernel_us, speedup
+    """
+    high, low, close = (df[c].to_numpy(float) for c in ("high", "low", "close"))
+    window = min(window, len(df))
+    x, y, piv, bj = hough_inputs(high, window, span, slope_bins, intercept_bins)
+    acc = hough_accumulator(bj, intercept_bins)
+    tol_abs = 0.01 * float(np.mean(y))
+
+    cases = [
+        ("wilder_atr", len(df),
+         lambda: loop_wilder_atr(high, low, close), lambda: wilder_atr(high, low, close),
+         lambda a, b: np.allclose(a, b, rtol=1e-12, atol=0)),
+        ("pivot_points", len(df),
+         lambda: loop_pivot_points(high, span), lambda: pivot_points(high, span),
+         np.array_equal),
+        ("hough_accumulator", window,
+         lambda: loop_hough_accumulator(bj, intercept_bins), lambda: hough_accumulator(bj, intercept_bins),
+         np.array_equal),
+        ("hough_peaks", window,
+         lambda: loop_hough_peaks(acc, top_k * 6), lambda: hough_peaks(acc, top_k * 6),
+         lambda a, b: a == b),
+        ("hough_lines", window,
+         lambda: loop_hough_lines(x, y, piv, slope_bins, intercept_bins, top_k, tol_abs, 2),
+         lambda: hough_lines(x, y, piv, slope_bins, intercept_bins, top_k, tol_abs, 2),
+         lambda a, b: a == b),
+    ]
+    rows = []
+    for name, bars, loop_fn, kernel_fn, same in cases:
+        if not same(loop_fn(), kernel_fn()):
+            raise AssertionError(f"{name}: kernel result differs from the reference loop")
+        loop_us, kernel_us = _best_us(loop_fn, repeat), _best_us(kernel_fn, repeat)
+        rows.append(dict(kernel=name, bars=bars, loop_us=round(loop_us, 1), kernel_us=round(kernel_us, 1),
+                         speedup=round(loop_us / kernel_us, 1)))
+    return pd.DataFrame(rows)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Micro-benchmarks of trendline_kernels vs the reference loops")
+    p.add_argument("--csv", default="", help="Prices CSV (date, open, high, low, close); default: synthetic")
+    p.add_argument("--bars", type=int, nargs="*", default=[300, 2000, 20000], help="Synthetic series lengths")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--window", type=int, default=180, help="Hough window (bars)")
+    p.add_argument("--pivot-span", type=int, default=10)
+    p.add_argument("--hough-slope-bins", type=int, default=121)
+    p.add_argument("--hough-intercept-bins", type=int, default=241)
+    p.add_argument("--topk-per-side", type=int, default=2)
+    args = p.parse_args()
+
+    frames = [load_ohlc(args.csv)] if args.csv else [synthetic_ohlc(n) for n in args.bars]
+    print(f"SciPy lfilter ATR: {'yes' if SCIPY_AVAILABLE else 'no (loop fallback)'}")
+    for df in frames:
+        out = run_benchmarks(df, repeat=args.repeat, window=args.window, span=args.pivot_span,
+                             slope_bins=args.hough_slope_bins, intercept_bins=args.hough_intercept_bins,
+                             top_k=args.topk_per_side)
+        print(out.to_string(index=False))
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -13,8 +13,13 @@ Config precedence (highest → lowest):
 3) Built-in defaults
 
 You can also dump the *effective* config after parsing with --dump-effective-config FILE.json
+
+stream() runs the bars through StreamEngine; a live feed can push() bars into the same
+engine one at a time and read results() whenever it needs the frames.
 """
 import argparse, json, os, sys, math
+from bisect import bisect_left
+from collections import deque
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass
@@ -22,6 +27,12 @@ import matplotlib.dates as mdates
 import numpy as np
 from matplotlib.patches import Rectangle as _Rect
 
+try:
+    from .trendline_kernels import true_range, wilder_atr, pivot_points, hough_lines
+except ImportError:  # loaded from its file path (trendline_api), not as part of the package
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from trendline_kernels import true_range, wilder_atr, pivot_points, hough_lines
+
 # === Envelope / Pivot-Channel utilities ===
 
 #!/usr/bin/env python3
@@ -58,6 +69,9 @@ import numpy as np
 
 
 # --- Angle veto globals (ADD) ---
+# Defaults of the parallel-veto thresholds; _ACTIVE_R/_ACTIVE_S are the active lines
+# seed_line() checks against. StreamEngine passes its own thresholds and actives to
+# _accept_seed() instead, so several engines never share them.
 ANGLE_BETWEEN_MIN_DEG = 20.0
 PARALLEL_GAP_MAX_ATR = 0.5
 PARALLEL_GAP_MAX_PCT = None
@@ -79,16 +93,7 @@ def _line_y(m: float, b: float, x: float) -> float:
 
 def atr_wilder(high, low, close, length=14):
     """Compute Wilder's ATR."""
-    h, l, c = map(np.asarray, (high, low, close))
-    prev_c = np.roll(c, 1)
-    tr = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
-    tr[0] = h[0] - l[0]  # initialize first bar
-    atr = np.zeros_like(tr, dtype=float)
-    atr[:length] = tr[:length].mean()
-    alpha = 1.0 / length
-    for i in range(length, len(tr)):
-        atr[i] = atr[i-1] + alpha * (tr[i] - atr[i-1])
-    return atr
+    return wilder_atr(high, low, close, length)
 
 def _draw_candles(ax, df_seg, width_frac=0.6):
     """
@@ -129,7 +134,9 @@ def fit_constrained_ols(x, y_fit_ref, c_bound, side, eps=1e-9):
     Strategy:
       (A) Try unconstrained OLS → if feasible, return it.
       (B) Minimal intercept shift holding OLS slope → feasible.
-      (C) All pairwise active-constraint candidates (two points on the bound) → keep feasible ones.
+      (C) Lines through two bound points that keep every point feasible. Those points lie on
+          one edge of the upper (R) / lower (S) convex hull of the bounds, so the candidates
+          come from a monotone-chain hull walk (O(n log n)) instead of all n² pairs.
       Pick the feasible candidate with minimum SSE vs y_fit_ref.
     """
     x = np.asarray(x, float)
@@ -156,52 +163,95 @@ def fit_constrained_ols(x, y_fit_ref, c_bound, side, eps=1e-9):
         b_shift = np.min(c - m0 * x)
     candidates.append((float(m0), float(b_shift)))
 
-    # (C) Pairwise active constraints
-    for i in range(n - 1):
-        xi, ci = x[i], c[i]
-        for j in range(i + 1, n):
-            xj, cj = x[j], c[j]
-            if xi == xj:
-                continue
-            m = (ci - cj) / (xi - xj)
-            b = ci - m * xi
-            y_line = m * x + b
-            feasible = np.all(y_line >= c - eps) if side == "R" else np.all(y_line <= c + eps)
-            if feasible:
-                candidates.append((float(m), float(b)))
-
-    # fallback (shouldn't happen): use minimal shift
-    if not candidates:
-        return (float(m0), float(b_shift))
+    # (C) Two-point lines along the hull edges (none is feasible with NaN bounds)
+    if np.all(np.isfinite(c)):
+        candidates += _hull_edge_lines(x, c, side, eps)
+
+    # SSE of a candidate = SSE of the OLS line + a quadratic in the parameter change, so the
+    # walk ranks candidates in O(1) each; only near-ties are summed exactly (first one wins)
+    x_mean = x.mean()
+    sxx = np.sum((x - x_mean)**2)
+    sse0 = np.sum((y - line0)**2)
+    excess = np.array([len(x) * ((b - b0) + (m - m0) * x_mean)**2 + (m - m0)**2 * sxx
+                       for (m, b) in candidates])
+    finite = np.isfinite(excess)
+    if not finite.any():
+        return None
+    cutoff = excess[finite].min() * (1 + 1e-9) + 1e-9 * sse0 + 1e-12
 
     # choose min-SSE candidate
     best, best_sse = None, np.inf
-    for (m, b) in candidates:
+    for (m, b), e in zip(candidates, excess):
+        if not e <= cutoff:
+            continue
         sse = np.sum((y - (m * x + b))**2)
         if sse < best_sse:
             best_sse = sse
             best = (m, b)
     return best
 
+def _hull_edge_lines(x, c, side, eps):
+    """
+    The feasible two-point lines of fit_constrained_ols(), i.e. every (m, b) through
+    (x[i], c[i]) and (x[j], c[j]), i < j, with all bounds on the feasible side (within eps).
+
+    Such a line runs along an edge of the upper (R) / lower (S) hull of the bound points,
+    so both points are within eps of that edge: the hull is built with a monotone chain
+    (near-collinear vertices merged into one edge), then the pairs of points on each edge
+    are checked against the hull points only. Returned in (i, j) order.
+    """
+    h = c if side == "R" else -c   # lower hull of c == upper hull of -c
+    order = np.lexsort((h, x))
+    xs = x[order]
+
+    # Upper hull over the highest point per x; a vertex within 4*eps of the chord is dropped
+    top = order[np.r_[xs[1:] != xs[:-1], True]]
+    xl, hl, tol = x.tolist(), h.tolist(), 4 * eps
+    hull = []
+    for k in top.tolist():
+        xk, hk = xl[k], hl[k]
+        while len(hull) >= 2:
+            a, v = hull[-2], hull[-1]
+            if hl[v] <= hl[a] + (hk - hl[a]) * (xl[v] - xl[a]) / (xk - xl[a]) + tol:
+                hull.pop()
+            else:
+                break
+        hull.append(k)
+    if len(hull) < 2:
+        return []
+
+    # Points within 2*eps below (or anywhere above) each edge
+    edges = []
+    for p, q in zip(hull[:-1], hull[1:]):
+        lo, hi = np.searchsorted(xs, x[p], side="left"), np.searchsorted(xs, x[q], side="right")
+        idx = order[lo:hi]
+        chord = h[p] + (h[q] - h[p]) * (x[idx] - x[p]) / (x[q] - x[p])
+        edges.append(np.sort(idx[h[idx] >= chord - 2 * eps]))
+    check = np.unique(np.concatenate(edges))
+    xc, cc = x[check], c[check]
+
+    lines = {}
+    for on_edge in edges:
+        for a in range(len(on_edge) - 1):
+            i = on_edge[a]
+            for j in on_edge[a + 1:]:
+                if x[i] == x[j] or (i, j) in lines:
+                    continue
+                m = (c[i] - c[j]) / (x[i] - x[j])
+                b = c[i] - m * x[i]
+                y_line = m * xc + b
+                feasible = np.all(y_line >= cc - eps) if side == "R" else np.all(y_line <= cc + eps)
+                if feasible:
+                    lines[(i, j)] = (float(m), float(b))
+    return [lines[key] for key in sorted(lines)]
+
 def compute_atr(high, low, close, length=14):
-    h,l,c = map(np.asarray, (high, low, close))
-    prev_c = np.roll(c, 1)
-    tr = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
-    tr[0] = h[0] - l[0]
-    atr = np.zeros_like(tr, dtype=float)
-    atr[:length] = tr[:length].mean()
-    alpha = 1.0 / length
-    for i in range(length, len(tr)):
-        atr[i] = atr[i-1] + alpha * (tr[i] - atr[i-1])
-    return atr
-
-def pivot_points(series, span=10, kind="max"):
-    y = np.asarray(series, float); n = len(y); out = []
-    for i in range(span, n-span):
-        w = y[i-span:i+span+1]
-        if (kind=="max" and y[i]==w.max()) or (kind=="min" and y[i]==w.min()):
-            out.append(i)
-    return np.asarray(out, int)
+    return wilder_atr(high, low, close, length)
+
+def atr_seed(high, low, close, length=14):
+    """Seed of compute_atr(): the mean true range of the first `length` bars (None without bars)"""
+    tr = true_range(high, low, close)[:length]
+    return float(tr.mean()) if len(tr) else None
 
 def fit_ols_line(x, y):
     X = np.vstack([x, np.ones_like(x)]).T
@@ -221,39 +271,6 @@ def fit_huber_line(x, y, delta=1.0, iters=30, eps=1e-8):
         m, b = float(m_new), float(b_new)
     return m, b
 
-def hough_lines(x, y, piv_idxs, slope_bins=101, intercept_bins=201, top_k=1,
-                tol_abs=1.0, min_touches=3):
-    if len(piv_idxs) < min_touches: 
-        return []
-    xs = x[piv_idxs].astype(float); ys = y[piv_idxs].astype(float)
-    xr = float(x[-1]-x[0]) if len(x)>1 else 1.0
-    yr = float(np.nanmax(y) - np.nanmin(y))
-    max_slope = 2.0 * (yr / max(1.0, xr))
-    m_grid = np.linspace(-max_slope, max_slope, slope_bins)
-    b_min = float(np.nanmin(y) - max_slope * x[-1])
-    b_max = float(np.nanmax(y) - (-max_slope) * x[-1])
-    b_grid = np.linspace(b_min, b_max, intercept_bins)
-    acc = np.zeros((slope_bins, intercept_bins), dtype=np.int32)
-    b_vals = ys[:,None] - m_grid[None,:] * xs[:,None]
-    bj = np.floor((b_vals - b_min) / (b_max - b_min) * (intercept_bins-1)).astype(int)
-    bj = np.clip(bj, 0, intercept_bins-1)
-    for i in range(len(xs)):
-        acc[np.arange(slope_bins), bj[i]] += 1
-    peaks=[]; A=acc.copy()
-    for _ in range(top_k*6):
-        si, jj = np.unravel_index(np.argmax(A), A.shape)
-        votes = int(A[si, jj])
-        if votes <= 1: break
-        peaks.append((si, jj, votes))
-        A[max(0,si-3):min(A.shape[0],si+4), max(0,jj-6):min(A.shape[1],jj+7)] = 0
-    lines = []
-    for (si, jj, votes) in peaks:
-        m = float(m_grid[si]); b = float(b_grid[jj])
-        touches = int(np.sum(np.abs(ys - (m*xs + b)) <= tol_abs))
-        if touches >= min_touches:
-            lines.append(dict(m=m, b=b, touches=touches, votes=votes))
-    return sorted(lines, key=lambda d:(-d["votes"], -d["touches"]))[:top_k]
-
 def count_touches(x_idx, price, m, b, tol_abs, spacing=1):
     diffs = np.abs(price - (m*x_idx + b))
     cand = np.where(diffs <= tol_abs)[0]
@@ -342,9 +359,6 @@ def seed_line(method, side, x_idx, highs, lows, close, tol_abs, min_touches, tou
       env_k    : multiplier (for atr/pct modes)
       ATR      : precomputed ATR array aligned to price arrays (may be None unless env_mode == "atr")
     """
-    # choose base reference for OLS/Huber
-    y_ref_default = highs if side == "R" else lows
-
     # safety: ensure numpy arrays
     x_idx = np.asarray(x_idx)
     highs = np.asarray(highs)
@@ -353,11 +367,36 @@ def seed_line(method, side, x_idx, highs, lows, close, tol_abs, min_touches, tou
     if x_idx.size == 0:
         return None
 
+    fit = _fit_seed(method, side, x_idx, highs, lows, close, tol_abs, min_touches, pivot_span, huber_delta,
+                    hough_slope_bins, hough_intercept_bins, topk_per_side, env_basis, env_mode, env_k, ATR)
+    if fit is None:
+        return None
+    m, b, y_use = fit
+    return _accept_seed(side, x_idx, y_use, m, b, close, tol_abs, min_touches, touch_spacing,
+                        max_violations, ATR, max_angle_deg=max_angle_deg,
+                        active=_ACTIVE_R if side == "R" else _ACTIVE_S,
+                        angle_between_min_deg=ANGLE_BETWEEN_MIN_DEG,
+                        parallel_gap_max_atr=PARALLEL_GAP_MAX_ATR,
+                        parallel_gap_max_pct=PARALLEL_GAP_MAX_PCT)
+
+def _fit_seed(method, side, x_idx, highs, lows, close, tol_abs, min_touches, pivot_span, huber_delta,
+              hough_slope_bins, hough_intercept_bins, topk_per_side, env_basis, env_mode, env_k, ATR,
+              base_fit=None, base_shift=None, piv=None):
+    """
+    Candidate line of seed_line(): (m, b, y_use) or None.
+
+    base_fit (OLS (m, b) of the fitted basis over the window), base_shift (ols_envelop
+    ATR / close mean) and piv (window-local pivots) come from StreamEngine's rolling
+    statistics; each one is computed from the window when not given.
+    """
+    # choose base reference for OLS/Huber
+    y_ref_default = highs if side == "R" else lows
+
     x = x_idx.astype(float)
 
     if method == "ols":
         y_use = y_ref_default
-        m, b = fit_ols_line(x, y_use)
+        m, b = base_fit if base_fit is not None else fit_ols_line(x, y_use)
     
     elif method == "ols_shift_min":
         # Constrained least-squares that hugs candles with tolerance
@@ -376,24 +415,25 @@ def seed_line(method, side, x_idx, highs, lows, close, tol_abs, min_touches, tou
             return None
 
         # 2) compute delta by env_mode (ATR or PCT)
-        idx0, idx1 = int(x_idx[0]), int(x_idx[-1])
-        if env_mode == "atr":
-            if ATR is None or ATR.size == 0:
-                return None
-            seg = ATR[idx0:idx1+1]
-            if seg.size == 0 or np.all(np.isnan(seg)):
-                return None
-            base_shift = float(np.nanmean(seg))
-        else:  # "pct"
-            seg = close[idx0:idx1+1]
-            if seg.size == 0 or np.all(np.isnan(seg)):
-                return None
-            base_shift = float(np.nanmean(seg)) * 0.01
+        if base_shift is None:
+            idx0, idx1 = int(x_idx[0]), int(x_idx[-1])
+            if env_mode == "atr":
+                if ATR is None or ATR.size == 0:
+                    return None
+                seg = ATR[idx0:idx1+1]
+                if seg.size == 0 or np.all(np.isnan(seg)):
+                    return None
+                base_shift = float(np.nanmean(seg))
+            else:  # "pct"
+                seg = close[idx0:idx1+1]
+                if seg.size == 0 or np.all(np.isnan(seg)):
+                    return None
+                base_shift = float(np.nanmean(seg)) * 0.01
 
         delta = env_k * base_shift
 
         # 3) base OLS on basis, then shift by +/- delta
-        m0, b0 = fit_ols_line(x, base_y)
+        m0, b0 = base_fit if base_fit is not None else fit_ols_line(x, base_y)
         if side == "R":
             m, b = m0, b0 + delta
             y_use = highs
@@ -406,7 +446,8 @@ def seed_line(method, side, x_idx, highs, lows, close, tol_abs, min_touches, tou
         m, b = fit_huber_line(x, y_use, delta=huber_delta)
 
     elif method == "hough":
-        piv = pivot_points(y_ref_default, span=pivot_span, kind=("max" if side == "R" else "min"))
+        if piv is None:
+            piv = pivot_points(y_ref_default, span=pivot_span, kind=("max" if side == "R" else "min"))
         lines = hough_lines(
             x, y_ref_default, piv,
             slope_bins=hough_slope_bins, intercept_bins=hough_intercept_bins,
@@ -420,6 +461,19 @@ def seed_line(method, side, x_idx, highs, lows, close, tol_abs, min_touches, tou
     else:
         raise ValueError(f"Unknown method: {method}")
 
+    return m, b, y_use
+
+def _accept_seed(side, x_idx, y_use, m, b, close, tol_abs, min_touches, touch_spacing,
+                 max_violations, ATR, max_angle_deg=None, active=None,
+                 angle_between_min_deg=ANGLE_BETWEEN_MIN_DEG, parallel_gap_max_atr=PARALLEL_GAP_MAX_ATR,
+                 parallel_gap_max_pct=PARALLEL_GAP_MAX_PCT):
+    """
+    Steepness / parallel-veto / touches / violations checks of seed_line() for a fitted candidate.
+
+    active: the line already active on this side (None = no parallel-veto); the veto
+    thresholds are the angle_between_min_deg / parallel_gap_max_* run arguments.
+    """
+    x = x_idx.astype(float)
     # --- Absolute steepness guard (new) ---
     if max_angle_deg is not None:
         _ang_abs = float(np.degrees(np.arctan(m)))
@@ -429,11 +483,6 @@ def seed_line(method, side, x_idx, highs, lows, close, tol_abs, min_touches, tou
     # --- end absolute steepness guard ---
 
     # ===== Angle-between active line and candidate (parallel-veto) (ADD) =====
-    # Active lines are exposed via globals set in stream()/try_seed
-    try:
-        active = _ACTIVE_R if side == "R" else _ACTIVE_S
-    except NameError:
-        active = None
     if active is not None:
         m_old = float(getattr(active, "m", getattr(active, "slope", getattr(active, "m", np.nan))))
         b_old = float(getattr(active, "b", getattr(active, "intercept", getattr(active, "b", np.nan))))
@@ -442,9 +491,9 @@ def seed_line(method, side, x_idx, highs, lows, close, tol_abs, min_touches, tou
         x_last = float(x_idx[-1])
         gap_end = abs(_line_y(m_old, b_old, x_last) - _line_y(m, b, x_last))
 
-        angle_thresh = ANGLE_BETWEEN_MIN_DEG
-        atr_guard = PARALLEL_GAP_MAX_ATR
-        pct_guard = PARALLEL_GAP_MAX_PCT
+        angle_thresh = angle_between_min_deg
+        atr_guard = parallel_gap_max_atr
+        pct_guard = parallel_gap_max_pct
 
         veto = ang_between < angle_thresh
 
@@ -473,7 +522,427 @@ def seed_line(method, side, x_idx, highs, lows, close, tol_abs, min_touches, tou
 
     return (m, b, touch_n, touch_ix_local)
 
-def stream(args,df_in=None):
+# === Incremental stream engine ===
+
+class _RollingWindow:
+    """
+    Sum and index-weighted sum (weights 0..W-1) of the last W values of one series,
+    updated in O(1) per bar. NaNs are counted instead of summed; the sums are rebuilt
+    from the raw window every W slides so rounding drift can't build up.
+    """
+    __slots__ = ("W", "ready", "sum", "usum", "nans", "slides")
+
+    def __init__(self, W):
+        self.W = W
+        self.ready = False
+        self.sum = self.usum = 0.0
+        self.nans = self.slides = 0
+
+    def reset(self, window):
+        finite = ~np.isnan(window)
+        vals = np.where(finite, window, 0.0)
+        self.sum = float(vals.sum())
+        self.usum = float(np.arange(self.W) @ vals)
+        self.nans = int(self.W - finite.sum())
+        self.slides = 0
+        self.ready = True
+
+    def slide(self, leaving, entering, window):
+        """Drop the window's oldest value `leaving`, append `entering` (`window` = the new window)."""
+        self.slides += 1
+        if self.slides >= self.W:
+            self.reset(window)
+            return
+        if np.isnan(leaving):
+            leaving = 0.0; self.nans -= 1
+        if np.isnan(entering):
+            entering = 0.0; self.nans += 1
+        self.sum -= leaving
+        self.usum += (self.W - 1) * entering - self.sum
+        self.sum += entering
+
+    def mean(self):
+        """nanmean of the window"""
+        k = self.W - self.nans
+        return self.sum / k if k else np.nan
+
+    def ols(self, s):
+        """OLS (m, b) of the window against x = s..s+W-1; None if the window holds NaNs"""
+        W = self.W
+        if self.nans or W < 2:
+            return None
+        u_mean = (W - 1) / 2.0
+        m = (self.usum - u_mean * self.sum) / (W * (W * W - 1) / 12.0)
+        b = self.sum / W - m * (u_mean + s)
+        return float(m), float(b)
+
+
+class StreamEngine:
+    """
+    Bar-by-bar trendline engine behind stream().
+
+    push() one OHLC bar at a time (live ticks or a history backfill); results() returns
+    the events/points/snapshot frames a batch stream() over the pushed bars returns.
+
+    For every window size the engine keeps rolling sums of the close (tolerance mean),
+    of the method's fitted basis (highs/lows for ols, hl2/close and ATR for ols_envelop)
+    and the confirmed pivots (hough), next to a Wilder ATR extended in place, so a new
+    bar costs O(1) per window before any candidate line is checked. Candidates are still
+    checked for touches/violations over their window; huber and ols_shift_min fit from it.
+
+    Break confidence looks up to max(persist_n, retest_window) bars ahead: push() returns
+    a break once those bars arrived, and results() scores breaks still pending on the
+    bars seen so far, like the batch run at the end of its data.
+
+    Wilder's ATR seed is the mean of the first atr_len true ranges. Without atr_seed the
+    engine can't see those bars ahead of time, so results match the batch run only when
+    atr_len <= base_window; stream() passes the seed of its whole frame (atr_seed()).
+    """
+
+    def __init__(self, args, snapshot_idx=None, atr_seed=None):
+        """
+        args        : stream() arguments (build_parser() namespace)
+        snapshot_idx: bar index of the snapshot; None = the latest bar pushed
+        atr_seed    : ATR of the first atr_len bars, when the data is known up front;
+                      None = the mean true range of the bars pushed so far
+        """
+        self.args = args
+        self.snapshot_idx = snapshot_idx
+        self.atr_seed = atr_seed
+        # Parallel-veto thresholds of this run, handed to _accept_seed (not module globals)
+        self._veto = dict(
+            angle_between_min_deg=getattr(args, "angle_between_min_deg", ANGLE_BETWEEN_MIN_DEG),
+            parallel_gap_max_atr=getattr(args, "parallel_gap_max_atr", PARALLEL_GAP_MAX_ATR),
+            parallel_gap_max_pct=getattr(args, "parallel_gap_max_pct", PARALLEL_GAP_MAX_PCT),
+        )
+
+        self.base_W = args.base_window
+        self.windows = list(range(args.base_window, args.max_window+1, args.step_window))
+        self.lookahead = max(args.persist_n, args.retest_window)
+
+        # Bar buffers (grown by doubling; the first n entries are valid)
+        self.n = 0
+        self.dates = []
+        self._cols = {name: np.empty(0) for name in ("open", "high", "low", "close", "hl2", "tr", "atr")}
+
+        # Rolling window sums per series and window size
+        series = ["close"]
+        if args.method == "ols":
+            series += ["high", "low"]
+        elif args.method == "ols_envelop":
+            series.append("hl2" if args.env_basis == "hl2" else "close")
+            series.append("atr" if args.env_mode == "atr" else "close")
+        self._rolling = {name: {W: _RollingWindow(W) for W in self.windows} for name in dict.fromkeys(series)}
+
+        # Confirmed pivots (hough): sliding-extreme deques over 2*span+1 bars
+        self._pivots = {"R": [], "S": []}
+        self._pivot_deques = {"R": deque(), "S": deque()}
+        self._last_nan = {"R": -1, "S": -1}
+
+        self.active_R = None; self.active_S = None
+        self.cooldown_R = self.cooldown_S = 0
+        self.ev_rows, self.pt_rows = [], []
+        self._pending = []   # breaks awaiting look-ahead bars: [ev_rows position, idx, side, LineState, tol_abs]
+        self.snapshot_rows = []
+
+    def col(self, name):
+        """Pushed values of a bar series (open/high/low/close/hl2/tr/atr)"""
+        return self._cols[name][:self.n]
+
+    # ----- push -----
+    def push(self, date, open, high, low, close):
+        """
+        Add the next bar. Returns the events it finalized: breaks whose look-ahead
+        bars are now complete (if confident enough), then this bar's expiries/creations.
+        """
+        t = self.n
+        if t == len(self._cols["close"]):
+            cap = max(256, 2 * t)
+            for name, buf in self._cols.items():
+                grown = np.empty(cap); grown[:t] = buf; self._cols[name] = grown
+        c = self._cols
+        c["open"][t] = open; c["high"][t] = high; c["low"][t] = low; c["close"][t] = close
+        c["hl2"][t] = (c["high"][t] + c["low"][t]) * 0.5
+        self.dates.append(date)
+        self.n = t + 1
+
+        self._update_atr(t)
+        self._update_rolling(t)
+        if self.args.method == "hough":
+            self._update_pivots(t)
+
+        out = self._settle_breaks(t)
+        if t >= self.base_W - 1:
+            first = len(self.ev_rows)
+            self._step(t)
+            out += [row for row in self.ev_rows[first:] if row is not None]
+            if t == self.snapshot_idx:
+                self.snapshot_rows = self._snapshot_rows(t)
+        return out
+
+    def _update_atr(self, t):
+        """Wilder ATR one bar at a time: seed over the first atr_len bars, then the recurrence"""
+        c = self._cols; length = self.args.atr_len
+        h, l = c["high"][t], c["low"][t]
+        if t == 0:
+            c["tr"][t] = h - l
+        else:
+            prev_c = c["close"][t-1]
+            c["tr"][t] = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
+        if t < length:
+            if self.atr_seed is None:
+                c["atr"][:t+1] = c["tr"][:t+1].mean()
+            else:
+                c["atr"][t] = self.atr_seed
+        else:
+            alpha = 1.0 / length
+            c["atr"][t] = c["atr"][t-1] + alpha * (c["tr"][t] - c["atr"][t-1])
+
+    def _update_rolling(self, t):
+        for name, windows in self._rolling.items():
+            y = self._cols[name]
+            # ATR values are rewritten until the seed mean is complete (unless seeded up front)
+            rebuild = name == "atr" and t < self.args.atr_len and self.atr_seed is None
+            for W, roll in windows.items():
+                if t + 1 < W:
+                    continue
+                if t + 1 == W or rebuild:
+                    roll.reset(y[t-W+1:t+1])
+                else:
+                    roll.slide(y[t-W], y[t], y[t-W+1:t+1])
+
+    def _update_pivots(self, t):
+        """Confirm bar t-span as a pivot, with the same equality test as pivot_points()"""
+        span = self.args.pivot_span
+        i = t - span
+        for side, y in (("R", self._cols["high"]), ("S", self._cols["low"])):
+            dq = self._pivot_deques[side]
+            v = y[t]
+            if np.isnan(v):
+                self._last_nan[side] = t
+            if side == "R":
+                while dq and v >= y[dq[-1]]: dq.pop()
+            else:
+                while dq and v <= y[dq[-1]]: dq.pop()
+            dq.append(t)
+            while dq[0] < t - 2*span: dq.popleft()
+            if i >= span and self._last_nan[side] < t - 2*span and y[i] == y[dq[0]]:
+                self._pivots[side].append(i)
+
+    # ----- per-bar logic (breaks, expiry, reseed) -----
+    def _step(self, t):
+        a = self.args
+        close = self.col("close"); ATR = self.col("atr"); dates = self.dates
+        if self.active_R: self.active_R.age += 1
+        if self.active_S: self.active_S.age += 1
+        self.cooldown_R = max(0, self.cooldown_R-1); self.cooldown_S = max(0, self.cooldown_S-1)
+
+        # Breaks
+        for side, st in (("R",self.active_R), ("S",self.active_S)):
+            if st is None: continue
+            y_t = st.m*t + st.b
+            tol_abs = a.tol_pct * close[t]
+            if side=="R":
+                broke = (close[t-1] <= (st.m*(t-1)+st.b) + tol_abs) and (close[t] > y_t + tol_abs)
+            else:
+                broke = (close[t-1] >= (st.m*(t-1)+st.b) - tol_abs) and (close[t] < y_t - tol_abs)
+            if broke:
+                # Scored once the persistence/retest bars are in (_settle_breaks)
+                self._pending.append([len(self.ev_rows), t, side, st, tol_abs])
+                self.ev_rows.append(None)
+                if side=="R": self.active_R=None; self.cooldown_R=a.cooldown
+                else: self.active_S=None; self.cooldown_S=a.cooldown
+                if a.reseed_mode=="both":
+                    if side=="R" and self.active_S is not None: self.active_S=None; self.cooldown_S=a.cooldown
+                    if side=="S" and self.active_R is not None: self.active_R=None; self.cooldown_R=a.cooldown
+
+        # Expiry
+        for side, st in (("R",self.active_R), ("S",self.active_S)):
+            if st is None: continue
+            expired=False; reason=""
+            if a.expiry_mode=="hard":
+                if st.age >= a.max_active_len: expired=True; reason="max_active_len"
+            else:
+                dist = abs(close[t] - (st.m*t + st.b))
+                if dist > a.decay_k_atr * ATR[t] and st.age >= a.decay_hold:
+                    expired=True; reason=f"decay_{a.decay_k_atr}xATR_for_{a.decay_hold}"
+            if expired:
+                self.ev_rows.append(dict(event="expire", side=side, idx=t, date=pd.to_datetime(dates[t]),
+                                         price=float(st.m*t + st.b), m=st.m, b=st.b, start_idx=st.start_idx,
+                                         created_at=st.created_at, touches=st.touches, window_len=st.window_len,method=a.method,
+                                         lookback_used=st.lookback_used, reason=reason))
+                if side=="R": self.active_R=None; self.cooldown_R=a.cooldown
+                else: self.active_S=None; self.cooldown_S=a.cooldown
+
+        # Reseed
+        prev_lb_R = self.active_R.lookback_used if self.active_R else None
+        prev_lb_S = self.active_S.lookback_used if self.active_S else None
+        self._try_seed(t, "R", prev_lb_R)
+        self._try_seed(t, "S", prev_lb_S)
+
+    def _try_seed(self, t, side, prev_lookback=None):
+        a = self.args
+        if side=="R":
+            if self.active_R is not None or self.cooldown_R>0: return
+        else:
+            if self.active_S is not None or self.cooldown_S>0: return
+        close = self.col("close"); ATR = self.col("atr"); dates = self.dates
+        tried = []
+        if prev_lookback is not None: tried.append(prev_lookback)
+        W_list = tried + [W for W in self.windows if W not in tried]
+        for W in W_list:
+            s = t - W + 1
+            if s < 0: continue
+            x_idx = np.arange(s, t+1)
+            highs = self._cols["high"][s:t+1]; lows = self._cols["low"][s:t+1]
+            roll = self._rolling["close"].get(W)
+            tol_abs = a.tol_pct * (roll.mean() if roll is not None else float(np.nanmean(close[s:t+1])))
+
+            fit = _fit_seed(a.method, side, x_idx, highs, lows, close, tol_abs, a.min_touches,
+                            a.pivot_span, a.huber_delta, a.hough_slope_bins, a.hough_intercept_bins, a.topk_per_side,
+                            a.env_basis, a.env_mode, a.env_k, ATR, **self._window_stats(side, W, s))
+            if fit is None: continue
+            fit = _accept_seed(side, x_idx, fit[2], fit[0], fit[1], close, tol_abs, a.min_touches,
+                               a.touch_spacing, a.max_violations, ATR, max_angle_deg=getattr(a, "max_angle_deg", None),
+                               active=self.active_R if side == "R" else self.active_S, **self._veto)
+            if fit is None: continue
+            m,b,touch_n,touch_ix_local = fit
+            st = LineState(side=side, m=m, b=b, start_idx=int(s), created_at=int(t),
+                           age=0, touches=touch_n, window_len=W, lookback_used=W,
+                           pivot_span=(a.pivot_span if a.method=="hough" else None))
+            if side=="R": self.active_R=st
+            else: self.active_S=st
+            self.ev_rows.append(dict(event="create", side=side, idx=t, date=pd.to_datetime(dates[t]),
+                                     price=float(m*t + b), m=m, b=b, start_idx=int(s), created_at=int(t),
+                                     touches=touch_n, window_len=W, lookback_used=W, method=a.method,
+                                     pivot_span=(a.pivot_span if a.method=="hough" else "")))
+            abs_touch_ix = (s + np.asarray(touch_ix_local, int)).tolist()
+            abs_touch_dates = [pd.to_datetime(dates[i]) for i in abs_touch_ix]
+            self.pt_rows.append(dict(side=side, created_at=int(t), start_idx=int(s),
+                                     touch_idx=";".join(map(str, abs_touch_ix)),
+                                     touch_date=";".join(pd.to_datetime(abs_touch_dates).strftime("%Y-%m-%d"))))
+            break
+
+    def _window_stats(self, side, W, s):
+        """Rolling statistics of window [s, s+W) for _fit_seed() (empty when not tracked)"""
+        a = self.args
+
+        def ready(name):
+            roll = self._rolling.get(name, {}).get(W)
+            return roll if roll is not None and roll.ready else None
+
+        if a.method == "ols":
+            roll = ready("high" if side == "R" else "low")
+            return {"base_fit": roll.ols(s)} if roll else {}
+        if a.method == "ols_envelop":
+            stats = {}
+            roll = ready("hl2" if a.env_basis == "hl2" else "close")
+            if roll:
+                stats["base_fit"] = roll.ols(s)
+            roll = ready("atr" if a.env_mode == "atr" else "close")
+            if roll and roll.nans < W:
+                stats["base_shift"] = roll.mean() if a.env_mode == "atr" else roll.mean() * 0.01
+            return stats
+        if a.method == "hough":
+            span = a.pivot_span
+            piv = self._pivots["R" if side == "R" else "S"]
+            lo = bisect_left(piv, s + span)
+            return {"piv": np.asarray(piv[lo:], int) - s}
+        return {}
+
+    # ----- breaks -----
+    def _break_row(self, t, side, st, tol_abs):
+        a = self.args
+        pen_s, pers_s, ret_s, conf = break_confidence(
+            t, side, st.m, st.b, tol_abs, self.col("close"), self.col("atr"),
+            persist_n=a.persist_n, retest_window=a.retest_window,
+            w_pen=a.w_pen, w_pers=a.w_pers, w_retest=a.w_retest
+        )
+        if conf < a.min_confidence:
+            return None
+        return dict(event="break", side=side, idx=t, date=pd.to_datetime(self.dates[t]),
+                    price=float(st.m*t + st.b), m=st.m, b=st.b, start_idx=st.start_idx,
+                    created_at=st.created_at, touches=st.touches, window_len=st.window_len,
+                    lookback_used=st.lookback_used, confidence=conf,method=a.method,
+                    penetration_score=pen_s, persistence_score=pers_s, retest_score=ret_s)
+
+    def _settle_breaks(self, t):
+        settled = []
+        while self._pending and self._pending[0][1] + self.lookahead <= t:
+            pos, idx, side, st, tol_abs = self._pending.pop(0)
+            self.ev_rows[pos] = self._break_row(idx, side, st, tol_abs)
+            if self.ev_rows[pos] is not None:
+                settled.append(self.ev_rows[pos])
+        return settled
+
+    # ----- snapshot / results -----
+    def _snapshot_rows(self, t):
+        close = self.col("close"); dates = self.dates
+        def line_row(st, side):
+            if st is None:
+                return dict(side=side, status="inactive")
+            price_at = float(st.m*t + st.b)
+            age = int(t - st.created_at)
+            return dict(
+                side=side, status="active",
+                m=st.m, b=st.b, start_idx=st.start_idx, created_at=st.created_at,
+                created_date=pd.to_datetime(dates[st.created_at]),
+                touches=st.touches, window_len=st.window_len, lookback_used=st.lookback_used,
+                pivot_span=(st.pivot_span if st.pivot_span is not None else ""),
+                price_at_snapshot=price_at, age_bars=age
+            )
+        row_R = line_row(self.active_R, "R")
+        row_S = line_row(self.active_S, "S")
+        # Channel (if both active)
+        if row_R.get("status")=="active" and row_S.get("status")=="active":
+            ch_w = row_R["price_at_snapshot"] - row_S["price_at_snapshot"]
+            ch_pct = ch_w / max(1e-9, close[t])
+        else:
+            ch_w = np.nan; ch_pct = np.nan
+        return [
+            dict(kind="line", **row_R),
+            dict(kind="line", **row_S),
+            dict(kind="channel", side="BOTH", status=("active" if np.isfinite(ch_w) else "n/a"),
+                 width=ch_w, width_pct=ch_pct)
+        ]
+
+    def results(self, latest_break=None):
+        """{"events", "points", "snapshot"} DataFrames for the bars pushed so far"""
+        ev_rows = list(self.ev_rows)
+        for pos, idx, side, st, tol_abs in self._pending:
+            ev_rows[pos] = self._break_row(idx, side, st, tol_abs)
+        ev_df = pd.DataFrame([row for row in ev_rows if row is not None]); pt_df = pd.DataFrame(self.pt_rows)
+
+        if self.snapshot_idx is not None:
+            snapshot_rows = self.snapshot_rows
+        else:
+            snapshot_rows = self._snapshot_rows(self.n - 1) if self.n >= self.base_W else []
+        if snapshot_rows:
+            snap_df = pd.DataFrame(snapshot_rows)
+            # Attach latest signal (one row) if exists
+            sig_df = pd.DataFrame()
+            if latest_break is not None:
+                sig_df = pd.DataFrame([{
+                    "kind":"signal", "side": latest_break["side"], "signal": "breakout" if latest_break["side"]=="R" else "breakdown",
+                    "signal_idx": latest_break["idx"], "signal_date": latest_break["date"],
+                    "signal_price": latest_break["price"], "confidence": latest_break.get("confidence", np.nan)
+                }])
+            snapshot_out_df = pd.concat([snap_df, sig_df], ignore_index=True)
+        else:
+            snapshot_out_df = pd.DataFrame()
+        return {"events": ev_df, "points": pt_df, "snapshot": snapshot_out_df}
+
+def stream(args,df_in=None,engine=None):
+    """
+    Run the trendline method over df_in (or --csv); returns {"events", "points",
+    "snapshot"} with --return-results, plus the StreamEngine under "engine" when
+    args.return_engine is set.
+
+    engine: a StreamEngine that already consumed the first engine.n bars of this data
+    (e.g. restored by trendline_cache); only the bars after those are pushed. It is
+    ignored when its snapshot bar or its ATR seed no longer matches (a run over fewer
+    than atr_len bars seeded its ATR from those bars only).
+    """
     if isinstance(df_in, pd.DataFrame):
         df = df_in.copy()
     elif getattr(args, "csv", ""):
@@ -502,7 +971,6 @@ def stream(args,df_in=None):
         snap_idx = len(df)-1
 
     latest_break = None  # store the last accepted break (<= snapshot)
-    snapshot_rows = []   # rows to dump if requested
 
     df.columns = [c.lower() for c in df.columns]
     if "date" in df.columns: df["date"] = pd.to_datetime(df["date"])
@@ -513,179 +981,30 @@ def stream(args,df_in=None):
     close = df["close"].to_numpy()
     dates = df["date"].to_numpy()
 
-    ATR = compute_atr(high, low, close, length=args.atr_len)
-
-    # Sync angle-veto thresholds from CLI into globals (ADD)
-    global ANGLE_BETWEEN_MIN_DEG, PARALLEL_GAP_MAX_ATR, PARALLEL_GAP_MAX_PCT
-
-    ANGLE_BETWEEN_MIN_DEG = getattr(args, "angle_between_min_deg", ANGLE_BETWEEN_MIN_DEG)
-    PARALLEL_GAP_MAX_ATR  = getattr(args, "parallel_gap_max_atr", PARALLEL_GAP_MAX_ATR)
-    PARALLEL_GAP_MAX_PCT  = getattr(args, "parallel_gap_max_pct", PARALLEL_GAP_MAX_PCT)
-    # --- end sync ---
-
-    ev_rows, pt_rows = [], []
-    active_R = None; active_S = None
-    cooldown_R = cooldown_S = 0
-
-    base_W = args.base_window; max_W = args.max_window; step_W = args.step_window
-
-    for t in range(base_W-1, len(df)):
-        if active_R: active_R.age += 1
-        if active_S: active_S.age += 1
-        cooldown_R = max(0, cooldown_R-1); cooldown_S = max(0, cooldown_S-1)
-
-        # Breaks
-        for side, st in (("R",active_R), ("S",active_S)):
-            if st is None: continue
-            y_t = st.m*t + st.b
-            tol_abs = args.tol_pct * close[t]
-            if side=="R":
-                broke = (close[t-1] <= (st.m*(t-1)+st.b) + tol_abs) and (close[t] > y_t + tol_abs)
-            else:
-                broke = (close[t-1] >= (st.m*(t-1)+st.b) - tol_abs) and (close[t] < y_t - tol_abs)
-            if broke:
-                pen_s, pers_s, ret_s, conf = break_confidence(
-                    t, side, st.m, st.b, tol_abs, close, ATR,
-                    persist_n=args.persist_n, retest_window=args.retest_window,
-                    w_pen=args.w_pen, w_pers=args.w_pers, w_retest=args.w_retest
-                )
-                if conf >= args.min_confidence:
-                    ev_rows.append(dict(event="break", side=side, idx=t, date=pd.to_datetime(dates[t]),
-                                        price=float(y_t), m=st.m, b=st.b, start_idx=st.start_idx,
-                                        created_at=st.created_at, touches=st.touches, window_len=st.window_len,
-                                        lookback_used=st.lookback_used, confidence=conf,method=args.method,
-                                        penetration_score=pen_s, persistence_score=pers_s, retest_score=ret_s))
-                if side=="R": active_R=None; cooldown_R=args.cooldown
-                else: active_S=None; cooldown_S=args.cooldown
-                if args.reseed_mode=="both":
-                    if side=="R" and active_S is not None: active_S=None; cooldown_S=args.cooldown
-                    if side=="S" and active_R is not None: active_R=None; cooldown_R=args.cooldown
-
-        # Expiry
-        for side, st in (("R",active_R), ("S",active_S)):
-            if st is None: continue
-            expired=False; reason=""
-            if args.expiry_mode=="hard":
-                if st.age >= args.max_active_len: expired=True; reason="max_active_len"
-            else:
-                dist = abs(close[t] - (st.m*t + st.b))
-                if dist > args.decay_k_atr * ATR[t] and st.age >= args.decay_hold:
-                    expired=True; reason=f"decay_{args.decay_k_atr}xATR_for_{args.decay_hold}"
-            if expired:
-                ev_rows.append(dict(event="expire", side=side, idx=t, date=pd.to_datetime(dates[t]),
-                                    price=float(st.m*t + st.b), m=st.m, b=st.b, start_idx=st.start_idx,
-                                    created_at=st.created_at, touches=st.touches, window_len=st.window_len,method=args.method,
-                                    lookback_used=st.lookback_used, reason=reason))
-                if side=="R": active_R=None; cooldown_R=args.cooldown
-                else: active_S=None; cooldown_S=args.cooldown
-
-        # Reseed
-        def try_seed(side, prev_lookback=None):
-            import numpy as np
-            nonlocal active_R, active_S, pt_rows
-            if side=="R":
-                if active_R is not None or cooldown_R>0: return
-            else:
-                if active_S is not None or cooldown_S>0: return
-            tried = []; 
-            if prev_lookback is not None: tried.append(prev_lookback)
-            W_list = tried + [W for W in range(base_W, max_W+1, step_W) if W not in tried]
-            for W in W_list:
-                s = t - W + 1
-                if s < 0: continue
-                x_idx = np.arange(s, t+1)
-                highs = high[s:t+1]; lows = low[s:t+1]
-                tol_abs = args.tol_pct * float(np.nanmean(close[s:t+1]))
-                
-                # Expose current actives to seed_line via globals (ADD)
-                global _ACTIVE_R, _ACTIVE_S
-                _ACTIVE_R, _ACTIVE_S = active_R, active_S
-                # --- end expose ---
-                fit = seed_line(args.method, side, x_idx, highs, lows, close, tol_abs,
-                                args.min_touches, args.touch_spacing, args.max_violations,
-                                args.pivot_span, args.huber_delta, args.hough_slope_bins, args.hough_intercept_bins, args.topk_per_side,
-                                args.env_basis, args.env_mode, args.env_k, ATR,max_angle_deg=getattr(args, "max_angle_deg", None) )
-                if fit is None: continue
-                m,b,touch_n,touch_ix_local = fit
-                st = LineState(side=side, m=m, b=b, start_idx=int(s), created_at=int(t),
-                               age=0, touches=touch_n, window_len=W, lookback_used=W,
-                               pivot_span=(args.pivot_span if args.method=="hough" else None))
-                if side=="R": active_R=st
-                else: active_S=st
-                ev_rows.append(dict(event="create", side=side, idx=t, date=pd.to_datetime(dates[t]),
-                                    price=float(m*t + b), m=m, b=b, start_idx=int(s), created_at=int(t),
-                                    touches=touch_n, window_len=W, lookback_used=W, method=args.method,
-                                    pivot_span=(args.pivot_span if args.method=="hough" else "")))
-                abs_touch_ix = (s + np.asarray(touch_ix_local, int)).tolist()
-                abs_touch_dates = [pd.to_datetime(dates[i]) for i in abs_touch_ix]
-                pt_rows.append(dict(side=side, created_at=int(t), start_idx=int(s),
-                                    touch_idx=";".join(map(str, abs_touch_ix)),
-                                    touch_date=";".join(pd.to_datetime(abs_touch_dates).strftime("%Y-%m-%d"))))
-                break
-
-        prev_lb_R = active_R.lookback_used if active_R else None
-        prev_lb_S = active_S.lookback_used if active_S else None
-        try_seed("R", prev_lb_R)
-        try_seed("S", prev_lb_S)
-
-        # If we've reached the snapshot index, capture snapshot state
-        if t == snap_idx:
-            def line_row(st, side):
-                if st is None:
-                    return dict(side=side, status="inactive")
-                price_at = float(st.m*t + st.b)
-                age = int(t - st.created_at)
-                return dict(
-                    side=side, status="active",
-                    m=st.m, b=st.b, start_idx=st.start_idx, created_at=st.created_at,
-                    created_date=pd.to_datetime(dates[st.created_at]),
-                    touches=st.touches, window_len=st.window_len, lookback_used=st.lookback_used,
-                    pivot_span=(st.pivot_span if st.pivot_span is not None else ""),
-                    price_at_snapshot=price_at, age_bars=age
-                )
-            row_R = line_row(active_R, "R")
-            row_S = line_row(active_S, "S")
-            # Channel (if both active)
-            if row_R.get("status")=="active" and row_S.get("status")=="active":
-                ch_w = row_R["price_at_snapshot"] - row_S["price_at_snapshot"]
-                close_idx = max(0, min(len(close)-1, snap_idx))
-                ch_pct = ch_w / max(1e-9, close[close_idx])
-            else:
-                ch_w = np.nan; ch_pct = np.nan
-            snapshot_rows = [
-                dict(kind="line", **row_R),
-                dict(kind="line", **row_S),
-                dict(kind="channel", side="BOTH", status=("active" if np.isfinite(ch_w) else "n/a"),
-                     width=ch_w, width_pct=ch_pct)
-            ]
-
+    # Push the bars through the incremental engine (same state machine as a live feed),
+    # with the ATR seeded from the whole frame like the batch ATR
+    seed = atr_seed(high, low, close, args.atr_len)
+    if engine is not None and (engine.n > len(df) or (snap_idx < engine.n and snap_idx != engine.snapshot_idx)
+                               or getattr(engine, "atr_seed", None) != seed):
+        engine = None
+    if engine is None:
+        engine = StreamEngine(args, snapshot_idx=snap_idx, atr_seed=seed)
+    else:
+        engine.snapshot_idx = snap_idx
+    for t in range(engine.n, len(df)):
+        engine.push(dates[t], openp[t], high[t], low[t], close[t])
+    results = engine.results(latest_break)
 
-    
     # Write normal outputs
-    ev_df = pd.DataFrame(ev_rows); pt_df = pd.DataFrame(pt_rows)
+    ev_df = results["events"]; pt_df = results["points"]; snapshot_out_df = results["snapshot"]
 
     # only write if explicitly enabled
     if getattr(args, "write_csv", False) and args.events:
         ev_df.to_csv(args.events, index=False)
     if getattr(args, "write_csv", False) and args.points:
         pt_df.to_csv(args.points, index=False)
-
-    # Build snapshot DataFrame
-    if snapshot_rows:
-        snap_df = pd.DataFrame(snapshot_rows)
-        # Attach latest signal (one row) if exists
-        sig_df = pd.DataFrame()
-        if latest_break is not None:
-            sig_df = pd.DataFrame([{
-                "kind":"signal", "side": latest_break["side"], "signal": "breakout" if latest_break["side"]=="R" else "breakdown",
-                "signal_idx": latest_break["idx"], "signal_date": latest_break["date"],
-                "signal_price": latest_break["price"], "confidence": latest_break.get("confidence", np.nan)
-            }])
-        snapshot_out_df = pd.concat([snap_df, sig_df], ignore_index=True)
-        if getattr(args, "write_csv", False) and args.snapshot_out:
-            snapshot_out_df.to_csv(args.snapshot_out, index=False)
-    else:
-        snapshot_out_df = pd.DataFrame()
+    if getattr(args, "write_csv", False) and args.snapshot_out and not snapshot_out_df.empty:
+        snapshot_out_df.to_csv(args.snapshot_out, index=False)
 
     # Plot if requested and not snapshot-only
     if args.write_plots and args.plot and not args.snapshot_only:
@@ -813,7 +1132,10 @@ def stream(args,df_in=None):
         print(f'Wrote plot: {out_path.resolve()}')
         if args.plot and not args.snapshot_only: print(f"Wrote plot: {args.plot}")
     if getattr(args, "return_results", False):
-        return {"events": ev_df, "points": pt_df, "snapshot": snapshot_out_df}
+        out = {"events": ev_df, "points": pt_df, "snapshot": snapshot_out_df}
+        if getattr(args, "return_engine", False):
+            out["engine"] = engine
+        return out
     return 0
 
 
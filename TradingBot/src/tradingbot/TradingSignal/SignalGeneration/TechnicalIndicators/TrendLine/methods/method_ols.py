@@ -15,7 +15,9 @@ def fit_constrained_ols(x, y_fit_ref, c_bound, side, eps=1e-9):
     Strategy:
       (A) Try unconstrained OLS → if feasible, return it.
       (B) Minimal intercept shift holding OLS slope → feasible.
-      (C) All pairwise active-constraint candidates (two points on the bound) → keep feasible ones.
+      (C) Lines through two bound points that keep every point feasible. Those points lie on
+          one edge of the upper (R) / lower (S) convex hull of the bounds, so the candidates
+          come from a monotone-chain hull walk (O(n log n)) instead of all n² pairs.
       Pick the feasible candidate with minimum SSE vs y_fit_ref.
     """
     x = np.asarray(x, float)
@@ -42,29 +44,84 @@ def fit_constrained_ols(x, y_fit_ref, c_bound, side, eps=1e-9):
         b_shift = np.min(c - m0 * x)
     candidates.append((float(m0), float(b_shift)))
 
-    # (C) Pairwise active constraints
-    for i in range(n - 1):
-        xi, ci = x[i], c[i]
-        for j in range(i + 1, n):
-            xj, cj = x[j], c[j]
-            if xi == xj:
-                continue
-            m = (ci - cj) / (xi - xj)
-            b = ci - m * xi
-            y_line = m * x + b
-            feasible = np.all(y_line >= c - eps) if side == "R" else np.all(y_line <= c + eps)
-            if feasible:
-                candidates.append((float(m), float(b)))
+    # (C) Two-point lines along the hull edges (none is feasible with NaN bounds)
+    if np.all(np.isfinite(c)):
+        candidates += _hull_edge_lines(x, c, side, eps)
 
-    # fallback (shouldn't happen): use minimal shift
-    if not candidates:
-        return (float(m0), float(b_shift))
+    # SSE of a candidate = SSE of the OLS line + a quadratic in the parameter change, so the
+    # walk ranks candidates in O(1) each; only near-ties are summed exactly (first one wins)
+    x_mean = x.mean()
+    sxx = np.sum((x - x_mean)**2)
+    sse0 = np.sum((y - line0)**2)
+    excess = np.array([len(x) * ((b - b0) + (m - m0) * x_mean)**2 + (m - m0)**2 * sxx
+                       for (m, b) in candidates])
+    finite = np.isfinite(excess)
+    if not finite.any():
+        return None
+    cutoff = excess[finite].min() * (1 + 1e-9) + 1e-9 * sse0 + 1e-12
 
     # choose min-SSE candidate
     best, best_sse = None, np.inf
-    for (m, b) in candidates:
+    for (m, b), e in zip(candidates, excess):
+        if not e <= cutoff:
+            continue
         sse = np.sum((y - (m * x + b))**2)
         if sse < best_sse:
             best_sse = sse
             best = (m, b)
-    return best
\ No newline at end of file
+    return best
+
+def _hull_edge_lines(x, c, side, eps):
+    """
+    The feasible two-point lines of fit_constrained_ols(), i.e. every (m, b) through
+    (x[i], c[i]) and (x[j], c[j]), i < j, with all bounds on the feasible side (within eps).
+
+    Such a line runs along an edge of the upper (R) / lower (S) hull of the bound points,
+    so both points are within eps of that edge: the hull is built with a monotone chain
+    (near-collinear vertices merged into one edge), then the pairs of points on each edge
+    are checked against the hull points only. Returned in (i, j) order.
+    """
+    h = c if side == "R" else -c   # lower hull of c == upper hull of -c
+    order = np.lexsort((h, x))
+    xs = x[order]
+
+    # Upper hull over the highest point per x; a vertex within 4*eps of the chord is dropped
+    top = order[np.r_[xs[1:] != xs[:-1], True]]
+    xl, hl, tol = x.tolist(), h.tolist(), 4 * eps
+    hull = []
+    for k in top.tolist():
+        xk, hk = xl[k], hl[k]
+        while len(hull) >= 2:
+            a, v = hull[-2], hull[-1]
+            if hl[v] <= hl[a] + (hk - hl[a]) * (xl[v] - xl[a]) / (xk - xl[a]) + tol:
+                hull.pop()
+            else:
+                break
+        hull.append(k)
+    if len(hull) < 2:
+        return []
+
+    # Points within 2*eps below (or anywhere above) each edge
+    edges = []
+    for p, q in zip(hull[:-1], hull[1:]):
+        lo, hi = np.searchsorted(xs, x[p], side="left"), np.searchsorted(xs, x[q], side="right")
+        idx = order[lo:hi]
+        chord = h[p] + (h[q] - h[p]) * (x[idx] - x[p]) / (x[q] - x[p])
+        edges.append(np.sort(idx[h[idx] >= chord - 2 * eps]))
+    check = np.unique(np.concatenate(edges))
+    xc, cc = x[check], c[check]
+
+    lines = {}
+    for on_edge in edges:
+        for a in range(len(on_edge) - 1):
+            i = on_edge[a]
+            for j in on_edge[a + 1:]:
+                if x[i] == x[j] or (i, j) in lines:
+                    continue
+                m = (c[i] - c[j]) / (x[i] - x[j])
+                b = c[i] - m * x[i]
+                y_line = m * xc + b
+                feasible = np.all(y_line >= cc - eps) if side == "R" else np.all(y_line <= cc + eps)
+                if feasible:
+                    lines[(i, j)] = (float(m), float(b))
+    return [lines[key] for key in sorted(lines)]
@@ -10,6 +10,15 @@ Public API
 ----------
 - run_methods(df, config, methods, main_stream_path, ..., write_csv=False)
 - run_single_method(...)
+- run_symbols(symbol_dfs, config=..., methods=..., main_stream_path=...) across processes
+
+Pass cache_dir (and a symbol) to keep results on disk (see trendline_cache.py): a rerun on
+the same bars reads them back, bars appended since the last run are pushed through the
+stored engine state instead of recomputing the whole history.
+
+Loaded copies of `main_trendline_stream.py` are kept warm and reused (reloaded when the
+file changes). run_symbols hands each process its OHLCV as columnar NumPy blocks in
+shared memory and gets result frames back column by column.
 
 Return shape
 ------------
@@ -27,6 +36,7 @@ Assumptions
 Your `main_trendline_stream.py` was patched as recommended:
 - build_parser(defaults=None) -> argparse.ArgumentParser
 - stream(args, df_in=None) -> returns {"events":..., "points":..., "snapshot":...} if args.return_results
+- (optional) stream(..., engine=...) resumes a StreamEngine; needed for cached tail runs
 - (optional) merge_config_with_method(cfg, argv_like) -> dict defaults
 
 If some helper is missing, this module falls back gracefully with reasonable defaults.
@@ -36,19 +46,32 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import sys
+import threading
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass, field
+from multiprocessing import shared_memory
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Any, Union
 
 import importlib.util
+import inspect
+import numpy as np
 import pandas as pd
 from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from time import perf_counter
 
+try:
+    from . import trendline_cache
+except ImportError:  # loaded from its file path, not as part of the package
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import trendline_cache
+
 
-__all__ = ["run_methods", "run_single_method"]
+__all__ = ["run_methods", "run_single_method", "run_symbols", "concat_symbol_results"]
 
 
 # -------------------------
@@ -66,6 +89,46 @@ def _load_module_from_path(py_path: Union[str, Path]):
     return module
 
 
+# Idle loaded copies of the stream module per (path, mtime). StreamEngine keeps its run
+# settings on the engine, but the module still has globals (seed_line()'s veto settings)
+# a run may set, so concurrent runs each check out their own copy.
+_STREAM_MODULES: Dict[Tuple[str, int], List[Tuple[Any, Dict[str, Any]]]] = {}
+_STREAM_MODULES_LOCK = threading.Lock()
+
+
+def _scalar_globals(module) -> Dict[str, Any]:
+    """Module-level scalars (thresholds, active-line slots) as loaded."""
+    return {k: v for k, v in vars(module).items()
+            if not k.startswith("__") and isinstance(v, (bool, int, float, str, type(None)))}
+
+
+@contextmanager
+def _stream_module(py_path: Union[str, Path]):
+    """
+    Check out a warm copy of the stream module at `py_path` for one run.
+
+    A copy is loaded once and reused by later runs with its scalar globals restored,
+    so settings from a previous run don't leak. Editing the file loads a fresh copy.
+    """
+    path = os.path.abspath(str(py_path))
+    key = (path, os.stat(path).st_mtime_ns)
+    with _STREAM_MODULES_LOCK:
+        idle = _STREAM_MODULES.get(key)
+        entry = idle.pop() if idle else None
+    if entry is None:
+        module = _load_module_from_path(path)
+        entry = (module, _scalar_globals(module))
+    else:
+        vars(entry[0]).update(entry[1])
+    try:
+        yield entry[0]
+    finally:
+        with _STREAM_MODULES_LOCK:
+            for stale in [k for k in _STREAM_MODULES if k[0] == path and k != key]:
+                del _STREAM_MODULES[stale]
+            _STREAM_MODULES.setdefault(key, []).append(entry)
+
+
 def _coerce_config(config: Union[str, Path, Dict[str, Any]]) -> Dict[str, Any]:
     """Accept dict or JSON filepath and return a dict."""
     if isinstance(config, (str, Path)):
@@ -113,6 +176,13 @@ def _ensure_df(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
+def _symbol_of(df: pd.DataFrame) -> Optional[str]:
+    """The frame's symbol, if it has a single-valued 'Symbol' column."""
+    if "Symbol" in df.columns and len(df) and df["Symbol"].nunique() == 1:
+        return str(df["Symbol"].iloc[0])
+    return None
+
+
 @dataclass
 class RunOptions:
     main_stream_path: Union[str, Path]
@@ -224,11 +294,16 @@ def run_single_method(
     min_confidence: Optional[float] = None,
     max_angle_deg: Optional[float] = None,
     extra_overrides: Optional[Dict[str, Any]] = None,
+    symbol: Optional[str] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
 ) -> Dict[str, pd.DataFrame]:
     """
     Run a single method in-memory and return its dataframes.
+
+    With cache_dir, results are read from / stored in the trendline result cache under
+    `symbol` (default: the frame's single 'Symbol' value; no symbol, no cache). Runs
+    that write CSVs or plots bypass it.
     """
-    tlc_main = _load_module_from_path(main_stream_path)
     cfg = _coerce_config(config)
     df_use = _ensure_df(df)
 
@@ -243,18 +318,38 @@ def run_single_method(
         extra_overrides=extra_overrides or {},
     )
 
-    args = _prepare_args_for_method(tlc_main, cfg, method, run_opts)
-
-    # stream(...) MUST support df_in per the recommended patch
-    res = tlc_main.stream(args, df_in=df_use)  # type: ignore
-
-    # Normalize shape of return
-    out = {
-        "events": res.get("events", pd.DataFrame()),
-        "points": res.get("points", pd.DataFrame()),
-    }
-    if isinstance(res, dict) and "snapshot" in res:
-        out["snapshot"] = res.get("snapshot", pd.DataFrame())
+    symbol = symbol if symbol is not None else _symbol_of(df_use)
+    entry = engine = None
+
+    with _stream_module(main_stream_path) as tlc_main:
+        args = _prepare_args_for_method(tlc_main, cfg, method, run_opts)
+
+        if cache_dir is not None and symbol is not None and not (write_csv or write_plots):
+            overrides = {"min_confidence": min_confidence, "max_angle_deg": max_angle_deg,
+                         "extra_overrides": extra_overrides or {}}
+            key = trendline_cache.run_key(_merge_top_and_method_cfg(cfg, method), overrides, main_stream_path)
+            entry = trendline_cache.entry_dir(cache_dir, symbol, method, key)
+            cached, engine = trendline_cache.read_entry(entry, df_use, tlc_main)
+            if cached is not None:
+                return cached
+            setattr(args, "return_engine", True)
+
+        # stream(...) MUST support df_in per the recommended patch
+        if engine is not None and "engine" in inspect.signature(tlc_main.stream).parameters:
+            res = tlc_main.stream(args, df_in=df_use, engine=engine)  # type: ignore
+        else:
+            res = tlc_main.stream(args, df_in=df_use)  # type: ignore
+
+        # Normalize shape of return
+        out = {
+            "events": res.get("events", pd.DataFrame()),
+            "points": res.get("points", pd.DataFrame()),
+        }
+        if isinstance(res, dict) and "snapshot" in res:
+            out["snapshot"] = res.get("snapshot", pd.DataFrame())
+
+        if entry is not None:
+            trendline_cache.write_entry(entry, df_use, out, res.get("engine"), tlc_main)
     return out
 
 
@@ -272,6 +367,8 @@ def run_methods(
     parallel: bool = True,
     max_workers: Optional[int] = None,
     extra_overrides: Optional[Dict[str, Any]] = None,
+    symbol: Optional[str] = None,
+    cache_dir: Optional[Union[str, Path]] = None,
 ) -> Dict[str, Dict[str, pd.DataFrame]]:
     """
     Execute multiple methods (OLS, Huber, Hough, etc.) entirely in memory.
@@ -304,12 +401,18 @@ def run_methods(
         Thread pool workers; defaults to len(methods) if None.
     extra_overrides : Dict[str, Any] | None
         Additional attributes forced onto the argparse Namespace for your main stream.
+    symbol : str | None
+        Cache key of the data; defaults to the frame's single 'Symbol' value.
+    cache_dir : str|Path|None
+        Result cache directory (see trendline_cache.py); None disables caching.
+        Ignored for runs that write CSVs or plots.
 
     Returns
     -------
     dict[method] -> {"events": DataFrame, "points": DataFrame, "snapshot": DataFrame (optional)}
     """
-    tlc_main = _load_module_from_path(main_stream_path)
+    with _stream_module(main_stream_path):  # load (or fail) once, before fanning out
+        pass
     cfg = _coerce_config(config)
     df_use = _ensure_df(df)
 
@@ -328,6 +431,8 @@ def run_methods(
                 min_confidence=min_confidence,
                 max_angle_deg=max_angle_deg,
                 extra_overrides=extra_overrides,
+                symbol=symbol,
+                cache_dir=cache_dir,
             )
             return method, res
         except Exception as e:
@@ -350,13 +455,93 @@ def run_methods(
     return results
 
 
+# -------------------------
+# Symbol batches
+# -------------------------
+
+# Per-process state of run_symbols workers (set by _init_symbol_worker)
+_worker_state: Dict[str, Any] = {}
+
+
+def _share_frames(symbol_dfs: Dict[str, pd.DataFrame]) -> Tuple[shared_memory.SharedMemory, Dict[str, Dict[str, Any]]]:
+    """
+    Copy the frames' NumPy columns (numbers, datetimes) into one shared memory block.
+
+    Returns
+    -------
+    (SharedMemory block owned by the caller, {symbol: spec for _attach_frame})
+    Other columns (strings, tz-aware dates) travel inside the spec.
+    """
+    specs, blocks, offset = {}, [], 0
+    for sym, df in symbol_dfs.items():
+        columns = []
+        for name in df.columns:
+            col = df[name]
+            if isinstance(col.dtype, np.dtype) and col.dtype.kind in "biufmM":
+                values = np.ascontiguousarray(col.to_numpy())
+                offset = -(-offset // 8) * 8  # 8-byte aligned
+                columns.append((name, "shared", (values.dtype.str, offset)))
+                blocks.append((offset, values))
+                offset += values.nbytes
+            else:
+                columns.append((name, "inline", col.reset_index(drop=True)))
+        specs[sym] = {"rows": len(df), "columns": columns}
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for start, values in blocks:
+        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf, offset=start)[:] = values
+    for spec in specs.values():
+        spec["name"] = shm.name
+    return shm, specs
+
+
+def _attach_frame(shm: shared_memory.SharedMemory, spec: Dict[str, Any]) -> pd.DataFrame:
+    """Rebuild one symbol's DataFrame over the shared block created by _share_frames"""
+    data = {}
+    for name, where, value in spec["columns"]:
+        if where == "shared":
+            dtype, start = value
+            data[name] = np.ndarray(spec["rows"], dtype=np.dtype(dtype), buffer=shm.buf, offset=start)
+        else:
+            data[name] = value
+    return pd.DataFrame(data, copy=False)
+
+
+def _init_symbol_worker(shm_name: str, main_stream_path: str):
+    """Process pool initializer: map the shared block and load the stream module once"""
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state["block"] = shm  # Keep the mapping alive for the process lifetime
+    with _stream_module(main_stream_path):
+        pass
+
+
+def _pack_frame(df: pd.DataFrame) -> Dict[str, Any]:
+    """Result frame as plain columns (names, dtypes, NumPy arrays) for the trip back"""
+    index = df.index
+    if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+        index = None
+    return {"columns": df.columns, "dtypes": list(df.dtypes),
+            "values": [df.iloc[:, i].to_numpy() for i in range(df.shape[1])], "index": index}
+
+
+def _unpack_frame(packed: Dict[str, Any]) -> pd.DataFrame:
+    """Inverse of _pack_frame"""
+    out = pd.DataFrame({i: pd.Series(v, dtype=dt, copy=False)
+                        for i, (v, dt) in enumerate(zip(packed["values"], packed["dtypes"]))})
+    out.columns = packed["columns"]
+    if packed["index"] is not None:
+        out.index = packed["index"]
+    return out
+
 
 def _worker_run_symbol(payload):
     """
-    Top-level (pickleable) worker for ProcessPool.
+    Top-level (pickleable) worker for ProcessPool / ThreadPool.
     payload = {
         'symbol': str,
-        'df_json': str (DataFrame.to_json orient='records'),
+        'df': DataFrame (threads) | 'spec': dict from _share_frames (processes),
         'config': dict|path,
         'methods': list[str],
         'main_stream_path': str|Path,
@@ -368,12 +553,14 @@ def _worker_run_symbol(payload):
         'per_symbol_method_parallel': bool,
         'max_workers_methods': int|None,
         'extra_overrides': dict|None,
+        'cache_dir': str|Path|None,
     }
+    Results come back packed (_pack_frame) when the frame was shared.
     """
-    import pandas as pd
     from pathlib import Path
     symbol = payload["symbol"]
-    df = pd.read_json(payload["df_json"], orient="records")
+    shared = "spec" in payload
+    df = _attach_frame(_worker_state["block"], payload["spec"]) if shared else payload["df"]
     t0 = perf_counter()
     res = run_methods(  # uses the in-memory runner you already have
         df=df,
@@ -388,8 +575,12 @@ def _worker_run_symbol(payload):
         parallel=bool(payload["per_symbol_method_parallel"]),
         max_workers=payload["max_workers_methods"],
         extra_overrides=payload.get("extra_overrides"),
+        symbol=symbol,
+        cache_dir=payload.get("cache_dir"),
     )
     elapsed = perf_counter() - t0
+    if shared:
+        res = {m: {k: _pack_frame(v) for k, v in frames.items()} for m, frames in res.items()}
     return symbol, res, elapsed
 
 
@@ -409,52 +600,73 @@ def run_symbols(
     min_confidence: float | None = None,
     max_angle_deg: float | None = None,
     extra_overrides: dict | None = None,
+    cache_dir: str | None = None,
 ):
     """
     Parallel orchestrator across symbols.
 
+    With processes, every symbol's numeric/date columns are copied once into a shared
+    memory block that workers map at start-up (no per-symbol serialization), and each
+    worker keeps the stream module loaded for all the symbols it runs. With cache_dir,
+    each (symbol, method) reuses its cached results / engine state (see run_methods),
+    so an end-of-day rescan only pushes the new bars.
+
     Recommendations:
       - Set `use_processes=True` for CPU-bound work (NumPy releases GIL often, but this is safest).
       - Keep `per_symbol_method_parallel=False` to avoid N_symbols × N_methods thread explosion.
       - Keep `write_csv=False` to prevent file collisions; plots also off for big batches.
     """
-    import pandas as pd
-    from math import ceil
     workers = workers or max(1, os.cpu_count() or 1)
-    Executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    cfg = _coerce_config(config)
 
-    # Serialize DataFrames so payload is pickle-safe & small(ish)
-    jobs = []
+    frames = {}
     for sym, df in symbol_dfs.items():
-        df_use = df.copy()
+        df_use = _ensure_df(df)  # parse dates here so they are shared as datetime64
         if "Symbol" not in df_use.columns:
             df_use["Symbol"] = sym
-        jobs.append({
-            "symbol": sym,
-            "df_json": df_use.to_json(orient="records"),
-            "config": config,
-            "methods": list(methods),
-            "main_stream_path": str(main_stream_path),
-            "write_csv": bool(write_csv),
-            "write_plots": bool(write_plots),
-            "outdir": outdir,
-            "min_confidence": min_confidence,
-            "max_angle_deg": max_angle_deg,
-            "per_symbol_method_parallel": bool(per_symbol_method_parallel),
-            "max_workers_methods": max_workers_methods,
-            "extra_overrides": extra_overrides or {},
-        })
+        frames[sym] = df_use
+
+    common = {
+        "config": cfg,
+        "methods": list(methods),
+        "main_stream_path": str(main_stream_path),
+        "write_csv": bool(write_csv),
+        "write_plots": bool(write_plots),
+        "outdir": outdir,
+        "min_confidence": min_confidence,
+        "max_angle_deg": max_angle_deg,
+        "per_symbol_method_parallel": bool(per_symbol_method_parallel),
+        "max_workers_methods": max_workers_methods,
+        "extra_overrides": extra_overrides or {},
+        "cache_dir": cache_dir,
+    }
 
     results_by_symbol = {}
     timings = {}
     t_all = perf_counter()
 
-    with Executor(max_workers=workers) as ex:
-        futs = [ex.submit(_worker_run_symbol, payload=j) for j in jobs]
-        for fut in futs:
-            sym, res, sec = fut.result()
-            results_by_symbol[sym] = res
-            timings[sym] = sec
+    shm = None
+    try:
+        if use_processes:
+            shm, specs = _share_frames(frames)
+            jobs = [dict(common, symbol=sym, spec=specs[sym]) for sym in frames]
+            ex = ProcessPoolExecutor(max_workers=workers, initializer=_init_symbol_worker,
+                                     initargs=(shm.name, str(main_stream_path)))
+        else:
+            jobs = [dict(common, symbol=sym, df=frames[sym]) for sym in frames]
+            ex = ThreadPoolExecutor(max_workers=workers)
+        with ex:
+            futs = [ex.submit(_worker_run_symbol, payload=j) for j in jobs]
+            for fut in futs:
+                sym, res, sec = fut.result()
+                if use_processes:
+                    res = {m: {k: _unpack_frame(v) for k, v in packed.items()} for m, packed in res.items()}
+                results_by_symbol[sym] = res
+                timings[sym] = sec
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
 
     timings["__total__"] = perf_counter() - t_all
     return results_by_symbol, timings
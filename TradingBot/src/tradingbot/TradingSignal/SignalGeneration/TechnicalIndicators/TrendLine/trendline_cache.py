@@ -0,0 +1,218 @@
+"""
+trendline_cache.py — persistent results of trendline runs
+----------------------------------------------------------
+Keeps the events/points/snapshot frames of each (symbol, method, run config) on disk,
+next to the StreamEngine state they came from, so `trendline_api` can skip work:
+
+- same bars as last time      -> the stored frames are returned as they are
+- bars appended since          -> the stored engine is restored and only the new bars
+                                  are pushed (same frames as a full run)
+- anything else (edited history, shorter data, new code/config) -> full run, stored again
+
+Layout
+------
+<cache_dir>/<symbol>/<method>-<run key>/
+    state.pkl                      fingerprint of the bars + pickled StreamEngine
+    events-<digest>.parquet        (points-, snapshot-) frames of that data
+
+The run key hashes the merged method config, the run overrides and the stream code
+(see run_key), so a changed config or edited `main_trendline_stream.py` starts a fresh
+entry. Frames are Parquet when pandas can write them (pyarrow/fastparquet installed,
+columns Parquet can store), pickle otherwise.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+__all__ = [
+    "CACHE_VERSION",
+    "CACHE_DIR",
+    "run_key",
+    "bar_fingerprint",
+    "entry_dir",
+    "read_entry",
+    "write_entry",
+]
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored layout or the engine's state changes shape
+CACHE_VERSION = 1
+CACHE_DIR = os.getenv("TRENDLINE_CACHE_DIR", os.path.expanduser("~/.cache/tradingbot/trendline"))
+
+FRAMES = ("events", "points", "snapshot")
+
+
+# -------------------------
+# Keys
+# -------------------------
+
+def _digest(*chunks: bytes) -> str:
+    h = hashlib.sha1()
+    for chunk in chunks:
+        h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def run_key(merged_cfg: Dict[str, Any], overrides: Dict[str, Any], main_stream_path: Union[str, Path]) -> str:
+    """
+    Hash of everything besides the bars that shapes a method's results: the merged
+    config (per-method blocks already applied), run overrides and the stream code
+    (`main_trendline_stream.py` and the `trendline_kernels.py` next to it).
+    """
+    cfg = {k: v for k, v in merged_cfg.items() if k not in ("methods", "method_overrides")}
+    blob = json.dumps({"version": CACHE_VERSION, "config": cfg, "overrides": overrides},
+                      sort_keys=True, default=str).encode("utf-8")
+    code = []
+    stream_path = Path(main_stream_path)
+    for path in (stream_path, stream_path.with_name("trendline_kernels.py")):
+        if path.exists():
+            code.append(path.read_bytes())
+    return _digest(blob, *code)
+
+
+def _bar_columns(df: pd.DataFrame) -> list:
+    """date/open/high/low/close as stream() reads them (column names case-insensitive)"""
+    cols = {str(c).lower(): c for c in df.columns}
+    if "date" in cols:
+        dates = pd.to_datetime(df[cols["date"]], errors="coerce").to_numpy("datetime64[ns]").view("i8")
+    else:
+        dates = np.arange(len(df), dtype="i8")
+    return [np.ascontiguousarray(dates)] + [df[cols[k]].to_numpy(float) for k in ("open", "high", "low", "close")]
+
+
+def bar_fingerprint(df: pd.DataFrame, rows: Optional[int] = None) -> Dict[str, Any]:
+    """{"rows", "digest"} of the first `rows` bars (all by default)"""
+    rows = len(df) if rows is None else rows
+    return {"rows": int(rows), "digest": _digest(*(col[:rows].tobytes() for col in _bar_columns(df)))}
+
+
+# -------------------------
+# Engine pickling
+# -------------------------
+# The stream module is loaded from its file path under one name for every copy, so its
+# classes can't be pickled by reference; they are stored by name and resolved against
+# the copy doing the reading.
+
+class _EnginePickler(pickle.Pickler):
+    def __init__(self, file, module):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._module = module
+
+    def persistent_id(self, obj):
+        if isinstance(obj, type) and obj.__module__ == self._module.__name__:
+            return obj.__qualname__
+        return None
+
+
+class _EngineUnpickler(pickle.Unpickler):
+    def __init__(self, file, module):
+        super().__init__(file)
+        self._module = module
+
+    def persistent_load(self, pid):
+        return getattr(self._module, pid)
+
+
+# -------------------------
+# Entries
+# -------------------------
+
+def entry_dir(cache_dir: Union[str, Path], symbol: str, method: str, key: str) -> Path:
+    """Directory of one (symbol, method, run key) entry"""
+    safe_symbol = "".join(ch if ch.isalnum() or ch in "-_.^&" else "_" for ch in str(symbol))
+    return Path(cache_dir) / safe_symbol / f"{method}-{key}"
+
+
+def _frame_path(entry: Path, name: str, digest: str, parquet: bool) -> Path:
+    return entry / f"{name}-{digest}.{'parquet' if parquet else 'pkl'}"
+
+
+def read_entry(entry: Path, df: pd.DataFrame, module) -> Tuple[Optional[Dict[str, pd.DataFrame]], Any]:
+    """
+    Look up the stored run for `df`.
+
+    Returns
+    -------
+    (frames, None)   same bars as stored: the stored frames
+    (None, engine)   bars appended to the stored ones: engine restored after the stored bars
+    (None, None)     nothing usable
+    """
+    try:
+        with open(entry / "state.pkl", "rb") as f:
+            state = _EngineUnpickler(f, module).load()
+    except FileNotFoundError:
+        return None, None
+    except Exception as e:
+        logger.warning(f"⚠️  Ignoring unreadable trendline cache {entry}: {e}")
+        return None, None
+
+    stored = state["fingerprint"]
+    if stored["rows"] > len(df) or bar_fingerprint(df, stored["rows"]) != stored:
+        return None, None
+    if stored["rows"] < len(df):
+        return None, state["engine"]
+
+    frames = {}
+    try:
+        for name, parquet in state["frames"].items():
+            path = _frame_path(entry, name, stored["digest"], parquet)
+            frames[name] = pd.read_parquet(path) if parquet else pd.read_pickle(path)
+    except Exception as e:
+        logger.warning(f"⚠️  Ignoring unreadable trendline cache frames in {entry}: {e}")
+        return None, state["engine"]  # resuming with no new bars rebuilds them
+    return frames, None
+
+
+def write_entry(entry: Path, df: pd.DataFrame, frames: Dict[str, pd.DataFrame], engine, module):
+    """Store the frames of a run over `df` and the engine state after its last bar"""
+    fingerprint = bar_fingerprint(df)
+    try:
+        entry.mkdir(parents=True, exist_ok=True)
+        written = {}
+        for name in FRAMES:
+            if name not in frames:
+                continue
+            written[name] = _write_frame(entry, name, fingerprint["digest"], frames[name])
+
+        tmp = entry / f"state.pkl.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            _EnginePickler(f, module).dump({"fingerprint": fingerprint, "frames": written, "engine": engine})
+        os.replace(tmp, entry / "state.pkl")
+
+        current = {_frame_path(entry, name, fingerprint["digest"], parquet).name for name, parquet in written.items()}
+        for path in entry.iterdir():
+            if path.name.split("-")[0] in FRAMES and path.name not in current:
+                path.unlink()
+    except Exception as e:
+        logger.warning(f"⚠️  Could not cache trendline results at {entry}: {e}")
+
+
+def _write_frame(entry: Path, name: str, digest: str, frame: pd.DataFrame) -> bool:
+    """Write one frame (Parquet if possible); returns whether it went to Parquet"""
+    if len(frame.columns):  # a column-less frame doesn't round-trip
+        path = _frame_path(entry, name, digest, True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            frame.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+            return True
+        except Exception:
+            # no Parquet engine installed, or mixed-type object columns: pickle instead
+            tmp.unlink(missing_ok=True)
+    path = _frame_path(entry, name, digest, False)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    frame.to_pickle(tmp)
+    os.replace(tmp, path)
+    return False
@@ -0,0 +1,178 @@
+"""
+trendline_kernels.py — array kernels of the trendline methods
+--------------------------------------------------------------
+Loop-free building blocks shared by `main_trendline_stream.py` (and `methods/`):
+
+- true_range / wilder_atr : Wilder ATR, the recurrence run as a first-order IIR filter
+                            (scipy.signal.lfilter; plain loop when SciPy is missing)
+- pivot_points            : swing highs/lows from sliding-window max/min
+- hough_accumulator       : Hough votes of pivot points in one bincount
+- hough_peaks             : greedy peak picking with box suppression, ranked once
+- hough_lines             : the hough method's line search on top of the above
+
+Every kernel returns what the per-element loops it replaces returned; wilder_atr
+agrees to rounding (the filter evaluates a*tr + (1-a)*atr instead of
+atr + a*(tr - atr)). `benchmark_trendline_kernels.py` times them against those loops.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy.signal import lfilter
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+
+__all__ = [
+    "SCIPY_AVAILABLE",
+    "true_range",
+    "wilder_atr",
+    "pivot_points",
+    "hough_accumulator",
+    "hough_peaks",
+    "hough_lines",
+]
+
+
+# -------------------------
+# ATR
+# -------------------------
+
+def true_range(high, low, close):
+    """True range per bar; the first bar has no previous close and uses high - low."""
+    h, l, c = map(np.asarray, (high, low, close))
+    prev_c = np.roll(c, 1)
+    tr = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
+    if len(tr):
+        tr[0] = h[0] - l[0]  # initialize first bar
+    return tr
+
+
+def wilder_atr(high, low, close, length=14):
+    """
+    Wilder's ATR.
+
+    The first `length` bars get the mean true range of those bars; after that
+    atr[i] = atr[i-1] + (tr[i] - atr[i-1]) / length, i.e. an IIR filter with
+    b = [1/length], a = [1, 1/length - 1] started from atr[length-1].
+    """
+    tr = true_range(high, low, close)
+    atr = np.zeros_like(tr, dtype=float)
+    if len(tr) == 0:
+        return atr
+    atr[:length] = tr[:length].mean()
+    if len(tr) <= length:
+        return atr
+    alpha = 1.0 / length
+    if SCIPY_AVAILABLE:
+        atr[length:] = lfilter([alpha], [1.0, alpha - 1.0], tr[length:].astype(float),
+                               zi=[(1.0 - alpha) * atr[length-1]])[0]
+    else:
+        for i in range(length, len(tr)):
+            atr[i] = atr[i-1] + alpha * (tr[i] - atr[i-1])
+    return atr
+
+
+# -------------------------
+# Pivots
+# -------------------------
+
+def pivot_points(series, span=10, kind="max"):
+    """
+    Indices i (span <= i < n - span) where series[i] is the max ("max") / min of
+    series[i-span : i+span+1]. Windows containing NaN yield no pivot.
+    """
+    y = np.asarray(series, float); n = len(y)
+    if n - span <= span:
+        return np.asarray([], int)
+    windows = sliding_window_view(y, 2*span + 1)
+    extreme = windows.max(axis=1) if kind == "max" else windows.min(axis=1)
+    return np.flatnonzero(y[span:n-span] == extreme).astype(int) + span
+
+
+# -------------------------
+# Hough transform
+# -------------------------
+
+def hough_accumulator(bj, intercept_bins):
+    """
+    Vote counts (slope_bins x intercept_bins, int32) for intercept bin indices `bj`
+    of shape (pivots, slope_bins): each pivot votes once per slope row.
+    """
+    bj = np.asarray(bj, int)
+    slope_bins = bj.shape[1]
+    cells = bj + (np.arange(slope_bins) * intercept_bins)[None, :]
+    votes = np.bincount(cells.ravel(), minlength=slope_bins * intercept_bins)
+    return votes.reshape(slope_bins, intercept_bins).astype(np.int32)
+
+
+def hough_peaks(acc, max_peaks, row_radius=3, col_radius=6):
+    """
+    Greedy peaks of an accumulator: take the cell with the most votes (first in
+    row-major order on ties), clear the (2*row_radius+1) x (2*col_radius+1) box
+    around it, repeat until max_peaks peaks or no cell has more than one vote.
+
+    Equivalently: walk the cells in that ranking and keep each one outside the
+    boxes of the peaks kept so far. At most max_peaks * (box + 1) cells are walked,
+    so only the cells voted at least as high as that many are ranked.
+
+    Returns
+    -------
+    list of (slope_idx, intercept_idx, votes)
+    """
+    flat = np.asarray(acc).ravel()
+    cand = np.flatnonzero(flat > 1)
+    if cand.size == 0 or max_peaks <= 0:
+        return []
+    reach = max_peaks * ((2*row_radius + 1) * (2*col_radius + 1) + 1)
+    if cand.size > reach:
+        cutoff = np.partition(flat[cand], cand.size - reach)[cand.size - reach]
+        cand = cand[flat[cand] >= cutoff]
+    ranked = cand[np.lexsort((cand, -flat[cand]))]
+    ncols = acc.shape[1]
+    peaks = []
+    for cell in ranked.tolist():
+        si, jj = divmod(cell, ncols)
+        if any(abs(si - pi) <= row_radius and abs(jj - pj) <= col_radius for pi, pj, _ in peaks):
+            continue
+        peaks.append((si, jj, int(flat[cell])))
+        if len(peaks) == max_peaks:
+            break
+    return peaks
+
+
+def hough_lines(x, y, piv_idxs, slope_bins=101, intercept_bins=201, top_k=1,
+                tol_abs=1.0, min_touches=3):
+    """
+    Lines through the pivots (x[piv_idxs], y[piv_idxs]) by Hough voting.
+
+    Returns
+    -------
+    Up to top_k dicts (m, b, touches, votes), most votes first, each touching at
+    least min_touches pivots within tol_abs.
+    """
+    if len(piv_idxs) < min_touches:
+        return []
+    xs = x[piv_idxs].astype(float); ys = y[piv_idxs].astype(float)
+    xr = float(x[-1]-x[0]) if len(x)>1 else 1.0
+    yr = float(np.nanmax(y) - np.nanmin(y))
+    max_slope = 2.0 * (yr / max(1.0, xr))
+    m_grid = np.linspace(-max_slope, max_slope, slope_bins)
+    b_min = float(np.nanmin(y) - max_slope * x[-1])
+    b_max = float(np.nanmax(y) - (-max_slope) * x[-1])
+    b_grid = np.linspace(b_min, b_max, intercept_bins)
+    b_vals = ys[:,None] - m_grid[None,:] * xs[:,None]
+    bj = np.floor((b_vals - b_min) / (b_max - b_min) * (intercept_bins-1)).astype(int)
+    bj = np.clip(bj, 0, intercept_bins-1)
+    acc = hough_accumulator(bj, intercept_bins)
+    lines = []
+    for (si, jj, votes) in hough_peaks(acc, top_k*6):
+        m = float(m_grid[si]); b = float(b_grid[jj])
+        touches = int(np.sum(np.abs(ys - (m*xs + b)) <= tol_abs))
+        if touches >= min_touches:
+            lines.append(dict(m=m, b=b, touches=touches, votes=votes))
+    return sorted(lines, key=lambda d:(-d["votes"], -d["touches"]))[:top_k]
@@ -0,0 +1,91 @@
+"""
+Randomized equivalence test: hull-based fit_constrained_ols vs the pairwise search it replaced.
+
+Run from the repo root:  PYTHONPATH=src python -m pytest tests/test_fit_constrained_ols.py
+"""
+import numpy as np
+import pytest
+
+from tradingbot.TradingSignal.SignalGeneration.TechnicalIndicators.TrendLine import main_trendline_stream
+from tradingbot.TradingSignal.SignalGeneration.TechnicalIndicators.TrendLine.methods import method_ols
+
+
+def pairwise_fit_constrained_ols(x, y_fit_ref, c_bound, side, eps=1e-9):
+    """The previous O(n³) implementation: every two-point line checked against all bounds."""
+    x = np.asarray(x, float)
+    y = np.asarray(y_fit_ref, float)
+    c = np.asarray(c_bound, float)
+    n = len(x)
+
+    X = np.vstack([x, np.ones_like(x)]).T
+    m0, b0 = np.linalg.lstsq(X, y, rcond=None)[0]
+    line0 = m0 * x + b0
+    feas0 = np.all(line0 >= c - eps) if side == "R" else np.all(line0 <= c + eps)
+    if feas0:
+        return float(m0), float(b0)
+
+    candidates = []
+    if side == "R":
+        b_shift = np.max(c - m0 * x)
+    else:
+        b_shift = np.min(c - m0 * x)
+    candidates.append((float(m0), float(b_shift)))
+
+    for i in range(n - 1):
+        xi, ci = x[i], c[i]
+        for j in range(i + 1, n):
+            xj, cj = x[j], c[j]
+            if xi == xj:
+                continue
+            m = (ci - cj) / (xi - xj)
+            b = ci - m * xi
+            y_line = m * x + b
+            feasible = np.all(y_line >= c - eps) if side == "R" else np.all(y_line <= c + eps)
+            if feasible:
+                candidates.append((float(m), float(b)))
+
+    best, best_sse = None, np.inf
+    for (m, b) in candidates:
+        sse = np.sum((y - (m * x + b))**2)
+        if sse < best_sse:
+            best_sse = sse
+            best = (m, b)
+    return best
+
+
+def random_prices(rng, kind, n):
+    if kind == "float":
+        return rng.normal(500, 10, n)
+    if kind == "ticks":        # 0.05 tick random walk
+        return np.round((1000 + np.cumsum(rng.normal(0, 8, n))) / 0.05) * 0.05
+    if kind == "coarse":       # few price levels: equal highs/lows, collinear touches
+        return np.round(100 + np.cumsum(rng.integers(-2, 3, n)) * 0.5, 2)
+    if kind == "steps":        # exact lines with jumps
+        return 3.0 * np.arange(n) * rng.choice([-1, 0, 1]) + 200 + rng.choice([0.0, 5.0], n)
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize("impl", [main_trendline_stream.fit_constrained_ols, method_ols.fit_constrained_ols],
+                         ids=["main_trendline_stream", "methods.method_ols"])
+@pytest.mark.parametrize("kind", ["float", "ticks", "coarse", "steps"])
+def test_matches_pairwise_search(impl, kind):
+    rng = np.random.default_rng(2024)
+    for _ in range(60):
+        n = int(rng.choice([2, 3, 5, 12, 40, 60]))
+        s = int(rng.integers(0, 3000))
+        x = np.arange(s, s + n)
+        y = random_prices(rng, kind, n)
+        tol_abs = float(rng.choice([0.0, 0.01, 1.0])) * float(np.mean(y))
+        for side in ("R", "S"):
+            c = y + tol_abs if side == "R" else y - tol_abs
+            assert impl(x, y, c, side) == pairwise_fit_constrained_ols(x, y, c, side), (kind, n, side)
+
+
+@pytest.mark.parametrize("side", ["R", "S"])
+def test_result_is_feasible(side):
+    rng = np.random.default_rng(7)
+    x = np.arange(150, 330)
+    y = random_prices(rng, "ticks", len(x))
+    m, b = main_trendline_stream.fit_constrained_ols(x, y, y, side)
+    line = m * x + b
+    assert np.all(line >= y - 1e-9) if side == "R" else np.all(line <= y + 1e-9)
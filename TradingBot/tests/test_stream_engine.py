@@ -0,0 +1,114 @@
+"""
+StreamEngine: bars pushed one at a time give what a batch stream() over them gives
+(with the batch ATR seed when atr_len > base_window), and engines with different
+configs don't share state.
+
+Run from the repo root:  PYTHONPATH=src python -m pytest tests/test_stream_engine.py
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingbot.TradingSignal.SignalGeneration.TechnicalIndicators.TrendLine import trendline_api
+
+TL = Path(trendline_api.__file__).parent
+MAIN = TL / "main_trendline_stream.py"
+CONFIG = json.loads((TL.parents[2] / "config" / "tlc_config_methods.json").read_text())
+CHECKPOINTS = [40, 90, 150, 266]
+
+
+@pytest.fixture(scope="module")
+def tlc():
+    return trendline_api._load_module_from_path(MAIN)
+
+
+@pytest.fixture(scope="module")
+def bars():
+    df = pd.read_csv(TL / "HAVELLS.csv", index_col=0)
+    df.columns = [c.lower() for c in df.columns]
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def make_args(tlc, method, **overrides):
+    options = trendline_api.RunOptions(main_stream_path=MAIN, config=CONFIG, extra_overrides=overrides)
+    return trendline_api._prepare_args_for_method(tlc, CONFIG, method, options)
+
+
+def push(engine, bars, start, stop):
+    for t in range(start, stop):
+        row = bars.iloc[t]
+        engine.push(row["date"].to_datetime64(), row["open"], row["high"], row["low"], row["close"])
+
+
+def assert_same(got, expected):
+    assert set(got) == set(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(got[name], expected[name], check_dtype=False)
+
+
+def batch(tlc, args, bars, k):
+    res = tlc.stream(args, df_in=bars.iloc[:k])
+    return {name: res[name] for name in ("events", "points", "snapshot")}
+
+
+@pytest.mark.parametrize("method", ["ols", "hough", "ols_envelop"])
+def test_results_after_k_pushes_match_stream_of_k_bars(tlc, bars, method):
+    args = make_args(tlc, method)
+    engine = tlc.StreamEngine(args)
+
+    pushed = 0
+    for k in CHECKPOINTS:
+        push(engine, bars, pushed, k)
+        pushed = k
+        assert_same(engine.results(), batch(tlc, args, bars, k))
+
+
+@pytest.mark.parametrize("method, atr_len", [("ols_envelop", 100), ("ols_shift_min", 200)])
+def test_batch_atr_is_seeded_from_the_whole_frame(tlc, bars, method, atr_len):
+    # atr_len > base_window: the first atr_len bars get the mean true range of all of them
+    args = make_args(tlc, method, atr_len=atr_len, return_engine=True)
+    assert args.atr_len > args.base_window
+
+    engine = tlc.stream(args, df_in=bars)["engine"]
+
+    expected = tlc.compute_atr(bars["high"], bars["low"], bars["close"], args.atr_len)
+    np.testing.assert_allclose(engine.col("atr"), expected)
+
+    seeded = tlc.StreamEngine(args, atr_seed=tlc.atr_seed(bars["high"], bars["low"], bars["close"], args.atr_len))
+    push(seeded, bars, 0, len(bars))
+    assert_same(seeded.results(), batch(tlc, args, bars, len(bars)))
+
+
+def test_interleaved_engines_with_different_configs_stay_independent(tlc, bars):
+    loose = make_args(tlc, "ols", angle_between_min_deg=0.0, parallel_gap_max_atr=None, max_violations=4)
+    strict = make_args(tlc, "ols", angle_between_min_deg=45.0, parallel_gap_max_atr=0.1, max_violations=3)
+    engines = [tlc.StreamEngine(loose), tlc.StreamEngine(strict)]
+
+    for t in range(len(bars)):
+        for engine in engines:
+            push(engine, bars, t, t + 1)
+
+    assert_same(engines[0].results(), batch(tlc, loose, bars, len(bars)))
+    assert_same(engines[1].results(), batch(tlc, strict, bars, len(bars)))
+    assert not engines[0].results()["events"].equals(engines[1].results()["events"])
+
+
+def test_parallel_veto_uses_the_thresholds_it_is_given(tlc):
+    x_idx = np.arange(10)
+    y = np.full(10, 100.0)
+    close = np.full(10, 99.0)
+    ATR = np.ones(10)
+    active = tlc.LineState(side="R", m=0.05, b=100.0, start_idx=0, created_at=9)
+
+    def accept(active=active, **veto):
+        return tlc._accept_seed("R", x_idx, y, 0.0, 100.0, close, 0.5, 2, 1, 0, ATR, active=active, **veto)
+
+    assert accept(angle_between_min_deg=20.0, parallel_gap_max_atr=None) is None
+    assert accept(angle_between_min_deg=1.0, parallel_gap_max_atr=None) is not None
+    assert accept(angle_between_min_deg=20.0, parallel_gap_max_atr=0.1) is not None  # lines 0.45 apart
+    assert accept(angle_between_min_deg=20.0, parallel_gap_max_atr=None, active=None) is not None
+    assert tlc.ANGLE_BETWEEN_MIN_DEG == 20.0 and tlc._ACTIVE_R is None  # module globals untouched
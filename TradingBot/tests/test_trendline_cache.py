@@ -0,0 +1,66 @@
+"""
+Trendline result cache: cached and resumed runs return what a fresh run returns.
+
+Run from the repo root:  PYTHONPATH=src python -m pytest tests/test_trendline_cache.py
+"""
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from tradingbot.TradingSignal.SignalGeneration.TechnicalIndicators.TrendLine import trendline_api
+
+TL = Path(trendline_api.__file__).parent
+MAIN = TL / "main_trendline_stream.py"
+CONFIG = json.loads((TL.parents[2] / "config" / "tlc_config_methods.json").read_text())
+
+
+@pytest.fixture(scope="module")
+def prices():
+    return pd.read_csv(TL / "HAVELLS.csv", index_col=0)
+
+
+def run(df, method, **kwargs):
+    return trendline_api.run_methods(df, CONFIG, [method], MAIN, parallel=False, **kwargs)[method]
+
+
+def assert_same(got, expected):
+    assert set(got) == set(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(got[name], expected[name], check_dtype=False)
+
+
+@pytest.mark.parametrize("method", ["ols", "hough"])
+def test_appended_bars_and_reruns_match_fresh_run(prices, method, tmp_path):
+    expected = run(prices, method)
+    run(prices.iloc[:-10], method, symbol="HAVELLS", cache_dir=tmp_path)
+    assert_same(run(prices, method, symbol="HAVELLS", cache_dir=tmp_path), expected)  # tail resumed
+    assert_same(run(prices, method, symbol="HAVELLS", cache_dir=tmp_path), expected)  # stored frames
+
+
+def test_edited_history_is_recomputed(prices, tmp_path):
+    run(prices, "ols", symbol="HAVELLS", cache_dir=tmp_path)
+    edited = prices.copy()
+    edited.loc[edited.index[5], "High"] += 50
+    assert_same(run(edited, "ols", symbol="HAVELLS", cache_dir=tmp_path), run(edited, "ols"))
+
+
+def test_config_change_uses_a_new_entry(prices, tmp_path):
+    run(prices, "ols", symbol="HAVELLS", cache_dir=tmp_path)
+    overrides = {"min_touches": 3}
+    assert_same(run(prices, "ols", symbol="HAVELLS", cache_dir=tmp_path, extra_overrides=overrides),
+                run(prices, "ols", extra_overrides=overrides))
+    assert len(list((tmp_path / "HAVELLS").iterdir())) == 2
+
+
+def test_resume_past_a_partial_atr_seed_matches_fresh_run(prices, tmp_path):
+    overrides = {"atr_len": 100}  # > base_window
+    expected = run(prices, "ols_envelop", extra_overrides=overrides)
+
+    # The first run's ATR seed only saw 90 bars: its engine can't be resumed
+    run(prices.iloc[:90], "ols_envelop", symbol="HAVELLS", cache_dir=tmp_path, extra_overrides=overrides)
+    assert_same(run(prices, "ols_envelop", symbol="HAVELLS", cache_dir=tmp_path, extra_overrides=overrides), expected)
+
+    run(prices.iloc[:-10], "ols_envelop", symbol="HAVELLS", cache_dir=tmp_path, extra_overrides=overrides)
+    assert_same(run(prices, "ols_envelop", symbol="HAVELLS", cache_dir=tmp_path, extra_overrides=overrides), expected)
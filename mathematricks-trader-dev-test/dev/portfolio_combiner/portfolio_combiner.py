@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import os
 import glob
@@ -7,6 +8,11 @@ import matplotlib.dates as mdates
 import matplotlib.ticker as ticker
 import quantstats as qs
 
+# Shared strategy CSV loader (services/strategy_csv)
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'services'))
+from strategy_csv import load_strategy_csvs, strategy_name_from_path
+
 # Custom formatter for millions
 def millions_formatter(x, pos):
     """Format y-axis labels in millions (e.g., 100M instead of 1e8)"""
@@ -26,6 +32,56 @@ def validate_weights(allocation_config, accounts):
         leverage = total_weight / 100.0
         print(f"  ✓ {account_name}: {len(strategies)} strategies, total allocation = {total_weight:.1f}% ({leverage:.2f}x leverage)")
 
+def infer_dev_starting_equity(pnl, returns):
+    """
+    Infer the developer's starting equity from the first day with a non-zero return.
+
+    Args:
+        pnl: Daily P&L ($) array
+        returns: Daily returns array (fractions, e.g. 0.008463)
+
+    Returns:
+        abs(P&L / return) on that day, or None if every return is (near) zero
+    """
+    nonzero = np.flatnonzero(np.abs(returns) > 0.0001)  # Avoid division by zero
+    if len(nonzero) == 0:
+        return None
+    first = nonzero[0]
+    return abs(pnl[first] / returns[first])
+
+def compound_equity(starting_equity, returns):
+    """
+    Compound daily returns into equity at the END of each day.
+
+    Args:
+        starting_equity: Scalar, or a (strategies, 1) column of starting equities
+        returns: Daily returns, shape (days,) or (strategies, days)
+
+    Returns:
+        Array shaped like returns; a running product, so each value is rounded exactly
+        like equity = equity * (1 + ret) applied day by day
+    """
+    growth = 1 + np.asarray(returns, dtype=float)
+    start = np.broadcast_to(np.asarray(starting_equity, dtype=float), growth.shape[:-1] + (1,))
+    return np.multiply.accumulate(np.concatenate([start, growth], axis=-1), axis=-1)[..., 1:]
+
+def equity_scaling_ratios(our_equity, dev_equity):
+    """Our equity / developer's equity per strategy and day (0 where the developer's equity is not positive)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(dev_equity > 0, our_equity / dev_equity, 0.0)
+
+def _strategy_matrix(master_df, strategy_names, suffix, num_days):
+    """Stack master_df columns '<strategy><suffix>' into a (strategies, days) array"""
+    return np.array([master_df[f"{name}{suffix}"].to_numpy(dtype=float)
+                     for name in strategy_names]).reshape(len(strategy_names), num_days)
+
+def _sum_rows(matrix, num_days):
+    """Sum a (strategies, days) array over strategies, adding rows in order like the per-day loop"""
+    total = np.zeros(num_days)
+    for row in matrix:
+        total += row
+    return total
+
 def compile_portfolio(data_folder, allocation_config, starting_capital=1_000_000,
                      accounts=None, strategy_metadata=None, output_folder='output'):
     """
@@ -61,30 +117,31 @@ def compile_portfolio(data_folder, allocation_config, starting_capital=1_000_000
 
     print(f"Found {len(csv_files)} strategy files to process...")
 
+    # Parse all files in one parallel pass (typed parsing, Parquet cache - see services/strategy_csv)
+    # Expected columns: Date, Daily P&L ($), Daily Returns (%), Daily Return on Notional (%), Maximum Daily Notional Value, Maximum Daily Margin Utilization ($)
+    frames, failures = load_strategy_csvs(
+        csv_files, required=('date', 'pnl', 'return', 'notional_value', 'margin_used')
+    )
+
     for filepath in csv_files:
-        # Extract strategy name from filename (e.g., 'SPX_Condors.csv' -> 'SPX_Condors')
-        strategy_name = os.path.basename(filepath).replace('.csv', '')
-        
-        # Read the CSV file
-        try:
-            df = pd.read_csv(filepath)
-            # Standardize column names for easier processing
-            # Expected columns: Date, Daily P&L ($), Daily Returns (%), Daily Return on Notional (%), Maximum Daily Notional Value, Maximum Daily Margin Utilization ($)
-            df.columns = ['Date', 'PnL_$', 'Return_%', 'Return_on_Notional_%', 'Notional_Value', 'Margin_Used']
-
-            df['Date'] = pd.to_datetime(df['Date'])
-
-            # Convert Return_% from string (e.g., '0.8463%') to float (e.g., 0.008463)
-            df['Return_%'] = df['Return_%'].str.rstrip('%').astype('float') / 100
-
-            df.set_index('Date', inplace=True)
-
-            # Rename columns to be unique for this strategy (keep PnL_$ for direct P&L calculation)
-            df = df[['PnL_$', 'Return_%', 'Notional_Value', 'Margin_Used']].add_prefix(f"{strategy_name}_")
-            all_strategy_dfs.append(df)
-            print(f"  - Processed '{strategy_name}'")
-        except Exception as e:
-            print(f"  - FAILED to process '{filepath}'. Error: {e}")
+        # Strategy name from filename (e.g., 'SPX_Condors.csv' -> 'SPX_Condors')
+        strategy_name = strategy_name_from_path(filepath)
+        if strategy_name in failures:
+            print(f"  - FAILED to process '{filepath}'. Error: {failures[strategy_name]}")
+            continue
+
+        frame = frames[strategy_name]
+        # Returns are already fractions (e.g., '0.8463%' -> 0.008463)
+        df = pd.DataFrame({
+            'PnL_$': frame['pnl'].to_numpy(),
+            'Return_%': frame['return'].to_numpy(),
+            'Notional_Value': frame['notional_value'].to_numpy(),
+            'Margin_Used': frame['margin_used'].to_numpy()
+        }, index=pd.DatetimeIndex(frame['date'], name='Date'))
+
+        # Rename columns to be unique for this strategy (keep PnL_$ for direct P&L calculation)
+        all_strategy_dfs.append(df.add_prefix(f"{strategy_name}_"))
+        print(f"  - Processed '{strategy_name}'")
 
     # --- 2. Align All Strategies to a Master Timeline ---
     master_df = pd.concat(all_strategy_dfs, axis=1)
@@ -94,12 +151,15 @@ def compile_portfolio(data_folder, allocation_config, starting_capital=1_000_000
     print("\nStep 1: All strategies aligned onto a master timeline.")
 
     # --- 3. PRE-CALCULATE DEVELOPER'S EQUITY CURVES ---
+    # All curves are computed on a strategies x days matrix (rows in allocation order).
+    # Running products and row-by-row sums keep the same operation order as a per-day
+    # loop, so the results are bit-for-bit what the sequential calculation gives.
     print("\nStep 2a: Building developer's equity curves from returns...")
 
-    import numpy as np
-
     dev_equity_curves = {}  # Store developer's equity curve for each strategy
     account_strategy_map = {}  # Map account to list of strategies
+    strategy_names = []  # Strategies with data, in allocation order
+    new_columns = {}  # Columns added to master_df (single concat at the end)
 
     for strategy_name, config in allocation_config.items():
         account = config['account']
@@ -112,40 +172,26 @@ def compile_portfolio(data_folder, allocation_config, starting_capital=1_000_000
             print(f"  - WARNING: Missing data for '{strategy_name}', skipping...")
             continue
 
-        # Infer developer's starting equity from first day's P&L and return
-        first_pnl = master_df[pnl_col].iloc[0]
-        first_return = master_df[return_col].iloc[0]
-
-        if abs(first_return) > 0.0001:  # Avoid division by zero
-            dev_starting_equity = abs(first_pnl / first_return)
-        else:
-            # If first return is zero, try to find first non-zero return
-            non_zero_mask = master_df[return_col].abs() > 0.0001
-            if non_zero_mask.any():
-                first_nonzero_idx = non_zero_mask.idxmax()
-                dev_starting_equity = abs(master_df[pnl_col].loc[first_nonzero_idx] /
-                                         master_df[return_col].loc[first_nonzero_idx])
-            else:
-                # Fallback: assume $1M
-                dev_starting_equity = 1_000_000
-                print(f"  - WARNING: Cannot infer equity for '{strategy_name}', assuming $1M")
-
-        # Build developer's compounded equity curve (equity at END of each day)
-        dev_equity = dev_starting_equity
-        dev_equity_list = []
-        for ret in master_df[return_col]:
-            dev_equity = dev_equity * (1 + ret)
-            dev_equity_list.append(dev_equity)  # Store equity AFTER applying return
+        dev_starting_equity = infer_dev_starting_equity(master_df[pnl_col].to_numpy(dtype=float),
+                                                        master_df[return_col].to_numpy(dtype=float))
+        if dev_starting_equity is None:
+            # Fallback: assume $1M
+            dev_starting_equity = 1_000_000
+            print(f"  - WARNING: Cannot infer equity for '{strategy_name}', assuming $1M")
 
-        dev_equity_curves[strategy_name] = pd.Series(dev_equity_list, index=master_df.index)
+        # Developer's compounded equity curve (equity at END of each day)
+        dev_equity_curves[strategy_name] = pd.Series(
+            compound_equity(dev_starting_equity, master_df[return_col].to_numpy(dtype=float)),
+            index=master_df.index
+        )
+        strategy_names.append(strategy_name)
 
         print(f"  - Built equity curve for '{strategy_name}' (starting: ${dev_starting_equity:,.0f})")
 
         # Calculate developer's implied position for margin tracking
         if strategy_metadata and strategy_name in strategy_metadata:
             margin_per_unit = strategy_metadata[strategy_name]['margin_per_unit']
-            dev_implied_units = master_df[margin_col] / margin_per_unit
-            master_df[f"{strategy_name}_Implied_Units"] = dev_implied_units
+            new_columns[f"{strategy_name}_Implied_Units"] = master_df[margin_col] / margin_per_unit
 
         # Track which strategies belong to which account
         if account not in account_strategy_map:
@@ -154,59 +200,28 @@ def compile_portfolio(data_folder, allocation_config, starting_capital=1_000_000
 
     print("Step 2a: Developer equity curves built.")
 
-    # --- 3. ITERATIVE DAILY LOOP WITH WEIGHTED-AVERAGE RETURNS ---
-    print("\nStep 2b: Running daily loop with weighted-average return calculation...")
-
-    # Initialize portfolio equity at starting capital
-    portfolio_equity = starting_capital
+    # Strategies x days matrices
+    num_days = len(master_df)
+    weights = np.array([allocation_config[name]['weight'] / 100.0 for name in strategy_names]).reshape(-1, 1)
+    returns = _strategy_matrix(master_df, strategy_names, '_Return_%', num_days)
+    dev_margins = _strategy_matrix(master_df, strategy_names, '_Margin_Used', num_days)
+    dev_equity = np.array([dev_equity_curves[name].to_numpy() for name in strategy_names]).reshape(-1, num_days)
 
-    # Storage for daily portfolio values
-    daily_portfolio_equity = []
-    daily_portfolio_returns = []
-    daily_portfolio_margin = []
+    # --- 3. DAILY PORTFOLIO WITH WEIGHTED-AVERAGE RETURNS ---
+    print("\nStep 2b: Computing daily portfolio with weighted-average return calculation...")
 
-    # Iterate through each day
-    for day_idx, day in enumerate(master_df.index):
-        # STEP 1: Calculate weighted-average portfolio return for this day
-        # Portfolio Return = Sum of (Strategy Return × Allocation%)
-        portfolio_daily_return = 0.0
-        total_margin = 0.0
+    # Portfolio Return = Sum of (Strategy Return × Allocation%)
+    daily_portfolio_returns = _sum_rows(returns * weights, num_days)
 
-        for strategy_name, config in allocation_config.items():
-            if strategy_name not in dev_equity_curves:
-                continue
+    # Apply each day's portfolio return to the previous day's equity
+    daily_portfolio_equity = compound_equity(starting_capital, daily_portfolio_returns)
 
-            # Get strategy's daily return from developer data
-            return_col = f"{strategy_name}_Return_%"
-            strategy_return = master_df[return_col].iloc[day_idx]
-
-            # Get allocation weight (expressed as percentage, e.g., 20.0 = 20%)
-            allocation_pct = config['weight']
-
-            # Add this strategy's weighted contribution to portfolio return
-            # allocation_pct is already in percentage form, so divide by 100
-            portfolio_daily_return += strategy_return * (allocation_pct / 100.0)
-
-            # Calculate margin used by this strategy (for monitoring)
-            # Scale developer's margin by our allocation
-            margin_col = f"{strategy_name}_Margin_Used"
-            dev_margin = master_df[margin_col].iloc[day_idx]
-            dev_equity = dev_equity_curves[strategy_name].iloc[day_idx]
-
-            # Our effective equity for this strategy
-            strategy_equity = portfolio_equity * (allocation_pct / 100.0)
-
-            # Scale margin proportionally
-            scaling_ratio = strategy_equity / dev_equity if dev_equity > 0 else 0
-            total_margin += dev_margin * scaling_ratio
-
-        # STEP 2: Apply portfolio return to update equity
-        portfolio_equity = portfolio_equity * (1 + portfolio_daily_return)
-
-        # STEP 3: Store daily values
-        daily_portfolio_equity.append(portfolio_equity)
-        daily_portfolio_returns.append(portfolio_daily_return)
-        daily_portfolio_margin.append(total_margin)
+    # Margin (for monitoring): scale developer's margin by our allocation of the equity
+    # at the START of the day (before that day's return is applied)
+    start_of_day_equity = np.concatenate([[starting_capital], daily_portfolio_equity[:-1]])
+    daily_portfolio_margin = _sum_rows(
+        dev_margins * equity_scaling_ratios(start_of_day_equity * weights, dev_equity), num_days
+    )
 
     # --- 4. Build Portfolio DataFrame from daily values ---
     print("\nStep 2c: Building portfolio performance DataFrame...")
@@ -218,28 +233,15 @@ def compile_portfolio(data_folder, allocation_config, starting_capital=1_000_000
     total_portfolio_df['Total_Margin_Used'] = pd.Series(daily_portfolio_margin, index=master_df.index)
     total_portfolio_df['Margin_Utilization_%'] = (total_portfolio_df['Total_Margin_Used'] / starting_capital) * 100
 
-    # Calculate notional exposure (sum across all strategies, scaled proportionally)
+    # Calculate notional exposure (sum across all strategies, scaled by END of day equity)
     notional_cols = [col for col in master_df.columns if col.endswith('_Notional_Value')]
     if notional_cols:
-        total_notional = pd.Series(0, index=master_df.index)
-        for day_idx, day in enumerate(master_df.index):
-            for strategy_name, config in allocation_config.items():
-                if strategy_name not in dev_equity_curves:
-                    continue
-
-                notional_col = f"{strategy_name}_Notional_Value"
-                if notional_col not in master_df.columns:
-                    continue
-
-                dev_notional = master_df[notional_col].iloc[day_idx]
-                dev_equity = dev_equity_curves[strategy_name].iloc[day_idx]
-                portfolio_equity_today = daily_portfolio_equity[day_idx]
-
-                allocation_pct = config['weight']
-                strategy_equity = portfolio_equity_today * (allocation_pct / 100.0)
-                scaling_ratio = strategy_equity / dev_equity if dev_equity > 0 else 0
-
-                total_notional.iloc[day_idx] += dev_notional * scaling_ratio
+        notional_names = [name for name in strategy_names if f"{name}_Notional_Value" in master_df.columns]
+        rows = [strategy_names.index(name) for name in notional_names]
+        dev_notional = _strategy_matrix(master_df, notional_names, '_Notional_Value', num_days)
+        total_notional = pd.Series(_sum_rows(
+            dev_notional * equity_scaling_ratios(daily_portfolio_equity * weights[rows], dev_equity[rows]), num_days
+        ), index=master_df.index)
 
         total_portfolio_df['Total_Notional_Exposure'] = total_notional
         total_portfolio_df['Leverage_Ratio'] = total_notional / starting_capital
@@ -252,43 +254,20 @@ def compile_portfolio(data_folder, allocation_config, starting_capital=1_000_000
     # --- 4b. Build Individual Strategy Equity Curves for Visualization ---
     print("\nStep 2d: Building individual strategy equity curves...")
 
-    # For each strategy, build its equity curve using its allocated capital and returns
-    strategy_equity_map = {}
+    # Each strategy compounds its own returns from its allocated capital
+    strategy_equity = compound_equity(starting_capital * weights, returns)
+    strategy_margin = dev_margins * equity_scaling_ratios(strategy_equity, dev_equity)
 
-    for strategy_name, config in allocation_config.items():
-        if strategy_name not in dev_equity_curves:
-            continue
+    strategy_equity_map = {}
+    for row, strategy_name in enumerate(strategy_names):
+        equity_series = pd.Series(strategy_equity[row], index=master_df.index)
+        new_columns[f"{strategy_name}_Equity_$"] = equity_series
+        new_columns[f"{strategy_name}_Scaled_Return_%"] = master_df[f"{strategy_name}_Return_%"]
+        new_columns[f"{strategy_name}_Scaled_Margin"] = pd.Series(strategy_margin[row], index=master_df.index)
+        strategy_equity_map[strategy_name] = equity_series
 
-        allocation_pct = config['weight']
-        strategy_starting_equity = starting_capital * (allocation_pct / 100.0)
-
-        # Build equity curve by compounding strategy's returns
-        strategy_equity = strategy_starting_equity
-        strategy_equity_list = []
-        strategy_margin_list = []
-
-        for day_idx in range(len(master_df)):
-            # Get strategy's return for this day
-            return_col = f"{strategy_name}_Return_%"
-            strategy_return = master_df[return_col].iloc[day_idx]
-
-            # Apply return to equity
-            strategy_equity = strategy_equity * (1 + strategy_return)
-            strategy_equity_list.append(strategy_equity)
-
-            # Calculate scaled margin for this strategy
-            margin_col = f"{strategy_name}_Margin_Used"
-            dev_margin = master_df[margin_col].iloc[day_idx]
-            dev_equity = dev_equity_curves[strategy_name].iloc[day_idx]
-            scaling_ratio = strategy_equity / dev_equity if dev_equity > 0 else 0
-            strategy_margin = dev_margin * scaling_ratio
-            strategy_margin_list.append(strategy_margin)
-
-        # Store in master_df
-        master_df[f"{strategy_name}_Equity_$"] = pd.Series(strategy_equity_list, index=master_df.index)
-        master_df[f"{strategy_name}_Scaled_Return_%"] = master_df[f"{strategy_name}_Return_%"]
-        master_df[f"{strategy_name}_Scaled_Margin"] = pd.Series(strategy_margin_list, index=master_df.index)
-        strategy_equity_map[strategy_name] = pd.Series(strategy_equity_list, index=master_df.index)
+    if new_columns:
+        master_df = pd.concat([master_df, pd.DataFrame(new_columns, index=master_df.index)], axis=1)
 
     # --- 5. Calculate Account-Level Performance ---
     # With weighted-average returns, account performance = portfolio performance
@@ -629,32 +608,16 @@ def compile_portfolio(data_folder, allocation_config, starting_capital=1_000_000
         numeric_cols = df.select_dtypes(include=[np.number]).columns
         dollar_cols = [col for col in numeric_cols if col not in percent_cols]
 
-        # Round dollar columns to 0 decimals
+        # Dollar columns: rounded to 0 decimals with thousand separators
         for col in dollar_cols:
-            df[col] = df[col].round(0)
+            df[col] = [f'{int(x):,}' if pd.notna(x) else '' for x in df[col].round(0)]
 
-        # Convert percentage columns to percentage format (multiply by 100, keep 4 decimals)
+        # Percentage columns: multiplied by 100 with 4 decimals and % sign
         for col in percent_cols:
             if col in df.columns:
-                df[col] = df[col] * 100
-
-        # Save with formatting
-        df.to_csv(filepath, index=False, float_format='%.4f')
-
-        # Read back and format numbers manually
-        df_formatted = pd.read_csv(filepath)
-
-        # Add thousand separators to dollar columns
-        for col in dollar_cols:
-            if col in df_formatted.columns:
-                df_formatted[col] = df_formatted[col].apply(lambda x: f'{int(x):,}' if pd.notna(x) else '')
-
-        # Format percentage columns with 4 decimals and % sign
-        for col in percent_cols:
-            if col in df_formatted.columns:
-                df_formatted[col] = df_formatted[col].apply(lambda x: f'{x:.4f}%' if pd.notna(x) else '')
+                df[col] = [f'{x:.4f}%' if pd.notna(x) else '' for x in df[col] * 100]
 
-        df_formatted.to_csv(filepath, index=False)
+        df.to_csv(filepath, index=False)
 
     # Save strategy-level CSVs: 1_[StrategyName].csv
     for strategy_name in allocation_config.keys():
@@ -22,11 +22,17 @@ from services.account_data_service.config import (
     DATABASE_NAME,
     PORT,
     POLL_INTERVAL_SECONDS,
+    POLL_MAX_WORKERS,
+    POLL_ACCOUNT_TIMEOUT_SECONDS,
+    POLL_JITTER_PCT,
+    BALANCE_WRITE_TOLERANCE_PCT,
+    BALANCE_MAX_WRITE_AGE_SECONDS,
     LOG_LEVEL
 )
 from services.account_data_service.repository import TradingAccountRepository
 from services.account_data_service.broker_poller import BrokerPoller
 from services.account_data_service.models import CreateAccountRequest
+from services.positions import PositionStore
 
 # Configure logging
 LOG_DIR = os.path.join(PROJECT_ROOT, 'logs')
@@ -74,10 +80,24 @@ mongo_client = MongoClient(
 )
 db = mongo_client[DATABASE_NAME]
 trading_accounts_collection = db['trading_accounts']
+position_store = PositionStore(db)  # Open positions (written by ExecutionService)
+position_store.ensure_indexes()
 
 # Initialize repository and poller
-repository = TradingAccountRepository(trading_accounts_collection)
-poller = BrokerPoller(repository, interval=POLL_INTERVAL_SECONDS, mongodb_url=MONGODB_URI)
+repository = TradingAccountRepository(
+    trading_accounts_collection,
+    position_store,
+    balance_tolerance_pct=BALANCE_WRITE_TOLERANCE_PCT,
+    balance_max_age_seconds=BALANCE_MAX_WRITE_AGE_SECONDS
+)
+poller = BrokerPoller(
+    repository,
+    interval=POLL_INTERVAL_SECONDS,
+    mongodb_url=MONGODB_URI,
+    max_workers=POLL_MAX_WORKERS,
+    account_timeout=POLL_ACCOUNT_TIMEOUT_SECONDS,
+    jitter_pct=POLL_JITTER_PCT
+)
 
 
 # ============================================================================
@@ -107,6 +127,15 @@ def health_check():
         }
 
 
+@app.get("/api/v1/poller/stats")
+def poller_stats():
+    """
+    Broker poller state: in-flight polls, next scheduled polls, a poll
+    latency histogram per account and written/skipped repository writes
+    """
+    return poller.stats()
+
+
 # ============================================================================
 # ACCOUNT MANAGEMENT ENDPOINTS
 # ============================================================================
@@ -158,7 +187,6 @@ def create_account(request: CreateAccountRequest):
                 "margin_utilization_pct": 0,
                 "last_updated": datetime.utcnow()
             },
-            "open_positions": [],
             "positions_last_updated": datetime.utcnow(),
             "connection_status": "DISCONNECTED",
             "last_poll_time": None,
@@ -215,6 +243,7 @@ def get_account(account_id: str):
                 status_code=404,
                 detail=f"Account {account_id} not found"
             )
+        account['open_positions'] = repository.get_open_positions(account_id)
         return {"account": account}
     except HTTPException:
         raise
@@ -237,9 +266,12 @@ def sync_account(account_id: str):
                 detail=f"Account {account_id} not found"
             )
 
-        # Poll this account immediately
+        # Poll this account immediately (on the poller's worker pool, bounded by its deadline)
         logger.info(f"Forcing sync for {account_id}")
-        poller.poll_account(account)
+        try:
+            poller.poll_now(account)
+        except TimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
 
         # Get updated account
         updated_account = repository.get_account(account_id)
@@ -250,7 +282,7 @@ def sync_account(account_id: str):
             "timestamp": datetime.utcnow(),
             "connection_status": updated_account['connection_status'],
             "equity": updated_account['balances']['equity'],
-            "num_positions": len(updated_account['open_positions'])
+            "num_positions": len(repository.get_open_positions(account_id))
         }
     except HTTPException:
         raise
@@ -319,7 +351,7 @@ def get_account_state_legacy(account_name: str):
             "margin_available": account['balances']['margin_available'],
             "unrealized_pnl": account['balances']['unrealized_pnl'],
             "realized_pnl": account['balances']['realized_pnl'],
-            "open_positions": account['open_positions'],
+            "open_positions": repository.get_open_positions(account['account_id']),
             "open_orders": [],  # Not tracking orders in this service
             "created_at": account['updated_at']
         }
@@ -444,7 +476,9 @@ def startup():
     logger.info("=" * 70)
     logger.info(f"MongoDB URI: {MONGODB_URI}")
     logger.info(f"Database: {DATABASE_NAME}")
-    logger.info(f"Poll interval: {POLL_INTERVAL_SECONDS}s")
+    logger.info(f"Poll interval: {POLL_INTERVAL_SECONDS}s (±{POLL_JITTER_PCT:.0%} jitter)")
+    logger.info(f"Poll workers: {POLL_MAX_WORKERS} | Per-account deadline: {POLL_ACCOUNT_TIMEOUT_SECONDS}s")
+    logger.info(f"Balance write tolerance: {BALANCE_WRITE_TOLERANCE_PCT:.4%} (max age {BALANCE_MAX_WRITE_AGE_SECONDS:.0f}s)")
     logger.info(f"Port: {PORT}")
     logger.info("=" * 70)
 
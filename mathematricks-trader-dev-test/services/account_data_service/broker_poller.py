@@ -1,11 +1,15 @@
 """
 Background broker polling service
-Polls all active trading accounts at regular intervals
+Polls all active trading accounts concurrently on a bounded worker pool, each on its own
+jittered interval and with its own deadline (a slow broker never delays the others)
 Also watches MongoDB for position changes (event-driven polling)
 """
+import asyncio
+import random
 import threading
 import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FuturesTimeoutError
 from typing import Dict, Callable, Optional
 import sys
 import os
@@ -18,16 +22,33 @@ sys.path.insert(0, PROJECT_ROOT)
 sys.path.insert(0, os.path.join(PROJECT_ROOT, 'services'))
 
 from brokers import BrokerFactory
-from account_data_service.repository import TradingAccountRepository
+from account_data_service.repository import TradingAccountRepository, position_key
+from account_data_service.poll_metrics import PollLatencyHistogram
 from exceptions import BrokerConnectionError
 
 logger = logging.getLogger(__name__)
 
+# Newly ACTIVE / deactivated accounts are picked up at least this often
+ACCOUNT_REFRESH_SECONDS = 60
+
+
+def _init_worker_event_loop():
+    """Give each poll worker thread its own asyncio event loop (ib_insync uses it)"""
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+def _ensure_event_loop():
+    """Make sure the calling thread has an event loop (poll_account outside the pool)"""
+    try:
+        asyncio.get_event_loop()
+    except RuntimeError:
+        _init_worker_event_loop()
+
 
 class MongoPositionWatcher:
     """
-    Watches MongoDB trading_accounts collection for position changes
-    Triggers immediate polling when open_positions array is updated
+    Watches MongoDB positions collection for position changes
+    Triggers immediate polling when ExecutionService applies a fill
     """
 
     def __init__(self, mongodb_url: str, position_change_callback: Callable[[str], None]):
@@ -41,7 +62,7 @@ class MongoPositionWatcher:
         self.mongodb_url = mongodb_url
         self.position_change_callback = position_change_callback
         self.mongodb_client = None
-        self.trading_accounts_collection = None
+        self.positions_collection = None
         self.resume_token = None
         self.running = False
         self.thread = None
@@ -63,9 +84,9 @@ class MongoPositionWatcher:
             # Test connection
             self.mongodb_client.admin.command('ping')
 
-            # Get trading_accounts collection
+            # Get positions collection (one document per position, written by ExecutionService)
             db = self.mongodb_client['mathematricks_trading']
-            self.trading_accounts_collection = db['trading_accounts']
+            self.positions_collection = db['positions']
 
             logger.info("✅ MongoPositionWatcher connected to MongoDB")
             return True
@@ -128,7 +149,7 @@ class MongoPositionWatcher:
         Watch for position changes using MongoDB Change Streams
         Returns: 'success', 'token_reset', 'error', or 'stopped'
         """
-        if self.trading_accounts_collection is None:
+        if self.positions_collection is None:
             logger.error("❌ MongoDB not available - cannot watch for position changes")
             return 'error'
 
@@ -139,22 +160,17 @@ class MongoPositionWatcher:
                 watch_options['resume_after'] = self.resume_token
                 logger.debug("🔄 Resuming from previous position")
 
-            # Pipeline to filter for updates to open_positions field
+            # Pipeline to filter for position fills (new positions and quantity/status updates)
             pipeline = [
                 {
                     '$match': {
-                        'operationType': {'$in': ['update', 'replace']},
-                        # Match when open_positions field is updated
-                        '$or': [
-                            {'updateDescription.updatedFields.open_positions': {'$exists': True}},
-                            {'updateDescription.updatedFields': {'$regex': '^open_positions\\.'}}
-                        ]
+                        'operationType': {'$in': ['insert', 'update', 'replace']}
                     }
                 }
             ]
 
             # Open change stream
-            with self.trading_accounts_collection.watch(pipeline, full_document='updateLookup', **watch_options) as stream:
+            with self.positions_collection.watch(pipeline, full_document='updateLookup', **watch_options) as stream:
                 logger.info("✅ Change Stream connected - watching for position updates...")
 
                 for change in stream:
@@ -205,9 +221,21 @@ class MongoPositionWatcher:
 
 
 class BrokerPoller:
-    """Background service to poll broker accounts"""
+    """
+    Background service to poll broker accounts
+
+    Key responsibilities:
+    - Schedule each ACTIVE account on its own jittered interval and poll accounts
+      concurrently on a long-lived, bounded worker pool
+    - Enforce a per-account deadline: an overrunning poll marks the account TIMEOUT and
+      the account is not polled again until that poll returns, so one stuck gateway holds
+      at most one worker and never delays the other accounts
+    - Trigger event-driven polls when ExecutionService applies a fill
+    - Keep a poll latency histogram per account (stats())
+    """
 
-    def __init__(self, repository: TradingAccountRepository, interval: int = 300, mongodb_url: Optional[str] = None):
+    def __init__(self, repository: TradingAccountRepository, interval: int = 300, mongodb_url: Optional[str] = None,
+                 max_workers: int = 8, account_timeout: float = 30.0, jitter_pct: float = 0.1):
         """
         Initialize broker poller
 
@@ -215,16 +243,35 @@ class BrokerPoller:
             repository: TradingAccountRepository instance
             interval: Polling interval in seconds (default: 300 = 5 minutes)
             mongodb_url: MongoDB connection string for position watching (optional)
+            max_workers: Maximum accounts polled at the same time
+            account_timeout: Seconds a single account poll may take before it is marked TIMEOUT
+            jitter_pct: Each account's next poll is interval * (1 ± jitter_pct) away, and the
+                first polls are spread over interval * jitter_pct, so polls don't bunch up
         """
         self.repository = repository
         self.interval = interval
         self.mongodb_url = mongodb_url
+        self.max_workers = max_workers
+        self.account_timeout = account_timeout
+        self.jitter_pct = jitter_pct
         self.running = False
         self.thread = None
         self.position_watcher = None
         self.broker_instances = {}  # Cache broker connections {account_id: broker}
+        self.broker_lock = threading.Lock()
         self.last_positions_state = {}  # Track last position state for change detection {account_id: positions_hash}
-        self.poll_lock = threading.Lock()  # Prevent concurrent polling of same account
+
+        # Long-lived worker pool; every worker thread has its own event loop (ib_insync needs one)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="broker-poll",
+            initializer=_init_worker_event_loop
+        )
+        self.state_lock = threading.Lock()
+        self.in_flight: Dict[str, Dict] = {}  # {account_id: {'future', 'started', 'poll_type', 'timed_out'}}
+        self.rerun_requested = set()  # Accounts with an event-driven poll requested while one was in flight
+        self.next_poll_at: Dict[str, float] = {}  # {account_id: monotonic time of next scheduled poll}
+        self.latency: Dict[str, PollLatencyHistogram] = {}
 
     def start(self):
         """Start polling in background thread"""
@@ -237,7 +284,10 @@ class BrokerPoller:
         # Start scheduled polling thread
         self.thread = threading.Thread(target=self._poll_loop, daemon=True)
         self.thread.start()
-        logger.info(f"✅ Started broker polling (interval: {self.interval}s)")
+        logger.info(
+            f"✅ Started broker polling (interval: {self.interval}s ±{self.jitter_pct:.0%}, "
+            f"workers: {self.max_workers}, per-account deadline: {self.account_timeout}s)"
+        )
 
         # Start MongoDB position watcher (event-driven polling)
         if self.mongodb_url:
@@ -266,6 +316,9 @@ class BrokerPoller:
         if self.thread:
             self.thread.join(timeout=10)
 
+        # Drop queued polls; polls already running finish on their own (threads can't be killed)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
         # Disconnect all brokers
         for account_id, broker in self.broker_instances.items():
             try:
@@ -274,19 +327,210 @@ class BrokerPoller:
             except Exception as e:
                 logger.error(f"Error disconnecting {account_id}: {e}")
 
+    # ------------------------------------------------------------------
+    # Scheduling
+    # ------------------------------------------------------------------
+
+    def _jittered(self, seconds: float) -> float:
+        """seconds * (1 ± jitter_pct)"""
+        return seconds * (1 + random.uniform(-self.jitter_pct, self.jitter_pct))
+
     def _poll_loop(self):
-        """Main polling loop (runs in background thread)"""
+        """
+        Main scheduling loop (runs in background thread)
+
+        Wakes every second: refreshes the ACTIVE account list, submits accounts whose
+        jittered due time has passed, and flags polls that overran their deadline.
+        """
+        next_refresh = 0.0
+        accounts: Dict[str, Dict] = {}
+
         while self.running:
+            now = time.monotonic()
             try:
-                self.poll_all_accounts()
+                if now >= next_refresh:
+                    accounts = {a['account_id']: a for a in self.repository.list_accounts(status="ACTIVE")}
+                    self._sync_schedule(accounts, now)
+                    next_refresh = now + min(self.interval, ACCOUNT_REFRESH_SECONDS)
+
+                for account_id, due_at in list(self.next_poll_at.items()):
+                    if due_at <= now and account_id in accounts:
+                        if self.submit_poll(accounts[account_id]) is not None:
+                            self.next_poll_at[account_id] = now + self._jittered(self.interval)
+
+                self._check_deadlines(now)
             except Exception as e:
                 logger.error(f"Polling error: {e}", exc_info=True)
 
-            # Sleep in small intervals to allow quick shutdown
-            for _ in range(self.interval):
-                if not self.running:
-                    break
-                time.sleep(1)
+            time.sleep(1)
+
+    def _sync_schedule(self, accounts: Dict[str, Dict], now: float):
+        """Schedule newly ACTIVE accounts (spread over the jitter window) and drop removed ones"""
+        for account_id in accounts:
+            if account_id not in self.next_poll_at:
+                self.next_poll_at[account_id] = now + random.uniform(0, self.interval * self.jitter_pct)
+        for account_id in list(self.next_poll_at):
+            if account_id not in accounts:
+                del self.next_poll_at[account_id]
+
+    def _check_deadlines(self, now: float):
+        """Mark accounts whose in-flight poll overran account_timeout"""
+        with self.state_lock:
+            overdue = [
+                (account_id, entry) for account_id, entry in self.in_flight.items()
+                if not entry['timed_out'] and now - entry['started'] > self.account_timeout
+            ]
+            for _, entry in overdue:
+                entry['timed_out'] = True
+
+        for account_id, entry in overdue:
+            logger.warning(
+                f"⏱️  {account_id} {entry['poll_type'].lower()} poll exceeded {self.account_timeout}s deadline "
+                f"- other accounts keep polling, {account_id} is skipped until it returns"
+            )
+            self._histogram(account_id).record_timeout()
+            self.repository.update_connection_status(account_id, "TIMEOUT", False)
+
+    def _histogram(self, account_id: str) -> PollLatencyHistogram:
+        """Get or create the latency histogram for an account"""
+        with self.state_lock:
+            if account_id not in self.latency:
+                self.latency[account_id] = PollLatencyHistogram()
+            return self.latency[account_id]
+
+    def submit_poll(self, account: Dict, poll_type: str = "SCHEDULED") -> Optional[Future]:
+        """
+        Poll an account on the worker pool
+
+        Args:
+            account: Account document from MongoDB
+            poll_type: Type of poll - "SCHEDULED" or "EVENT-DRIVEN"
+
+        Returns:
+            Future for the poll, or None if a poll for this account is still in flight
+            (event-driven requests are then re-run once it finishes)
+        """
+        account_id = account['account_id']
+        with self.state_lock:
+            if account_id in self.in_flight:
+                if poll_type == "EVENT-DRIVEN":
+                    self.rerun_requested.add(account_id)
+                logger.debug(f"{account_id} poll still in flight - skipping {poll_type.lower()} poll")
+                return None
+
+            started = time.monotonic()
+            future = self.executor.submit(self._run_poll, account, poll_type)
+            self.in_flight[account_id] = {
+                'future': future,
+                'started': started,
+                'poll_type': poll_type,
+                'timed_out': False
+            }
+
+        future.add_done_callback(lambda f: self._on_poll_done(account, started, f))
+        return future
+
+    def _on_poll_done(self, account: Dict, started: float, future: Future):
+        """Record latency, release the account and re-run a deferred event-driven poll"""
+        account_id = account['account_id']
+        success = not future.cancelled() and future.exception() is None
+        self._histogram(account_id).record(time.monotonic() - started, success)
+
+        with self.state_lock:
+            self.in_flight.pop(account_id, None)
+            rerun = account_id in self.rerun_requested
+            self.rerun_requested.discard(account_id)
+
+        if rerun and self.running:
+            self.submit_poll(account, poll_type="EVENT-DRIVEN")
+
+    def _run_poll(self, account: Dict, poll_type: str):
+        """Poll one account on a worker thread, recording connection status on failure"""
+        account_id = account['account_id']
+        try:
+            self.poll_account(account, poll_type=poll_type)
+        except BrokerConnectionError as e:
+            # Connection errors are expected when broker is offline - log as warning, not error
+            logger.warning(f"⚠️  {account_id} offline during {poll_type.lower()} poll: {e.message}")
+            self.repository.update_connection_status(account_id, "DISCONNECTED", False)
+            raise
+        except Exception as e:
+            # Unexpected errors should be logged with traceback
+            logger.error(f"❌ Error in {poll_type.lower()} poll for {account_id}: {e}", exc_info=True)
+            self.repository.update_connection_status(account_id, "ERROR", False)
+            raise
+
+    def poll_now(self, account: Dict, poll_type: str = "SCHEDULED"):
+        """
+        Poll an account on the worker pool and wait for it (at most account_timeout)
+
+        Waits for the in-flight poll instead if one is already running.
+
+        Raises:
+            TimeoutError: If the poll does not finish within account_timeout
+            Exception: Whatever the poll raised
+        """
+        future = self.submit_poll(account, poll_type=poll_type)
+        if future is None:
+            with self.state_lock:
+                entry = self.in_flight.get(account['account_id'])
+            if entry is None:
+                return self.poll_now(account, poll_type)  # Finished in between - poll again
+            future = entry['future']
+        try:
+            future.result(timeout=self.account_timeout)
+        except FuturesTimeoutError:
+            raise TimeoutError(f"{account['account_id']} poll exceeded {self.account_timeout}s deadline")
+
+    def poll_all_accounts(self):
+        """Poll all active accounts concurrently and wait for them (each bounded by account_timeout)"""
+        accounts = self.repository.list_accounts(status="ACTIVE")
+        logger.info(f"📊 Polling {len(accounts)} active accounts...")
+
+        futures = {}
+        for account in accounts:
+            future = self.submit_poll(account)
+            if future is not None:
+                futures[account['account_id']] = future
+
+        deadline = time.monotonic() + self.account_timeout
+        for account_id, future in futures.items():
+            try:
+                future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeoutError:
+                self._check_deadlines(time.monotonic())
+            except Exception:
+                pass  # Already logged and recorded by _run_poll
+
+    def stats(self) -> Dict:
+        """Scheduler state and per-account poll latency histograms (for monitoring)"""
+        with self.state_lock:
+            now = time.monotonic()
+            in_flight = {
+                account_id: {
+                    'poll_type': entry['poll_type'],
+                    'running_seconds': now - entry['started'],
+                    'timed_out': entry['timed_out']
+                }
+                for account_id, entry in self.in_flight.items()
+            }
+            histograms = dict(self.latency)
+            next_poll_in = {account_id: max(0.0, due - now) for account_id, due in self.next_poll_at.items()}
+        return {
+            'running': self.running,
+            'interval_seconds': self.interval,
+            'jitter_pct': self.jitter_pct,
+            'max_workers': self.max_workers,
+            'account_timeout_seconds': self.account_timeout,
+            'in_flight': in_flight,
+            'next_poll_in_seconds': next_poll_in,
+            'accounts': {account_id: h.snapshot() for account_id, h in histograms.items()},
+            'repository_writes': self.repository.write_stats()
+        }
+
+    # ------------------------------------------------------------------
+    # Event-driven polling
+    # ------------------------------------------------------------------
 
     def _on_position_change(self, account_id: str):
         """
@@ -315,16 +559,9 @@ class BrokerPoller:
             logger.debug(f"Account {account_id} not active - skipping event-driven poll")
             return
 
-        # Use lock to prevent concurrent polling
-        with self.poll_lock:
-            try:
-                self.poll_account(account, poll_type="EVENT-DRIVEN")
-            except BrokerConnectionError as e:
-                logger.warning(f"⚠️  {account_id} offline during event-driven poll: {e.message}")
-                self.repository.update_connection_status(account_id, "DISCONNECTED", False)
-            except Exception as e:
-                logger.error(f"❌ Error in event-driven poll for {account_id}: {e}", exc_info=True)
-                self.repository.update_connection_status(account_id, "ERROR", False)
+        # Runs on the worker pool so the change stream keeps flowing; polls of the
+        # same account never overlap (a request during a poll re-runs after it)
+        self.submit_poll(account, poll_type="EVENT-DRIVEN")
 
     def _display_mock_snapshot(self, account_id: str):
         """
@@ -338,10 +575,8 @@ class BrokerPoller:
                 logger.warning(f"Account {account_id} not found for snapshot")
                 return
 
-            # Get positions and balances from MongoDB
-            open_positions = account_doc.get('open_positions', [])
-            # Filter for OPEN status
-            open_positions = [p for p in open_positions if p.get('status') == 'OPEN']
+            # Get OPEN positions (positions collection) and balances from MongoDB
+            open_positions = self.repository.get_open_positions(account_id)
 
             # Get balances
             equity = account_doc.get('balances', {}).get('equity', 1000000)
@@ -371,50 +606,45 @@ class BrokerPoller:
         except Exception as e:
             logger.error(f"Error displaying Mock snapshot for {account_id}: {e}", exc_info=True)
 
-    def poll_all_accounts(self):
-        """Poll all active accounts"""
-        accounts = self.repository.list_accounts(status="ACTIVE")
-        logger.info(f"📊 Polling {len(accounts)} active accounts...")
-
-        for account in accounts:
-            try:
-                self.poll_account(account)
-            except BrokerConnectionError as e:
-                # Connection errors are expected when broker is offline - log as warning, not error
-                account_id = account['account_id']
-                logger.warning(f"⚠️  {account_id} offline: {e.message}")
-                self.repository.update_connection_status(
-                    account_id,
-                    "DISCONNECTED",
-                    False
-                )
-            except Exception as e:
-                # Unexpected errors should be logged with traceback
-                account_id = account['account_id']
-                logger.error(f"❌ Error polling {account_id}: {e}", exc_info=True)
-                self.repository.update_connection_status(
-                    account_id,
-                    "ERROR",
-                    False
-                )
+    # ------------------------------------------------------------------
+    # Broker polling (runs on a worker thread)
+    # ------------------------------------------------------------------
 
     def poll_account(self, account: Dict, poll_type: str = "SCHEDULED"):
         """
-        Poll single account for balances and positions
+        Poll single account for balances and positions (blocking, on the calling thread)
 
         Args:
             account: Account document from MongoDB
             poll_type: Type of poll - "SCHEDULED" or "EVENT-DRIVEN"
         """
-        import asyncio
-
         account_id = account['account_id']
+        config = self._build_broker_config(account)
+
+        if account['broker'] == "IBKR":
+            # ib_insync binds a connection to the event loop of the thread that opened it and
+            # polls can land on any worker, so IBKR gets a fresh connection per poll
+            _ensure_event_loop()
+            broker = BrokerFactory.create_broker(config)
+            try:
+                self._poll_broker(account_id, broker, poll_type)
+            finally:
+                broker.disconnect()
+            return
+
+        # Get or create broker instance
+        broker = self._get_broker(account_id, config)
+        self._poll_broker(account_id, broker, poll_type)
+
+    @staticmethod
+    def _build_broker_config(account: Dict) -> Dict:
+        """Broker config (BrokerFactory) from an account document"""
         auth = account['authentication_details']
 
         # Create broker config
         config = {
             "broker": account['broker'],
-            "account_id": account_id,
+            "account_id": account['account_id'],
         }
 
         # Add authentication details based on broker type
@@ -430,34 +660,17 @@ class BrokerPoller:
                 "api_secret": auth.get('api_secret'),
                 "access_token": auth.get('access_token')
             })
+        return config
 
-        # For IBKR, we need to ensure we have an event loop
-        # Run in a new thread if called from FastAPI context
-        if account['broker'] == "IBKR":
-            try:
-                asyncio.get_event_loop()
-            except RuntimeError:
-                # No event loop in current thread - run in separate thread
-                import concurrent.futures
-                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                    future = executor.submit(self._poll_account_sync, account_id, config, auth)
-                    try:
-                        future.result(timeout=30)
-                    except Exception as e:
-                        # Re-raise to be caught by poll_all_accounts
-                        raise e
-                return
-
-        # Get or create broker instance
-        broker = self._get_broker(account_id, config)
-
+    def _poll_broker(self, account_id: str, broker, poll_type: str):
+        """Fetch balances and positions from a broker and store them"""
         # Connect if needed
         if not broker.is_connected():
             logger.info(f"Connecting to {account_id}...")
             if not broker.connect():
                 raise Exception("Failed to connect to broker")
 
-        # Fetch balances
+        # Fetch balances (the repository skips writes within tolerance of the last one)
         balance = broker.get_account_balance()
         balances = {
             "base_currency": "USD",
@@ -471,7 +684,7 @@ class BrokerPoller:
         }
         self.repository.update_balances(account_id, balances)
 
-        # Fetch positions
+        # Fetch positions (the repository writes only changed entries, nothing if unchanged)
         positions = broker.get_open_positions()
         self.repository.update_broker_positions_snapshot(account_id, positions)
 
@@ -487,64 +700,6 @@ class BrokerPoller:
         # Log detailed summary
         self._log_account_summary(account_id, balances, positions, position_changed, poll_type=poll_type)
 
-    def _poll_account_sync(self, account_id: str, config: Dict, auth: Dict):
-        """
-        Synchronous version of poll_account for running in separate thread
-        This creates its own event loop for IBKR
-        """
-        import asyncio
-
-        # Create new event loop for this thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        try:
-            # Create broker instance
-            broker = BrokerFactory.create_broker(config)
-
-            # Connect
-            if not broker.is_connected():
-                logger.info(f"Connecting to {account_id}...")
-                if not broker.connect():
-                    raise Exception("Failed to connect to broker")
-
-            # Fetch balances
-            balance = broker.get_account_balance()
-            balances = {
-                "base_currency": "USD",
-                "equity": balance.get('equity', 0),
-                "cash_balance": balance.get('cash_balance', 0),
-                "margin_used": balance.get('margin_used', 0),
-                "margin_available": balance.get('margin_available', 0),
-                "unrealized_pnl": balance.get('unrealized_pnl', 0),
-                "realized_pnl": balance.get('realized_pnl', 0),
-                "margin_utilization_pct": self._calculate_margin_pct(balance)
-            }
-            self.repository.update_balances(account_id, balances)
-
-            # Fetch positions
-            positions = broker.get_open_positions()
-            self.repository.update_positions(account_id, positions)
-
-            # Update connection status
-            self.repository.update_connection_status(account_id, "CONNECTED", True)
-
-            # Check if positions changed
-            positions_hash = self._hash_positions(positions)
-            position_changed = (account_id not in self.last_positions_state or
-                              self.last_positions_state[account_id] != positions_hash)
-            self.last_positions_state[account_id] = positions_hash
-
-            # Log detailed summary
-            self._log_account_summary(account_id, balances, positions, position_changed, poll_type="SCHEDULED")
-
-            # Disconnect
-            broker.disconnect()
-
-        finally:
-            # Clean up event loop
-            loop.close()
-
     def _get_broker(self, account_id: str, config: Dict):
         """
         Get or create broker instance
@@ -556,10 +711,11 @@ class BrokerPoller:
         Returns:
             Broker instance
         """
-        if account_id not in self.broker_instances:
-            logger.debug(f"Creating new broker instance for {account_id}")
-            self.broker_instances[account_id] = BrokerFactory.create_broker(config)
-        return self.broker_instances[account_id]
+        with self.broker_lock:
+            if account_id not in self.broker_instances:
+                logger.debug(f"Creating new broker instance for {account_id}")
+                self.broker_instances[account_id] = BrokerFactory.create_broker(config)
+            return self.broker_instances[account_id]
 
     @staticmethod
     def _calculate_margin_pct(balance: Dict) -> float:
@@ -592,13 +748,13 @@ class BrokerPoller:
         import hashlib
         import json
 
-        # Sort positions by instrument for consistent hashing
-        sorted_positions = sorted(positions, key=lambda x: x.get('instrument', ''))
+        # Sort positions by key for consistent hashing
+        sorted_positions = sorted(positions, key=position_key)
 
         # Create hash from relevant fields (instrument, quantity, side)
         position_data = [
             {
-                'instrument': p.get('instrument'),
+                'instrument': position_key(p)[0],
                 'quantity': p.get('quantity'),
                 'side': p.get('side'),
                 'avg_price': p.get('avg_price')
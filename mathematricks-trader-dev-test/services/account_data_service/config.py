@@ -15,6 +15,13 @@ GCP_PROJECT_ID = os.getenv('GCP_PROJECT_ID', 'mathematricks-trader')
 
 # Polling
 POLL_INTERVAL_SECONDS = int(os.getenv('ACCOUNT_POLL_INTERVAL', '300'))  # 5 minutes default
+POLL_MAX_WORKERS = int(os.getenv('ACCOUNT_POLL_MAX_WORKERS', '8'))  # Accounts polled concurrently
+POLL_ACCOUNT_TIMEOUT_SECONDS = float(os.getenv('ACCOUNT_POLL_TIMEOUT', '30'))  # Per-account poll deadline
+POLL_JITTER_PCT = float(os.getenv('ACCOUNT_POLL_JITTER', '0.1'))  # Each account polls every interval ±10%
+
+# Poll writes (diff-aware repository)
+BALANCE_WRITE_TOLERANCE_PCT = float(os.getenv('ACCOUNT_BALANCE_TOLERANCE_PCT', '0.0001'))  # Skip balance moves <= 0.01%
+BALANCE_MAX_WRITE_AGE_SECONDS = float(os.getenv('ACCOUNT_BALANCE_MAX_AGE', '900'))  # Refresh balances at least every 15 min
 
 # Service
 PORT = int(os.getenv('ACCOUNT_DATA_SERVICE_PORT', '8082'))
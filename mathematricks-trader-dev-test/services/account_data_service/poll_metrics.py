@@ -0,0 +1,94 @@
+"""
+Poll Metrics Module
+Per-account poll latency histograms for BrokerPoller.
+
+Each account gets a fixed-bucket histogram of poll durations plus outcome counters
+(ok / failed / timed out), so a slow or flaky broker shows up in /api/v1/poller/stats
+without scraping logs.
+"""
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime
+import bisect
+import threading
+
+# Bucket upper bounds in seconds (the last bucket catches everything slower)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class PollLatencyHistogram:
+    """
+    Thread-safe fixed-bucket latency histogram for one account.
+
+    Key responsibilities:
+    - record() a poll duration and its outcome
+    - snapshot() bucket counts, count/mean/max and bucket-estimated p50/p90/p99
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize PollLatencyHistogram.
+
+        Args:
+            buckets: Ascending bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.ok = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.last_duration: Optional[float] = None
+        self.last_poll_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, success: bool):
+        """Record one finished poll"""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+            self.last_duration = seconds
+            self.last_poll_at = datetime.utcnow()
+            if success:
+                self.ok += 1
+            else:
+                self.failed += 1
+
+    def record_timeout(self):
+        """Count a poll that overran its deadline (its duration is recorded when it finishes)"""
+        with self._lock:
+            self.timed_out += 1
+
+    def _quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding quantile q (caller holds the lock)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max_seconds
+        return self.max_seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Histogram and summary (for monitoring)"""
+        with self._lock:
+            labels = [f"le_{bound:g}s" for bound in self.buckets] + ["gt_" + f"{self.buckets[-1]:g}s"]
+            return {
+                'count': self.count,
+                'ok': self.ok,
+                'failed': self.failed,
+                'timed_out': self.timed_out,
+                'mean_seconds': self.total_seconds / self.count if self.count else None,
+                'max_seconds': self.max_seconds,
+                'p50_seconds': self._quantile(0.50),
+                'p90_seconds': self._quantile(0.90),
+                'p99_seconds': self._quantile(0.99),
+                'last_duration_seconds': self.last_duration,
+                'last_poll_at': self.last_poll_at,
+                'buckets': dict(zip(labels, self.counts))
+            }
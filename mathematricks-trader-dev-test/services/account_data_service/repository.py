@@ -1,23 +1,122 @@
 """
 MongoDB repository for trading_accounts collection
+
+Broker poll results are written diff-aware: the repository remembers what it last wrote
+per account, skips balance writes within a tolerance and unchanged position snapshots,
+and otherwise writes only the position entries that changed.
 """
 from pymongo.collection import Collection
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
 
+def position_key(position: Dict) -> Tuple[str, str, str]:
+    """
+    Identity of a broker position: (instrument, side, strategy_id)
+
+    Brokers report the instrument as 'instrument' (Mock) or 'symbol' (IBKR, Zerodha);
+    strategy_id is only set by the Mock broker.
+    """
+    return (
+        str(position.get('instrument') or position.get('symbol') or ''),
+        str(position.get('side') or 'LONG'),
+        str(position.get('strategy_id') or '')
+    )
+
+
+def hash_positions(positions: List[Dict]) -> str:
+    """Order-independent hash of the full position contents"""
+    entries = sorted(json.dumps(p, sort_keys=True, default=str) for p in positions)
+    return hashlib.md5("\n".join(entries).encode()).hexdigest()
+
+
+def _snapshot_fields(positions: List[Dict]) -> Dict[str, Dict]:
+    """
+    Map positions to their field names inside the broker_positions_snapshot map
+
+    MongoDB field names can't contain '.' or start with '$' (e.g. "BRK.B"), so those are
+    replaced by their full-width forms; a key repeated within one snapshot gets a #n suffix.
+    """
+    fields = {}
+    seen: Dict[str, int] = {}
+    for position in positions:
+        field = "|".join(position_key(position)).replace('.', '．').replace('$', '＄')
+        seen[field] = seen.get(field, 0) + 1
+        fields[field if seen[field] == 1 else f"{field}#{seen[field]}"] = position
+    return fields
+
+
 class TradingAccountRepository:
-    """Repository for trading_accounts CRUD operations"""
+    """
+    Repository for trading_accounts CRUD operations
 
-    def __init__(self, collection: Collection):
+    Key responsibilities:
+    - Account CRUD and open position reads (positions collection)
+    - Diff-aware poll writes: update_balances() coalesces changes within
+      balance_tolerance_pct (refreshing at least every balance_max_age_seconds) and
+      update_broker_positions_snapshot() skips unchanged snapshots and writes only
+      changed entries
+    """
+
+    def __init__(self, collection: Collection, position_store=None,
+                 balance_tolerance_pct: float = 0.0, balance_max_age_seconds: float = 900.0):
+        """
+        Args:
+            collection: trading_accounts collection
+            position_store: PositionStore for open positions (positions collection,
+                written by ExecutionService)
+            balance_tolerance_pct: Skip a balance write when every numeric field moved by at
+                most this fraction of its last written value (0 = write any change)
+            balance_max_age_seconds: Write balances at least this often even when unchanged,
+                so balances.last_updated stays fresh
+        """
         self.collection = collection
+        self.position_store = position_store
+        self.balance_tolerance_pct = balance_tolerance_pct
+        self.balance_max_age = timedelta(seconds=balance_max_age_seconds)
+
+        # Last written poll state per account (the broker poller is the only writer)
+        self._last_balances: Dict[str, Tuple[datetime, Dict]] = {}
+        self._last_snapshots: Dict[str, Tuple[str, Dict[str, Dict]]] = {}  # {account_id: (hash, {field: position})}
+        self._state_lock = threading.Lock()
+        self.write_counts = {
+            'balances_written': 0,
+            'balances_skipped': 0,
+            'snapshots_written': 0,
+            'snapshots_skipped': 0,
+            'snapshot_entries_written': 0
+        }
+
+    @staticmethod
+    def _present(account: Optional[Dict]) -> Optional[Dict]:
+        """Expose broker_positions_snapshot as a list (it is stored as a map keyed by position)"""
+        if account and isinstance(account.get('broker_positions_snapshot'), dict):
+            account['broker_positions_snapshot'] = list(account['broker_positions_snapshot'].values())
+        return account
 
     def get_account(self, account_id: str) -> Optional[Dict]:
         """Get single account by ID"""
-        return self.collection.find_one({"_id": account_id})
+        return self._present(self.collection.find_one({"_id": account_id}))
+
+    def get_open_positions(self, account_id: str) -> List[Dict]:
+        """
+        Get the account's OPEN positions (ExecutionService is source of truth)
+
+        Args:
+            account_id: Account ID
+
+        Returns:
+            List of position dicts (without MongoDB _id)
+        """
+        if self.position_store is None:
+            return []
+        return self.position_store.get_open_positions(account_id=account_id, projection={"_id": 0})
 
     def list_accounts(self, broker: str = None, status: str = "ACTIVE") -> List[Dict]:
         """
@@ -33,7 +132,7 @@ class TradingAccountRepository:
         query = {"status": status}
         if broker:
             query["broker"] = broker
-        return list(self.collection.find(query))
+        return [self._present(account) for account in self.collection.find(query)]
 
     def create_account(self, account_doc: Dict) -> str:
         """
@@ -46,20 +145,51 @@ class TradingAccountRepository:
             account_id of created account
         """
         result = self.collection.insert_one(account_doc)
+        self.forget(account_doc['_id'])
         logger.info(f"Created account: {account_doc['_id']}")
         return str(result.inserted_id)
 
-    def update_balances(self, account_id: str, balances: Dict):
+    def forget(self, account_id: str):
+        """Drop the remembered poll state so the next poll writes in full"""
+        with self._state_lock:
+            self._last_balances.pop(account_id, None)
+            self._last_snapshots.pop(account_id, None)
+
+    def _balances_within_tolerance(self, old: Dict, new: Dict) -> bool:
+        """True if no field changed beyond balance_tolerance_pct of its last written value"""
+        if old.keys() != new.keys():
+            return False
+        for field, value in new.items():
+            previous = old[field]
+            if isinstance(value, (int, float)) and isinstance(previous, (int, float)):
+                if abs(value - previous) > self.balance_tolerance_pct * abs(previous):
+                    return False
+            elif value != previous:
+                return False
+        return True
+
+    def update_balances(self, account_id: str, balances: Dict) -> bool:
         """
-        Update account balances with timestamp
+        Update account balances with timestamp, unless they are within tolerance of the
+        last write and that write is younger than balance_max_age
 
         Args:
             account_id: Account ID
             balances: Balances dict (without last_updated - will be added)
+
+        Returns:
+            True if balances were written
         """
+        now = datetime.utcnow()
+        with self._state_lock:
+            last = self._last_balances.get(account_id)
+            if last and now - last[0] < self.balance_max_age and self._balances_within_tolerance(last[1], balances):
+                self.write_counts['balances_skipped'] += 1
+                return False
+
         balances_with_timestamp = {
             **balances,
-            "last_updated": datetime.utcnow()
+            "last_updated": now
         }
 
         self.collection.update_one(
@@ -67,35 +197,77 @@ class TradingAccountRepository:
             {
                 "$set": {
                     "balances": balances_with_timestamp,
-                    "updated_at": datetime.utcnow()
+                    "updated_at": now
                 }
             }
         )
+        with self._state_lock:
+            self._last_balances[account_id] = (now, dict(balances))
+            self.write_counts['balances_written'] += 1
         logger.debug(f"Updated balances for {account_id}")
+        return True
 
-    def update_broker_positions_snapshot(self, account_id: str, positions: List[Dict]):
+    def update_broker_positions_snapshot(self, account_id: str, positions: List[Dict]) -> bool:
         """
         Store broker's position snapshot for monitoring/comparison only.
-        Does NOT update open_positions (ExecutionService owns that field).
+        Does NOT update open positions (ExecutionService owns the positions collection).
 
         This method stores the latest positions reported by the broker in a separate
         field so we can compare broker state vs. execution state and detect discrepancies.
+        The snapshot is stored as a map keyed by position (see _snapshot_fields): an
+        unchanged snapshot is not written at all, otherwise only added/changed entries are
+        $set and closed ones $unset. The first write per account (per process) is in full.
 
         Args:
             account_id: Account ID
             positions: List of position dicts from broker
+
+        Returns:
+            True if anything was written
         """
-        self.collection.update_one(
-            {"_id": account_id},
-            {
-                "$set": {
-                    "broker_positions_snapshot": positions,
-                    "broker_positions_last_updated": datetime.utcnow(),
-                    "updated_at": datetime.utcnow()
-                }
-            }
-        )
-        logger.debug(f"Updated broker snapshot: {len(positions)} positions for {account_id}")
+        snapshot_hash = hash_positions(positions)
+        fields = _snapshot_fields(positions)
+
+        with self._state_lock:
+            last = self._last_snapshots.get(account_id)
+            if last and last[0] == snapshot_hash:
+                self.write_counts['snapshots_skipped'] += 1
+                return False
+
+        now = datetime.utcnow()
+        set_fields = {
+            "broker_positions_last_updated": now,
+            "updated_at": now
+        }
+        unset_fields = {}
+        if last is None:
+            set_fields["broker_positions_snapshot"] = fields
+            entries_written = len(fields)
+        else:
+            previous = last[1]
+            changed = {field: p for field, p in fields.items() if previous.get(field) != p}
+            for field, position in changed.items():
+                set_fields[f"broker_positions_snapshot.{field}"] = position
+            for field in previous.keys() - fields.keys():
+                unset_fields[f"broker_positions_snapshot.{field}"] = ""
+            entries_written = len(changed) + len(unset_fields)
+
+        update = {"$set": set_fields}
+        if unset_fields:
+            update["$unset"] = unset_fields
+        self.collection.update_one({"_id": account_id}, update)
+
+        with self._state_lock:
+            self._last_snapshots[account_id] = (snapshot_hash, fields)
+            self.write_counts['snapshots_written'] += 1
+            self.write_counts['snapshot_entries_written'] += entries_written
+        logger.debug(f"Updated broker snapshot for {account_id}: {entries_written} of {len(positions)} positions written")
+        return True
+
+    def write_stats(self) -> Dict:
+        """Written vs skipped poll writes (for monitoring)"""
+        with self._state_lock:
+            return dict(self.write_counts)
 
     def update_connection_status(self, account_id: str, status: str, success: bool):
         """
@@ -103,7 +275,7 @@ class TradingAccountRepository:
 
         Args:
             account_id: Account ID
-            status: Connection status ("CONNECTED", "DISCONNECTED", "ERROR")
+            status: Connection status ("CONNECTED", "DISCONNECTED", "ERROR", "TIMEOUT")
             success: Whether the last poll was successful
         """
         self.collection.update_one(
@@ -0,0 +1,50 @@
+"""
+Shared Backtest Series encoding for Mathematricks strategies
+
+Strategy backtest histories are stored as packed columns (backtest_series, BSON binary
+per column) instead of per-day dicts (raw_data_backtest_full). CerebroService's history
+cache, the portfolio research loaders and tools/load_strategies_from_folder.py all go
+through this package; documents still in the legacy layout are read transparently
+(tools/migrate_backtest_series.py converts them).
+
+Usage:
+    from backtest_series import encode_backtest_series, load_backtest_columns
+
+    doc['backtest_series'] = encode_backtest_series({'date': dates, 'return': returns})
+    columns = load_backtest_columns(doc)  # {'date': datetime64[ns] array, 'return': float64 array}
+"""
+from .codec import (
+    SERIES_FIELD,
+    LEGACY_FIELD,
+    SCHEMA_VERSION,
+    COLUMN_DTYPES,
+    COLUMN_DEFAULTS,
+    BacktestSeriesError,
+    encode_backtest_series,
+    decode_backtest_series,
+    records_to_columns,
+    columns_to_records,
+    has_backtest_data,
+    load_backtest_columns,
+    backtest_digest,
+    pack_backtest_records,
+    present_backtest_series,
+)
+
+__all__ = [
+    'SERIES_FIELD',
+    'LEGACY_FIELD',
+    'SCHEMA_VERSION',
+    'COLUMN_DTYPES',
+    'COLUMN_DEFAULTS',
+    'BacktestSeriesError',
+    'encode_backtest_series',
+    'decode_backtest_series',
+    'records_to_columns',
+    'columns_to_records',
+    'has_backtest_data',
+    'load_backtest_columns',
+    'backtest_digest',
+    'pack_backtest_records',
+    'present_backtest_series',
+]
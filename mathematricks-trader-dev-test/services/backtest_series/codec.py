@@ -0,0 +1,243 @@
+"""
+Backtest Series Codec
+Columnar encoding of strategy backtest series for the strategies collection.
+
+Strategy documents used to carry raw_data_backtest_full as one dict per day
+({date, return, pnl, notional_value, margin_used, account_equity}). Every reader walked
+that list in Python and parsed dates item by item. backtest_series stores the same data
+as packed little-endian arrays, one BSON binary per column:
+
+    {
+        "schema_version": 1,
+        "length": 1250,
+        "dtypes": {"date": "<M8[ns]", "return": "<f8", ...},
+        "columns": {"date": Binary(...), "return": Binary(...), ...}
+    }
+
+decode_backtest_series() maps each column straight onto a NumPy array (np.frombuffer,
+no per-row Python work, no copy). schema_version gates the decoder, so a future layout
+can be migrated document by document.
+"""
+import hashlib
+import logging
+from typing import Dict, Any, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+from bson import Binary
+
+logger = logging.getLogger(__name__)
+
+SERIES_FIELD = 'backtest_series'
+LEGACY_FIELD = 'raw_data_backtest_full'
+
+SCHEMA_VERSION = 1
+SUPPORTED_SCHEMA_VERSIONS = (1,)
+
+# Column -> stored dtype (explicit little-endian so documents are portable)
+COLUMN_DTYPES: Dict[str, str] = {
+    'date': '<M8[ns]',
+    'return': '<f8',
+    'pnl': '<f8',
+    'notional_value': '<f8',
+    'margin_used': '<f8',
+    'account_equity': '<f8',
+}
+
+# Values assumed for columns a legacy record doesn't have
+COLUMN_DEFAULTS: Dict[str, float] = {
+    'return': 0.0,
+    'pnl': 0.0,
+    'notional_value': 0.0,
+    'margin_used': 0.0,
+    'account_equity': 100000.0,
+}
+
+
+class BacktestSeriesError(ValueError):
+    """Raised when a backtest_series field can't be encoded or decoded"""
+
+
+def _parse_dates(values: Any) -> np.ndarray:
+    """
+    datetime64[ns] array of dates in any ISO 8601 form (mixed within one list is fine);
+    dates with a UTC offset are converted to UTC, naive ones are taken as they are
+    """
+    dates = pd.DatetimeIndex(pd.to_datetime(values, format='ISO8601', utc=True))
+    return dates.tz_convert(None).to_numpy(dtype='datetime64[ns]')
+
+
+def encode_backtest_series(columns: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Encode backtest columns for storage in a strategy document.
+
+    Args:
+        columns: {column: array-like} with 'date' and 'return' required; other columns
+            from COLUMN_DTYPES are optional (unknown columns are rejected)
+
+    Returns:
+        backtest_series sub-document
+
+    Raises:
+        BacktestSeriesError: On missing/unknown columns or mismatched lengths
+    """
+    missing = {'date', 'return'} - set(columns)
+    if missing:
+        raise BacktestSeriesError(f"backtest series needs columns {sorted(missing)}")
+    unknown = set(columns) - set(COLUMN_DTYPES)
+    if unknown:
+        raise BacktestSeriesError(f"Unknown backtest series columns {sorted(unknown)}")
+
+    arrays = {}
+    for name, values in columns.items():
+        if name == 'date':
+            values = _parse_dates(values)
+        arrays[name] = np.ascontiguousarray(values, dtype=COLUMN_DTYPES[name])
+
+    lengths = {name: len(array) for name, array in arrays.items()}
+    if len(set(lengths.values())) != 1:
+        raise BacktestSeriesError(f"Backtest series columns differ in length: {lengths}")
+
+    return {
+        'schema_version': SCHEMA_VERSION,
+        'length': lengths['date'],
+        'dtypes': {name: COLUMN_DTYPES[name] for name in arrays},
+        'columns': {name: Binary(array.tobytes()) for name, array in arrays.items()}
+    }
+
+
+def decode_backtest_series(series: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+    """
+    Decode a backtest_series sub-document into NumPy arrays.
+
+    The arrays are read-only views over the BSON payload ('date' is datetime64[ns]).
+
+    Raises:
+        BacktestSeriesError: On an unsupported schema_version or a corrupt column
+    """
+    version = series.get('schema_version')
+    if version not in SUPPORTED_SCHEMA_VERSIONS:
+        raise BacktestSeriesError(f"Unsupported backtest series schema_version {version!r}")
+
+    length = series.get('length', 0)
+    dtypes = series.get('dtypes', {})
+    arrays = {}
+    for name, payload in series.get('columns', {}).items():
+        array = np.frombuffer(payload, dtype=np.dtype(dtypes.get(name, COLUMN_DTYPES.get(name, '<f8'))))
+        if len(array) != length:
+            raise BacktestSeriesError(f"Column {name} has {len(array)} values, expected {length}")
+        arrays[name] = array
+    return arrays
+
+
+def records_to_columns(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert legacy raw_data_backtest_full records to columns.
+
+    Dates are parsed in one vectorized call (_parse_dates); columns a record set doesn't
+    carry get
+    COLUMN_DEFAULTS, as do individual missing values - except returns, which stay NaN so
+    callers can drop those days.
+    """
+    frame = pd.DataFrame.from_records(records)
+    if 'date' not in frame:
+        raise BacktestSeriesError("backtest records have no 'date' field")
+
+    columns = {'date': _parse_dates(frame['date'])}
+    for name, default in COLUMN_DEFAULTS.items():
+        if name in frame:
+            values = pd.to_numeric(frame[name])
+            if name != 'return':
+                values = values.fillna(default)
+            columns[name] = values.to_numpy(dtype=np.float64)
+        else:
+            columns[name] = np.full(len(frame), default)
+    return columns
+
+
+def columns_to_records(columns: Mapping[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """
+    Legacy record list (date as YYYY-MM-DD) for API consumers of raw_data_backtest_full
+
+    Missing values (NaN returns, NaT dates) become None, so the records serialize as
+    strict JSON.
+    """
+    frame = pd.DataFrame({name: np.asarray(values) for name, values in columns.items()})
+    if 'date' in frame:
+        frame['date'] = frame['date'].dt.strftime('%Y-%m-%d')
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict('records')
+
+
+def has_backtest_data(strategy_doc: Mapping[str, Any]) -> bool:
+    """True if the document carries backtest data in either layout"""
+    return SERIES_FIELD in strategy_doc or LEGACY_FIELD in strategy_doc
+
+
+def load_backtest_columns(strategy_doc: Mapping[str, Any]) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Backtest columns of a strategy document, from backtest_series or (legacy)
+    raw_data_backtest_full.
+
+    Returns:
+        {column: ndarray}, or None if the document has no usable backtest data
+
+    Raises:
+        BacktestSeriesError: If the stored data can't be decoded
+    """
+    series = strategy_doc.get(SERIES_FIELD)
+    if series:
+        return decode_backtest_series(series)
+
+    records = strategy_doc.get(LEGACY_FIELD)
+    if isinstance(records, list) and records and isinstance(records[0], dict):
+        try:
+            return records_to_columns(records)
+        except (KeyError, ValueError, TypeError) as e:
+            raise BacktestSeriesError(f"Invalid {LEGACY_FIELD}: {e}")
+    return None
+
+
+def backtest_digest(strategy_doc: Mapping[str, Any]) -> str:
+    """Content hash of a document's backtest data (either layout)"""
+    series = strategy_doc.get(SERIES_FIELD)
+    if series:
+        digest = hashlib.sha1()
+        for name in sorted(series.get('columns', {})):
+            digest.update(name.encode('utf-8'))
+            digest.update(bytes(series['columns'][name]))
+        return digest.hexdigest()
+    return hashlib.sha1(repr(strategy_doc.get(LEGACY_FIELD) or []).encode('utf-8')).hexdigest()
+
+
+def pack_backtest_records(fields: Dict[str, Any]) -> bool:
+    """
+    Replace a raw_data_backtest_full record list by backtest_series in place (for writes
+    that still send the legacy layout)
+
+    Returns:
+        True if the records were packed (a stored legacy field should then be unset)
+    """
+    records = fields.get(LEGACY_FIELD)
+    if not (isinstance(records, list) and records and isinstance(records[0], dict)):
+        return False
+    try:
+        fields[SERIES_FIELD] = encode_backtest_series(records_to_columns(records))
+    except (KeyError, ValueError, TypeError) as e:
+        raise BacktestSeriesError(f"Invalid {LEGACY_FIELD}: {e}")
+    del fields[LEGACY_FIELD]
+    return True
+
+
+def present_backtest_series(strategy_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Replace backtest_series by the legacy raw_data_backtest_full list in place (for JSON
+    API responses, which can't carry the binary columns)
+    """
+    series = strategy_doc.pop(SERIES_FIELD, None)
+    if series and LEGACY_FIELD not in strategy_doc:
+        try:
+            strategy_doc[LEGACY_FIELD] = columns_to_records(decode_backtest_series(series))
+        except BacktestSeriesError as e:
+            logger.warning(f"⚠️ {strategy_doc.get('strategy_id')}: could not decode {SERIES_FIELD} - {e}")
+    return strategy_doc
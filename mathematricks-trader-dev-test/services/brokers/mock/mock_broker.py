@@ -21,14 +21,14 @@ logger = logging.getLogger(__name__)
 
 # MongoDB connection will be lazy-loaded
 _mongo_client = None
-_trading_accounts_collection = None
+_position_store = None
 
 
-def get_trading_accounts_collection():
-    """Lazy load MongoDB connection for position tracking"""
-    global _mongo_client, _trading_accounts_collection
+def get_position_store():
+    """Lazy load MongoDB connection for position tracking (positions collection)"""
+    global _mongo_client, _position_store
 
-    if _trading_accounts_collection is None:
+    if _position_store is None:
         try:
             # Use MONGODB_URI (same as other services)
             MONGO_URI = os.getenv('MONGODB_URI')
@@ -36,15 +36,17 @@ def get_trading_accounts_collection():
                 logger.warning("MONGODB_URI not set, position tracking disabled")
                 return None
 
+            # Shared position store (services/positions), written by ExecutionService
+            from positions import PositionStore
+
             _mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
-            db = _mongo_client['mathematricks_trading']
-            _trading_accounts_collection = db['trading_accounts']
+            _position_store = PositionStore(_mongo_client['mathematricks_trading'])
             logger.info("✅ Connected to MongoDB for position tracking")
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             return None
 
-    return _trading_accounts_collection
+    return _position_store
 
 
 class MockBroker(AbstractBroker):
@@ -271,7 +273,7 @@ class MockBroker(AbstractBroker):
 
     def get_open_positions(self, account_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        Return open positions from MongoDB trading_accounts collection.
+        Return open positions from the MongoDB positions collection.
 
         Args:
             account_id: Account ID (optional, defaults to self.account_id)
@@ -282,21 +284,14 @@ class MockBroker(AbstractBroker):
         try:
             acc_id = account_id or self.account_id
 
-            # Get MongoDB collection (lazy-loaded)
-            trading_accounts_collection = get_trading_accounts_collection()
-            if trading_accounts_collection is None:
+            # Get position store (lazy-loaded)
+            position_store = get_position_store()
+            if position_store is None:
                 logger.warning("MongoDB not available, returning empty positions")
                 return []
 
-            # Fetch account document from MongoDB
-            account_doc = trading_accounts_collection.find_one({"account_id": acc_id})
-
-            if not account_doc:
-                return []
-
-            # Get open_positions array and filter for OPEN status only
-            all_positions = account_doc.get('open_positions', [])
-            open_positions = [pos for pos in all_positions if pos.get('status') == 'OPEN']
+            # Indexed query for the account's OPEN positions
+            open_positions = position_store.get_open_positions(account_id=acc_id)
 
             # Convert to format expected by AccountDataService
             formatted_positions = []
@@ -4,16 +4,20 @@ The intelligent core for portfolio management, risk assessment, and position siz
 Implements hard margin limits and smart position sizing.
 """
 import os
+import sys
 import logging
 import json
 import time
 from datetime import datetime
 from typing import Dict, Any, Optional
-from google.cloud import pubsub_v1
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import requests
 import threading
+import itertools
+
+# Shared services packages (messaging, positions)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Portfolio constructor imports
 from portfolio_constructor.base import PortfolioConstructor
@@ -26,6 +30,21 @@ from portfolio_constructor.max_hybrid.strategy import MaxHybridConstructor
 # Position manager import
 from position_manager import PositionManager
 
+# Strategy history cache import
+from strategy_history_cache import StrategyHistoryCache
+
+# Ordered signal executor import
+from signal_executor import OrderedSignalExecutor, DeferSignal, SignalTask
+
+# Entry fill index import
+from entry_fill_index import EntryFillIndex
+
+# Lookup cache import
+from lookup_cache import ReadThroughCache
+
+# Pub/Sub transport import (shared services/messaging package)
+from messaging import get_transport
+
 # Margin calculation imports
 from margin_calculation import MarginCalculatorFactory
 from broker_adapter import CerebroBrokerAdapter
@@ -112,6 +131,60 @@ incoming_signals_collection = signals_db['trading_signals']  # Raw signals from
 DEFAULT_ACCOUNT_ID = os.getenv('DEFAULT_ACCOUNT_ID', 'Mock_Paper')
 position_manager = PositionManager(mongo_client, default_account_id=DEFAULT_ACCOUNT_ID)
 
+# Initialize Strategy History Cache (warmed at startup, invalidated on strategy changes)
+STRATEGY_HISTORY_POLL_INTERVAL = float(os.getenv('STRATEGY_HISTORY_POLL_INTERVAL', '60'))
+strategy_history_cache = StrategyHistoryCache(
+    strategies_collection,
+    poll_interval=STRATEGY_HISTORY_POLL_INTERVAL
+)
+
+# Initialize Entry Fill Index (fed by the signal_store change stream; EXITs wake on fills)
+entry_fill_index = EntryFillIndex(signal_store_collection)
+
+# Initialize per-signal lookup caches (strategy documents, deployed capital, account state)
+STRATEGY_DOCUMENT_CACHE_TTL = float(os.getenv('STRATEGY_DOCUMENT_CACHE_TTL', '60'))
+DEPLOYED_CAPITAL_CACHE_TTL = float(os.getenv('DEPLOYED_CAPITAL_CACHE_TTL', '5'))
+ACCOUNT_STATE_CACHE_TTL = float(os.getenv('ACCOUNT_STATE_CACHE_TTL', '2'))
+LOOKUP_CACHE_MAX_ENTRIES = int(os.getenv('LOOKUP_CACHE_MAX_ENTRIES', '1024'))
+strategy_document_cache = ReadThroughCache(
+    "strategy_documents", ttl=STRATEGY_DOCUMENT_CACHE_TTL, max_entries=LOOKUP_CACHE_MAX_ENTRIES
+)
+deployed_capital_cache = ReadThroughCache(
+    "deployed_capital", ttl=DEPLOYED_CAPITAL_CACHE_TTL, max_entries=LOOKUP_CACHE_MAX_ENTRIES
+)
+account_state_cache = ReadThroughCache(
+    "account_state", ttl=ACCOUNT_STATE_CACHE_TTL, max_entries=LOOKUP_CACHE_MAX_ENTRIES
+)
+
+
+def invalidate_strategy_document(strategy_id: Optional[str]):
+    """Strategy change hook: drop one cached strategy document (all if strategy_id is None)"""
+    if strategy_id is None:
+        strategy_document_cache.clear()
+    else:
+        strategy_document_cache.invalidate(strategy_id)
+
+
+def invalidate_position_lookups(entry_doc: Dict[str, Any]):
+    """Entry fill/close hook: positions changed, so deployed capital and account state are stale"""
+    deployed_capital_cache.invalidate(entry_doc.get('strategy_id'))
+    account_state_cache.clear()
+
+
+def get_lookup_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters for the per-signal lookup caches and the allocation memo (for monitoring)"""
+    stats = {
+        cache.name: cache.stats()
+        for cache in (strategy_document_cache, deployed_capital_cache, account_state_cache)
+    }
+    if PORTFOLIO_CONSTRUCTOR is not None:
+        stats['allocation_memo'] = PORTFOLIO_CONSTRUCTOR.allocation_memo_stats()
+    return stats
+
+
+strategy_history_cache.add_change_listener(invalidate_strategy_document)
+entry_fill_index.add_change_listener(invalidate_position_lookups)
+
 # Initialize Broker Adapter for margin calculations
 broker_adapter = CerebroBrokerAdapter(broker_name="IBKR")
 
@@ -149,17 +222,37 @@ def update_signal_store_with_decision(signal_store_id: str, decision_doc: dict):
 # GOOGLE CLOUD PUB/SUB
 # ============================================================================
 
-# Pub/Sub clients (initialized in main block to avoid triggering during imports)
+# Pub/Sub transport (initialized by init_pubsub() to avoid triggering during imports)
 project_id = None
-subscriber = None
-publisher = None
+transport = None
 signals_subscription = None
 trading_orders_topic = None
 order_commands_topic = None
 
+
+def init_pubsub():
+    """Create the Pub/Sub transport (PUBSUB_TRANSPORT=gcp|memory) and resolve topic paths"""
+    global project_id, transport, signals_subscription, trading_orders_topic, order_commands_topic
+    project_id = os.getenv('GCP_PROJECT_ID', 'mathematricks-trader')
+    transport = get_transport()
+    signals_subscription = transport.subscription_path(project_id, 'standardized-signals-sub')
+    trading_orders_topic = transport.topic_path(project_id, 'trading-orders')
+    order_commands_topic = transport.topic_path(project_id, 'order-commands')
+
 # AccountDataService URL
 ACCOUNT_DATA_SERVICE_URL = os.getenv('ACCOUNT_DATA_SERVICE_URL', 'http://localhost:8002')
 
+# Local cache of the approved allocation (downloaded from MongoDB at startup)
+ALLOCATIONS_CACHE_PATH = os.getenv(
+    'ALLOCATIONS_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'current_portfolio_allocation_approved.json')
+)
+
+# Signal processing concurrency: signals for different (strategy, instrument) pairs run in
+# parallel, signals for the same pair run in arrival order
+SIGNAL_WORKERS = int(os.getenv('SIGNAL_WORKERS', '8'))
+SIGNAL_MAX_PENDING = int(os.getenv('SIGNAL_MAX_PENDING', '256'))
+
 
 # ============================================================================
 # CONFIGURATION
@@ -180,6 +273,9 @@ ALLOCATIONS_LOCK = threading.Lock()
 PORTFOLIO_CONSTRUCTOR = None
 CONSTRUCTOR_LOCK = threading.Lock()
 
+# Max age (seconds) of the constructor's memoized allocation - unset = re-solve only on input change
+ALLOCATION_CACHE_TTL = float(os.getenv('ALLOCATION_CACHE_TTL')) if os.getenv('ALLOCATION_CACHE_TTL') else None
+
 
 # ============================================================================
 # LEGACY FUNCTIONS (for backward compatibility with tests)
@@ -226,10 +322,7 @@ def initialize_portfolio_constructor():
 
             # Use cached approved allocations for speed (signals are time-critical)
             # This file is updated by PortfolioBuilder when allocations are approved via frontend
-            allocations_cache_path = os.path.join(
-                os.path.dirname(os.path.abspath(__file__)),
-                'current_portfolio_allocation_approved.json'
-            )
+            allocations_cache_path = ALLOCATIONS_CACHE_PATH
 
             PORTFOLIO_CONSTRUCTOR = MaxHybridConstructor(
                 alpha=0.85,  # 85% Sharpe, 15% CAGR weighting
@@ -240,13 +333,24 @@ def initialize_portfolio_constructor():
                 cagr_target=2.0,  # 200% CAGR target for normalization
                 use_cached_allocations=True,  # ⚡ Use cached allocations (not recalculated - signals are time-critical)
                 allocations_config_path=allocations_cache_path,  # current_portfolio_allocation_approved.json
-                risk_free_rate=0.0
+                risk_free_rate=0.0,
+                allocation_cache_ttl=ALLOCATION_CACHE_TTL  # Re-solve on input change or after TTL
             )
             logger.info("✅ Portfolio Constructor initialized (MaxHybrid)")
 
     return PORTFOLIO_CONSTRUCTOR
 
 
+def invalidate_allocation_memo(strategy_id: Optional[str]):
+    """Strategy change hook: the next signal re-runs the constructor's optimizer"""
+    constructor = PORTFOLIO_CONSTRUCTOR
+    if constructor is not None:
+        constructor.invalidate_allocation_cache()
+
+
+strategy_history_cache.add_change_listener(invalidate_allocation_memo)
+
+
 def load_active_allocations() -> Dict[str, float]:
     """
     Load active portfolio allocations from MongoDB
@@ -298,10 +402,7 @@ def download_allocations_from_mongo_to_cache(update_action: str = "cerebro_resta
         allocations = allocation_doc.get('allocations', {})
 
         # Save to local JSON cache
-        cache_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)),
-            'current_portfolio_allocation_approved.json'
-        )
+        cache_path = ALLOCATIONS_CACHE_PATH
 
         cache_data = {
             "_comment": "Current approved portfolio allocation (downloaded from MongoDB)",
@@ -342,66 +443,17 @@ def load_strategy_histories_from_mongodb() -> Dict[str, Any]:
     """
     Load strategy backtest equity curves from MongoDB.
 
+    Served from the in-process StrategyHistoryCache - documents are only re-parsed
+    when they change (see strategy_history_cache.py).
+
     Returns:
         Dict mapping strategy_id to DataFrame with returns
     """
-    import pandas as pd
-
-    histories = {}
-
     try:
-        # Query all ACTIVE strategies from MongoDB
-        strategies = list(strategies_collection.find({"status": "ACTIVE"}))
-
-        logger.info(f"Loading histories for {len(strategies)} ACTIVE strategies...")
-
-        for strat_doc in strategies:
-            strategy_id = strat_doc.get('strategy_id')
-
-            if not strategy_id:
-                continue
-
-            # Try to extract backtest equity curve from raw_data_backtest_full
-            if 'raw_data_backtest_full' in strat_doc:
-                raw_data = strat_doc['raw_data_backtest_full']
-
-                # Should be a list of dicts with 'date', 'return', 'account_equity', etc
-                if isinstance(raw_data, list) and len(raw_data) > 0:
-                    try:
-                        # Extract returns from backtest data
-                        dates = [pd.to_datetime(item['date']) for item in raw_data]
-                        returns = [item.get('return', 0) for item in raw_data]
-
-                        # Create DataFrame
-                        df = pd.DataFrame({
-                            'returns': returns  # Note: plural 'returns' to match MaxHybrid expectation
-                        }, index=dates)
-
-                        # Remove any NaN values
-                        df = df.dropna()
-
-                        if len(df) > 0:
-                            histories[strategy_id] = df
-                            logger.info(f"  ✅ {strategy_id}: Loaded {len(df)} backtest returns")
-                        else:
-                            logger.warning(f"  ⚠️  {strategy_id}: Backtest data produced zero valid returns")
-
-                    except (KeyError, ValueError, TypeError) as e:
-                        logger.error(f"  ❌ {strategy_id}: Failed to parse backtest data - {e}")
-                else:
-                    logger.warning(f"  ⚠️  {strategy_id}: raw_data_backtest_full is empty or invalid format")
-            else:
-                logger.warning(f"  ⚠️  {strategy_id}: No raw_data_backtest_full field")
-
-        if histories:
-            logger.info(f"✅ Successfully loaded {len(histories)} strategy histories")
-        else:
-            logger.warning("⚠️  NO strategy histories loaded - optimizer will have no data to work with")
-
+        return strategy_history_cache.get_histories()
     except Exception as e:
         logger.error(f"Error loading strategy histories: {e}", exc_info=True)
-
-    return histories
+        return {}
 
 
 # ============================================================================
@@ -421,9 +473,8 @@ def get_strategy_metadata(strategy_id: str) -> Dict[str, Any]:
             - estimated_position_margin
     """
     try:
-        strategy = strategies_collection.find_one({"strategy_id": strategy_id})
+        strategy = get_strategy_document(strategy_id)
         if not strategy:
-            logger.warning(f"Strategy {strategy_id} not found in MongoDB")
             return {
                 "estimated_avg_positions": 3.0,  # Default
                 "median_margin_pct": 0.5,  # 50% default
@@ -448,6 +499,7 @@ def get_strategy_metadata(strategy_id: str) -> Dict[str, Any]:
 def get_strategy_document(strategy_id: str) -> Optional[Dict[str, Any]]:
     """
     Get full strategy document from MongoDB including accounts field.
+    Read through strategy_document_cache; the returned dict is shared - do not mutate it.
 
     Args:
         strategy_id: Strategy identifier
@@ -456,7 +508,10 @@ def get_strategy_document(strategy_id: str) -> Optional[Dict[str, Any]]:
         Strategy document dict or None if not found
     """
     try:
-        strategy = strategies_collection.find_one({"strategy_id": strategy_id})
+        strategy = strategy_document_cache.get(
+            strategy_id,
+            lambda: strategies_collection.find_one({"strategy_id": strategy_id})
+        )
         if not strategy:
             logger.warning(f"Strategy {strategy_id} not found in MongoDB")
             return None
@@ -557,7 +612,8 @@ def estimate_ibkr_margin(signal: Dict[str, Any], quantity: float, price: float)
 def get_deployed_capital(strategy_id: str) -> Dict[str, Any]:
     """
     Get currently deployed capital for a strategy from OPEN positions (not pending orders).
-    Uses PositionManager for accurate position tracking.
+    Uses PositionManager for accurate position tracking, read through deployed_capital_cache
+    (invalidated when an entry for the strategy fills or closes).
 
     Args:
         strategy_id: Strategy ID to check
@@ -570,7 +626,10 @@ def get_deployed_capital(strategy_id: str) -> Dict[str, Any]:
             - position_count: Number of open positions
     """
     try:
-        return position_manager.get_deployed_capital(strategy_id)
+        return deployed_capital_cache.get(
+            strategy_id,
+            lambda: position_manager.get_deployed_capital(strategy_id)
+        )
     except Exception as e:
         logger.error(f"Error getting deployed capital for {strategy_id}: {e}")
         return {
@@ -587,7 +646,15 @@ def get_deployed_capital(strategy_id: str) -> Dict[str, Any]:
 
 def get_account_state(account_name: str) -> Optional[Dict[str, Any]]:
     """
-    Query AccountDataService for current account state
+    Query AccountDataService for current account state (read through account_state_cache;
+    failures are not cached)
+    """
+    return account_state_cache.get(account_name, lambda: fetch_account_state(account_name))
+
+
+def fetch_account_state(account_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Query AccountDataService for current account state (uncached)
     """
     try:
         response = requests.get(f"{ACCOUNT_DATA_SERVICE_URL}/api/v1/account/{account_name}/state")
@@ -620,7 +687,7 @@ def publish_cancel_command(order_id: str, reason: str = ""):
             'timestamp': datetime.utcnow().isoformat()
         }
         message_data = json.dumps(command_data, default=str).encode('utf-8')
-        future = publisher.publish(order_commands_topic, message_data)
+        future = transport.publish(order_commands_topic, message_data)
         message_id = future.result()
         logger.info(f"✅ Published cancel command for order {order_id}: {message_id}")
         return True
@@ -695,7 +762,11 @@ def opposite_direction(direction: str) -> str:
 
 def find_open_entry_signal(strategy_id: str, instrument: str, direction: str) -> Optional[Dict[str, Any]]:
     """
-    Query signal_store for open entry signal
+    Find the open entry signal for an EXIT
+
+    Served from the in-memory entry fill index while its change stream is live. On an
+    index miss (or without the index) it queries signal_store: the change stream feeds
+    the index asynchronously, so a fill written just now may not be indexed yet.
 
     Args:
         strategy_id: Strategy identifier
@@ -709,14 +780,18 @@ def find_open_entry_signal(strategy_id: str, instrument: str, direction: str) ->
         # For an EXIT signal with direction SHORT, we need to find ENTRY with direction LONG (and vice versa)
         entry_direction = opposite_direction(direction)
 
-        entry_signal = signal_store_collection.find_one({
-            "strategy_id": strategy_id,
-            "instrument": instrument,
-            "direction": entry_direction,
-            "position_status": "OPEN",
-            "cerebro_decision.decision": "APPROVE",
-            "execution.status": "FILLED"
-        })
+        entry_signal = None
+        if entry_fill_index.is_live:
+            entry_signal = entry_fill_index.find_open_entry(strategy_id, instrument, entry_direction)
+        if entry_signal is None:
+            entry_signal = signal_store_collection.find_one({
+                "strategy_id": strategy_id,
+                "instrument": instrument,
+                "direction": entry_direction,
+                "position_status": "OPEN",
+                "cerebro_decision.decision": "APPROVE",
+                "execution.status": "FILLED"
+            })
 
         if entry_signal:
             logger.info(f"✅ Found open entry signal: {entry_signal.get('signal_id')} for {instrument} {entry_direction}")
@@ -730,115 +805,160 @@ def find_open_entry_signal(strategy_id: str, instrument: str, direction: str) ->
         return None
 
 
-def wait_for_entry_fill(strategy_id: str, instrument: str, direction: str, max_wait: int = 30) -> Optional[Dict[str, Any]]:
+def find_pending_entry_signal(strategy_id: str, instrument: str, entry_direction: str) -> Optional[Dict[str, Any]]:
     """
-    Wait for entry order to fill with exponential backoff retry logic.
+    Find an approved ENTRY whose order has not filled yet (index first, then signal_store)
+
+    An index miss falls through to signal_store: the index is fed asynchronously by the
+    change stream, so an APPROVE cerebro has just written may not be indexed yet.
+
+    Args:
+        strategy_id: Strategy identifier
+        instrument: Instrument name
+        entry_direction: Direction of the ENTRY signal
+
+    Returns:
+        Pending entry signal document, or None if not found
+    """
+    if entry_fill_index.is_live:
+        pending_entry = entry_fill_index.find_pending_entry(strategy_id, instrument, entry_direction)
+        if pending_entry is not None:
+            return pending_entry
+
+    # Note: execution field is null until order fills, position_status is null until filled
+    return signal_store_collection.find_one({
+        "strategy_id": strategy_id,
+        "instrument": instrument,
+        "direction": entry_direction,
+        "cerebro_decision.decision": "APPROVE",
+        "position_status": {"$ne": "CLOSED"},  # Include null, "OPEN", and any other non-CLOSED status
+        "$or": [
+            {"execution": None},  # Order not yet sent to execution_service
+            {"execution": {"$exists": False}},  # No execution field at all
+            {"execution.status": {"$nin": ["FILLED"]}}  # Order in-flight but not filled
+        ]
+    })
+
+
+ENTRY_FILL_RETRY_DELAYS = [2, 4, 8, 16]  # Seconds between fill re-checks without the fill index (max 30s total)
+
+
+def wait_for_entry_fill(strategy_id: str, instrument: str, direction: str, max_wait: int = 30,
+                        retry_state: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Wait for entry order to fill.
 
     This handles the case where EXIT signals arrive before ENTRY orders fill in the broker.
     Instead of rejecting the EXIT signal, we wait for the entry to fill.
 
+    The wait does not sleep: while the entry is still pending this raises DeferSignal and
+    the signal executor re-runs the signal later, without holding a worker thread. Signals
+    for the same strategy/instrument queue behind it.
+    - Entry fill index live: a fill listener wakes the signal the moment the fill lands
+      in signal_store; max_wait is only the timeout
+    - Otherwise: re-checks signal_store with exponential backoff (2s, 4s, 8s, 16s)
+    retry_state carries the wait start, retry count and listener across re-runs.
+
     Args:
         strategy_id: Strategy identifier
         instrument: Instrument name
         direction: Direction of the EXIT signal (we need opposite for ENTRY)
         max_wait: Maximum total wait time in seconds (default: 30)
+        retry_state: Per-signal state preserved across deferrals (SignalTask.state)
 
     Returns:
         Entry signal document from signal_store if filled, or None if timeout
+
+    Raises:
+        DeferSignal: Entry order still pending and max_wait not reached yet
     """
-    logger.info(f"⏳ Waiting for entry order to fill (max {max_wait}s)...")
+    if retry_state is None:
+        retry_state = {}
+    entry_direction = opposite_direction(direction)
+
+    # A previous run's fill listener is either spent (it woke us) or stale (timer fired)
+    listener = retry_state.pop('fill_listener', None)
+    if listener is not None:
+        entry_fill_index.remove_fill_listener(strategy_id, instrument, entry_direction, listener)
+
+    first_check = 'fill_wait_started' not in retry_state
+    if first_check:
+        retry_state['fill_wait_started'] = time.monotonic()
+        logger.info(f"⏳ Waiting for entry order to fill (max {max_wait}s)...")
+    total_waited = time.monotonic() - retry_state['fill_wait_started']
 
-    # First check if entry signal already filled
+    # Check if entry signal already filled
     entry_signal = find_open_entry_signal(strategy_id, instrument, direction)
     if entry_signal:
-        logger.info(f"✅ Entry already filled, proceeding with exit")
+        if first_check:
+            logger.info(f"✅ Entry already filled, proceeding with exit")
+        else:
+            logger.info(f"✅ Entry filled after {total_waited:.1f}s wait! Proceeding with exit")
         return entry_signal
 
-    # Check if there's a pending ENTRY order
-    entry_direction = opposite_direction(direction)
-
     try:
-        # DEBUG: First let's see what entry signals exist for this instrument (newest first)
-        debug_query = {
-            "strategy_id": strategy_id,
-            "instrument": instrument,
-            "direction": entry_direction
-        }
-        all_entries = list(signal_store_collection.find(debug_query).sort("created_at", -1).limit(5))
-        logger.info(f"🔍 DEBUG: Found {len(all_entries)} entry signals for {strategy_id}/{instrument}/{entry_direction} (showing 5 most recent)")
-        for idx, entry in enumerate(all_entries, 1):
-            logger.info(f"   Entry {idx}: signal_id={entry.get('signal_id')}")
-            logger.info(f"            cerebro_decision.action={entry.get('cerebro_decision', {}).get('action')}")
-            logger.info(f"            position_status={entry.get('position_status')}")
-            logger.info(f"            execution.status={entry.get('execution', {}).get('status') if entry.get('execution') else None}")
-            logger.info(f"            execution (full)={entry.get('execution')}")
-
-        # Query for pending ENTRY order in signal_store (cerebro approved but not filled yet)
-        # Note: execution field is null until order fills, position_status is null until filled
-        pending_entry = signal_store_collection.find_one({
-            "strategy_id": strategy_id,
-            "instrument": instrument,
-            "direction": entry_direction,
-            "cerebro_decision.decision": "APPROVE",
-            "position_status": {"$ne": "CLOSED"},  # Include null, "OPEN", and any other non-CLOSED status
-            "$or": [
-                {"execution": None},  # Order not yet sent to execution_service
-                {"execution": {"$exists": False}},  # No execution field at all
-                {"execution.status": {"$nin": ["FILLED"]}}  # Order in-flight but not filled
-            ]
-        })
-
-        if not pending_entry:
-            logger.warning(f"⚠️ No pending entry order found for {strategy_id}/{instrument}/{entry_direction}")
-            logger.warning(f"   Cannot wait for fill - rejecting EXIT signal")
-            return None
+        if first_check:
+            # Check if there's a pending ENTRY order (cerebro approved but not filled yet)
+            pending_entry = find_pending_entry_signal(strategy_id, instrument, entry_direction)
 
-        logger.info(f"📋 Found pending entry order: {pending_entry.get('signal_id')}")
-        logger.info(f"   Status: {pending_entry.get('execution', {}).get('status', 'UNKNOWN')}")
+            if not pending_entry:
+                logger.warning(f"⚠️ No pending entry order found for {strategy_id}/{instrument}/{entry_direction}")
+                logger.warning(f"   Cannot wait for fill - rejecting EXIT signal")
+                return None
 
-        # Retry with exponential backoff: 2s, 4s, 8s, 16s (max 30s total)
-        retry_delays = [2, 4, 8, 16]
-        total_waited = 0
+            logger.info(f"📋 Found pending entry order: {pending_entry.get('signal_id')}")
+            logger.info(f"   Status: {(pending_entry.get('execution') or {}).get('status', 'UNKNOWN')}")
+            retry_state['pending_entry_signal_id'] = pending_entry.get('signal_id')
 
-        for i, delay in enumerate(retry_delays, 1):
-            # Cap delay to not exceed max_wait
-            actual_delay = min(delay, max_wait - total_waited)
-            if actual_delay <= 0:
-                break
+        remaining = max_wait - total_waited
+        reason = f"waiting for entry fill {strategy_id}/{instrument}/{entry_direction}"
 
-            logger.info(f"⏳ Retry {i}/{len(retry_delays)}: Waiting {actual_delay}s for entry to fill...")
-            time.sleep(actual_delay)
-            total_waited += actual_delay
+        if remaining > 0 and entry_fill_index.is_live:
+            def wake_on_fill(entry_doc, key=(strategy_id, instrument)):
+                signal_executor.wake(key)
 
-            # Check if entry filled during wait
-            entry_signal = find_open_entry_signal(strategy_id, instrument, direction)
+            # Register before re-checking so a fill landing in between still wakes us
+            entry_fill_index.add_fill_listener(strategy_id, instrument, entry_direction, wake_on_fill)
+            entry_signal = entry_fill_index.find_open_entry(strategy_id, instrument, entry_direction)
             if entry_signal:
-                logger.info(f"✅ Entry filled after {total_waited}s wait! Proceeding with exit")
+                entry_fill_index.remove_fill_listener(strategy_id, instrument, entry_direction, wake_on_fill)
+                logger.info(f"✅ Entry filled after {total_waited:.1f}s wait! Proceeding with exit")
                 return entry_signal
 
-            # Check if we've exceeded max wait time
-            if total_waited >= max_wait:
-                logger.error(f"⏰ Timeout after {total_waited}s - entry order still not filled")
-                break
+            retry_state['fill_listener'] = wake_on_fill
+            logger.info(f"⏳ Waiting up to {remaining:.0f}s for entry fill notification...")
+            raise DeferSignal(remaining, reason=reason)
+
+        retry = retry_state.get('fill_retry', 0)
+        if remaining > 0 and retry < len(ENTRY_FILL_RETRY_DELAYS):
+            # Cap delay to not exceed max_wait
+            actual_delay = min(ENTRY_FILL_RETRY_DELAYS[retry], remaining)
+            retry_state['fill_retry'] = retry + 1
+            logger.info(f"⏳ Retry {retry + 1}/{len(ENTRY_FILL_RETRY_DELAYS)}: Re-checking entry fill in {actual_delay:.0f}s...")
+            raise DeferSignal(actual_delay, reason=reason)
+
+        logger.error(f"⏰ Timeout after {total_waited:.1f}s - entry order still not filled")
 
         # Timeout - send critical alert
         logger.critical(f"🚨 CRITICAL: EXIT signal timeout waiting for entry fill")
         logger.critical(f"   Strategy: {strategy_id}")
         logger.critical(f"   Instrument: {instrument}")
         logger.critical(f"   Direction: {entry_direction}")
-        logger.critical(f"   Pending Entry Signal: {pending_entry.get('signal_id')}")
-        logger.critical(f"   Waited: {total_waited}s")
+        logger.critical(f"   Pending Entry Signal: {retry_state.get('pending_entry_signal_id')}")
+        logger.critical(f"   Waited: {total_waited:.1f}s")
         logger.critical(f"   Action Required: Manual intervention needed to close position")
 
         # TODO: Send Telegram notification
         # send_telegram_alert(
         #     f"🚨 EXIT signal timeout for {strategy_id}/{instrument}\n"
-        #     f"Entry order {pending_entry.get('signal_id')} still pending after {total_waited}s\n"
+        #     f"Entry order {retry_state.get('pending_entry_signal_id')} still pending after {total_waited:.1f}s\n"
         #     f"Manual intervention required"
         # )
 
         return None
 
+    except DeferSignal:
+        raise
     except Exception as e:
         logger.error(f"❌ Error in wait_for_entry_fill: {e}")
         return None
@@ -924,7 +1044,7 @@ def build_portfolio_context(account_state: Dict[str, Any]) -> PortfolioContext:
     with ALLOCATIONS_LOCK:
         current_allocations = dict(ACTIVE_ALLOCATIONS)
 
-    # Load strategy histories from MongoDB (backtest data)
+    # Load strategy histories (cached backtest data - no MongoDB round-trip per signal)
     strategy_histories = load_strategy_histories_from_mongodb()
 
     # Build context
@@ -1153,9 +1273,15 @@ def log_detailed_calculation_math(signal: Dict[str, Any], context, decision_obj,
 # SIGNAL PROCESSING
 # ============================================================================
 
-def process_signal_with_constructor(signal: Dict[str, Any]):
+def process_signal_with_constructor(signal: Dict[str, Any], retry_state: Optional[Dict[str, Any]] = None):
     """
     Process signal using Portfolio Constructor (NEW APPROACH)
+
+    Args:
+        signal: Standardized signal dict
+        retry_state: Per-signal state kept across DeferSignal re-runs (EXIT fill waits).
+            Nothing is written before the fill wait, so a deferred signal is simply
+            processed again from the top.
     """
     signal_id = signal.get('signal_id')
     signal_store_id = signal.get('mathematricks_signal_id')  # Extract from Pub/Sub message (mongodb_watcher created this)
@@ -1300,7 +1426,8 @@ def process_signal_with_constructor(signal: Dict[str, Any]):
                     strategy_id=signal.get('strategy_id'),
                     instrument=signal.get('instrument'),
                     direction=signal.get('direction'),
-                    max_wait=30
+                    max_wait=30,
+                    retry_state=retry_state
                 )
 
         if entry_signal and entry_signal.get('execution') and entry_signal['execution'].get('quantity_filled'):
@@ -1621,10 +1748,13 @@ def process_signal_with_constructor(signal: Dict[str, Any]):
         trading_orders_collection.insert_one(trading_order)
         logger.info(f"✅ Trading order created: {order_id} for {final_quantity_rounded} shares")
 
+        # The new order changes the account's open orders/margin for the next signal
+        account_state_cache.invalidate(account_name)
+
         # Publish to Pub/Sub
         try:
             message_data = json.dumps(trading_order, default=str).encode('utf-8')
-            future = publisher.publish(trading_orders_topic, message_data)
+            future = transport.publish(trading_orders_topic, message_data)
             future.result(timeout=5)
             logger.info(f"✅ Order published to Pub/Sub topic")
 
@@ -1640,30 +1770,69 @@ def process_signal_with_constructor(signal: Dict[str, Any]):
 # PUB/SUB SUBSCRIBER
 # ============================================================================
 
-def signals_callback(message):
+LOOKUP_CACHE_STATS_EVERY = 100  # Log lookup cache counters every N processed signals
+processed_signal_count = itertools.count(1)
+
+
+def process_signal_task(task: SignalTask):
     """
-    Callback for standardized signals from Pub/Sub
+    Signal executor handler: process one signal (re-run after a DeferSignal)
     """
+    data = task.payload
     try:
-        data = json.loads(message.data.decode('utf-8'))
-        logger.info(f"Received signal: {data.get('signal_id')}")
+        if task.attempts == 1:
+            logger.info(f"Received signal: {data.get('signal_id')}")
 
         # Use new portfolio constructor approach
-        process_signal_with_constructor(data)
+        process_signal_with_constructor(data, retry_state=task.state)
 
-        message.ack()
+        if next(processed_signal_count) % LOOKUP_CACHE_STATS_EVERY == 0:
+            summary = ", ".join(
+                f"{name}: {stats['hits']} hits / {stats['misses']} misses"
+                for name, stats in get_lookup_cache_stats().items()
+            )
+            logger.info(f"📊 Lookup cache stats - {summary}")
 
+    except DeferSignal:
+        raise
     except Exception as e:
-        signal_id = data.get('signal_id', 'UNKNOWN') if 'data' in locals() else 'UNKNOWN'
+        signal_id = data.get('signal_id', 'UNKNOWN')
         logger.error(f"🚨 CRITICAL ERROR processing signal {signal_id}: {str(e)}", exc_info=True)
-        logger.error(f"Signal data: {data if 'data' in locals() else 'Not available'}")
+        logger.error(f"Signal data: {data}")
         logger.error(f"Error type: {type(e).__name__}")
         logger.error(f"Error details: {e.args}")
 
         # IMPORTANT: ACK the message to prevent infinite redelivery loop
         # The failsafe in execution service will catch any duplicate attempts
         logger.warning(f"⚠️ ACKing failed signal {signal_id} to prevent redelivery loop")
+
+
+signal_executor = OrderedSignalExecutor(
+    handler=process_signal_task,
+    max_workers=SIGNAL_WORKERS,
+    max_pending=SIGNAL_MAX_PENDING,
+    name="cerebro-signal"
+)
+
+
+def signals_callback(message):
+    """
+    Callback for standardized signals from Pub/Sub
+
+    Hands the signal to the ordered executor and returns; the message is ACKed once the
+    signal has been fully processed (including any deferred fill wait).
+    """
+    try:
+        data = json.loads(message.data.decode('utf-8'))
+    except Exception as e:
+        logger.error(f"🚨 CRITICAL ERROR decoding signal message: {str(e)}", exc_info=True)
+        logger.warning(f"⚠️ ACKing undecodable signal message to prevent redelivery loop")
         message.ack()
+        return
+
+    # Same strategy + instrument => processed in arrival order (EXIT after ENTRY)
+    key = (data.get('strategy_id'), data.get('instrument'))
+    signal_executor.submit(key, data, on_done=message.ack)
 
 
 def start_signal_subscriber():
@@ -1672,7 +1841,12 @@ def start_signal_subscriber():
     """
     while True:
         try:
-            streaming_pull_future = subscriber.subscribe(signals_subscription, callback=signals_callback)
+            streaming_pull_future = transport.subscribe(
+                signals_subscription,
+                callback=signals_callback,
+                # Don't lease more messages than the executor will accept
+                max_messages=SIGNAL_MAX_PENDING
+            )
             logger.info("CerebroService listening for signals...")
             streaming_pull_future.result()  # Blocks until error
         except Exception as e:
@@ -1693,13 +1867,8 @@ def start_signal_subscriber():
 if __name__ == "__main__":
     logger.info("Starting Cerebro Service (Pub/Sub Only)")
 
-    # Initialize Pub/Sub clients
-    project_id = os.getenv('GCP_PROJECT_ID', 'mathematricks-trader')
-    subscriber = pubsub_v1.SubscriberClient()
-    publisher = pubsub_v1.PublisherClient()
-    signals_subscription = subscriber.subscription_path(project_id, 'standardized-signals-sub')
-    trading_orders_topic = publisher.topic_path(project_id, 'trading-orders')
-    order_commands_topic = publisher.topic_path(project_id, 'order-commands')
+    # Initialize Pub/Sub transport
+    init_pubsub()
 
     # Download current allocation from MongoDB to local cache (for fast signal processing)
     download_allocations_from_mongo_to_cache(update_action="cerebro_restart")
@@ -1710,5 +1879,12 @@ if __name__ == "__main__":
     # Load allocations
     reload_allocations()
 
+    # Warm strategy history cache and watch for strategy document changes
+    strategy_history_cache.warm()
+    strategy_history_cache.start_watcher()
+
+    # Index pending/open ENTRY signals from the signal_store change stream
+    entry_fill_index.start_watcher()
+
     # Start signal subscriber (BLOCKS)
     start_signal_subscriber()
@@ -0,0 +1,311 @@
+"""
+Entry Fill Index Module
+In-memory index of open (filled) and pending ENTRY signals, fed by the signal_store
+change stream.
+
+EXIT signals need the filled ENTRY they close. Finding it used to mean querying
+signal_store, and when the EXIT arrived before the fill, polling it with 2/4/8/16s
+back-off. The execution service writes every fill into signal_store (execution.status
+= FILLED, position_status = OPEN), so tailing that collection gives cerebro a live view:
+- find_open_entry() / find_pending_entry() are dict lookups per
+  (strategy_id, instrument, direction)
+- add_fill_listener() fires the moment an ENTRY fill lands, so a waiting EXIT can be
+  woken instead of re-checking on a timer
+
+While the change stream is not connected (e.g. standalone MongoDB) is_live is False and
+callers fall back to querying signal_store directly. They also query it on an index
+miss: change events arrive a moment after the write, so a just-written entry may not be
+indexed yet.
+"""
+from typing import Dict, Any, Optional, Callable, List, Tuple
+import logging
+import threading
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+EntryKey = Tuple[Optional[str], Optional[str], Optional[str]]  # (strategy_id, instrument, direction)
+
+# Fields kept per indexed ENTRY signal
+ENTRY_PROJECTION = {
+    "signal_id": 1, "strategy_id": 1, "instrument": 1, "direction": 1,
+    "position_status": 1, "cerebro_decision.decision": 1, "execution": 1, "created_at": 1
+}
+
+# Approved ENTRY signals that are pending or open (anything not CLOSED)
+ACTIVE_ENTRY_QUERY = {
+    "cerebro_decision.decision": "APPROVE",
+    "position_status": {"$ne": "CLOSED"}
+}
+
+STATE_OPEN = 'OPEN'
+STATE_PENDING = 'PENDING'
+
+
+def classify_entry(doc: Dict[str, Any]) -> Optional[str]:
+    """
+    Index state of a signal_store document.
+
+    Returns:
+        STATE_OPEN for an approved, filled, open entry, STATE_PENDING for an approved
+        entry whose order has not filled yet, None for anything else
+    """
+    if (doc.get('cerebro_decision') or {}).get('decision') != 'APPROVE':
+        return None
+    if doc.get('position_status') == 'CLOSED':
+        return None
+
+    execution = doc.get('execution') or {}
+    if execution.get('status') == 'FILLED':
+        return STATE_OPEN if doc.get('position_status') == 'OPEN' else None
+    return STATE_PENDING
+
+
+class EntryFillIndex:
+    """
+    Live index of pending/open ENTRY signals keyed by (strategy_id, instrument, direction).
+
+    Key responsibilities:
+    - Warm from signal_store and apply every change stream event
+    - O(1) lookup of the oldest open (or pending) entry for a key
+    - One-shot fill listeners per key
+    """
+
+    def __init__(self, signal_store_collection):
+        """
+        Initialize EntryFillIndex.
+
+        Args:
+            signal_store_collection: MongoDB signal_store collection
+        """
+        self.signal_store_collection = signal_store_collection
+        self._open: Dict[EntryKey, Dict[Any, Dict[str, Any]]] = {}  # key -> {_id: doc}, oldest first
+        self._pending: Dict[EntryKey, Dict[Any, Dict[str, Any]]] = {}
+        self._doc_keys: Dict[Any, Tuple[EntryKey, str]] = {}  # _id -> (key, state)
+        self._listeners: Dict[EntryKey, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._change_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.RLock()
+        self._live = False
+        self._watcher_thread = None
+        self._stop_event = threading.Event()
+
+    @property
+    def is_live(self) -> bool:
+        """True while the change stream is connected and the index is authoritative"""
+        return self._live
+
+    @staticmethod
+    def entry_key(doc: Dict[str, Any]) -> EntryKey:
+        return doc.get('strategy_id'), doc.get('instrument'), doc.get('direction')
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def find_open_entry(self, strategy_id: str, instrument: str, direction: str) -> Optional[Dict[str, Any]]:
+        """Oldest approved, filled, open ENTRY for the key (direction = ENTRY direction)"""
+        with self._lock:
+            entries = self._open.get((strategy_id, instrument, direction))
+            return next(iter(entries.values())) if entries else None
+
+    def find_pending_entry(self, strategy_id: str, instrument: str, direction: str) -> Optional[Dict[str, Any]]:
+        """Oldest approved ENTRY for the key whose order has not filled yet"""
+        with self._lock:
+            entries = self._pending.get((strategy_id, instrument, direction))
+            return next(iter(entries.values())) if entries else None
+
+    def add_fill_listener(self, strategy_id: str, instrument: str, direction: str,
+                          callback: Callable[[Dict[str, Any]], None]):
+        """
+        Call callback(entry_doc) once, the next time an ENTRY for the key becomes open.
+        Register before re-checking find_open_entry() so a fill in between is not missed.
+        """
+        with self._lock:
+            self._listeners.setdefault((strategy_id, instrument, direction), []).append(callback)
+
+    def remove_fill_listener(self, strategy_id: str, instrument: str, direction: str,
+                             callback: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            listeners = self._listeners.get((strategy_id, instrument, direction))
+            if listeners and callback in listeners:
+                listeners.remove(callback)
+                if not listeners:
+                    del self._listeners[(strategy_id, instrument, direction)]
+
+    def add_change_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Call callback(entry_doc) whenever an ENTRY is opened, filled or closed/removed
+        (i.e. whenever strategy positions may have changed).
+        """
+        self._change_listeners.append(callback)
+
+    def _notify_change(self, doc: Dict[str, Any]):
+        for callback in self._change_listeners:
+            try:
+                callback(doc)
+            except Exception as e:
+                logger.error(f"❌ Entry change listener failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'live': self._live,
+                'open_entries': sum(len(entries) for entries in self._open.values()),
+                'pending_entries': sum(len(entries) for entries in self._pending.values()),
+                'listeners': sum(len(listeners) for listeners in self._listeners.values())
+            }
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def _remove(self, doc_id) -> Optional[EntryKey]:
+        """Drop a document from the index (caller holds the lock); returns its key"""
+        previous = self._doc_keys.pop(doc_id, None)
+        if previous is None:
+            return None
+        key, state = previous
+        bucket = self._open if state == STATE_OPEN else self._pending
+        entries = bucket.get(key)
+        if entries is not None:
+            entries.pop(doc_id, None)
+            if not entries:
+                del bucket[key]
+        return key
+
+    def apply_document(self, doc: Dict[str, Any]):
+        """Insert/update/remove one signal_store document and fire fill listeners"""
+        doc_id = doc.get('_id')
+        state = classify_entry(doc)
+        key = self.entry_key(doc)
+        fired = []
+
+        with self._lock:
+            previous = self._doc_keys.get(doc_id)
+            if previous == (key, state):
+                # Same bucket - refresh the stored fields in place (keeps ordering)
+                bucket = self._open if state == STATE_OPEN else self._pending
+                bucket[key][doc_id] = doc
+                return
+
+            removed = self._remove(doc_id)
+            if state is not None:
+                bucket = self._open if state == STATE_OPEN else self._pending
+                bucket.setdefault(key, {})[doc_id] = doc
+                self._doc_keys[doc_id] = (key, state)
+
+                if state == STATE_OPEN:
+                    fired = self._listeners.pop(key, [])
+
+        if removed is None and state is None:
+            return
+        self._notify_change(doc)
+
+        for callback in fired:
+            try:
+                callback(doc)
+            except Exception as e:
+                logger.error(f"❌ Entry fill listener failed for {key}: {e}")
+
+    @staticmethod
+    def _project(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep only the ENTRY_PROJECTION fields of a full change stream document"""
+        projected = {'_id': doc.get('_id')}
+        for field in ENTRY_PROJECTION:
+            if '.' not in field:
+                projected[field] = doc.get(field)
+        decision = (doc.get('cerebro_decision') or {}).get('decision')
+        projected['cerebro_decision'] = {'decision': decision} if decision else None
+        return projected
+
+    def remove_document(self, doc_id):
+        with self._lock:
+            key = self._remove(doc_id)
+        if key is not None:
+            strategy_id, instrument, direction = key
+            self._notify_change({'_id': doc_id, 'strategy_id': strategy_id,
+                                 'instrument': instrument, 'direction': direction})
+
+    def warm(self) -> int:
+        """
+        Rebuild the index from signal_store.
+
+        Returns:
+            Number of pending/open entries indexed
+        """
+        docs = list(
+            self.signal_store_collection.find(ACTIVE_ENTRY_QUERY, ENTRY_PROJECTION).sort("_id", 1)
+        )
+        with self._lock:
+            self._open = {}
+            self._pending = {}
+            self._doc_keys = {}
+        for doc in docs:
+            self.apply_document(doc)
+
+        stats = self.stats()
+        logger.info(f"✅ Entry fill index warmed: {stats['open_entries']} open, {stats['pending_entries']} pending entries")
+        return stats['open_entries'] + stats['pending_entries']
+
+    def _handle_change(self, change: Dict[str, Any]):
+        operation = change.get('operationType')
+        if operation == 'delete':
+            self.remove_document(change.get('documentKey', {}).get('_id'))
+        elif operation in ('insert', 'update', 'replace'):
+            doc = change.get('fullDocument')
+            if doc:
+                self.apply_document(self._project(doc))
+            else:
+                # Document deleted before the lookup - nothing left to index
+                self.remove_document(change.get('documentKey', {}).get('_id'))
+        elif operation in ('drop', 'rename', 'invalidate'):
+            logger.warning(f"⚠️  signal_store {operation} event - rebuilding entry fill index")
+            self.warm()
+
+    # ------------------------------------------------------------------
+    # Background watcher
+    # ------------------------------------------------------------------
+
+    def _watch_loop(self):
+        """Tail signal_store; mark the index live only while the stream is open"""
+        while not self._stop_event.is_set():
+            try:
+                with self.signal_store_collection.watch(full_document='updateLookup') as stream:
+                    # Stream is open before warming, so no fill between the two is lost
+                    self.warm()
+                    self._live = True
+                    logger.info("👀 Watching signal_store for entry fills...")
+                    while not self._stop_event.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            self._stop_event.wait(0.1)
+                            continue
+                        self._handle_change(change)
+
+            except PyMongoError as e:
+                was_live = self._live
+                self._live = False
+                if not was_live:
+                    logger.warning(f"⚠️  signal_store change stream unavailable ({e}) - EXIT fill lookups will query MongoDB")
+                    return
+                logger.warning(f"⚠️  signal_store change stream interrupted ({e}) - reconnecting in 5s")
+                self._stop_event.wait(5)
+
+        self._live = False
+
+    def start_watcher(self):
+        """Start the background change stream thread (idempotent)"""
+        if self._watcher_thread and self._watcher_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher_thread = threading.Thread(
+            target=self._watch_loop,
+            name="entry-fill-index-watcher",
+            daemon=True
+        )
+        self._watcher_thread.start()
+
+    def stop_watcher(self):
+        """Stop the background change stream thread"""
+        self._stop_event.set()
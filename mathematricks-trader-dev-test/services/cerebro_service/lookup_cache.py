@@ -0,0 +1,198 @@
+"""
+Lookup Cache Module
+Read-through TTL/LRU cache for cerebro's per-signal lookups.
+
+Every signal used to fetch its strategy document (twice - once for routing, once for
+position sizing metadata), its deployed capital from MongoDB and the account state over
+HTTP. ReadThroughCache keeps each resource for a short TTL:
+- Entries expire after ttl seconds and the least recently used entry is evicted beyond
+  max_entries
+- Concurrent misses for the same key share one load (one round-trip per resource)
+- invalidate() / invalidate_where() / clear() are the hooks for change events
+- stats() exposes hit/miss/load/eviction counters for monitoring
+"""
+from typing import Dict, Any, Callable, Hashable, Optional
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class ReadThroughCache:
+    """
+    Thread-safe read-through cache with per-entry TTL and LRU eviction.
+
+    Key responsibilities:
+    - get(key, loader) returns the cached value or calls loader() once per key
+    - Values the loader reports as not cacheable (cache_if) are returned but not stored
+    - Invalidation by key, by predicate, or all at once
+    """
+
+    def __init__(self,
+                 name: str,
+                 ttl: float,
+                 max_entries: int = 1024,
+                 cache_if: Optional[Callable[[Any], bool]] = None):
+        """
+        Initialize ReadThroughCache.
+
+        Args:
+            name: Cache name (used in logs and stats)
+            ttl: Seconds an entry stays valid (0 disables caching)
+            max_entries: Maximum entries kept; least recently used are evicted first
+            cache_if: Predicate deciding whether a loaded value is stored
+                (default: everything except None)
+        """
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_if = cache_if or (lambda value: value is not None)
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._loading: Dict[Hashable, threading.Event] = {}
+        self._generation: Dict[Hashable, int] = {}  # Bumped by invalidate() during a load
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.load_errors = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _lookup(self, key: Hashable, now: float):
+        """Cached value or _MISSING (caller holds the lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get a value, loading it on a miss.
+
+        Args:
+            key: Cache key
+            loader: Zero-argument callable fetching the value (MongoDB/HTTP round-trip)
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        if self.ttl <= 0:
+            with self._lock:
+                self.misses += 1
+                self.loads += 1
+            return loader()
+
+        while True:
+            with self._lock:
+                value = self._lookup(key, time.monotonic())
+                if value is not _MISSING:
+                    self.hits += 1
+                    return value
+
+                in_flight = self._loading.get(key)
+                if in_flight is None:
+                    self.misses += 1
+                    self.loads += 1
+                    in_flight = self._loading[key] = threading.Event()
+                    generation = self._generation.get(key, 0)
+                    break
+
+            # Another thread is loading this key - wait and re-check
+            in_flight.wait()
+
+        try:
+            value = loader()
+        except Exception:
+            with self._lock:
+                self.load_errors += 1
+            raise
+        else:
+            with self._lock:
+                # Skip storing if the key was invalidated while we were loading
+                if self.cache_if(value) and self._generation.get(key, 0) == generation:
+                    self._entries[key] = (time.monotonic() + self.ttl, value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+                self._generation.pop(key, None)
+            in_flight.set()
+
+    def peek(self, key: Hashable) -> Any:
+        """Cached value without loading or touching counters (None if absent/expired)"""
+        with self._lock:
+            value = self._lookup(key, time.monotonic())
+        return None if value is _MISSING else value
+
+    # ------------------------------------------------------------------
+    # Invalidation hooks
+    # ------------------------------------------------------------------
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Drop one key (an in-flight load for it will not be stored).
+
+        Returns:
+            True if an entry was removed
+        """
+        with self._lock:
+            self.invalidations += 1
+            if key in self._loading:
+                self._generation[key] = self._generation.get(key, 0) + 1
+            return self._entries.pop(key, None) is not None
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Drop every key matching predicate.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            keys = [key for key in list(self._entries) + list(self._loading) if predicate(key)]
+        return sum(self.invalidate(key) for key in set(keys))
+
+    def clear(self) -> int:
+        """Drop everything"""
+        return self.invalidate_where(lambda key: True)
+
+    # ------------------------------------------------------------------
+    # Monitoring
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and size (for monitoring)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'ttl': self.ttl,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'loads': self.loads,
+                'load_errors': self.load_errors,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
@@ -9,6 +9,7 @@ from scipy.optimize import minimize
 
 from ..base import PortfolioConstructor
 from ..context import PortfolioContext, Signal, SignalDecision
+from ..optimizer_core import PortfolioOptimizerCore
 
 
 class MaxCAGRConstructor(PortfolioConstructor):
@@ -119,54 +120,35 @@ class MaxCAGRConstructor(PortfolioConstructor):
         mean_returns = returns_df.mean().values
         cov_matrix = returns_df.cov().values
         
+        # Shared optimizer core (analytic gradients + cached intermediates)
+        core = PortfolioOptimizerCore(
+            returns_df.values,
+            mean_returns=mean_returns,
+            cov_matrix=cov_matrix,
+            risk_free_rate=self.risk_free_rate
+        )
+        
         # Optimization objective: Maximize CAGR (geometric mean, not arithmetic)
         # This matches portfolio_optimizer.py implementation
         def objective(weights):
-            # Calculate portfolio returns time series
-            portfolio_returns = np.dot(returns_df.values, weights)
-            
-            # Calculate CAGR (geometric mean growth rate)
-            cumulative = np.cumprod(1 + portfolio_returns)
-            total_return = cumulative[-1]
-            n_years = len(portfolio_returns) / 252  # Assuming 252 trading days per year
-            
-            if total_return <= 0 or n_years <= 0:
+            if core.total_return(weights) <= 0 or core.n_years <= 0:
                 return 1e10  # Return large penalty for invalid portfolios
             
-            cagr = (total_return ** (1 / n_years)) - 1
-            return -cagr  # Negative because we minimize
-        
-        # Drawdown constraint - calculate actual historical max drawdown
-        # This matches the implementation in portfolio_optimizer.py
-        def drawdown_constraint(weights):
-            # Calculate portfolio returns time series
-            portfolio_returns = np.dot(returns_df.values, weights)
-            
-            # Calculate cumulative returns
-            cumulative = np.cumprod(1 + portfolio_returns)
-            
-            # Calculate running maximum
-            running_max = np.maximum.accumulate(cumulative)
-            
-            # Calculate drawdown series
-            drawdown = (cumulative - running_max) / running_max
-            
-            # Get maximum drawdown (most negative value)
-            max_drawdown = drawdown.min()  # This is negative, e.g., -0.18
-            
-            # Return positive value when constraint is satisfied
-            # max_drawdown must be >= -max_drawdown_limit (less negative)
-            # Example: -0.15 >= -0.20 returns 0.05 (positive, satisfied)
-            #          -0.25 >= -0.20 returns -0.05 (negative, violated)
-            return max_drawdown + self.max_drawdown_limit
+            return -core.cagr(weights)  # Negative because we minimize
+        
+        def objective_grad(weights):
+            return -core.cagr_grad(weights)
         
         # Constraints
-        constraints = [
+        constraints = (
             # Total allocation must not exceed max_leverage * 100%
-            {'type': 'ineq', 'fun': lambda w: self.max_leverage - np.sum(w)},
-            # Drawdown constraint
-            {'type': 'ineq', 'fun': drawdown_constraint}
-        ]
+            core.leverage_constraints(self.max_leverage, include_lower=False)
+            + [
+                # Drawdown constraint: historical max DD must be >= -max_drawdown_limit
+                # Example: -0.15 >= -0.20 returns 0.05 (positive, satisfied)
+                core.drawdown_constraint(-self.max_drawdown_limit)
+            ]
+        )
         
         # Bounds for each weight
         bounds = tuple(
@@ -181,6 +163,7 @@ class MaxCAGRConstructor(PortfolioConstructor):
         result = minimize(
             objective,
             x0,
+            jac=objective_grad,
             method='SLSQP',
             bounds=bounds,
             constraints=constraints,
@@ -29,6 +29,7 @@ from typing import Dict, List, Optional
 import logging
 
 from ..base import PortfolioConstructor, PortfolioContext, SignalDecision, Signal
+from ..optimizer_core import PortfolioOptimizerCore
 
 logger = logging.getLogger(__name__)
 
@@ -169,47 +170,47 @@ class MaxCAGRSharpeConstructor(PortfolioConstructor):
         initial_weights = np.array([1.0 / n_strategies] * n_strategies)
         bounds = tuple((0, self.max_single_strategy) for _ in range(n_strategies))
         
+        # Shared optimizer core (analytic gradients + cached intermediates)
+        core = PortfolioOptimizerCore(
+            returns_matrix,
+            mean_returns=mean_returns,
+            cov_matrix=cov_matrix,
+            risk_free_rate=self.risk_free_rate
+        )
+        
         # Objective: Maximize CAGR (minimize negative CAGR)
         def negative_cagr(weights):
-            portfolio_returns = np.dot(returns_matrix, weights)
-            cagr = self._calculate_cagr(portfolio_returns)
-            return -cagr
+            return -core.cagr(weights)
+        
+        def negative_cagr_grad(weights):
+            return -core.cagr_grad(weights)
         
         # Sharpe constraint: Sharpe >= min_sharpe
         def sharpe_constraint(weights):
             """Returns positive if Sharpe >= min_sharpe"""
-            portfolio_return = np.dot(weights, mean_returns)
-            portfolio_std = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-            
-            if portfolio_std == 0:
+            if core.portfolio_std(weights) == 0:
                 return -np.inf  # Violated
             
-            # Daily Sharpe
-            sharpe_daily = (portfolio_return - self.risk_free_rate) / portfolio_std
-            
             # Annualized Sharpe (this is what we compare to min_sharpe)
-            sharpe_annual = sharpe_daily * np.sqrt(252)
+            sharpe_annual = core.sharpe(weights) * np.sqrt(252)
             
             # Return positive if satisfied
             return sharpe_annual - self.min_sharpe
         
-        # Drawdown constraint
-        def drawdown_constraint(weights):
-            """Returns positive if max_dd >= max_drawdown_limit"""
-            portfolio_returns = np.dot(returns_matrix, weights)
-            max_dd = self._calculate_max_drawdown(portfolio_returns)
-            return max_dd - self.max_drawdown_limit
+        def sharpe_constraint_grad(weights):
+            return core.sharpe_grad(weights) * np.sqrt(252)
         
         # Constraints
-        constraints = [
+        constraints = (
             # Total allocation
-            {'type': 'ineq', 'fun': lambda w: self.max_leverage - np.sum(w)},
-            {'type': 'ineq', 'fun': lambda w: np.sum(w)},
-            # Sharpe constraint
-            {'type': 'ineq', 'fun': sharpe_constraint},
-            # Drawdown constraint
-            {'type': 'ineq', 'fun': drawdown_constraint}
-        ]
+            core.leverage_constraints(self.max_leverage)
+            + [
+                # Sharpe constraint
+                {'type': 'ineq', 'fun': sharpe_constraint, 'jac': sharpe_constraint_grad},
+                # Drawdown constraint: max_dd >= max_drawdown_limit
+                core.drawdown_constraint(self.max_drawdown_limit)
+            ]
+        )
         
         logger.info(f"Running optimization (min_sharpe={self.min_sharpe:.2f})...")
         logger.info(f"  Objective: Maximize CAGR")
@@ -218,6 +219,7 @@ class MaxCAGRSharpeConstructor(PortfolioConstructor):
         result = minimize(
             fun=negative_cagr,
             x0=initial_weights,
+            jac=negative_cagr_grad,
             method='SLSQP',
             bounds=bounds,
             constraints=constraints,
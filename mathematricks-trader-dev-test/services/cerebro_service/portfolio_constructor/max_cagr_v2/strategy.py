@@ -20,6 +20,7 @@ import logging
 
 from ..base import PortfolioConstructor
 from ..context import PortfolioContext, Signal, SignalDecision
+from ..optimizer_core import PortfolioOptimizerCore
 
 logger = logging.getLogger(__name__)
 
@@ -147,62 +148,36 @@ class MaxCAGRV2Constructor(PortfolioConstructor):
         df = pd.DataFrame({sid: returns for sid, returns in zip(strategy_ids, aligned_returns_list)})
         cov_matrix = df.cov().values
         
+        # Shared optimizer core: returns matrix built once, analytic gradients
+        core = PortfolioOptimizerCore(
+            np.array(aligned_returns_list).T,  # Shape: (n_days, n_strategies)
+            mean_returns=mean_returns,
+            cov_matrix=cov_matrix,
+            risk_free_rate=self.risk_free_rate
+        )
+        
         # Step 4: Define objective function - NEGATIVE CAGR (for minimization)
         def portfolio_negative_cagr(weights: np.ndarray) -> float:
             """Calculate negative CAGR for minimization"""
-            # Calculate portfolio returns using aligned data
-            returns_matrix = np.array(aligned_returns_list).T  # Shape: (n_days, n_strategies)
-            portfolio_returns = np.dot(returns_matrix, weights)
-            
-            # Calculate CAGR (geometric mean)
-            cumulative = (1 + portfolio_returns).prod()
-            n_days = len(portfolio_returns)
-            n_years = n_days / 252
-            
-            if cumulative <= 0 or n_years <= 0:
+            if core.total_return(weights) <= 0 or core.n_years <= 0:
                 return 1e10  # Large penalty
             
-            cagr = (cumulative ** (1 / n_years)) - 1
-            return -cagr  # Negative for minimization
-        
-        # Step 5: Define drawdown constraint
-        def drawdown_constraint(weights: np.ndarray) -> float:
-            """
-            Constraint: max_drawdown >= -max_drawdown_limit
-            Returns positive value if satisfied
-            
-            Matches portfolio_optimizer.py line 185
-            """
-            returns_matrix = np.array(aligned_returns_list).T
-            portfolio_returns = np.dot(returns_matrix, weights)
-            
-            # Calculate cumulative returns
-            cumulative = np.cumprod(1 + portfolio_returns)
-            
-            # Calculate running maximum
-            running_max = np.maximum.accumulate(cumulative)
-            
-            # Calculate drawdown series
-            drawdown = (cumulative - running_max) / running_max
-            
-            # Get maximum drawdown (most negative value)
-            max_dd = drawdown.min()  # This is negative, e.g., -0.18
-            
-            # Return positive value when constraint is satisfied
-            # max_dd >= -max_drawdown_limit
-            # Example: -0.15 >= -0.20 returns 0.05 (positive, satisfied)
-            #          -0.25 >= -0.20 returns -0.05 (negative, violated)
-            return max_dd - (-self.max_drawdown_limit)  # Convert limit to negative
-        
-        # Step 6: Set up constraints (matches portfolio_optimizer.py)
-        constraints = [
-            # Total allocation <= max_leverage
-            {'type': 'ineq', 'fun': lambda w: self.max_leverage - np.sum(w)},
-            # Total allocation >= 0
-            {'type': 'ineq', 'fun': lambda w: np.sum(w)},
-            # Drawdown constraint
-            {'type': 'ineq', 'fun': drawdown_constraint}
-        ]
+            return -core.cagr(weights)  # Negative for minimization
+        
+        def portfolio_negative_cagr_grad(weights: np.ndarray) -> np.ndarray:
+            """Analytic gradient of portfolio_negative_cagr"""
+            return -core.cagr_grad(weights)
+        
+        # Step 5/6: Set up constraints (matches portfolio_optimizer.py)
+        constraints = (
+            # Total allocation in [0, max_leverage]
+            core.leverage_constraints(self.max_leverage)
+            + [
+                # Drawdown constraint: max_dd >= -max_drawdown_limit
+                # Example: -0.15 >= -0.20 returns 0.05 (positive, satisfied)
+                core.drawdown_constraint(-self.max_drawdown_limit)
+            ]
+        )
         
         # Step 7: Bounds for each weight
         bounds = tuple((self.min_allocation, self.max_single_strategy) for _ in range(n_strategies))
@@ -214,6 +189,7 @@ class MaxCAGRV2Constructor(PortfolioConstructor):
         result = minimize(
             fun=portfolio_negative_cagr,
             x0=initial_weights,
+            jac=portfolio_negative_cagr_grad,
             method='SLSQP',
             bounds=bounds,
             constraints=constraints,
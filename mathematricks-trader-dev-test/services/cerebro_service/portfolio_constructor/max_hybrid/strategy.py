@@ -27,10 +27,14 @@ from scipy.optimize import minimize
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List, Optional
+import hashlib
 import logging
 import os
+import threading
+import time
 
 from ..base import PortfolioConstructor, PortfolioContext, SignalDecision, Signal
+from ..optimizer_core import PortfolioOptimizerCore
 
 logger = logging.getLogger(__name__)
 
@@ -153,6 +157,12 @@ class MaxHybridConstructor(PortfolioConstructor):
     - max_leverage: Maximum total allocation
     - max_single_strategy: Maximum per-strategy allocation
     - cagr_target: Target CAGR for normalization (default 1.0 = 100%)
+    - allocation_cache_ttl: Max age (seconds) of a memoized allocation before re-solving
+
+    evaluate_signal() memoizes allocate_portfolio() on a fingerprint of the strategy
+    histories, constraints and current allocations, so a burst of signals reuses one
+    solve and SLSQP only re-runs when the inputs actually change (or the TTL expires).
+    cerebro calls invalidate_allocation_cache() whenever a strategy document changes.
     """
     
     def __init__(self,
@@ -164,7 +174,8 @@ class MaxHybridConstructor(PortfolioConstructor):
                  cagr_target: float = 2,
                  risk_free_rate: float = 0.0,
                  use_cached_allocations: bool = True,
-                 allocations_config_path: str = None):
+                 allocations_config_path: str = None,
+                 allocation_cache_ttl: Optional[float] = None):
         """
         Initialize MaxHybrid constructor.
 
@@ -178,6 +189,8 @@ class MaxHybridConstructor(PortfolioConstructor):
             risk_free_rate: Risk-free rate for Sharpe calculation
             use_cached_allocations: If True, use cached allocations (not recalculated - signals are time-critical)
             allocations_config_path: Path to JSON file with cached approved allocations
+            allocation_cache_ttl: Re-run the optimizer after this many seconds even if the
+                inputs are unchanged. None = only re-run when the inputs change.
         """
         self.alpha = alpha
         self.max_drawdown_limit = max_drawdown_limit
@@ -188,6 +201,15 @@ class MaxHybridConstructor(PortfolioConstructor):
         self.risk_free_rate = risk_free_rate
         self.use_cached_allocations = use_cached_allocations
         self.cached_allocations = None
+        self.allocation_cache_ttl = allocation_cache_ttl
+
+        # Allocation memo: one solve per distinct set of inputs
+        self._allocation_memo_key = None
+        self._allocation_memo = None
+        self._allocation_memo_time = 0.0
+        self._allocation_memo_lock = threading.Lock()
+        self.allocation_memo_hits = 0
+        self.allocation_memo_misses = 0
 
         # Load cached allocations if enabled
         if self.use_cached_allocations:
@@ -248,6 +270,92 @@ class MaxHybridConstructor(PortfolioConstructor):
         drawdown = (cumulative - running_max) / running_max
         return drawdown.min()
     
+    def _allocation_fingerprint(self, context: PortfolioContext) -> str:
+        """
+        Fingerprint of everything allocate_portfolio() depends on.
+
+        Covers the optimizer configuration, approved (cached) allocations, the context's
+        current allocations and the contents of every strategy history used by the
+        optimizer ('returns' and 'margin_used').
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(sorted(self.get_config().items())).encode('utf-8'))
+        h.update(repr((self.use_cached_allocations, sorted((self.cached_allocations or {}).items()))).encode('utf-8'))
+        h.update(repr(sorted((context.current_allocations or {}).items())).encode('utf-8'))
+
+        for sid in sorted(context.strategy_histories):
+            df = context.strategy_histories[sid]
+            h.update(sid.encode('utf-8'))
+            h.update(str(len(df)).encode('utf-8'))
+            for col in ('returns', 'margin_used'):
+                if col in df.columns:
+                    h.update(col.encode('utf-8'))
+                    h.update(np.ascontiguousarray(df[col].values, dtype=np.float64).tobytes())
+
+        return h.hexdigest()
+
+    def get_allocations(self, context: PortfolioContext) -> Dict[str, float]:
+        """
+        Memoized allocate_portfolio().
+
+        Re-runs the optimizer only when the fingerprint of the inputs changes or the
+        memo is older than allocation_cache_ttl. Concurrent callers wait on the same
+        solve instead of starting their own. In cached mode the approved allocations
+        are returned as they are, without fingerprinting the histories.
+        """
+        if self.use_cached_allocations and self.cached_allocations:
+            return self.cached_allocations.copy()
+
+        key = self._allocation_fingerprint(context)
+
+        with self._allocation_memo_lock:
+            age = time.time() - self._allocation_memo_time
+            expired = self.allocation_cache_ttl is not None and age > self.allocation_cache_ttl
+
+            if self._allocation_memo is not None and key == self._allocation_memo_key and not expired:
+                self.allocation_memo_hits += 1
+                return dict(self._allocation_memo)
+
+            self.allocation_memo_misses += 1
+            reason = "TTL expired" if expired and key == self._allocation_memo_key else "inputs changed"
+            logger.info(f"Allocation memo miss ({reason}) - running allocate_portfolio")
+
+            allocations = self.allocate_portfolio(context)
+            self._allocation_memo_key = key
+            self._allocation_memo = dict(allocations)
+            self._allocation_memo_time = time.time()
+            return dict(allocations)
+
+    def invalidate_allocation_cache(self):
+        """Force the next get_allocations() call to re-run the optimizer"""
+        with self._allocation_memo_lock:
+            self._allocation_memo_key = None
+            self._allocation_memo = None
+            self._allocation_memo_time = 0.0
+
+    def allocation_memo_stats(self) -> Dict[str, float]:
+        """Allocation memo hit/miss counters (for monitoring)"""
+        with self._allocation_memo_lock:
+            lookups = self.allocation_memo_hits + self.allocation_memo_misses
+            return {
+                'hits': self.allocation_memo_hits,
+                'misses': self.allocation_memo_misses,
+                'hit_rate': self.allocation_memo_hits / lookups if lookups else 0.0,
+            }
+
+    def __getstate__(self):
+        """Pickle without the memo lock/entry (constructors are shipped to backtest workers)"""
+        state = self.__dict__.copy()
+        state['_allocation_memo_lock'] = None
+        state['_allocation_memo_key'] = None
+        state['_allocation_memo'] = None
+        state['_allocation_memo_time'] = 0.0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._allocation_memo_lock = threading.Lock()
+
     def allocate_portfolio(self, context: PortfolioContext) -> Dict[str, float]:
         """
         Allocate portfolio using hybrid optimization.
@@ -450,6 +558,14 @@ class MaxHybridConstructor(PortfolioConstructor):
         # Track optimization iterations
         iteration_count = [0]
 
+        # Shared optimizer core: analytic gradients + cached intermediate products
+        core = PortfolioOptimizerCore(
+            returns_matrix,
+            mean_returns=mean_returns,
+            cov_matrix=cov_matrix,
+            risk_free_rate=self.risk_free_rate
+        )
+
         # Hybrid objective function
         def hybrid_objective(weights):
             """
@@ -458,17 +574,12 @@ class MaxHybridConstructor(PortfolioConstructor):
             iteration_count[0] += 1
 
             # Sharpe ratio component
-            portfolio_return = np.dot(weights, mean_returns)
-            portfolio_std = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-
-            if portfolio_std == 0:
-                sharpe = 0
-            else:
-                sharpe = (portfolio_return - self.risk_free_rate) / portfolio_std
+            portfolio_return = core.portfolio_return(weights)
+            portfolio_std = core.portfolio_std(weights)
+            sharpe = core.sharpe(weights)
 
             # CAGR component (using aligned returns)
-            portfolio_returns = np.dot(returns_matrix, weights)
-            cagr = self._calculate_cagr(portfolio_returns)
+            cagr = core.cagr(weights)
             cagr_normalized = cagr / self.cagr_target  # Normalize to target
 
             # Weighted combination
@@ -488,12 +599,11 @@ class MaxHybridConstructor(PortfolioConstructor):
                 log_opt(f"    Objective (negative): {-hybrid_score:.4f}")
 
             return -hybrid_score  # Negative for minimization
-        
-        # Drawdown constraint
-        def drawdown_constraint(weights):
-            portfolio_returns = np.dot(returns_matrix, weights)
-            max_dd = self._calculate_max_drawdown(portfolio_returns)
-            return max_dd - self.max_drawdown_limit  # Positive if satisfied
+
+        def hybrid_objective_grad(weights):
+            """Analytic gradient of hybrid_objective"""
+            return -(self.alpha * core.sharpe_grad(weights)
+                     + (1 - self.alpha) * core.cagr_grad(weights) / self.cagr_target)
         
         # Margin constraint (Phase 3)
         def margin_constraint(weights):
@@ -535,10 +645,9 @@ class MaxHybridConstructor(PortfolioConstructor):
             return slack
         
         # Constraints (margin scaling happens post-optimization in backtest_engine)
-        constraints = [
-            {'type': 'ineq', 'fun': lambda w: self.max_leverage - np.sum(w)},  # Total allocation <= max_leverage
-            {'type': 'ineq', 'fun': lambda w: np.sum(w)},                       # Total allocation >= 0
-            {'type': 'ineq', 'fun': drawdown_constraint},                       # Max DD <= limit
+        # Total allocation in [0, max_leverage], Max DD <= limit (all with analytic Jacobians)
+        constraints = core.leverage_constraints(self.max_leverage) + [
+            core.drawdown_constraint(self.max_drawdown_limit),
         ]
         
         log_opt(f"\n🔧 RUNNING SCIPY OPTIMIZATION (SLSQP)...")
@@ -548,6 +657,7 @@ class MaxHybridConstructor(PortfolioConstructor):
         result = minimize(
             fun=hybrid_objective,
             x0=initial_weights,
+            jac=hybrid_objective_grad,
             method='SLSQP',
             bounds=bounds,
             constraints=constraints,
@@ -670,8 +780,8 @@ class MaxHybridConstructor(PortfolioConstructor):
         Returns:
             SignalDecision with action and size, including detailed metadata
         """
-        # Get current allocations
-        allocations = self.allocate_portfolio(context)
+        # Get current allocations (memoized - one solve per distinct set of inputs)
+        allocations = self.get_allocations(context)
         
         strategy_id = signal.strategy_id
         
@@ -766,5 +876,6 @@ class MaxHybridConstructor(PortfolioConstructor):
             "max_single_strategy": self.max_single_strategy,
             "min_allocation": self.min_allocation,
             "cagr_target": self.cagr_target,
-            "risk_free_rate": self.risk_free_rate
+            "risk_free_rate": self.risk_free_rate,
+            "allocation_cache_ttl": self.allocation_cache_ttl
         }
@@ -26,6 +26,7 @@ from typing import Dict, List, Optional
 import logging
 
 from ..base import PortfolioConstructor, PortfolioContext, SignalDecision, Signal
+from ..optimizer_core import PortfolioOptimizerCore
 
 logger = logging.getLogger(__name__)
 
@@ -161,29 +162,34 @@ class MaxSharpeConstructor(PortfolioConstructor):
         # Bounds: 0 to max_single_strategy
         bounds = tuple((0, self.max_single_strategy) for _ in range(n_strategies))
         
+        # Shared optimizer core (analytic gradients)
+        core = PortfolioOptimizerCore(
+            np.array(aligned_returns_list).T,
+            mean_returns=mean_returns,
+            cov_matrix=cov_matrix,
+            risk_free_rate=self.risk_free_rate
+        )
+        
         # Constraints
-        constraints = [
-            # Total weight between 0 and max_leverage
-            {'type': 'ineq', 'fun': lambda w: self.max_leverage - np.sum(w)},
-            {'type': 'ineq', 'fun': lambda w: np.sum(w)}
-        ]
+        # Total weight between 0 and max_leverage
+        constraints = core.leverage_constraints(self.max_leverage)
         
         # Objective: Negative Sharpe ratio (for minimization)
         def negative_sharpe(weights):
-            portfolio_return = np.dot(weights, mean_returns)
-            portfolio_std = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
-            
-            if portfolio_std == 0:
+            if core.portfolio_std(weights) == 0:
                 return np.inf
             
-            sharpe = (portfolio_return - self.risk_free_rate) / portfolio_std
-            return -sharpe  # Negative for minimization
+            return -core.sharpe(weights)  # Negative for minimization
+        
+        def negative_sharpe_grad(weights):
+            return -core.sharpe_grad(weights)
         
         logger.info("Running optimization (SLSQP)...")
         
         result = minimize(
             fun=negative_sharpe,
             x0=initial_weights,
+            jac=negative_sharpe_grad,
             method='SLSQP',
             bounds=bounds,
             constraints=constraints,
@@ -0,0 +1,268 @@
+"""
+Shared optimizer core for the portfolio constructors.
+
+All SLSQP-based constructors optimize some mix of Sharpe, CAGR and max drawdown over
+the same returns matrix. Without gradients SLSQP differentiates these numerically,
+costing N+1 full evaluations (each an O(days x strategies) matrix product) per
+iteration. PortfolioOptimizerCore provides:
+
+- Closed-form gradients for Sharpe and CAGR
+- The exact max drawdown with its (almost everywhere) analytic gradient, plus a smooth
+  log-sum-exp surrogate for callers that want a differentiable constraint
+- Caching of the intermediate products (portfolio returns, growth, cumulative wealth)
+  for the last weight vector, since SLSQP evaluates the objective, its gradient and
+  every constraint at the same point
+
+Constructors pass `fun`/`jac` pairs from this class to scipy.optimize.minimize.
+"""
+from typing import Dict, List, Optional, Any
+import numpy as np
+
+
+class PortfolioOptimizerCore:
+    """
+    Vectorized objective/constraint evaluator over a (days x strategies) returns matrix.
+
+    Parameters:
+    - returns_matrix: Aligned daily returns, rows = days, cols = strategies
+    - mean_returns: Mean daily return per strategy (defaults to column means). The
+      constructors compute these on the FULL history, so they are passed in.
+    - cov_matrix: Covariance of daily returns (defaults to sample covariance)
+    - risk_free_rate: Daily risk-free rate used in the Sharpe numerator
+    - periods_per_year: Trading days per year for CAGR
+    """
+
+    def __init__(self,
+                 returns_matrix: np.ndarray,
+                 mean_returns: Optional[np.ndarray] = None,
+                 cov_matrix: Optional[np.ndarray] = None,
+                 risk_free_rate: float = 0.0,
+                 periods_per_year: int = 252):
+        self.returns_matrix = np.ascontiguousarray(returns_matrix, dtype=np.float64)
+        self.n_days, self.n_strategies = self.returns_matrix.shape
+
+        if mean_returns is None:
+            mean_returns = self.returns_matrix.mean(axis=0)
+        if cov_matrix is None:
+            cov_matrix = np.cov(self.returns_matrix, rowvar=False).reshape(self.n_strategies, self.n_strategies)
+
+        self.mean_returns = np.asarray(mean_returns, dtype=np.float64)
+        self.cov_matrix = np.asarray(cov_matrix, dtype=np.float64)
+        self.risk_free_rate = risk_free_rate
+        self.n_years = self.n_days / periods_per_year
+
+        self._key = None
+        self._cache: Dict[str, Any] = {}
+        self.n_evaluations = 0
+
+    # ------------------------------------------------------------------
+    # Cached intermediate products
+    # ------------------------------------------------------------------
+
+    def _state(self, weights: np.ndarray) -> Dict[str, Any]:
+        """Intermediate products for `weights`, recomputed only when the weights change"""
+        weights = np.asarray(weights, dtype=np.float64)
+        key = weights.tobytes()
+        if key != self._key:
+            self.n_evaluations += 1
+            portfolio_returns = self.returns_matrix @ weights
+            growth = 1.0 + portfolio_returns
+            self._key = key
+            self._cache = {
+                'weights': weights.copy(),
+                'portfolio_returns': portfolio_returns,
+                'growth': growth,
+                'cumulative': np.cumprod(growth),
+            }
+        return self._cache
+
+    def _cached(self, state: Dict[str, Any], name: str, compute):
+        """Lazily compute and memoize a derived product for the current weights"""
+        if name not in state:
+            state[name] = compute()
+        return state[name]
+
+    def _growth_ratios(self, state: Dict[str, Any]) -> np.ndarray:
+        """d log(1 + r_t) / dw = R_t / (1 + r_t), shape (days, strategies)"""
+        return self._cached(
+            state, 'growth_ratios',
+            lambda: self.returns_matrix / state['growth'][:, None]
+        )
+
+    def portfolio_returns(self, weights: np.ndarray) -> np.ndarray:
+        """Daily portfolio returns R @ w"""
+        return self._state(weights)['portfolio_returns']
+
+    # ------------------------------------------------------------------
+    # Sharpe
+    # ------------------------------------------------------------------
+
+    def portfolio_return(self, weights: np.ndarray) -> float:
+        """Expected daily portfolio return (mean_returns . w)"""
+        return float(np.dot(weights, self.mean_returns))
+
+    def portfolio_std(self, weights: np.ndarray) -> float:
+        """Daily portfolio volatility sqrt(w' Cov w)"""
+        state = self._state(weights)
+        cov_w = self._cached(state, 'cov_w', lambda: self.cov_matrix @ state['weights'])
+        return float(np.sqrt(np.dot(state['weights'], cov_w)))
+
+    def sharpe(self, weights: np.ndarray) -> float:
+        """Daily Sharpe ratio (0 when volatility is 0)"""
+        std = self.portfolio_std(weights)
+        if std == 0:
+            return 0.0
+        return (self.portfolio_return(weights) - self.risk_free_rate) / std
+
+    def sharpe_grad(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Gradient of the daily Sharpe ratio:
+            d/dw [(mu.w - rf) / sigma] = mu / sigma - (mu.w - rf) * Cov w / sigma^3
+        """
+        state = self._state(weights)
+        std = self.portfolio_std(weights)
+        if std == 0:
+            return np.zeros(self.n_strategies)
+        excess = self.portfolio_return(weights) - self.risk_free_rate
+        return self.mean_returns / std - excess * state['cov_w'] / std ** 3
+
+    # ------------------------------------------------------------------
+    # CAGR
+    # ------------------------------------------------------------------
+
+    def total_return(self, weights: np.ndarray) -> float:
+        """Terminal wealth multiple prod(1 + r_t)"""
+        return float(self._state(weights)['cumulative'][-1])
+
+    def cagr(self, weights: np.ndarray) -> float:
+        """CAGR = prod(1 + r_t)^(1/years) - 1 (-1 when the portfolio is wiped out)"""
+        total = self.total_return(weights)
+        if self.n_years <= 0:
+            return 0.0
+        if total <= 0:
+            return -1.0
+        return total ** (1 / self.n_years) - 1
+
+    def cagr_grad(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Gradient of CAGR:
+            d/dw = (1 + CAGR) / years * sum_t R_t / (1 + r_t)
+        """
+        state = self._state(weights)
+        total = self.total_return(weights)
+        if self.n_years <= 0 or total <= 0:
+            return np.zeros(self.n_strategies)
+        inv_growth = 1.0 / state['growth']
+        return (self.cagr(weights) + 1) / self.n_years * (self.returns_matrix.T @ inv_growth)
+
+    # ------------------------------------------------------------------
+    # Drawdown
+    # ------------------------------------------------------------------
+
+    def _drawdown_path(self, state: Dict[str, Any]):
+        """Drawdown series, running peak index and trough index for current weights"""
+        def compute():
+            cumulative = state['cumulative']
+            running_max = np.maximum.accumulate(cumulative)
+            drawdown = (cumulative - running_max) / running_max
+            days = np.arange(len(cumulative))
+            peak_idx = np.maximum.accumulate(np.where(cumulative == running_max, days, 0))
+            return drawdown, peak_idx, int(np.argmin(drawdown))
+        return self._cached(state, 'drawdown_path', compute)
+
+    def max_drawdown(self, weights: np.ndarray) -> float:
+        """Exact max drawdown (negative number, e.g. -0.12)"""
+        drawdown, _, trough = self._drawdown_path(self._state(weights))
+        return float(drawdown[trough])
+
+    def max_drawdown_grad(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Gradient of the exact max drawdown (valid wherever the peak/trough pair is unique):
+            MDD + 1 = prod_{peak < t <= trough} (1 + r_t)
+            d/dw    = (MDD + 1) * sum_{peak < t <= trough} R_t / (1 + r_t)
+        """
+        state = self._state(weights)
+        drawdown, peak_idx, trough = self._drawdown_path(state)
+        peak = peak_idx[trough]
+        if peak >= trough:
+            return np.zeros(self.n_strategies)
+        segment = self.returns_matrix[peak + 1:trough + 1] / state['growth'][peak + 1:trough + 1, None]
+        return (drawdown[trough] + 1) * segment.sum(axis=0)
+
+    def smooth_max_drawdown(self, weights: np.ndarray, temperature: float = 1e-3) -> float:
+        """
+        Smooth surrogate for max drawdown: soft-min (log-sum-exp) of the log drawdown
+        series. Always <= the exact max drawdown, converging to it as temperature -> 0,
+        so a constraint on the surrogate is conservative.
+        """
+        return self._smooth_drawdown(weights, temperature)[0]
+
+    def smooth_max_drawdown_grad(self, weights: np.ndarray, temperature: float = 1e-3) -> np.ndarray:
+        """Gradient of smooth_max_drawdown()"""
+        return self._smooth_drawdown(weights, temperature)[1]
+
+    def _smooth_drawdown(self, weights: np.ndarray, temperature: float):
+        state = self._state(weights)
+
+        def compute():
+            if np.any(state['growth'] <= 0):
+                mdd = self.max_drawdown(weights)
+                return mdd, self.max_drawdown_grad(weights)
+
+            _, peak_idx, _ = self._drawdown_path(state)
+            log_wealth = np.cumsum(np.log(state['growth']))
+            log_drawdown = log_wealth - log_wealth[peak_idx]
+
+            # Soft-min over days: -T * log(sum(exp(-d_t / T)))
+            z = -log_drawdown / temperature
+            z_max = z.max()
+            weights_t = np.exp(z - z_max)
+            total = weights_t.sum()
+            soft_min = -temperature * (z_max + np.log(total))
+            p = weights_t / total
+
+            # d(log_drawdown_t)/dw = cumG_t - cumG_peak(t), aggregated by soft-min weights
+            coeff = p - np.bincount(peak_idx, weights=p, minlength=len(p))
+            # sum_t coeff_t * cumG_t == sum_s G_s * (suffix sum of coeff from s)
+            suffix = np.cumsum(coeff[::-1])[::-1]
+            grad_log = self._growth_ratios(state).T @ suffix
+
+            value = np.expm1(soft_min)
+            return value, (value + 1) * grad_log
+
+        return self._cached(state, f'smooth_drawdown_{temperature}', compute)
+
+    # ------------------------------------------------------------------
+    # Constraint helpers
+    # ------------------------------------------------------------------
+
+    def leverage_constraints(self, max_leverage: float, include_lower: bool = True) -> List[Dict[str, Any]]:
+        """SLSQP constraints 0 <= sum(w) <= max_leverage with constant Jacobians"""
+        ones = np.ones(self.n_strategies)
+        constraints = [
+            {'type': 'ineq', 'fun': lambda w: max_leverage - np.sum(w), 'jac': lambda w: -ones},
+        ]
+        if include_lower:
+            constraints.append({'type': 'ineq', 'fun': lambda w: np.sum(w), 'jac': lambda w: ones})
+        return constraints
+
+    def drawdown_constraint(self, limit: float, smooth: bool = False, temperature: float = 1e-3) -> Dict[str, Any]:
+        """
+        SLSQP constraint max_drawdown(w) >= limit (limit is negative, e.g. -0.06).
+
+        Args:
+            limit: Most negative drawdown allowed
+            smooth: Use the log-sum-exp surrogate instead of the exact drawdown
+            temperature: Surrogate temperature (log-return units)
+        """
+        if smooth:
+            return {
+                'type': 'ineq',
+                'fun': lambda w: self.smooth_max_drawdown(w, temperature) - limit,
+                'jac': lambda w: self.smooth_max_drawdown_grad(w, temperature),
+            }
+        return {
+            'type': 'ineq',
+            'fun': lambda w: self.max_drawdown(w) - limit,
+            'jac': self.max_drawdown_grad,
+        }
@@ -6,7 +6,8 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime
 from pymongo import MongoClient
 import logging
-import time
+
+from positions import PositionStore
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +17,7 @@ class PositionManager:
     Manages open positions and tracks deployed capital.
 
     Key responsibilities:
-    - Track open positions in MongoDB
+    - Track open positions in MongoDB (positions collection)
     - Determine signal type (entry/exit/scale)
     - Calculate deployed capital from positions
     - Update positions on order fills
@@ -31,26 +32,25 @@ class PositionManager:
             default_account_id: Default account ID to use for position queries
         """
         self.db = mongo_client['mathematricks_trading']
-        self.trading_accounts = self.db['trading_accounts']
         self.orders = self.db['trading_orders']
         self.default_account_id = default_account_id
 
-        # Create indexes for efficient queries on trading_accounts
-        self.trading_accounts.create_index([("account_id", 1)])
-        self.trading_accounts.create_index([("open_positions.strategy_id", 1)])
-        self.trading_accounts.create_index([("open_positions.instrument", 1)])
+        # Positions collection (written by ExecutionService), indexed by
+        # account/strategy/instrument/direction
+        self.position_store = PositionStore(self.db)
+        self.position_store.ensure_indexes()
 
-    def get_open_position(self, strategy_id: str, instrument: str, direction: str, retry_count: int = 3, retry_delay: float = 0.5, account_id: str = None) -> Optional[Dict[str, Any]]:
+    def get_open_position(self, strategy_id: str, instrument: str, direction: str, account_id: str = None) -> Optional[Dict[str, Any]]:
         """
-        Get open position for strategy + instrument + direction from trading_accounts collection.
-        Includes retry logic to handle race conditions where position is being created.
+        Get open position for strategy + instrument + direction (one indexed query).
+
+        ExecutionService applies each fill in a single atomic update, so a position is
+        either fully written or absent - there is no partially-created state to retry on.
 
         Args:
             strategy_id: Strategy identifier
             instrument: Instrument symbol (e.g., "AAPL")
             direction: "LONG" or "SHORT"
-            retry_count: Number of retries (default: 3)
-            retry_delay: Delay between retries in seconds (default: 0.5)
             account_id: Account ID (defaults to self.default_account_id)
 
         Returns:
@@ -59,45 +59,15 @@ class PositionManager:
         if account_id is None:
             account_id = self.default_account_id
 
-        for attempt in range(retry_count):
-            # Query trading_accounts collection for open position in open_positions array
-            account_doc = self.trading_accounts.find_one({
-                "account_id": account_id,
-                "open_positions": {
-                    "$elemMatch": {
-                        "strategy_id": strategy_id,
-                        "instrument": instrument,
-                        "status": "OPEN"
-                    }
-                }
-            })
-
-            if account_doc:
-                # Find the matching position in the array
-                open_positions = account_doc.get('open_positions', [])
-                for pos in open_positions:
-                    if (pos.get('strategy_id') == strategy_id and
-                        pos.get('instrument') == instrument and
-                        pos.get('status') == 'OPEN'):
-                        if attempt > 0:
-                            logger.info(f"✅ Found position for {strategy_id}/{instrument} on retry attempt {attempt + 1}")
-                        return pos
-
-            # If not found and not last attempt, wait and retry
-            if attempt < retry_count - 1:
-                logger.debug(f"⏳ Position not found for {strategy_id}/{instrument}, retrying in {retry_delay}s (attempt {attempt + 1}/{retry_count})")
-                time.sleep(retry_delay)
-
-        # Not found after all retries
-        return None
+        return self.position_store.get_open_position(account_id, strategy_id, instrument, direction)
 
     def get_positions_by_strategy(self, strategy_id: str, account_id: str = None) -> List[Dict[str, Any]]:
         """
-        Get all open positions for a strategy from trading_accounts collection.
+        Get all open positions for a strategy from the positions collection.
 
         Args:
             strategy_id: Strategy identifier
-            account_id: Account ID (defaults to self.default_account_id)
+            account_id: Account ID (defaults to self.default_account_id, "ALL" for every account)
 
         Returns:
             List of position documents
@@ -106,16 +76,10 @@ class PositionManager:
             account_id = self.default_account_id
 
         # Query all accounts if account_id is "ALL", otherwise query specific account
-        query = {} if account_id == "ALL" else {"account_id": account_id}
-
-        all_positions = []
-        for account_doc in self.trading_accounts.find(query):
-            open_positions = account_doc.get('open_positions', [])
-            for pos in open_positions:
-                if pos.get('strategy_id') == strategy_id and pos.get('status') == 'OPEN':
-                    all_positions.append(pos)
-
-        return all_positions
+        return self.position_store.get_open_positions(
+            account_id=None if account_id == "ALL" else account_id,
+            strategy_id=strategy_id
+        )
 
     def get_deployed_capital(self, strategy_id: str, account_id: str = None) -> Dict[str, Any]:
         """
@@ -6,14 +6,78 @@ import pandas as pd
 import numpy as np
 import os
 import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Callable
 
 from ..portfolio_constructor.base import PortfolioConstructor
 from ..portfolio_constructor.context import PortfolioContext
 from .tearsheet_generator import generate_tearsheet
 
 
+# Per-process state for parallel window optimization (set by _init_window_worker)
+_worker_state: Dict[str, Any] = {}
+
+
+def _share_frame(frame: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, Dict[str, Any]]:
+    """
+    Copy a numeric DataFrame into a shared memory block.
+
+    Returns:
+        (SharedMemory block owned by the caller, spec for _attach_frame)
+    """
+    values = np.ascontiguousarray(frame.values, dtype=np.float64)
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)[:] = values
+    spec = {
+        'name': shm.name,
+        'shape': values.shape,
+        'index': frame.index,
+        'columns': list(frame.columns)
+    }
+    return shm, spec
+
+
+def _attach_frame(spec: Dict[str, Any]) -> Tuple[shared_memory.SharedMemory, pd.DataFrame]:
+    """Rebuild a DataFrame view over a shared memory block created by _share_frame"""
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    values = np.ndarray(spec['shape'], dtype=np.float64, buffer=shm.buf)
+    frame = pd.DataFrame(values, index=spec['index'], columns=spec['columns'], copy=False)
+    return shm, frame
+
+
+def _init_window_worker(constructor: PortfolioConstructor, specs: Dict[str, Optional[Dict[str, Any]]]):
+    """Process pool initializer: receive the constructor once and map the shared matrices"""
+    _worker_state['constructor'] = constructor
+    _worker_state['blocks'] = []
+    for key, spec in specs.items():
+        if spec is None:
+            _worker_state[key] = None
+            continue
+        shm, frame = _attach_frame(spec)
+        _worker_state['blocks'].append(shm)  # Keep the mapping alive for the process lifetime
+        _worker_state[key] = frame
+
+
+def _optimize_window_worker(window: Tuple[int, int]) -> Dict[str, float]:
+    """Run the constructor's optimizer for one training window inside a pool worker"""
+    train_start_idx, test_start_idx = window
+    returns_matrix = _worker_state['returns_matrix']
+    margin_matrix = _worker_state['margin_matrix']
+    notional_matrix = _worker_state['notional_matrix']
+
+    train_context = WalkForwardBacktest._build_context(
+        returns_df=returns_matrix.iloc[train_start_idx:test_start_idx],
+        margin_df=margin_matrix.iloc[train_start_idx:test_start_idx] if margin_matrix is not None else None,
+        notional_df=notional_matrix.iloc[train_start_idx:test_start_idx] if notional_matrix is not None else None,
+        is_backtest=True,
+        current_date=returns_matrix.index[test_start_idx - 1]
+    )
+    return _worker_state['constructor'].allocate_portfolio(train_context)
+
+
 class WalkForwardBacktest:
     """
     Walk-forward backtesting engine for portfolio constructors.
@@ -33,7 +97,9 @@ class WalkForwardBacktest:
         walk_forward_type: str = 'anchored',  # 'anchored' or 'rolling'
         apply_drawdown_protection: bool = False,
         max_drawdown_threshold: float = 0.20,
-        output_dir: Optional[str] = None
+        output_dir: Optional[str] = None,
+        n_jobs: int = 1,
+        progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ):
         """
         Initialize walk-forward backtest engine.
@@ -46,6 +112,13 @@ class WalkForwardBacktest:
             apply_drawdown_protection: If True, reduce leverage when drawdown exceeds threshold
             max_drawdown_threshold: Drawdown threshold for protection (e.g., 0.20 = 20%)
             output_dir: Directory to save outputs (default: constructor's outputs/ folder)
+            n_jobs: Worker processes for the per-window optimizations (1 = sequential,
+                    0 or negative = one per CPU). Windows are optimized independently in
+                    a process pool; allocation scaling, drawdown protection and equity
+                    carry-over are still applied window by window in order.
+            progress_callback: Optional callable(stage, info) invoked as the backtest moves
+                    through its stages ('aligned', 'windows', 'window', 'combined', 'metrics',
+                    'saved')
             
         Walk-forward types:
         - anchored: Train on all data from start to test_start (expanding window)
@@ -61,6 +134,8 @@ class WalkForwardBacktest:
         self.walk_forward_type = walk_forward_type
         self.apply_drawdown_protection = apply_drawdown_protection
         self.max_drawdown_threshold = max_drawdown_threshold
+        self.n_jobs = n_jobs if n_jobs > 0 else (os.cpu_count() or 1)
+        self.progress_callback = progress_callback
         self.test_periods = []
         
         # Set output directory - use constructor's outputs folder if not specified
@@ -121,6 +196,7 @@ class WalkForwardBacktest:
         print(f"  ✓ Aligned {len(strategy_ids)} strategies")
         print(f"  ✓ Date range: {all_dates[0]} to {all_dates[-1]}")
         print(f"  ✓ Total days: {len(all_dates)}")
+        self._report_progress('aligned', strategies=len(strategy_ids), days=len(all_dates))
         
         # Phase 1: Log margin/notional data availability and patterns
         if margin_matrix is not None:
@@ -153,24 +229,22 @@ class WalkForwardBacktest:
         print(f"\n[2/4] Running walk-forward windows ({self.walk_forward_type})...")
         
         window_results = []
-        window_count = 0
         global_peak_equity = 100000.0  # Track peak across ALL windows
         current_equity = 100000.0      # Track current equity
         
-        # Walk forward: each test period is distinct (no overlap)
-        test_start_idx = self.train_days  # First test starts after training period
+        windows = self._window_bounds(len(all_dates))
+        self._report_progress('windows', total_windows=len(windows))
         
-        while test_start_idx + self.test_days <= len(all_dates):
-            window_count += 1
-            
-            # Determine training window based on type
-            if self.walk_forward_type == 'anchored':
-                # Anchored: Train from start to test_start (expanding window)
-                train_start_idx = 0
-            else:  # rolling
-                # Rolling: Train on fixed window before test
-                train_start_idx = max(0, test_start_idx - self.train_days)
-            
+        # Optimizations only depend on the training data, so they can run up front in
+        # parallel. Everything that depends on equity carried over from earlier windows
+        # (margin scaling, drawdown protection, _apply_allocations) stays sequential below.
+        precomputed_allocations = None
+        if self.n_jobs > 1 and len(windows) > 1:
+            precomputed_allocations = self._optimize_windows_parallel(
+                windows, returns_matrix, margin_matrix, notional_matrix
+            )
+        
+        for window_count, (train_start_idx, test_start_idx) in enumerate(windows, start=1):
             train_dates = all_dates[train_start_idx:test_start_idx]
             test_dates = all_dates[test_start_idx:test_start_idx + self.test_days]
             
@@ -190,17 +264,19 @@ class WalkForwardBacktest:
             print(f"    Train: {train_dates[0]} to {train_dates[-1]} ({len(train_dates)} days)")
             print(f"    Test:  {test_dates[0]} to {test_dates[-1]} ({len(test_dates)} days)")
             
-            # Build context for training period
-            train_context = self._build_context(
-                returns_df=train_returns,
-                margin_df=train_margin,
-                notional_df=train_notional,
-                is_backtest=True,
-                current_date=train_dates[-1]
-            )
-            
             # Get allocations from constructor
-            allocations = self.constructor.allocate_portfolio(train_context)
+            if precomputed_allocations is not None:
+                allocations = dict(precomputed_allocations[window_count - 1])
+            else:
+                # Build context for training period
+                train_context = self._build_context(
+                    returns_df=train_returns,
+                    margin_df=train_margin,
+                    notional_df=train_notional,
+                    is_backtest=True,
+                    current_date=train_dates[-1]
+                )
+                allocations = self.constructor.allocate_portfolio(train_context)
 
             print(f"    📊 ALLOCATION DECISION TRACKING:")
             print(f"       [STEP 1] Optimizer output:")
@@ -227,36 +303,31 @@ class WalkForwardBacktest:
 
                     # Calculate portfolio margin for each day in test period
                     # FIXED: Normalize margin to percentages using account_equity
-                    portfolio_margin_daily = []
-                    for idx in range(len(test_dates)):
-                        daily_margin_pct = 0.0  # Portfolio margin as % of portfolio equity
-
-                        # Use account_equity to normalize margin into percentages
-                        if test_account_equity is not None:
-                            for sid, weight in weights.items():
-                                if sid in test_margin.columns and sid in test_account_equity.columns:
-                                    # Get strategy's margin and account equity for this day
-                                    strategy_margin = test_margin[sid].iloc[idx]
-                                    strategy_account_equity = test_account_equity[sid].iloc[idx]
-
-                                    # Calculate strategy's margin as % of their account equity
-                                    if strategy_account_equity > 0:
-                                        strategy_margin_pct = strategy_margin / strategy_account_equity
-                                    else:
-                                        strategy_margin_pct = 0.0
-
-                                    # Add weighted contribution to portfolio margin %
-                                    daily_margin_pct += weight * strategy_margin_pct
-                        else:
-                            # FALLBACK: If no account_equity data, use old (broken) method
-                            # This will trigger the scaling but at least won't crash
-                            for sid, weight in weights.items():
-                                if sid in test_margin.columns:
-                                    daily_margin_pct += weight * test_margin[sid].iloc[idx] / account_equity
-
-                        # Convert portfolio margin % to absolute dollars for current equity
-                        daily_margin_dollars = daily_margin_pct * account_equity
-                        portfolio_margin_daily.append(daily_margin_dollars)
+                    # Vectorized over days; strategies are accumulated in the same order as
+                    # a day-by-day loop so the sums are identical
+                    daily_margin_pct = np.zeros(len(test_dates))  # Portfolio margin as % of portfolio equity
+
+                    # Use account_equity to normalize margin into percentages
+                    if test_account_equity is not None:
+                        for sid, weight in weights.items():
+                            if sid in test_margin.columns and sid in test_account_equity.columns:
+                                # Strategy's margin as % of their account equity (0 if no equity)
+                                strategy_margin_pct = self._margin_pct(
+                                    test_margin[sid].to_numpy(dtype=np.float64),
+                                    test_account_equity[sid].to_numpy(dtype=np.float64)
+                                )
+
+                                # Add weighted contribution to portfolio margin %
+                                daily_margin_pct += weight * strategy_margin_pct
+                    else:
+                        # FALLBACK: If no account_equity data, use old (broken) method
+                        # This will trigger the scaling but at least won't crash
+                        for sid, weight in weights.items():
+                            if sid in test_margin.columns:
+                                daily_margin_pct += weight * test_margin[sid].to_numpy(dtype=np.float64) / account_equity
+
+                    # Convert portfolio margin % to absolute dollars for current equity
+                    portfolio_margin_daily = (daily_margin_pct * account_equity).tolist()
 
                     max_margin_used = max(portfolio_margin_daily)
                     avg_margin_used = sum(portfolio_margin_daily) / len(portfolio_margin_daily)
@@ -337,15 +408,11 @@ class WalkForwardBacktest:
             
             # Calculate IN-SAMPLE (training period) metrics using the allocations
             weights = {sid: (pct / 100.0) for sid, pct in allocations.items()}
-            train_portfolio_returns = []
-            for idx in range(len(train_returns)):
-                daily_ret = 0.0
-                for sid, weight in weights.items():
-                    if sid in train_returns.columns:
-                        daily_ret += weight * train_returns[sid].iloc[idx]
-                train_portfolio_returns.append(daily_ret)
-
-            train_portfolio_returns_arr = np.array(train_portfolio_returns)
+            train_portfolio_returns_arr = np.zeros(len(train_returns))
+            for sid, weight in weights.items():
+                if sid in train_returns.columns:
+                    train_portfolio_returns_arr += weight * train_returns[sid].to_numpy(dtype=np.float64)
+
             in_sample_cagr = self._calculate_cagr(train_portfolio_returns_arr)
             in_sample_sharpe = (train_portfolio_returns_arr.mean() / train_portfolio_returns_arr.std() * np.sqrt(252)) if train_portfolio_returns_arr.std() > 0 else 0
             in_sample_max_dd = self._calculate_max_drawdown(train_portfolio_returns_arr)
@@ -386,17 +453,22 @@ class WalkForwardBacktest:
                 'oos_max_dd': oos_max_dd,
                 'oos_volatility': oos_volatility
             })
-            
-            # Step forward to next NON-OVERLAPPING test period
-            test_start_idx += self.test_days
+            self._report_progress(
+                'window',
+                window_num=window_count,
+                total_windows=len(windows),
+                test_start=test_dates[0],
+                test_end=test_dates[-1]
+            )
         
-        print(f"\n  ✓ Completed {window_count} walk-forward windows")
+        print(f"\n  ✓ Completed {len(windows)} walk-forward windows")
         
         # Step 3: Combine results
         print("\n[3/4] Combining results...")
         combined_results = self._combine_windows(window_results)
         
         print(f"  ✓ Portfolio equity curve: {len(combined_results['portfolio_equity_curve'])} points")
+        self._report_progress('combined', points=len(combined_results['portfolio_equity_curve']))
         
         # Step 4: Calculate final metrics
         print("\n[4/4] Calculating metrics...")
@@ -406,6 +478,7 @@ class WalkForwardBacktest:
         print(f"  ✓ CAGR: {metrics['cagr_pct']:.2f}%")
         print(f"  ✓ Sharpe Ratio: {metrics['sharpe_ratio']:.2f}")
         print(f"  ✓ Max Drawdown: {metrics['max_drawdown_pct']:.2f}%")
+        self._report_progress('metrics', **metrics)
         
         combined_results['metrics'] = metrics
         combined_results['window_allocations'] = window_results  # Include for CSV export
@@ -413,10 +486,97 @@ class WalkForwardBacktest:
         
         # Step 5: Save all outputs
         print("\n[5/5] Saving outputs...")
-        self._save_outputs(combined_results, strategies_data)
+        combined_results['output_files'] = self._save_outputs(combined_results, strategies_data)
+        self._report_progress('saved', output_files=combined_results['output_files'])
         
         return combined_results
     
+    def _report_progress(self, stage: str, **info):
+        """Forward a progress event to progress_callback (never fails the backtest)"""
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(stage, info)
+        except Exception as e:
+            print(f"  ⚠️  Progress callback failed for stage '{stage}': {e}")
+    
+    def _window_bounds(self, n_dates: int) -> List[Tuple[int, int]]:
+        """
+        Walk-forward windows as (train_start_idx, test_start_idx) pairs.
+        Each test period is distinct (no overlap) and test_days long.
+        """
+        windows = []
+        test_start_idx = self.train_days  # First test starts after training period
+        
+        while test_start_idx + self.test_days <= n_dates:
+            # Determine training window based on type
+            if self.walk_forward_type == 'anchored':
+                # Anchored: Train from start to test_start (expanding window)
+                train_start_idx = 0
+            else:  # rolling
+                # Rolling: Train on fixed window before test
+                train_start_idx = max(0, test_start_idx - self.train_days)
+            
+            windows.append((train_start_idx, test_start_idx))
+            
+            # Step forward to next NON-OVERLAPPING test period
+            test_start_idx += self.test_days
+        
+        return windows
+    
+    def _optimize_windows_parallel(
+        self,
+        windows: List[Tuple[int, int]],
+        returns_matrix: pd.DataFrame,
+        margin_matrix: Optional[pd.DataFrame],
+        notional_matrix: Optional[pd.DataFrame]
+    ) -> Optional[List[Dict[str, float]]]:
+        """
+        Run the constructor's optimizer for every window in a process pool.
+        
+        The aligned matrices are copied once into shared memory; workers map them and
+        only receive (train_start_idx, test_start_idx) per task. The constructor is sent
+        once per worker through the pool initializer. Workers are spawned rather than
+        forked: the engine runs inside services with live Mongo clients and threads,
+        which a forked child would inherit in an undefined state.
+        
+        Returns:
+            Raw optimizer allocations per window (in window order), or None if the pool
+            could not be used (caller falls back to sequential optimization)
+        """
+        n_workers = min(self.n_jobs, len(windows))
+        print(f"  ⚡ Optimizing {len(windows)} windows in parallel ({n_workers} processes)...")
+        
+        blocks = []
+        specs = {}
+        try:
+            for key, frame in (('returns_matrix', returns_matrix),
+                               ('margin_matrix', margin_matrix),
+                               ('notional_matrix', notional_matrix)):
+                if frame is None:
+                    specs[key] = None
+                    continue
+                shm, spec = _share_frame(frame)
+                blocks.append(shm)
+                specs[key] = spec
+            
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_window_worker,
+                initargs=(self.constructor, specs)
+            ) as executor:
+                return list(executor.map(_optimize_window_worker, windows))
+        
+        except Exception as e:
+            print(f"  ⚠️  Parallel window optimization failed ({e}) - falling back to sequential")
+            return None
+        
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+    
     def _align_strategies(self, strategies_data: Dict) -> Dict:
         """
         Align all strategies to master timeline (outer join).
@@ -445,7 +605,7 @@ class WalkForwardBacktest:
             dfs_returns.append(df_ret)
             
             # Margin data (if available)
-            if 'margin_used' in data and data['margin_used']:
+            if data.get('margin_used') is not None and len(data['margin_used']) > 0:
                 df_mar = pd.DataFrame({
                     'date': data['dates'],
                     sid: data['margin_used']
@@ -456,7 +616,7 @@ class WalkForwardBacktest:
                 dfs_margin.append(df_mar)
             
             # Notional data (if available)
-            if 'notional' in data and data['notional']:
+            if data.get('notional') is not None and len(data['notional']) > 0:
                 df_not = pd.DataFrame({
                     'date': data['dates'],
                     sid: data['notional']
@@ -467,7 +627,7 @@ class WalkForwardBacktest:
                 dfs_notional.append(df_not)
             
             # Account equity data (if available) - NEW
-            if 'account_equity' in data and data['account_equity']:
+            if data.get('account_equity') is not None and len(data['account_equity']) > 0:
                 df_eq = pd.DataFrame({
                     'date': data['dates'],
                     sid: data['account_equity']
@@ -526,8 +686,8 @@ class WalkForwardBacktest:
         
         return result
     
+    @staticmethod
     def _build_context(
-        self,
         returns_df: pd.DataFrame,
         margin_df: pd.DataFrame = None,
         notional_df: pd.DataFrame = None,
@@ -570,6 +730,73 @@ class WalkForwardBacktest:
         
         return context
     
+    @staticmethod
+    def _margin_pct(margin: np.ndarray, account_equity: np.ndarray) -> np.ndarray:
+        """Per-day margin / account_equity, 0 where account equity is not positive"""
+        positive = account_equity > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(positive, margin / np.where(positive, account_equity, 1.0), 0.0)
+    
+    @staticmethod
+    def _weighted_sum(columns: Dict[str, np.ndarray], weights: Dict[str, float], n_days: int) -> np.ndarray:
+        """
+        sum_sid weight * columns[sid] (strategies missing from columns are skipped).
+        
+        Strategies are accumulated in allocation order, starting from 0.0, so every day's
+        value is bit-for-bit the same as the equivalent per-day Python loop.
+        """
+        total = np.zeros(n_days)
+        for sid, weight in weights.items():
+            if sid in columns:
+                total += weight * columns[sid]
+        return total
+    
+    def _drawdown_scan(
+        self,
+        invested_returns: np.ndarray,
+        flat_returns: np.ndarray,
+        starting_equity: float,
+        peak_equity: float
+    ):
+        """
+        Apply the drawdown hard-stop as a segmented NumPy scan.
+        
+        Each day uses the invested returns unless the drawdown at the previous close
+        exceeds max_drawdown_threshold, in which case it uses the flattened (zero weight)
+        returns. Within a run of days in the same state the equity curve is a plain
+        multiply-accumulate, so the scan only breaks where the state switches (normally
+        at most once per window, since flat equity cannot recover).
+        
+        Returns:
+            (flattened: bool mask per day, equity: start-of-day equity per day plus final)
+        """
+        n_days = len(invested_returns)
+        flattened = np.zeros(n_days, dtype=bool)
+        equity = np.empty(n_days + 1)
+        equity[0] = starting_equity
+        peak = peak_equity
+        
+        start = 0
+        is_flat = False  # First day of the window is never flattened
+        while start < n_days:
+            returns = flat_returns if is_flat else invested_returns
+            # segment[k] = equity after day start+k-1 (segment[0] = equity before day start)
+            segment = np.multiply.accumulate(np.concatenate(([equity[start]], 1 + returns[start:])))
+            peaks = np.fmax.accumulate(np.concatenate(([peak], segment[1:])))
+            
+            # Protection decision for days start+1 .. n_days-1 (uses previous day's close)
+            drawdown = (peaks[1:-1] - segment[1:-1]) / peaks[1:-1]
+            switches = np.flatnonzero((drawdown > self.max_drawdown_threshold) != is_flat)
+            end = start + 1 + switches[0] if switches.size else n_days
+            
+            flattened[start:end] = is_flat
+            equity[start + 1:end + 1] = segment[1:end - start + 1]
+            peak = peaks[end - start]
+            start = end
+            is_flat = not is_flat
+        
+        return flattened, equity
+    
     def _apply_allocations(
         self,
         allocations: Dict[str, float],
@@ -585,6 +812,10 @@ class WalkForwardBacktest:
         Apply allocations to test period and calculate portfolio returns.
         Optionally applies drawdown protection by reducing leverage when DD exceeds threshold.
         
+        Portfolio returns, margin % and notional are computed for the whole window as
+        weighted column sums (once with the allocation weights, once with the flattened
+        weights), then _drawdown_scan() picks per day which one applies.
+        
         Args:
             test_margin: Optional margin data for test period
             test_notional: Optional notional data for test period
@@ -594,6 +825,7 @@ class WalkForwardBacktest:
         """
         # Convert allocation percentages to weights
         total_alloc = sum(allocations.values())
+        n_days = len(test_returns)
         
         if total_alloc == 0:
             # No allocations, return zeros with all required fields
@@ -608,105 +840,94 @@ class WalkForwardBacktest:
         # Normalize allocations to weights (handle leverage)
         base_weights = {sid: (pct / 100.0) for sid, pct in allocations.items()}
         
-        # Calculate portfolio returns for each day
-        portfolio_returns = []
-        portfolio_margin = []
-        portfolio_notional = []
-        equity_curve = [starting_equity]
-        leverage_adjustments = []
-        protection_triggered_count = 0
+        def window_columns(frame: Optional[pd.DataFrame]) -> Dict[str, np.ndarray]:
+            """Allocated strategies' columns for this window as float64 arrays"""
+            if frame is None:
+                return {}
+            return {
+                sid: frame[sid].to_numpy(dtype=np.float64)[:n_days]
+                for sid in base_weights if sid in frame.columns
+            }
         
-        # Track peak - use global if provided, and update it as we go
-        if global_peak_equity is not None:
-            peak_equity = global_peak_equity
-        else:
-            peak_equity = starting_equity
+        returns_columns = window_columns(test_returns)
+        notional_columns = window_columns(test_notional)
         
-        for idx in range(len(test_returns)):
-            # Apply drawdown protection if enabled
-            current_leverage_multiplier = 1.0
-            
-            if self.apply_drawdown_protection and len(equity_curve) > 1:
-                # Calculate current drawdown using peak (which updates within window)
-                current_equity = equity_curve[-1]
-                current_dd = (peak_equity - current_equity) / peak_equity
-                
-                # HARD STOP: If DD exceeds threshold, go to cash (zero leverage)
-                if current_dd > self.max_drawdown_threshold:
-                    current_leverage_multiplier = 0.0  # Flatten all positions
-                    protection_triggered_count += 1
-            
-            # Apply (possibly reduced) weights
-            active_weights = {sid: weight * current_leverage_multiplier 
-                            for sid, weight in base_weights.items()}
-            
-            # Calculate daily return
-            daily_return = 0.0
-            for sid, weight in active_weights.items():
-                if sid in test_returns.columns:
-                    daily_return += weight * test_returns[sid].iloc[idx]
-            
-            # Calculate portfolio margin and notional using CORRECT methodology
-            # STEP 1: Calculate per-strategy margin as % of their account equity
-            # STEP 2: Weight by allocation to get portfolio margin %
-            # STEP 3: Apply to current portfolio equity
-            
-            daily_margin_pct = 0.0  # Portfolio margin as % of portfolio equity
-            daily_notional = 0.0
-            
+        # Portfolio margin % calculation using CORRECT methodology
+        # STEP 1: Calculate per-strategy margin as % of their account equity
+        # STEP 2: Weight by allocation to get portfolio margin %
+        # STEP 3: Apply to current portfolio equity (after the drawdown scan)
+        margin_pct_columns = {}
+        if test_margin is not None and test_account_equity is not None:
             # NEW CORRECT APPROACH: Use account_equity to normalize margin into percentages
-            if test_margin is not None and test_account_equity is not None:
-                for sid, weight in active_weights.items():
-                    if sid in test_margin.columns and sid in test_account_equity.columns:
-                        # Get strategy's margin and account equity for this day
-                        strategy_margin = test_margin[sid].iloc[idx]
-                        strategy_account_equity = test_account_equity[sid].iloc[idx]
-                        
-                        # Calculate strategy's margin as % of their account equity
-                        if strategy_account_equity > 0:
-                            strategy_margin_pct = strategy_margin / strategy_account_equity
-                        else:
-                            strategy_margin_pct = 0.0
-                        
-                        # Add weighted contribution to portfolio margin %
-                        daily_margin_pct += weight * strategy_margin_pct
-            
+            margin_columns = window_columns(test_margin)
+            account_equity_columns = window_columns(test_account_equity)
+            margin_pct_columns = {
+                sid: self._margin_pct(margin, account_equity_columns[sid])
+                for sid, margin in margin_columns.items() if sid in account_equity_columns
+            }
+        elif test_margin is not None:
             # FALLBACK: If no account_equity data, use old scaling method (less accurate)
-            elif test_margin is not None:
-                for sid, weight in active_weights.items():
-                    if sid in test_margin.columns:
-                        daily_margin_pct += weight * test_margin[sid].iloc[idx] / starting_equity
-            
-            # Calculate notional value (still uses simple weighted sum)
-            if test_notional is not None:
-                for sid, weight in active_weights.items():
-                    if sid in test_notional.columns:
-                        daily_notional += weight * test_notional[sid].iloc[idx]
+            # (weight * margin) / starting_equity - divided after weighting, as before
+            margin_pct_columns = window_columns(test_margin)
+        fallback_margin = test_margin is not None and test_account_equity is None
+        
+        def window_sums(weights: Dict[str, float]):
+            """(daily return, daily margin %, daily notional) for fixed weights"""
+            daily_returns = self._weighted_sum(returns_columns, weights, n_days)
             
-            # Apply portfolio margin % to current portfolio equity to get absolute margin $
-            current_equity = equity_curve[-1]
-            daily_margin_dollars = daily_margin_pct * current_equity
+            daily_margin_pct = np.zeros(n_days)  # Portfolio margin as % of portfolio equity
+            for sid, weight in weights.items():
+                if sid in margin_pct_columns:
+                    if fallback_margin:
+                        daily_margin_pct += weight * margin_pct_columns[sid] / starting_equity
+                    else:
+                        daily_margin_pct += weight * margin_pct_columns[sid]
             
-            portfolio_returns.append(daily_return)
-            portfolio_margin.append(daily_margin_dollars)
-            portfolio_notional.append(daily_notional)
-            leverage_adjustments.append(current_leverage_multiplier)
+            # Notional value (still uses simple weighted sum)
+            daily_notional = self._weighted_sum(notional_columns, weights, n_days)
             
-            # Update equity curve and peak
-            new_equity = current_equity * (1 + daily_return)
-            equity_curve.append(new_equity)
+            return daily_returns, daily_margin_pct, daily_notional
+        
+        invested_returns, invested_margin_pct, invested_notional = window_sums(base_weights)
+        
+        # Track peak - use global if provided, and update it as we go
+        if global_peak_equity is not None:
+            peak_equity = global_peak_equity
+        else:
+            peak_equity = starting_equity
+        
+        if self.apply_drawdown_protection:
+            # HARD STOP: If DD exceeds threshold, go to cash (zero leverage)
+            flat_weights = {sid: weight * 0.0 for sid, weight in base_weights.items()}
+            flat_returns, flat_margin_pct, flat_notional = window_sums(flat_weights)
             
-            # ALWAYS update peak to track highest point reached
-            peak_equity = max(peak_equity, new_equity)
+            flattened, equity_curve = self._drawdown_scan(
+                invested_returns, flat_returns, starting_equity, peak_equity
+            )
+            portfolio_returns = np.where(flattened, flat_returns, invested_returns)
+            daily_margin_pct = np.where(flattened, flat_margin_pct, invested_margin_pct)
+            portfolio_notional = np.where(flattened, flat_notional, invested_notional)
+            leverage_adjustments = np.where(flattened, 0.0, 1.0)
+            protection_triggered_count = int(flattened.sum())
+        else:
+            # No feedback from equity into weights: the equity curve is a single scan
+            portfolio_returns = invested_returns
+            daily_margin_pct = invested_margin_pct
+            portfolio_notional = invested_notional
+            equity_curve = np.multiply.accumulate(np.concatenate(([starting_equity], 1 + invested_returns)))
+            protection_triggered_count = 0
+        
+        # Apply portfolio margin % to start-of-day portfolio equity to get absolute margin $
+        portfolio_margin = daily_margin_pct * equity_curve[:-1]
         
         if self.apply_drawdown_protection and protection_triggered_count > 0:
             print(f"      DD Protection triggered {protection_triggered_count}/{len(test_returns)} days")
         
         return {
-            'portfolio_returns': portfolio_returns,
-            'portfolio_margin': portfolio_margin,
-            'portfolio_notional': portfolio_notional,
-            'leverage_adjustments': leverage_adjustments if self.apply_drawdown_protection else None
+            'portfolio_returns': portfolio_returns.tolist(),
+            'portfolio_margin': portfolio_margin.tolist(),
+            'portfolio_notional': portfolio_notional.tolist(),
+            'leverage_adjustments': leverage_adjustments.tolist() if self.apply_drawdown_protection else None
         }
     
     def _combine_windows(self, window_results: List[Dict]) -> Dict:
@@ -810,7 +1031,7 @@ class WalkForwardBacktest:
             'annual_volatility_pct': std_return * np.sqrt(252) * 100
         }
     
-    def _save_outputs(self, results: Dict, strategies_data: Dict):
+    def _save_outputs(self, results: Dict, strategies_data: Dict) -> Dict[str, str]:
         """
         Save all backtest outputs to files.
         
@@ -820,6 +1041,10 @@ class WalkForwardBacktest:
         3. Allocations history CSV
         4. Correlation matrix CSV
         5. QuantStats HTML tearsheet
+        
+        Returns:
+            Dict of saved file paths (config_json, equity_csv, allocation_csv,
+            correlation_csv, tearsheet_html)
         """
         # Generate timestamp for filenames
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -963,5 +1188,13 @@ class WalkForwardBacktest:
         
         print(f"\n  📁 All outputs saved to: {self.output_dir}/")
         print(f"     Base filename: {base_filename}")
+        
+        return {
+            'config_json': config_path,
+            'equity_csv': equity_path,
+            'allocation_csv': allocations_path,
+            'correlation_csv': corr_path,
+            'tearsheet_html': tearsheet_path
+        }
 
 
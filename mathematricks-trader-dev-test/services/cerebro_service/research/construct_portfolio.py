@@ -36,10 +36,90 @@ sys.path.insert(0, project_root)
 # Load environment variables
 load_dotenv(os.path.join(project_root, '.env'))
 
+import numpy as np
 from pymongo import MongoClient
+from services.backtest_series import BacktestSeriesError, SERIES_FIELD, load_backtest_columns
 from services.cerebro_service.research.backtest_engine import WalkForwardBacktest
 
 
+def parse_strategy_document(doc):
+    """Convert a strategies collection document into backtest input.
+
+    Supports the columnar backtest_series field (see services/backtest_series), the
+    unified raw_data_backtest_full field, the legacy backtest_data.raw_data_backtest_full
+    and legacy backtest_data.daily_returns. Top-level data is returned as NumPy arrays.
+
+    Returns:
+        (strategy_id, {dates, returns, margin_used, notional, account_equity}, structure)
+        or None if the document has no usable backtest data
+    """
+    strategy_id = doc.get('strategy_id') or doc.get('name') or str(doc.get('_id'))
+    
+    # UNIFIED STRUCTURE: columnar backtest_series (or raw_data_backtest_full) at top level
+    try:
+        columns = load_backtest_columns(doc)
+    except BacktestSeriesError as e:
+        print(f"  ⚠️  Skipping {strategy_id}: {e}")
+        return None
+    if columns is not None:
+        return strategy_id, {
+            'dates': columns['date'],
+            'returns': columns['return'],
+            'margin_used': columns.get('margin_used', np.zeros(len(columns['return']))),
+            'notional': columns.get('notional_value', np.zeros(len(columns['return']))),
+            'account_equity': columns.get('account_equity', np.full(len(columns['return']), 100000.0))
+        }, 'columnar structure' if SERIES_FIELD in doc else 'unified structure'
+    
+    # LEGACY STRUCTURE: backtest_data.raw_data_backtest_full
+    if 'backtest_data' in doc:
+        backtest_data = doc['backtest_data']
+        
+        # Prefer raw_data_backtest_full (has margin and notional data)
+        if 'raw_data_backtest_full' in backtest_data and isinstance(backtest_data['raw_data_backtest_full'], list):
+            raw_data = backtest_data['raw_data_backtest_full']
+            if len(raw_data) > 0 and isinstance(raw_data[0], dict):
+                dates = [datetime.fromisoformat(item['date']) if isinstance(item.get('date'), str)
+                        else item['date'] for item in raw_data]
+                returns = [float(item['return']) for item in raw_data]
+                margin_used = [float(item.get('margin_used', 0)) for item in raw_data]
+                notional = [float(item.get('notional_value', 0)) for item in raw_data]
+                account_equity = [float(item.get('account_equity', 100000)) for item in raw_data]
+                
+                return strategy_id, {
+                    'dates': dates,
+                    'returns': returns,
+                    'margin_used': margin_used,
+                    'notional': notional,
+                    'account_equity': account_equity
+                }, 'legacy structure'
+        
+        # Fallback to daily_returns (backward compatibility)
+        if 'daily_returns' in backtest_data and isinstance(backtest_data['daily_returns'], list):
+            daily_returns = backtest_data['daily_returns']
+            if len(daily_returns) > 0:
+                if isinstance(daily_returns[0], dict):
+                    dates = [datetime.fromisoformat(item['date']) if isinstance(item.get('date'), str)
+                            else item['date'] for item in daily_returns]
+                    returns = [float(item['return']) for item in daily_returns]
+                else:
+                    if 'dates' in backtest_data:
+                        dates = [datetime.fromisoformat(d) if isinstance(d, str) else d 
+                                for d in backtest_data['dates']]
+                        returns = [float(r) for r in daily_returns]
+                    else:
+                        return None
+                
+                return strategy_id, {
+                    'dates': dates,
+                    'returns': returns,
+                    'margin_used': [0] * len(returns),  # Not available in old format
+                    'notional': [0] * len(returns),      # Not available in old format
+                    'account_equity': [100000] * len(returns)  # Not available in old format
+                }, 'legacy daily_returns'
+    
+    return None
+
+
 def load_strategies_from_mongodb(filter_strategy_ids=None):
     """Load strategy data from MongoDB (cloud).
 
@@ -69,78 +149,12 @@ def load_strategies_from_mongodb(filter_strategy_ids=None):
     strategies_data = {}
     
     for doc in strategies_cursor:
-        strategy_id = doc.get('strategy_id') or doc.get('name') or str(doc.get('_id'))
-        
-        # NEW UNIFIED STRUCTURE: raw_data_backtest_full at top level
-        if 'raw_data_backtest_full' in doc and isinstance(doc['raw_data_backtest_full'], list):
-            raw_data = doc['raw_data_backtest_full']
-            if len(raw_data) > 0 and isinstance(raw_data[0], dict):
-                dates = [datetime.fromisoformat(item['date']) if isinstance(item.get('date'), str)
-                        else item['date'] for item in raw_data]
-                returns = [float(item['return']) for item in raw_data]
-                margin_used = [float(item.get('margin_used', 0)) for item in raw_data]
-                notional = [float(item.get('notional_value', 0)) for item in raw_data]
-                account_equity = [float(item.get('account_equity', 100000)) for item in raw_data]
-                
-                strategies_data[strategy_id] = {
-                    'dates': dates,
-                    'returns': returns,
-                    'margin_used': margin_used,
-                    'notional': notional,
-                    'account_equity': account_equity
-                }
-                print(f"  ✓ Loaded {strategy_id}: {len(returns)} days of data (unified structure)")
-                continue
-        
-        # LEGACY STRUCTURE: backtest_data.raw_data_backtest_full
-        if 'backtest_data' in doc:
-            backtest_data = doc['backtest_data']
-            
-            # Prefer raw_data_backtest_full (has margin and notional data)
-            if 'raw_data_backtest_full' in backtest_data and isinstance(backtest_data['raw_data_backtest_full'], list):
-                raw_data = backtest_data['raw_data_backtest_full']
-                if len(raw_data) > 0 and isinstance(raw_data[0], dict):
-                    dates = [datetime.fromisoformat(item['date']) if isinstance(item.get('date'), str)
-                            else item['date'] for item in raw_data]
-                    returns = [float(item['return']) for item in raw_data]
-                    margin_used = [float(item.get('margin_used', 0)) for item in raw_data]
-                    notional = [float(item.get('notional_value', 0)) for item in raw_data]
-                    account_equity = [float(item.get('account_equity', 100000)) for item in raw_data]
-                    
-                    strategies_data[strategy_id] = {
-                        'dates': dates,
-                        'returns': returns,
-                        'margin_used': margin_used,
-                        'notional': notional,
-                        'account_equity': account_equity
-                    }
-                    print(f"  ✓ Loaded {strategy_id}: {len(returns)} days of data (legacy structure)")
-                    continue
-            
-            # Fallback to daily_returns (backward compatibility)
-            if 'daily_returns' in backtest_data and isinstance(backtest_data['daily_returns'], list):
-                daily_returns = backtest_data['daily_returns']
-                if len(daily_returns) > 0:
-                    if isinstance(daily_returns[0], dict):
-                        dates = [datetime.fromisoformat(item['date']) if isinstance(item.get('date'), str)
-                                else item['date'] for item in daily_returns]
-                        returns = [float(item['return']) for item in daily_returns]
-                    else:
-                        if 'dates' in backtest_data:
-                            dates = [datetime.fromisoformat(d) if isinstance(d, str) else d 
-                                    for d in backtest_data['dates']]
-                            returns = [float(r) for r in daily_returns]
-                        else:
-                            continue
-                    
-                    strategies_data[strategy_id] = {
-                        'dates': dates,
-                        'returns': returns,
-                        'margin_used': [0] * len(returns),  # Not available in old format
-                        'notional': [0] * len(returns),      # Not available in old format
-                        'account_equity': [100000] * len(returns)  # Not available in old format
-                    }
-                    print(f"  ✓ Loaded {strategy_id}: {len(returns)} days of data (legacy daily_returns)")
+        parsed = parse_strategy_document(doc)
+        if parsed is None:
+            continue
+        strategy_id, data, structure = parsed
+        strategies_data[strategy_id] = data
+        print(f"  ✓ Loaded {strategy_id}: {len(data['returns'])} days of data ({structure})")
     
     print(f"\n  ✓ Total strategies loaded: {len(strategies_data)}")
     
@@ -226,6 +240,9 @@ Examples:
   python services/cerebro_service/research/construct_portfolio.py --constructor max_sharpe
   python services/cerebro_service/research/construct_portfolio.py --constructor max_hybrid
   
+  # Optimize walk-forward windows on all CPUs
+  python services/cerebro_service/research/construct_portfolio.py --constructor max_hybrid --n-jobs 0
+  
   # Run with saved config (parameters will be overridden)
   python services/cerebro_service/research/construct_portfolio.py --constructor max_hybrid --config path/to/config.json
   
@@ -289,6 +306,13 @@ Available constructors:
         help='Comma-separated list of strategy IDs to include (default: all active strategies)'
     )
 
+    parser.add_argument(
+        '--n-jobs',
+        type=int,
+        default=1,
+        help='Worker processes for window optimizations (1 = sequential, 0 = one per CPU; default: 1)'
+    )
+
     args = parser.parse_args()
 
     # Parse strategy filter list
@@ -306,6 +330,7 @@ Available constructors:
     print(f"Train Days: {args.train_days}")
     print(f"Test Days: {args.test_days}")
     print(f"Walk-Forward: {args.walk_forward_type}")
+    print(f"Parallel Jobs: {args.n_jobs if args.n_jobs > 0 else 'all CPUs'}")
     if args.output_dir:
         print(f"Output Dir: {args.output_dir}")
     else:
@@ -331,7 +356,8 @@ Available constructors:
             train_days=args.train_days,
             test_days=args.test_days,
             walk_forward_type=args.walk_forward_type,
-            output_dir=args.output_dir
+            output_dir=args.output_dir,
+            n_jobs=args.n_jobs
         )
         
         # Run backtest (automatically saves all outputs)
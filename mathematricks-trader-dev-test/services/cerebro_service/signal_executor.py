@@ -0,0 +1,240 @@
+"""
+Ordered Signal Executor Module
+Bounded, per-key ordered executor for cerebro's Pub/Sub signal processing.
+
+The Pub/Sub callback used to process every signal synchronously (MongoDB lookups,
+margin estimation, portfolio construction) and could sleep for up to 30s waiting for an
+ENTRY fill, pinning a subscriber thread. This executor:
+- Runs signals for different (strategy, instrument) keys in parallel on a fixed pool
+- Runs signals for the same key strictly in arrival order (EXIT after its ENTRY)
+- Bounds the number of accepted-but-unfinished signals (back-pressure to Pub/Sub)
+- Lets a handler defer a signal (DeferSignal) instead of sleeping: the key stays
+  reserved, no thread is held, and the signal is re-run after the delay or as soon as
+  wake() is called for its key
+"""
+from typing import Dict, Any, Callable, Optional, Hashable
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DeferSignal(Exception):
+    """
+    Raised by a handler to re-run the same signal later without holding a worker thread.
+    Signals queued behind it for the same key keep waiting.
+    """
+
+    def __init__(self, delay: float, reason: str = ""):
+        super().__init__(reason or f"deferred for {delay}s")
+        self.delay = delay
+        self.reason = reason
+
+
+@dataclass
+class SignalTask:
+    """A signal accepted by the executor"""
+    key: Hashable
+    payload: Dict[str, Any]
+    on_done: Optional[Callable[[], None]] = None
+    attempts: int = 0
+    state: Dict[str, Any] = field(default_factory=dict)  # Handler-owned, survives deferrals
+    submitted_at: float = field(default_factory=time.time)
+    generation: int = 0  # Bumped on every deferral (invalidates stale timer entries)
+
+
+class OrderedSignalExecutor:
+    """
+    Thread pool that preserves per-key ordering.
+
+    Key responsibilities:
+    - At most one task per key is active (running or deferred) at any time
+    - At most max_pending tasks are accepted and unfinished; submit() blocks beyond that
+    - Deferred tasks are re-dispatched by a single timer thread (or wake())
+    """
+
+    def __init__(self,
+                 handler: Callable[[SignalTask], None],
+                 max_workers: int = 8,
+                 max_pending: int = 256,
+                 name: str = "signal-worker"):
+        """
+        Initialize OrderedSignalExecutor.
+
+        Args:
+            handler: Called with the SignalTask; may raise DeferSignal
+            max_workers: Worker threads (signals processed concurrently)
+            max_pending: Accepted-but-unfinished signals before submit() blocks
+            name: Thread name prefix
+        """
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._timer_cond = threading.Condition(self._lock)
+        self._queues: Dict[Hashable, deque] = {}  # key -> tasks, head is the active one
+        self._deferred: Dict[Hashable, SignalTask] = {}
+        self._wake_pending = set()  # keys woken while their task was still running
+        self._timers = []  # heap of (due, seq, generation, task)
+        self._seq = itertools.count()
+        self._stopped = False
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.deferrals = 0
+
+        self._timer_thread = threading.Thread(target=self._timer_loop, name=f"{name}-timer", daemon=True)
+        self._timer_thread.start()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def submit(self, key: Hashable, payload: Dict[str, Any],
+               on_done: Optional[Callable[[], None]] = None,
+               timeout: Optional[float] = None) -> bool:
+        """
+        Queue a signal behind any earlier signals with the same key.
+
+        Args:
+            key: Ordering key, e.g. (strategy_id, instrument)
+            payload: Signal dict passed to the handler as task.payload
+            on_done: Called once the signal is finished (success or failure), e.g. ack
+            timeout: Seconds to wait for a free slot (None = wait indefinitely)
+
+        Returns:
+            False if no slot became free within timeout (signal not accepted)
+        """
+        if not self._slots.acquire(timeout=timeout):
+            return False
+
+        task = SignalTask(key=key, payload=payload, on_done=on_done)
+        with self._lock:
+            self.submitted += 1
+            queue = self._queues.setdefault(key, deque())
+            queue.append(task)
+            is_head = len(queue) == 1
+
+        if is_head:
+            self._pool.submit(self._run, task)
+        return True
+
+    def wake(self, key: Hashable) -> bool:
+        """
+        Re-run the deferred signal for key now instead of waiting for its timer.
+        If the key's signal is still running, its next deferral is skipped instead.
+
+        Returns:
+            True if a deferred or running task was woken
+        """
+        with self._lock:
+            task = self._deferred.pop(key, None)
+            if task is None:
+                if key not in self._queues:
+                    return False
+                self._wake_pending.add(key)
+                return True
+        self._pool.submit(self._run, task)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and current queue depths (for monitoring)"""
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'deferrals': self.deferrals,
+                'active_keys': len(self._queues),
+                'pending': sum(len(queue) for queue in self._queues.values()),
+                'deferred': len(self._deferred),
+                'max_workers': self.max_workers,
+                'max_pending': self.max_pending
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop the timer thread and the worker pool (deferred signals are dropped)"""
+        with self._timer_cond:
+            self._stopped = True
+            self._timer_cond.notify_all()
+        self._pool.shutdown(wait=wait)
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _run(self, task: SignalTask):
+        task.attempts += 1
+        try:
+            self.handler(task)
+        except DeferSignal as d:
+            self._defer(task, d.delay)
+            return
+        except Exception as e:
+            logger.error(f"❌ Unhandled error processing signal for {task.key}: {e}", exc_info=True)
+            with self._lock:
+                self.failed += 1
+        self._finish(task)
+
+    def _finish(self, task: SignalTask):
+        if task.on_done:
+            try:
+                task.on_done()
+            except Exception as e:
+                logger.error(f"❌ Signal completion callback failed for {task.key}: {e}")
+
+        with self._lock:
+            self.completed += 1
+            self._wake_pending.discard(task.key)
+            queue = self._queues[task.key]
+            queue.popleft()
+            next_task = queue[0] if queue else None
+            if not queue:
+                del self._queues[task.key]
+
+        self._slots.release()
+        if next_task is not None:
+            self._pool.submit(self._run, next_task)
+
+    def _defer(self, task: SignalTask, delay: float):
+        with self._timer_cond:
+            self.deferrals += 1
+            task.generation += 1
+            if task.key in self._wake_pending:
+                # Woken while the handler was deciding to defer - re-run immediately
+                self._wake_pending.discard(task.key)
+                delay = 0.0
+            self._deferred[task.key] = task
+            heapq.heappush(self._timers, (time.monotonic() + max(delay, 0.0), next(self._seq), task.generation, task))
+            self._timer_cond.notify()
+
+    def _timer_loop(self):
+        """Dispatch deferred tasks whose delay has elapsed"""
+        with self._timer_cond:
+            while not self._stopped:
+                if not self._timers:
+                    self._timer_cond.wait()
+                    continue
+
+                due, _, generation, task = self._timers[0]
+                now = time.monotonic()
+                if due > now:
+                    self._timer_cond.wait(due - now)
+                    continue
+
+                heapq.heappop(self._timers)
+                # Skip entries superseded by wake() or a later deferral
+                if self._deferred.get(task.key) is not task or task.generation != generation:
+                    continue
+                del self._deferred[task.key]
+                self._pool.submit(self._run, task)
@@ -0,0 +1,385 @@
+"""
+Strategy History Cache Module
+In-process, versioned cache of strategy backtest histories for live signal processing.
+
+Parsing every ACTIVE strategy's backtest history on each signal costs seconds
+once there are dozens of strategies. This cache parses each strategy once, keeps the
+result keyed by strategy_id + version, and only reloads a strategy when its MongoDB
+document changes (change stream, or the PortfolioBuilder refresh-cache endpoint which
+bumps updated_at / history_version).
+"""
+from typing import Dict, Any, Optional, Callable, List
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pymongo.errors import PyMongoError
+
+from backtest_series import BacktestSeriesError, backtest_digest, has_backtest_data, load_backtest_columns
+
+logger = logging.getLogger(__name__)
+
+# Fields needed to decide whether a cached entry is stale (no backtest payload)
+VERSION_PROJECTION = {"strategy_id": 1, "status": 1, "updated_at": 1, "history_version": 1}
+
+
+@dataclass
+class StrategyHistory:
+    """Parsed backtest history for one strategy"""
+    strategy_id: str
+    version: str
+    dates: np.ndarray  # datetime64[ns], read-only
+    returns: np.ndarray  # float64, read-only
+    frame: pd.DataFrame  # DataFrame view over dates/returns (no copy)
+    loaded_at: datetime
+
+
+def compute_history_version(strategy_doc: Dict[str, Any]) -> str:
+    """
+    Version key for a strategy document.
+
+    Uses updated_at (+ history_version counter) when present, otherwise falls back to a
+    content hash of the backtest data.
+    """
+    updated_at = strategy_doc.get('updated_at')
+    if updated_at is not None:
+        return f"{updated_at}:{strategy_doc.get('history_version', 0)}"
+
+    return f"sha1:{backtest_digest(strategy_doc)}"
+
+
+def parse_backtest_history(strategy_doc: Dict[str, Any]) -> Optional[pd.DataFrame]:
+    """
+    Parse a strategy's backtest history into a DataFrame with a 'returns' column.
+
+    backtest_series columns are decoded straight from the BSON payload (no per-row work);
+    legacy raw_data_backtest_full lists are converted in one vectorized pass. The arrays
+    are marked read-only so the same buffers can be handed to every PortfolioContext
+    without copying.
+
+    Returns:
+        DataFrame indexed by date, or None if the document has no usable history
+    """
+    strategy_id = strategy_doc.get('strategy_id')
+
+    try:
+        columns = load_backtest_columns(strategy_doc)
+    except BacktestSeriesError as e:
+        logger.error(f"  ❌ {strategy_id}: Failed to parse backtest data - {e}")
+        return None
+
+    if columns is None or len(columns['return']) == 0:
+        logger.warning(f"  ⚠️  {strategy_id}: backtest data is empty or invalid format")
+        return None
+
+    dates = columns['date']
+    returns = columns['return']
+
+    # Remove any NaN values (only copies when there is something to drop)
+    valid = ~np.isnan(returns)
+    if not valid.all():
+        dates = dates[valid]
+        returns = returns[valid]
+
+    if len(returns) == 0:
+        logger.warning(f"  ⚠️  {strategy_id}: Backtest data produced zero valid returns")
+        return None
+
+    dates.flags.writeable = False
+    returns.flags.writeable = False
+
+    return pd.DataFrame(
+        {'returns': returns},  # Note: plural 'returns' to match MaxHybrid expectation
+        index=pd.DatetimeIndex(dates, copy=False),
+        copy=False
+    )
+
+
+class StrategyHistoryCache:
+    """
+    Versioned cache of strategy backtest histories.
+
+    Key responsibilities:
+    - Warm all ACTIVE strategy histories at startup
+    - Hand out the cached DataFrames (read-only arrays, no copying) per signal
+    - Invalidate a single strategy when its document changes
+    """
+
+    def __init__(self, strategies_collection, poll_interval: float = 60.0):
+        """
+        Initialize StrategyHistoryCache.
+
+        Args:
+            strategies_collection: MongoDB strategies collection
+            poll_interval: Seconds between version checks when change streams are
+                unavailable (standalone MongoDB). 0 disables the fallback poll.
+        """
+        self.strategies_collection = strategies_collection
+        self.poll_interval = poll_interval
+        self._entries: Dict[str, StrategyHistory] = {}
+        self._doc_ids: Dict[Any, str] = {}  # MongoDB _id -> strategy_id (for delete events)
+        self._lock = threading.RLock()
+        self._warmed = False
+        self._watcher_thread = None
+        self._stop_event = threading.Event()
+        self._change_listeners: List[Callable[[Optional[str]], None]] = []
+
+    def add_change_listener(self, callback: Callable[[Optional[str]], None]):
+        """
+        Call callback(strategy_id) whenever a strategy document is seen to change
+        (including changes that do not touch the backtest history). strategy_id is None
+        when the whole collection changed.
+        """
+        self._change_listeners.append(callback)
+
+    def _notify_change(self, strategy_id: Optional[str]):
+        for callback in self._change_listeners:
+            try:
+                callback(strategy_id)
+            except Exception as e:
+                logger.error(f"Strategy change listener failed for {strategy_id}: {e}")
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load_document(self, strategy_doc: Dict[str, Any]) -> Optional[StrategyHistory]:
+        """Parse a strategy document and store it in the cache"""
+        strategy_id = strategy_doc.get('strategy_id')
+        if not strategy_id:
+            return None
+
+        self._doc_ids[strategy_doc.get('_id')] = strategy_id
+
+        if strategy_doc.get('status') != 'ACTIVE':
+            self._entries.pop(strategy_id, None)
+            return None
+
+        if not has_backtest_data(strategy_doc):
+            logger.warning(f"  ⚠️  {strategy_id}: No backtest_series / raw_data_backtest_full field")
+            self._entries.pop(strategy_id, None)
+            return None
+
+        frame = parse_backtest_history(strategy_doc)
+        if frame is None:
+            self._entries.pop(strategy_id, None)
+            return None
+
+        entry = StrategyHistory(
+            strategy_id=strategy_id,
+            version=compute_history_version(strategy_doc),
+            dates=frame.index.values,
+            returns=frame['returns'].values,
+            frame=frame,
+            loaded_at=datetime.utcnow()
+        )
+        self._entries[strategy_id] = entry
+        logger.info(f"  ✅ {strategy_id}: Cached {len(frame)} backtest returns (version {entry.version})")
+        return entry
+
+    def warm(self) -> int:
+        """
+        Load histories for all ACTIVE strategies.
+
+        Returns:
+            Number of strategies cached
+        """
+        start = time.time()
+        try:
+            strategies = list(self.strategies_collection.find({"status": "ACTIVE"}))
+        except PyMongoError as e:
+            logger.error(f"Error warming strategy history cache: {e}", exc_info=True)
+            return 0
+
+        logger.info(f"Warming history cache for {len(strategies)} ACTIVE strategies...")
+
+        with self._lock:
+            self._entries = {}
+            self._doc_ids = {}
+            for strat_doc in strategies:
+                self._load_document(strat_doc)
+            self._warmed = True
+            count = len(self._entries)
+
+        if count:
+            logger.info(f"✅ Strategy history cache warmed: {count} strategies in {time.time() - start:.2f}s")
+        else:
+            logger.warning("⚠️  NO strategy histories loaded - optimizer will have no data to work with")
+        return count
+
+    def get_histories(self) -> Dict[str, pd.DataFrame]:
+        """
+        Get cached histories for all ACTIVE strategies.
+
+        The returned DataFrames share their buffers with the cache - callers must treat
+        them as read-only.
+
+        Returns:
+            Dict mapping strategy_id to DataFrame with returns
+        """
+        if not self._warmed:
+            self.warm()
+
+        with self._lock:
+            return {sid: entry.frame for sid, entry in self._entries.items()}
+
+    def get_entry(self, strategy_id: str) -> Optional[StrategyHistory]:
+        """Get the cached entry (arrays + version) for one strategy"""
+        with self._lock:
+            return self._entries.get(strategy_id)
+
+    def get_versions(self) -> Dict[str, str]:
+        """Get {strategy_id: version} for all cached strategies"""
+        with self._lock:
+            return {sid: entry.version for sid, entry in self._entries.items()}
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(self, strategy_id: str) -> bool:
+        """
+        Reload a single strategy from MongoDB.
+
+        Returns:
+            True if the strategy is cached after the reload
+        """
+        try:
+            strat_doc = self.strategies_collection.find_one({"strategy_id": strategy_id})
+        except PyMongoError as e:
+            logger.error(f"Error reloading history for {strategy_id}: {e}")
+            return False
+
+        with self._lock:
+            if not strat_doc:
+                self._entries.pop(strategy_id, None)
+                logger.info(f"🗑️  {strategy_id}: Removed from history cache (document not found)")
+                return False
+            return self._load_document(strat_doc) is not None
+
+    def invalidate_all(self) -> int:
+        """Drop everything and re-warm from MongoDB"""
+        return self.warm()
+
+    def _handle_change(self, change: Dict[str, Any]):
+        """Apply a single change stream event to the cache"""
+        operation = change.get('operationType')
+
+        if operation == 'delete':
+            doc_id = change.get('documentKey', {}).get('_id')
+            with self._lock:
+                strategy_id = self._doc_ids.pop(doc_id, None)
+                if strategy_id:
+                    self._entries.pop(strategy_id, None)
+                    logger.info(f"🗑️  {strategy_id}: Removed from history cache (document deleted)")
+            # Unknown _id (e.g. non-ACTIVE strategy): notify everything
+            self._notify_change(strategy_id)
+            return
+
+        if operation in ('insert', 'update', 'replace'):
+            strat_doc = change.get('fullDocument')
+            if not strat_doc:
+                return
+            self._notify_change(strat_doc.get('strategy_id'))
+            with self._lock:
+                strategy_id = strat_doc.get('strategy_id')
+                cached = self._entries.get(strategy_id)
+                if cached and cached.version == compute_history_version(strat_doc):
+                    return
+                logger.info(f"🔄 {strategy_id}: Strategy document changed - reloading history")
+                self._load_document(strat_doc)
+            return
+
+        if operation in ('drop', 'rename', 'invalidate'):
+            logger.warning(f"⚠️  Strategies collection {operation} event - re-warming history cache")
+            self._notify_change(None)
+            self.warm()
+
+    def refresh_stale(self) -> int:
+        """
+        Compare cached versions against MongoDB and reload only changed strategies.
+        Used as the fallback when change streams are unavailable.
+
+        Returns:
+            Number of strategies reloaded or removed
+        """
+        try:
+            current = {
+                doc['strategy_id']: doc
+                for doc in self.strategies_collection.find({"status": "ACTIVE"}, VERSION_PROJECTION)
+                if doc.get('strategy_id')
+            }
+        except PyMongoError as e:
+            logger.error(f"Error checking strategy history versions: {e}")
+            return 0
+
+        changed = 0
+        cached_versions = self.get_versions()
+
+        for strategy_id in set(cached_versions) - set(current):
+            with self._lock:
+                self._entries.pop(strategy_id, None)
+            self._notify_change(strategy_id)
+            changed += 1
+
+        for strategy_id, version_doc in current.items():
+            # Without updated_at we cannot detect changes from a projection - rely on
+            # the change stream / refresh-cache endpoint for those documents
+            if version_doc.get('updated_at') is None and strategy_id in cached_versions:
+                continue
+            if cached_versions.get(strategy_id) != compute_history_version(version_doc):
+                self.invalidate(strategy_id)
+                self._notify_change(strategy_id)
+                changed += 1
+
+        if changed:
+            logger.info(f"🔄 Strategy history cache: {changed} strategies refreshed")
+        return changed
+
+    # ------------------------------------------------------------------
+    # Background watcher
+    # ------------------------------------------------------------------
+
+    def _watch_loop(self):
+        """Consume the strategies change stream, falling back to version polling"""
+        while not self._stop_event.is_set():
+            try:
+                with self.strategies_collection.watch(full_document='updateLookup') as stream:
+                    logger.info("👀 Watching strategies collection for history changes...")
+                    # Catch anything that changed between warm() and opening the stream
+                    self.refresh_stale()
+                    while not self._stop_event.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            self._stop_event.wait(1.0)
+                            continue
+                        self._handle_change(change)
+
+            except PyMongoError as e:
+                if self.poll_interval <= 0:
+                    logger.error(f"Strategy change stream unavailable ({e}) - history cache will only refresh on demand")
+                    return
+                logger.warning(f"⚠️  Strategy change stream unavailable ({e}) - polling versions every {self.poll_interval:.0f}s")
+                while not self._stop_event.wait(self.poll_interval):
+                    self.refresh_stale()
+                return
+
+    def start_watcher(self):
+        """Start the background invalidation thread (idempotent)"""
+        if self._watcher_thread and self._watcher_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._watcher_thread = threading.Thread(
+            target=self._watch_loop,
+            name="strategy-history-cache-watcher",
+            daemon=True
+        )
+        self._watcher_thread.start()
+
+    def stop_watcher(self):
+        """Stop the background invalidation thread"""
+        self._stop_event.set()
@@ -5,12 +5,22 @@ APIs for strategy developers to query their signal status and positions
 import logging
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Header, Query
-from pymongo import MongoClient
+from fastapi.responses import StreamingResponse
+from pymongo import MongoClient, ASCENDING, DESCENDING
+
+from pagination import KeysetPage, InvalidCursorError, stream_json_list
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/signal-senders")
 
+# signal_store fields read by the signal list (signal_data and the rest of the decision stay on the server)
+SIGNAL_LIST_PROJECTION = {
+    f"cerebro_decision.{field}": 1
+    for field in ("signal_id", "timestamp", "instrument", "action", "decision", "original_quantity",
+                  "final_quantity", "allocated_capital", "allocation_pct", "price", "reason")
+}
+
 
 # Store MongoDB client (set by main.py)
 _mongo_client: Optional[MongoClient] = None
@@ -22,6 +32,14 @@ def set_mongo_client(client: MongoClient):
     _mongo_client = client
 
 
+def ensure_indexes():
+    """Create the signal_store index the signal list pages on (idempotent)"""
+    _mongo_client['mathematricks_trading']['signal_store'].create_index(
+        [("strategy_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        name="strategy_created_idx"
+    )
+
+
 async def verify_api_key(x_api_key: str = Header(None)) -> str:
     """
     Verify API key and return strategy_id.
@@ -52,19 +70,24 @@ async def get_signals(
     strategy_id: str,
     limit: int = Query(50, ge=1, le=500, description="Number of signals to return"),
     status: Optional[str] = Query(None, description="Filter by status: EXECUTED or REJECTED"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     x_api_key: str = Header(None, description="API key for authentication")
 ):
     """
-    Get signals for a strategy with optional status filtering.
+    Get signals for a strategy with optional status filtering, newest first.
+
+    Pages are keyset-paginated on (strategy_id, created_at): pass the returned next_cursor
+    to get the following page (null on the last page). The response is streamed.
 
     Args:
         strategy_id: Strategy identifier
         limit: Maximum number of signals to return (1-500)
         status: Optional filter - "EXECUTED" or "REJECTED"
+        cursor: Optional cursor from a previous page
         x_api_key: API key from request header
 
     Returns:
-        List of signals with status and details
+        List of signals with status and details, plus next_cursor
     """
     # Verify API key matches strategy_id
     verified_strategy = await verify_api_key(x_api_key)
@@ -76,63 +99,52 @@ async def get_signals(
 
     db = _mongo_client['mathematricks_trading']
 
-    # Build query
-    query = {"strategy_id": strategy_id}
-    if status:
-        if status == "EXECUTED":
-            query["decision"] = "APPROVED"
-        elif status == "REJECTED":
-            query["decision"] = {"$ne": "APPROVED"}
-        else:
-            raise HTTPException(status_code=400, detail="status must be EXECUTED or REJECTED")
-
     # Query decisions from signal_store (embedded)
-    # Need to match on signal_data.strategy_id since that's where the strategy is stored
     signal_store_query = {
-        'cerebro_decision': {'$ne': None},
-        'signal_data.strategy_name': strategy_id  # Match strategy in signal_data
+        'strategy_id': strategy_id,
+        'cerebro_decision': {'$ne': None}
     }
     if status:
         if status == "EXECUTED":
             signal_store_query['cerebro_decision.decision'] = "APPROVED"
         elif status == "REJECTED":
             signal_store_query['cerebro_decision.decision'] = {"$ne": "APPROVED"}
+        else:
+            raise HTTPException(status_code=400, detail="status must be EXECUTED or REJECTED")
 
-    # Get signal_store documents and extract decisions
-    signal_store_docs = list(
-        db['signal_store'].find(signal_store_query)
-        .sort("received_at", -1)
-        .limit(limit)
+    try:
+        page = KeysetPage(
+            db['signal_store'], signal_store_query, "created_at", limit,
+            cursor=cursor, projection=SIGNAL_LIST_PROJECTION
+        ).open()
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    signals = (_format_signal(doc['cerebro_decision']) for doc in page if doc.get('cerebro_decision'))
+    return StreamingResponse(
+        stream_json_list(
+            {"strategy_id": strategy_id}, "signals", signals,
+            tail=lambda count: {"count": count, "next_cursor": page.next_cursor}
+        ),
+        media_type="application/json"
     )
 
-    # Extract decisions from signal_store
-    decisions = []
-    for doc in signal_store_docs:
-        decision = doc.get('cerebro_decision', {})
-        if decision:
-            decisions.append(decision)
-
-    # Format response
-    signals = []
-    for decision in decisions:
-        signals.append({
-            "signal_id": decision.get("signal_id"),
-            "timestamp": decision.get("timestamp", "").isoformat() + "Z" if hasattr(decision.get("timestamp", ""), 'isoformat') else str(decision.get("timestamp", "")),
-            "ticker": decision.get("instrument", "UNKNOWN"),
-            "action": decision.get("action", "UNKNOWN"),
-            "status": "EXECUTED" if decision.get("decision") == "APPROVED" else "REJECTED",
-            "requested_quantity": decision.get("original_quantity", 0),
-            "actual_quantity": decision.get("final_quantity", 0),
-            "position_size_usd": decision.get("allocated_capital", 0.0),
-            "allocation_pct": decision.get("allocation_pct", 0.0),
-            "execution_price": decision.get("price", 0.0),
-            "reason": decision.get("reason", "UNKNOWN")
-        })
 
+def _format_signal(decision: dict) -> dict:
+    """List view of one cerebro decision"""
+    timestamp = decision.get("timestamp", "")
     return {
-        "strategy_id": strategy_id,
-        "count": len(signals),
-        "signals": signals
+        "signal_id": decision.get("signal_id"),
+        "timestamp": timestamp.isoformat() + "Z" if hasattr(timestamp, 'isoformat') else str(timestamp),
+        "ticker": decision.get("instrument", "UNKNOWN"),
+        "action": decision.get("action", "UNKNOWN"),
+        "status": "EXECUTED" if decision.get("decision") == "APPROVED" else "REJECTED",
+        "requested_quantity": decision.get("original_quantity", 0),
+        "actual_quantity": decision.get("final_quantity", 0),
+        "position_size_usd": decision.get("allocated_capital", 0.0),
+        "allocation_pct": decision.get("allocation_pct", 0.0),
+        "execution_price": decision.get("price", 0.0),
+        "reason": decision.get("reason", "UNKNOWN")
     }
 
 
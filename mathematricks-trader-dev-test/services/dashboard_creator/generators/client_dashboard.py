@@ -7,9 +7,13 @@ import logging
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 from pymongo import MongoClient
+from generators.strategy_aggregates import WATERMARKS_COLLECTION
 
 logger = logging.getLogger(__name__)
 
+# Regenerate at least this often even when no source changed (7-day trade window moves)
+CLIENT_DASHBOARD_MAX_AGE_MINUTES = float(os.getenv('CLIENT_DASHBOARD_MAX_AGE_MINUTES', '60'))
+
 
 def generate_client_dashboard(mongo_client: MongoClient) -> Dict[str, Any]:
     """
@@ -69,6 +73,56 @@ def generate_client_dashboard(mongo_client: MongoClient) -> Dict[str, Any]:
     return dashboard
 
 
+def _source_markers(db) -> Dict[str, str]:
+    """Identity of the newest document in each source the client dashboard reads"""
+    account_state = db['account_state'].find_one(sort=[("timestamp", -1)], projection={"_id": 1})
+    allocation = db['portfolio_allocations'].find_one(
+        {"status": "ACTIVE"},
+        sort=[("updated_at", -1)],
+        projection={"_id": 1, "updated_at": 1}
+    )
+    latest_trade = db['execution_confirmations'].find_one(sort=[("timestamp", -1)], projection={"_id": 1})
+    return {
+        "account_state": str(account_state["_id"]) if account_state else "",
+        "allocation": f"{allocation['_id']}@{allocation.get('updated_at')}" if allocation else "",
+        "latest_trade": str(latest_trade["_id"]) if latest_trade else ""
+    }
+
+
+def refresh_client_dashboard(mongo_client: MongoClient) -> bool:
+    """
+    Regenerate the client dashboard only if one of its sources changed (scheduler job).
+
+    Compares the newest account_state, ACTIVE allocation and execution confirmation with
+    the ones the current snapshot was built from; regenerates when any differs or the
+    snapshot is older than CLIENT_DASHBOARD_MAX_AGE_MINUTES.
+
+    Args:
+        mongo_client: MongoDB client instance
+
+    Returns:
+        True if the dashboard was regenerated
+    """
+    db = mongo_client['mathematricks_trading']
+
+    markers = _source_markers(db)
+    watermark = db[WATERMARKS_COLLECTION].find_one({"_id": "client_dashboard"}) or {}
+    snapshot = db['dashboard_snapshots'].find_one({"dashboard_type": "client"}, {"updated_at": 1})
+    stale_before = datetime.utcnow() - timedelta(minutes=CLIENT_DASHBOARD_MAX_AGE_MINUTES)
+
+    if snapshot and snapshot.get("updated_at", stale_before) > stale_before and watermark.get("markers") == markers:
+        logger.debug("Client dashboard sources unchanged - skipping regeneration")
+        return False
+
+    generate_client_dashboard(mongo_client)
+    db[WATERMARKS_COLLECTION].update_one(
+        {"_id": "client_dashboard"},
+        {"$set": {"markers": markers, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return True
+
+
 def _extract_fund_metrics(account_state: Dict[str, Any]) -> Dict[str, Any]:
     """Extract fund-level metrics from account state"""
     if not account_state:
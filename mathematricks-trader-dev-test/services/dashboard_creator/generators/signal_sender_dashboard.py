@@ -1,26 +1,39 @@
 """
 Signal Sender Dashboard Generator
 Generates per-strategy dashboard JSON for strategy developers
+(from incrementally maintained aggregates, see strategy_aggregates.py)
 """
 import os
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from pymongo import MongoClient
+from generators.strategy_aggregates import StrategyAggregator, WATERMARKS_COLLECTION
 
 logger = logging.getLogger(__name__)
 
+# Regenerate a dashboard at least this often even without new events (positions, prices)
+DASHBOARD_MAX_AGE_MINUTES = float(os.getenv('DASHBOARD_MAX_AGE_MINUTES', '15'))
+
 
 def generate_signal_sender_dashboard(
     strategy_id: str,
-    mongo_client: MongoClient
+    mongo_client: MongoClient,
+    aggregator: Optional[StrategyAggregator] = None,
+    allocation: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Generate dashboard for a specific strategy.
 
+    Summary metrics and rejection breakdown come from the strategy's materialized
+    aggregate (see strategy_aggregates), so the cost does not grow with its history.
+
     Args:
         strategy_id: Strategy identifier
         mongo_client: MongoDB client instance
+        aggregator: StrategyAggregator to read from (pending events are applied first
+            when omitted)
+        allocation: Current ACTIVE portfolio allocation (queried when omitted)
 
     Returns:
         Dict containing strategy dashboard with signals, positions, performance
@@ -29,41 +42,34 @@ def generate_signal_sender_dashboard(
 
     logger.info(f"Generating signal sender dashboard for {strategy_id}...")
 
-    # Query signal_store for this strategy's decisions (embedded)
-    signal_store_docs = list(
-        db['signal_store'].find({
-            "cerebro_decision": {"$ne": None},
-            "cerebro_decision.strategy_id": strategy_id
-        }).sort("received_at", -1).limit(100)
-    )
+    if aggregator is None:
+        aggregator = StrategyAggregator(db)
+        aggregator.apply_new_events()
 
-    # Extract embedded decisions
-    decisions = [doc.get('cerebro_decision') for doc in signal_store_docs if doc.get('cerebro_decision')]
+    aggregate = aggregator.get_aggregate(strategy_id)
+
+    # Most recent decisions for the signal list (indexed, bounded)
+    decisions = aggregator.recent_decisions(strategy_id, limit=20)
 
     # Query account_state for open positions (filter by strategy)
     account_state = db['account_state'].find_one(sort=[("timestamp", -1)])
     positions = _extract_strategy_positions(account_state, strategy_id)
 
     # Get current allocation for this strategy
-    allocation = db['portfolio_allocations'].find_one(
-        {"status": "ACTIVE"},
-        sort=[("updated_at", -1)]
-    )
+    if allocation is None:
+        allocation = _get_active_allocation(db)
     current_allocation_pct = 0.0
     if allocation:
         current_allocation_pct = allocation.get("allocations", {}).get(strategy_id, 0.0)
 
     # Calculate summary metrics
-    summary = _calculate_summary_metrics(decisions, current_allocation_pct)
+    summary = _calculate_summary_metrics(aggregate, current_allocation_pct)
 
     # Calculate performance metrics
-    performance = _calculate_strategy_performance(decisions)
+    performance = _calculate_strategy_performance()
 
     # Format recent signals
-    recent_signals = _format_signals(decisions[:20])
-
-    # Calculate rejection breakdown
-    rejection_breakdown = _calculate_rejection_reasons(decisions)
+    recent_signals = _format_signals(decisions)
 
     dashboard = {
         "strategy_id": strategy_id,
@@ -72,7 +78,7 @@ def generate_signal_sender_dashboard(
         "performance": performance,
         "recent_signals": recent_signals,
         "open_positions": positions,
-        "rejection_breakdown": rejection_breakdown
+        "rejection_breakdown": aggregate["rejection_counts"]
     }
 
     # Store to MongoDB
@@ -91,12 +97,20 @@ def generate_signal_sender_dashboard(
     return dashboard
 
 
+def _get_active_allocation(db) -> Optional[Dict[str, Any]]:
+    """Latest ACTIVE portfolio allocation"""
+    return db['portfolio_allocations'].find_one(
+        {"status": "ACTIVE"},
+        sort=[("updated_at", -1)]
+    )
+
+
 def _calculate_summary_metrics(
-    decisions: List[Dict[str, Any]],
+    aggregate: Dict[str, Any],
     current_allocation_pct: float
 ) -> Dict[str, Any]:
-    """Calculate summary metrics from cerebro decisions"""
-    total_signals = len(decisions)
+    """Calculate summary metrics from a strategy's decision aggregate"""
+    total_signals = aggregate["total_signals"]
     if total_signals == 0:
         return {
             "total_signals_sent": 0,
@@ -110,17 +124,13 @@ def _calculate_summary_metrics(
             "current_allocation_pct": current_allocation_pct
         }
 
-    executed = len([d for d in decisions if d.get("decision") == "APPROVED"])
+    executed = aggregate["signals_executed"]
     rejected = total_signals - executed
 
     # Calculate avg position size (from executed signals)
-    executed_decisions = [d for d in decisions if d.get("decision") == "APPROVED"]
     avg_position_size = 0.0
-    if executed_decisions:
-        position_sizes = [
-            d.get("allocated_capital", 0.0) for d in executed_decisions
-        ]
-        avg_position_size = sum(position_sizes) / len(position_sizes)
+    if executed:
+        avg_position_size = aggregate["executed_capital_sum"] / executed
 
     return {
         "total_signals_sent": total_signals,
@@ -135,7 +145,7 @@ def _calculate_summary_metrics(
     }
 
 
-def _calculate_strategy_performance(decisions: List[Dict[str, Any]]) -> Dict[str, Any]:
+def _calculate_strategy_performance() -> Dict[str, Any]:
     """
     Calculate performance metrics for the strategy.
 
@@ -205,29 +215,6 @@ def _extract_strategy_positions(
     return formatted_positions
 
 
-def _calculate_rejection_reasons(decisions: List[Dict[str, Any]]) -> Dict[str, int]:
-    """Calculate breakdown of rejection reasons"""
-    rejection_counts = {}
-
-    for decision in decisions:
-        if decision.get("decision") != "APPROVED":
-            reason = decision.get("reason", "UNKNOWN")
-
-            # Categorize rejection reasons
-            if "ALLOCATION" in reason or "allocation" in reason:
-                key = "NO_ALLOCATION"
-            elif "MARGIN" in reason or "margin" in reason:
-                key = "MARGIN_EXCEEDED"
-            elif "RISK" in reason or "risk" in reason:
-                key = "RISK_LIMIT"
-            else:
-                key = "OTHER"
-
-            rejection_counts[key] = rejection_counts.get(key, 0) + 1
-
-    return rejection_counts
-
-
 def generate_all_signal_sender_dashboards(mongo_client: MongoClient) -> int:
     """
     Generate dashboards for all active strategies.
@@ -240,16 +227,20 @@ def generate_all_signal_sender_dashboards(mongo_client: MongoClient) -> int:
     """
     db = mongo_client['mathematricks_trading']
 
+    aggregator = StrategyAggregator(db)
+    aggregator.apply_new_events()
+    allocation = _get_active_allocation(db)
+
     # Get all active strategies
     strategies = list(
-        db['strategy_configurations'].find({"status": "ACTIVE"})
+        db['strategy_configurations'].find({"status": "ACTIVE"}, {"strategy_id": 1})
     )
 
     count = 0
     for strategy in strategies:
         strategy_id = strategy["strategy_id"]
         try:
-            generate_signal_sender_dashboard(strategy_id, mongo_client)
+            generate_signal_sender_dashboard(strategy_id, mongo_client, aggregator, allocation)
             count += 1
         except Exception as e:
             logger.error(f"Failed to generate dashboard for {strategy_id}: {e}")
@@ -258,6 +249,70 @@ def generate_all_signal_sender_dashboards(mongo_client: MongoClient) -> int:
     return count
 
 
+def refresh_signal_sender_dashboards(mongo_client: MongoClient) -> int:
+    """
+    Incrementally refresh signal sender dashboards (scheduler job).
+
+    Applies signal_store changes since the last run to the strategy aggregates, then
+    regenerates only the dashboards that can have changed: strategies with new events,
+    ACTIVE strategies without a dashboard or one older than DASHBOARD_MAX_AGE_MINUTES,
+    and every ACTIVE strategy when the portfolio allocation changed.
+
+    Args:
+        mongo_client: MongoDB client instance
+
+    Returns:
+        Number of dashboards regenerated
+    """
+    db = mongo_client['mathematricks_trading']
+
+    aggregator = StrategyAggregator(db)
+    touched = aggregator.apply_new_events()
+    allocation = _get_active_allocation(db)
+
+    active_ids = [
+        s["strategy_id"]
+        for s in db['strategy_configurations'].find({"status": "ACTIVE"}, {"strategy_id": 1})
+    ]
+
+    # Allocation changes move current_allocation_pct on every dashboard
+    allocation_version = allocation.get("updated_at") if allocation else None
+    watermark = db[WATERMARKS_COLLECTION].find_one({"_id": "portfolio_allocation"}) or {}
+    allocation_changed = watermark.get("updated_at") != allocation_version
+
+    if allocation_changed:
+        due = set(active_ids)
+    else:
+        stale_before = datetime.utcnow() - timedelta(minutes=DASHBOARD_MAX_AGE_MINUTES)
+        fresh = {
+            snapshot["strategy_id"]
+            for snapshot in db['dashboard_snapshots'].find(
+                {"dashboard_type": "signal_sender", "strategy_id": {"$in": active_ids},
+                 "updated_at": {"$gte": stale_before}},
+                {"strategy_id": 1}
+            )
+        }
+        due = (touched & set(active_ids)) | (set(active_ids) - fresh)
+
+    count = 0
+    for strategy_id in sorted(due):
+        try:
+            generate_signal_sender_dashboard(strategy_id, mongo_client, aggregator, allocation)
+            count += 1
+        except Exception as e:
+            logger.error(f"Failed to generate dashboard for {strategy_id}: {e}")
+
+    if allocation_changed:
+        db[WATERMARKS_COLLECTION].update_one(
+            {"_id": "portfolio_allocation"},
+            {"$set": {"updated_at": allocation_version}},
+            upsert=True
+        )
+
+    logger.info(f"Refreshed {count} of {len(active_ids)} signal sender dashboards")
+    return count
+
+
 if __name__ == "__main__":
     # Test the generator
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,340 @@
+"""
+Strategy Aggregates
+Incrementally maintained per-strategy decision counters for the signal sender dashboards.
+
+Dashboards used to re-query signal_store and recount every strategy's decisions on each
+run. StrategyAggregator instead reads only signal_store documents whose updated_at moved
+past a stored high-water mark and folds them into materialized documents:
+- dashboard_signal_facts: one small fact per decided signal (strategy, executed,
+  rejection category, allocated capital)
+- dashboard_strategy_aggregates: per-strategy counters, updated with $inc by the
+  difference between a signal's new fact and the fact stored for it before
+
+Because a signal only contributes the difference to its previous fact, re-reading a
+document is a no-op. That makes the small overlap window behind the high-water mark safe
+(documents written slightly out of updated_at order are not missed, nor double counted).
+A document whose decision is cleared removes its fact (hard deletes are not seen).
+
+Crash safety: a batch first journals its new facts as `pending` under an op id, then
+applies each strategy's $inc together with that op id as a marker in the same update,
+then commits the facts and drops the markers. A pass that finds pending facts (the
+previous one died) replays them; the marker turns an already applied $inc into a no-op.
+Across processes only the holder of a lease in the watermarks collection applies events.
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+FACTS_COLLECTION = 'dashboard_signal_facts'
+AGGREGATES_COLLECTION = 'dashboard_strategy_aggregates'
+WATERMARKS_COLLECTION = 'dashboard_watermarks'
+
+# Re-read this far behind the high-water mark (concurrent writers commit out of order)
+OVERLAP_SECONDS = float(os.getenv('DASHBOARD_HWM_OVERLAP_SECONDS', '60'))
+BATCH_SIZE = int(os.getenv('DASHBOARD_AGGREGATE_BATCH_SIZE', '1000'))
+# A pass renews its lease every batch; a crashed holder blocks other processes this long
+LEASE_SECONDS = float(os.getenv('DASHBOARD_AGGREGATE_LEASE_SECONDS', '300'))
+
+LEASE_ID = 'signal_store_aggregator'
+FACT_FIELDS = ("strategy_id", "executed", "rejection", "allocated_capital")
+
+# One aggregation pass at a time per process (scheduler job and on-demand API requests);
+# across processes the pass holds the LEASE_ID lease
+_apply_lock = threading.Lock()
+_LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def categorize_rejection(reason: str) -> str:
+    """Map a cerebro rejection reason to a dashboard category"""
+    if "ALLOCATION" in reason or "allocation" in reason:
+        return "NO_ALLOCATION"
+    elif "MARGIN" in reason or "margin" in reason:
+        return "MARGIN_EXCEEDED"
+    elif "RISK" in reason or "risk" in reason:
+        return "RISK_LIMIT"
+    return "OTHER"
+
+
+def build_fact(decision: Dict[str, Any]) -> Dict[str, Any]:
+    """Dashboard fact for one cerebro decision"""
+    executed = decision.get("decision") == "APPROVED"
+    return {
+        "strategy_id": decision.get("strategy_id"),
+        "executed": executed,
+        "rejection": None if executed else categorize_rejection(decision.get("reason", "UNKNOWN")),
+        "allocated_capital": float(decision.get("allocated_capital", 0.0) or 0.0) if executed else 0.0
+    }
+
+
+def _counted_fact(doc: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """The counted fact of a facts document (None if it only holds a pending fact)"""
+    if not doc or "executed" not in doc:
+        return None
+    return {key: doc.get(key) for key in FACT_FIELDS}
+
+
+def _fact_counters(fact: Optional[Dict[str, Any]], sign: int) -> Dict[str, float]:
+    """$inc contribution of a fact (sign -1 removes it)"""
+    if not fact:
+        return {}
+    counters = {"total_signals": sign}
+    if fact["executed"]:
+        counters["signals_executed"] = sign
+        counters["executed_capital_sum"] = sign * fact["allocated_capital"]
+    else:
+        counters[f"rejection_counts.{fact['rejection']}"] = sign
+    return counters
+
+
+class StrategyAggregator:
+    """
+    Maintains per-strategy dashboard aggregates from signal_store changes.
+
+    Key responsibilities:
+    - apply_new_events(): fold signal_store documents changed since the high-water mark
+      into facts and per-strategy counters; report which strategies changed
+    - get_aggregate() / recent_decisions() for dashboard generation
+    - ensure_indexes() for the incremental and recent-signal queries
+    """
+
+    def __init__(self, db):
+        """
+        Initialize StrategyAggregator.
+
+        Args:
+            db: pymongo Database (mathematricks_trading)
+        """
+        self.signal_store = db['signal_store']
+        self.facts = db[FACTS_COLLECTION]
+        self.aggregates = db[AGGREGATES_COLLECTION]
+        self.watermarks = db[WATERMARKS_COLLECTION]
+
+    def ensure_indexes(self):
+        """Create the indexes the incremental queries and crash recovery rely on (idempotent)"""
+        self.signal_store.create_index([("updated_at", ASCENDING)], name="updated_at_idx")
+        self.signal_store.create_index(
+            [("cerebro_decision.strategy_id", ASCENDING), ("cerebro_decision.timestamp", DESCENDING)],
+            name="strategy_decision_time_idx"
+        )
+        self.facts.create_index([("pending.op", ASCENDING)], name="pending_op_idx", sparse=True)
+
+    # ------------------------------------------------------------------
+    # Incremental maintenance
+    # ------------------------------------------------------------------
+
+    def apply_new_events(self, batch_size: int = BATCH_SIZE) -> Set[str]:
+        """
+        Fold signal_store documents updated since the high-water mark into the aggregates.
+
+        Returns:
+            Strategy IDs with changed signal_store documents (their dashboards need a refresh,
+            even when the counters did not move - e.g. a fill changes positions). Empty when
+            another process holds the lease and is applying them.
+        """
+        with _apply_lock:
+            if not self._acquire_lease():
+                logger.debug("Dashboard aggregates: another process is applying events - skipping")
+                return set()
+            try:
+                return self._apply_new_events(batch_size)
+            finally:
+                self.watermarks.delete_one({"_id": LEASE_ID, "owner": _LEASE_OWNER})
+
+    def _acquire_lease(self) -> bool:
+        """Take or renew the cross-process apply lease; False if another process holds it"""
+        now = datetime.utcnow()
+        try:
+            self.watermarks.update_one(
+                {"_id": LEASE_ID, "$or": [{"owner": _LEASE_OWNER}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"owner": _LEASE_OWNER, "expires_at": now + timedelta(seconds=LEASE_SECONDS)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def _apply_new_events(self, batch_size: int) -> Set[str]:
+        touched = self._recover_pending()
+
+        watermark = self.watermarks.find_one({"_id": "signal_store"}) or {}
+        high_water = watermark.get("updated_at")
+
+        if high_water:
+            # Decided documents and ones whose decision was cleared since
+            query = {"updated_at": {"$gte": high_water - timedelta(seconds=OVERLAP_SECONDS)}}
+        else:
+            query = {"cerebro_decision": {"$ne": None}}
+
+        cursor = (
+            self.signal_store.find(query, {"cerebro_decision": 1, "updated_at": 1})
+            .sort("updated_at", ASCENDING)
+            .batch_size(batch_size)
+        )
+
+        applied = 0
+        batch: List[Dict[str, Any]] = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                if not self._acquire_lease():
+                    logger.warning("Dashboard aggregates: apply lease lost - stopping this pass")
+                    batch = []
+                    break
+                applied += self._apply_batch(batch, touched, watermark.get("updated_at"))
+                high_water = self._advance(high_water, batch)
+                batch = []
+        if batch and self._acquire_lease():
+            applied += self._apply_batch(batch, touched, watermark.get("updated_at"))
+            high_water = self._advance(high_water, batch)
+
+        if high_water and high_water != watermark.get("updated_at"):
+            self.watermarks.update_one(
+                {"_id": "signal_store"},
+                {"$set": {"updated_at": high_water, "advanced_at": datetime.utcnow()}},
+                upsert=True
+            )
+
+        if applied:
+            logger.info(f"Dashboard aggregates: {applied} new/changed decisions across {len(touched)} strategies")
+        return touched
+
+    @staticmethod
+    def _advance(high_water: Optional[datetime], docs: List[Dict[str, Any]]) -> Optional[datetime]:
+        """High-water mark after a batch (docs are sorted by updated_at; legacy docs may lack it)"""
+        last = docs[-1].get("updated_at")
+        if last is not None and (high_water is None or last > high_water):
+            return last
+        return high_water
+
+    def _apply_batch(self, docs: List[Dict[str, Any]], touched: Set[str],
+                     previous_high_water: Optional[datetime]) -> int:
+        """
+        Apply one batch; returns the number of facts that changed
+
+        A strategy counts as touched when one of its documents is newer than the previous
+        high-water mark or its fact changed (overlap re-reads alone don't touch it).
+        """
+        previous = {
+            fact["_id"]: _counted_fact(fact)
+            for fact in self.facts.find({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        }
+
+        changes = []
+        for doc in docs:
+            decision = doc.get("cerebro_decision")
+            fact = build_fact(decision) if decision else None
+            updated_at = doc.get("updated_at")
+            is_new = previous_high_water is None or updated_at is None or updated_at > previous_high_water
+            if fact and fact["strategy_id"] and is_new:
+                touched.add(fact["strategy_id"])
+
+            old = previous.get(doc["_id"])
+            if old == fact:
+                continue  # Already counted (overlap re-read or a non-decision update)
+            for changed in (fact, old):
+                if changed and changed["strategy_id"]:
+                    touched.add(changed["strategy_id"])
+            changes.append((doc["_id"], old, fact))
+
+        if changes:
+            self._apply_changes(uuid.uuid4().hex, changes)
+        return len(changes)
+
+    def _apply_changes(self, op: str, changes: List[Tuple[Any, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]],
+                       journaled: bool = False):
+        """
+        Move facts from old to new (None = no fact) and the counters with them, so that a
+        crash at any point is completed exactly once by the next pass (_recover_pending)
+
+        1. journal the new facts as pending under op (skipped when replaying)
+        2. $inc each strategy's counters and push op as a marker, in one update that only
+           matches while the marker is absent
+        3. commit the facts (new fields set, pending removed)
+        4. pull the markers
+        """
+        if not journaled:
+            for fact_id, _, new in changes:
+                self.facts.update_one({"_id": fact_id}, {"$set": {"pending": {"op": op, "fact": new}}}, upsert=True)
+
+        deltas: Dict[str, Dict[str, float]] = {}
+        for _, old, new in changes:
+            for fact, sign in ((new, 1), (old, -1)):
+                if not fact or not fact["strategy_id"]:
+                    continue
+                strategy_delta = deltas.setdefault(fact["strategy_id"], {})
+                for field, value in _fact_counters(fact, sign).items():
+                    strategy_delta[field] = strategy_delta.get(field, 0) + value
+
+        now = datetime.utcnow()
+        for strategy_id, strategy_delta in deltas.items():
+            strategy_delta = {field: value for field, value in strategy_delta.items() if value}
+            update = {"$set": {"updated_at": now}, "$push": {"applied_ops": op}}
+            if strategy_delta:
+                update["$inc"] = strategy_delta
+            try:
+                self.aggregates.update_one({"_id": strategy_id, "applied_ops": {"$ne": op}}, update, upsert=True)
+            except DuplicateKeyError:
+                pass  # Marker present: applied before the previous pass died
+
+        for fact_id, _, new in changes:
+            if new is None:
+                self.facts.delete_one({"_id": fact_id, "pending.op": op})
+            else:
+                self.facts.update_one({"_id": fact_id, "pending.op": op}, {"$set": new, "$unset": {"pending": ""}})
+
+        if deltas:
+            self.aggregates.update_many({"_id": {"$in": list(deltas)}}, {"$pull": {"applied_ops": op}})
+
+    def _recover_pending(self) -> Set[str]:
+        """Complete fact changes journaled by a pass that died; returns their strategies"""
+        by_op: Dict[str, list] = {}
+        for doc in self.facts.find({"pending": {"$exists": True}}):
+            by_op.setdefault(doc["pending"]["op"], []).append(
+                (doc["_id"], _counted_fact(doc), doc["pending"]["fact"])
+            )
+
+        touched: Set[str] = set()
+        for op, changes in by_op.items():
+            logger.warning(f"Dashboard aggregates: completing {len(changes)} interrupted fact changes (op {op})")
+            self._apply_changes(op, changes, journaled=True)
+            for _, old, new in changes:
+                touched.update(fact["strategy_id"] for fact in (old, new) if fact and fact["strategy_id"])
+        return touched
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_aggregate(self, strategy_id: str) -> Dict[str, Any]:
+        """Counters for a strategy (zeros if it has no decisions yet)"""
+        aggregate = self.aggregates.find_one({"_id": strategy_id}) or {}
+        return {
+            "total_signals": int(aggregate.get("total_signals", 0)),
+            "signals_executed": int(aggregate.get("signals_executed", 0)),
+            "executed_capital_sum": float(aggregate.get("executed_capital_sum", 0.0)),
+            "rejection_counts": {
+                category: int(count)
+                for category, count in aggregate.get("rejection_counts", {}).items() if count
+            }
+        }
+
+    def recent_decisions(self, strategy_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent cerebro decisions for a strategy (indexed, newest first)"""
+        docs = (
+            self.signal_store.find(
+                {"cerebro_decision.strategy_id": strategy_id, "cerebro_decision": {"$ne": None}},
+                {"cerebro_decision": 1}
+            )
+            .sort("cerebro_decision.timestamp", DESCENDING)
+            .limit(limit)
+        )
+        return [doc["cerebro_decision"] for doc in docs]
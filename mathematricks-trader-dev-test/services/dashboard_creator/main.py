@@ -6,6 +6,7 @@ Generates pre-computed dashboard JSONs for clients and strategy developers
 Port: 8004
 """
 import os
+import sys
 import logging
 import uvicorn
 from contextlib import asynccontextmanager
@@ -15,15 +16,19 @@ from fastapi.responses import JSONResponse
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
+# Shared service packages (pagination) live in services/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # Import dashboard generators
 from generators.client_dashboard import generate_client_dashboard
-from generators.signal_sender_dashboard import generate_signal_sender_dashboard
+from generators.signal_sender_dashboard import generate_signal_sender_dashboard, generate_all_signal_sender_dashboards
+from generators.strategy_aggregates import StrategyAggregator
 
 # Import scheduler
 from schedulers.background_jobs import start_scheduler, stop_scheduler
 
 # Import API router
-from api.strategy_developer_api import router as strategy_dev_router, set_mongo_client
+from api.strategy_developer_api import router as strategy_dev_router, set_mongo_client, ensure_indexes as ensure_signal_list_indexes
 
 # Load environment variables
 load_dotenv()
@@ -60,6 +65,14 @@ async def lifespan(app: FastAPI):
     # Set MongoDB client for API module
     set_mongo_client(mongo_client)
 
+    # Indexes for incremental dashboard aggregation (signal_store updated_at high-water mark)
+    # and the keyset-paginated signal list
+    try:
+        StrategyAggregator(db).ensure_indexes()
+        ensure_signal_list_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create dashboard aggregation indexes: {e}")
+
     # Generate initial dashboards
     logger.info("Generating initial dashboards...")
     try:
@@ -197,14 +210,7 @@ async def regenerate_dashboards():
         client_dashboard = generate_client_dashboard(mongo_client)
 
         # Generate all signal sender dashboards
-        strategies = list(db['strategy_configurations'].find({"status": "ACTIVE"}))
-        sender_count = 0
-        for strategy in strategies:
-            try:
-                generate_signal_sender_dashboard(strategy["strategy_id"], mongo_client)
-                sender_count += 1
-            except Exception as e:
-                logger.error(f"Failed to generate dashboard for {strategy['strategy_id']}: {e}")
+        sender_count = generate_all_signal_sender_dashboards(mongo_client)
 
         return {
             "status": "success",
@@ -6,8 +6,8 @@ import logging
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from pymongo import MongoClient
-from generators.client_dashboard import generate_client_dashboard
-from generators.signal_sender_dashboard import generate_all_signal_sender_dashboards
+from generators.client_dashboard import refresh_client_dashboard
+from generators.signal_sender_dashboard import refresh_signal_sender_dashboards
 
 logger = logging.getLogger(__name__)
 
@@ -24,18 +24,19 @@ def start_scheduler(mongo_client: MongoClient) -> BackgroundScheduler:
     """
     scheduler = BackgroundScheduler()
 
-    # Generate client dashboard every 5 minutes
+    # Refresh client dashboard every 5 minutes (skipped when its sources are unchanged)
     scheduler.add_job(
-        func=lambda: generate_client_dashboard(mongo_client),
+        func=lambda: refresh_client_dashboard(mongo_client),
         trigger=IntervalTrigger(minutes=5),
         id='client_dashboard',
         name='Generate Client Dashboard',
         replace_existing=True
     )
 
-    # Generate signal sender dashboards every 1 minute
+    # Refresh signal sender dashboards every 1 minute (incremental: only strategies
+    # with new signal_store events, see generators/strategy_aggregates.py)
     scheduler.add_job(
-        func=lambda: generate_all_signal_sender_dashboards(mongo_client),
+        func=lambda: refresh_signal_sender_dashboards(mongo_client),
         trigger=IntervalTrigger(minutes=1),
         id='signal_sender_dashboards',
         name='Generate Signal Sender Dashboards',
@@ -45,8 +46,8 @@ def start_scheduler(mongo_client: MongoClient) -> BackgroundScheduler:
     scheduler.start()
 
     logger.info("Background scheduler started")
-    logger.info("  • Client dashboard: every 5 minutes")
-    logger.info("  • Signal sender dashboards: every 1 minute")
+    logger.info("  • Client dashboard: every 5 minutes (when sources changed)")
+    logger.info("  • Signal sender dashboards: every 1 minute (incremental)")
 
     return scheduler
 
@@ -9,12 +9,10 @@ import json
 import argparse
 from datetime import datetime
 from typing import Dict, Any, Optional, List
-from google.cloud import pubsub_v1
 from pymongo import MongoClient
 from dotenv import load_dotenv
 import threading
 import time
-import queue
 import requests
 
 # Add services directory to path so we can import brokers package
@@ -31,6 +29,15 @@ from brokers.exceptions import (
     InvalidSymbolError
 )
 
+# Import Pub/Sub transport (PUBSUB_TRANSPORT=gcp|memory)
+from messaging import get_transport
+
+# Per-account order dispatcher
+from order_dispatcher import AccountOrderDispatcher
+
+# Shared position store (positions collection)
+from positions import PositionStore, STATUS_CLOSED, opposite_direction, position_direction_for_exit
+
 # Load environment variables from project root
 env_path = os.path.join(PROJECT_ROOT, '.env')
 load_dotenv(env_path)
@@ -111,18 +118,19 @@ else:
 db = mongo_client['mathematricks_trading']
 # execution_confirmations collection removed - execution data stored in signal_store.execution field
 trading_orders_collection = db['trading_orders']
-trading_accounts_collection = db['trading_accounts']  # For position tracking
+trading_accounts_collection = db['trading_accounts']  # Account documents (positions live in the positions collection)
 signal_store_collection = db['signal_store']  # For updating execution data
+position_store = PositionStore(db)  # Positions keyed by account/strategy/instrument/direction
+position_store.ensure_indexes()
 
-# Initialize Google Cloud Pub/Sub
+# Initialize Pub/Sub transport
 project_id = os.getenv('GCP_PROJECT_ID', 'mathematricks-trader')
-subscriber = pubsub_v1.SubscriberClient()
-publisher = pubsub_v1.PublisherClient()
+transport = get_transport()
 
-trading_orders_subscription = subscriber.subscription_path(project_id, 'trading-orders-sub')
-order_commands_subscription = subscriber.subscription_path(project_id, 'order-commands-sub')
-execution_confirmations_topic = publisher.topic_path(project_id, 'execution-confirmations')
-account_updates_topic = publisher.topic_path(project_id, 'account-updates')
+trading_orders_subscription = transport.subscription_path(project_id, 'trading-orders-sub')
+order_commands_subscription = transport.subscription_path(project_id, 'order-commands-sub')
+execution_confirmations_topic = transport.topic_path(project_id, 'execution-confirmations')
+account_updates_topic = transport.topic_path(project_id, 'account-updates')
 
 # Account Data Service Configuration
 ACCOUNT_DATA_SERVICE_URL = os.getenv('ACCOUNT_DATA_SERVICE_URL', 'http://localhost:5001')
@@ -228,6 +236,22 @@ def initialize_broker_pool():
     logger.info(f"Broker pool initialized with {len(broker_pool)} broker(s)")
 
 
+def resolve_order_account(order_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Account an order is routed to (Mock_Paper for every order in --use-mock-broker mode).
+
+    Args:
+        order_data: Trading order dict
+
+    Returns:
+        Account ID, or None if the order has no 'account' field
+    """
+    account_id = order_data.get('account')
+    if account_id and args.use_mock_broker:
+        return 'Mock_Paper'
+    return account_id
+
+
 def get_broker_for_account(account_id: str) -> Optional['AbstractBroker']:
     """
     Get broker instance for specific account.
@@ -249,68 +273,88 @@ def get_broker_for_account(account_id: str) -> Optional['AbstractBroker']:
 # Initialize broker pool on startup
 initialize_broker_pool()
 
-# Order queue for threading safety
-# Pub/Sub callbacks run in thread pool, orders are processed in main thread
-order_queue = queue.Queue()
-command_queue = queue.Queue()  # For cancel commands and other order management
-
-# Track active IBKR orders by order_id for cancellation
+# Track active broker orders by order_id for cancellation
 active_ibkr_orders = {}  # {order_id: broker_order_id}
+active_order_accounts = {}  # {order_id: account_id} - routes cancel commands to the order's worker
 
 # 🚨 CRITICAL FAILSAFE: Track processed signal IDs to prevent duplicate execution
 processed_signal_ids = set()  # In-memory deduplication
+processed_signal_ids_lock = threading.Lock()  # Orders for different accounts run concurrently
 SIGNAL_ID_EXPIRY_HOURS = 24  # Keep signal IDs for 24 hours
 
 
+def connect_broker(account_id: str, broker_instance) -> bool:
+    """
+    Connect one broker. Runs on the account's worker thread so the connection lives on
+    the same event loop as the account's orders.
+    """
+    try:
+        if not broker_instance.is_connected():
+            logger.info(f"Connecting to {broker_instance.broker_name} for account {account_id}...")
+            success = broker_instance.connect()
+            if success:
+                logger.info(f"✅ Connected to {broker_instance.broker_name} for {account_id}")
+                return True
+            logger.error(f"❌ Failed to connect to {broker_instance.broker_name} for {account_id}")
+            return False
+
+        logger.info(f"Already connected to {broker_instance.broker_name} for {account_id}")
+        return True
+
+    except BrokerConnectionError as e:
+        logger.error(f"❌ Broker connection error for {account_id}: {str(e)}")
+    except Exception as e:
+        logger.error(f"❌ Unexpected error connecting {account_id}: {str(e)}")
+    return False
+
+
 def connect_all_brokers():
     """
-    Connect to all brokers in the broker pool.
+    Connect to all brokers in the broker pool (concurrently, each on its account worker).
     """
     logger.info(f"Connecting to {len(broker_pool)} broker(s)...")
 
-    success_count = 0
-    for account_id, broker_instance in broker_pool.items():
-        try:
-            if not broker_instance.is_connected():
-                logger.info(f"Connecting to {broker_instance.broker_name} for account {account_id}...")
-                success = broker_instance.connect()
-                if success:
-                    logger.info(f"✅ Connected to {broker_instance.broker_name} for {account_id}")
-                    success_count += 1
-                else:
-                    logger.error(f"❌ Failed to connect to {broker_instance.broker_name} for {account_id}")
-            else:
-                logger.info(f"Already connected to {broker_instance.broker_name} for {account_id}")
-                success_count += 1
-
-        except BrokerConnectionError as e:
-            logger.error(f"❌ Broker connection error for {account_id}: {str(e)}")
-        except Exception as e:
-            logger.error(f"❌ Unexpected error connecting {account_id}: {str(e)}")
+    futures = [
+        order_dispatcher.run_on_account(account_id, connect_broker, account_id, broker_instance)
+        for account_id, broker_instance in broker_pool.items()
+    ]
+    success_count = sum(1 for future in futures if future.result())
 
     logger.info(f"Broker pool connection complete: {success_count}/{len(broker_pool)} connected")
     return success_count > 0
 
 
+def disconnect_all_brokers():
+    """
+    Disconnect all brokers in the broker pool (each on its account worker).
+    """
+    futures = [
+        order_dispatcher.run_on_account(account_id, broker_instance.disconnect)
+        for account_id, broker_instance in broker_pool.items()
+    ]
+    for future in futures:
+        try:
+            future.result(timeout=10)
+        except Exception as e:
+            logger.error(f"Error disconnecting broker: {str(e)}")
+
+
 def submit_order_to_broker(order_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     Submit order to broker using broker pool (multi-broker routing).
 
     Routes order to correct broker based on order['account'] field.
     In mock mode (--use-mock-broker), overrides all routing to Mock_Paper.
+    Runs on the account's worker thread (see order_dispatcher.py).
     """
     try:
-        # Get account from order
-        account_id = order_data.get('account')
+        # Get account from order (MOCK MODE OVERRIDE: Mock_Paper if flag set)
+        account_id = resolve_order_account(order_data)
         if not account_id:
             logger.error(f"❌ Order {order_data.get('order_id')} missing 'account' field - cannot route to broker")
             return None
-
-        # MOCK MODE OVERRIDE: Route all orders to Mock_Paper if flag set
-        if args.use_mock_broker:
-            original_account = account_id
-            account_id = 'Mock_Paper'
-            logger.debug(f"MOCK MODE: Overriding account {original_account} → Mock_Paper")
+        if account_id != order_data.get('account'):
+            logger.debug(f"MOCK MODE: Overriding account {order_data.get('account')} → {account_id}")
 
         # Get broker instance for this account
         broker = get_broker_for_account(account_id)
@@ -339,6 +383,7 @@ def submit_order_to_broker(order_data: Dict[str, Any]) -> Optional[Dict[str, Any
         order_id = order_data['order_id']
         broker_order_id = result.get('broker_order_id')
         active_ibkr_orders[order_id] = broker_order_id
+        active_order_accounts[order_id] = account_id
 
         logger.debug(f"Order {order_data.get('order_id')} submitted - Broker Order ID: {broker_order_id}, Status: {result.get('status')}")
 
@@ -374,7 +419,7 @@ def publish_execution_confirmation(execution_data: Dict[str, Any]):
     """
     try:
         message_data = json.dumps(execution_data, default=str).encode('utf-8')
-        future = publisher.publish(execution_confirmations_topic, message_data)
+        future = transport.publish(execution_confirmations_topic, message_data)
         message_id = future.result()
         logger.debug(f"Published execution confirmation: {message_id}")
     except Exception as e:
@@ -387,7 +432,7 @@ def publish_account_update(account_data: Dict[str, Any]):
     """
     try:
         message_data = json.dumps(account_data, default=str).encode('utf-8')
-        future = publisher.publish(account_updates_topic, message_data)
+        future = transport.publish(account_updates_topic, message_data)
         message_id = future.result()
         logger.info(f"Published account update: {message_id}")
     except Exception as e:
@@ -523,7 +568,7 @@ def update_signal_store_with_execution(order_data: Dict[str, Any], execution_dat
 
 def create_or_update_position(order_data: Dict[str, Any], filled_qty: float, avg_fill_price: float):
     """
-    Create or update position in trading_accounts.{account_id}.open_positions after order fill
+    Apply an order fill to the positions collection (one atomic update per fill)
     Handles both ENTRY (create/increase) and EXIT (decrease/close) actions
     """
     try:
@@ -534,35 +579,13 @@ def create_or_update_position(order_data: Dict[str, Any], filled_qty: float, avg
         signal_type = order_data.get('signal_type', '').upper()
         order_id = order_data.get('order_id')
 
+        if filled_qty <= 0:
+            return
+
         # For Mock broker, use "Mock_Paper" account
         # TODO: Get account_id from order_data when multi-account support is added
         account_id = "Mock_Paper" if args.use_mock_broker else "IBKR_Main"
 
-        # Find account document
-        account_doc = trading_accounts_collection.find_one({"account_id": account_id})
-        if not account_doc:
-            # Create account document if it doesn't exist
-            account_doc = {
-                "account_id": account_id,
-                "open_positions": [],
-                "created_at": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
-            }
-            trading_accounts_collection.insert_one(account_doc)
-
-        # Find existing position in open_positions array
-        existing_position = None
-        position_index = None
-        open_positions = account_doc.get('open_positions', [])
-
-        for idx, pos in enumerate(open_positions):
-            if (pos.get('strategy_id') == strategy_id and
-                pos.get('instrument') == instrument and
-                pos.get('status') == 'OPEN'):
-                existing_position = pos
-                position_index = idx
-                break
-
         # Determine if this is ENTRY or EXIT using signal_type OR direction+action
         # signal_type is preferred (set by Cerebro), fallback to direction+action logic
         is_entry = (
@@ -572,81 +595,33 @@ def create_or_update_position(order_data: Dict[str, Any], filled_qty: float, avg
         )
 
         if is_entry:
-            # ENTRY: Create new position or add to existing
-            if existing_position:
-                # Add to existing position (scale-in)
-                current_qty = existing_position['quantity']
-                current_avg_price = existing_position['avg_entry_price']
-
-                new_qty = current_qty + filled_qty
-                # Calculate new weighted average price
-                new_avg_price = ((current_qty * current_avg_price) + (filled_qty * avg_fill_price)) / new_qty
-
-                # Update the position in the array using array index
-                trading_accounts_collection.update_one(
-                    {'account_id': account_id},
-                    {'$set': {
-                        f'open_positions.{position_index}.quantity': new_qty,
-                        f'open_positions.{position_index}.avg_entry_price': new_avg_price,
-                        f'open_positions.{position_index}.updated_at': datetime.utcnow(),
-                        f'open_positions.{position_index}.last_order_id': order_id
-                    }}
-                )
-                logger.info(f"✅ Updated position {strategy_id}/{instrument}: {current_qty} → {new_qty} shares @ ${new_avg_price:.2f}")
+            # ENTRY: Create new position or add to existing (scale-in)
+            position = position_store.apply_entry_fill(
+                account_id, strategy_id, instrument, direction, filled_qty, avg_fill_price, order_id
+            )
+            if position['quantity'] > filled_qty:
+                logger.info(f"✅ Updated position {strategy_id}/{instrument}: {position['quantity'] - filled_qty} → {position['quantity']} shares @ ${position['avg_entry_price']:.2f}")
             else:
-                # Create new position and add to array
-                position = {
-                    'strategy_id': strategy_id,
-                    'instrument': instrument,
-                    'direction': direction,
-                    'quantity': filled_qty,
-                    'avg_entry_price': avg_fill_price,
-                    'current_price': avg_fill_price,
-                    'unrealized_pnl': 0.0,
-                    'status': 'OPEN',
-                    'entry_order_id': order_id,
-                    'last_order_id': order_id,
-                    'created_at': datetime.utcnow(),
-                    'updated_at': datetime.utcnow()
-                }
-                trading_accounts_collection.update_one(
-                    {'account_id': account_id},
-                    {'$push': {'open_positions': position}}
-                )
                 logger.info(f"✅ Created position {strategy_id}/{instrument}: {filled_qty} shares @ ${avg_fill_price:.2f}")
 
         else:
-            # EXIT: Reduce or close position
-            if existing_position:
-                current_qty = existing_position['quantity']
-
-                if filled_qty >= current_qty:
-                    # Full exit - close position by updating status in array
-                    trading_accounts_collection.update_one(
-                        {'account_id': account_id},
-                        {'$set': {
-                            f'open_positions.{position_index}.status': 'CLOSED',
-                            f'open_positions.{position_index}.exit_order_id': order_id,
-                            f'open_positions.{position_index}.avg_exit_price': avg_fill_price,
-                            f'open_positions.{position_index}.closed_at': datetime.utcnow(),
-                            f'open_positions.{position_index}.updated_at': datetime.utcnow()
-                        }}
-                    )
-                    logger.info(f"✅ Closed position {strategy_id}/{instrument}: {current_qty} shares @ ${avg_fill_price:.2f}")
-                else:
-                    # Partial exit - reduce position quantity in array
-                    new_qty = current_qty - filled_qty
-                    trading_accounts_collection.update_one(
-                        {'account_id': account_id},
-                        {'$set': {
-                            f'open_positions.{position_index}.quantity': new_qty,
-                            f'open_positions.{position_index}.updated_at': datetime.utcnow(),
-                            f'open_positions.{position_index}.last_order_id': order_id
-                        }}
-                    )
-                    logger.info(f"✅ Reduced position {strategy_id}/{instrument}: {current_qty} → {new_qty} shares")
-            else:
+            # EXIT: Reduce or close the position it exits (the other direction as fallback)
+            position_direction = position_direction_for_exit(direction, action)
+            position = position_store.apply_exit_fill(
+                account_id, strategy_id, instrument, position_direction, filled_qty, avg_fill_price, order_id
+            )
+            if position is None:
+                position = position_store.apply_exit_fill(
+                    account_id, strategy_id, instrument, opposite_direction(position_direction),
+                    filled_qty, avg_fill_price, order_id
+                )
+
+            if position is None:
                 logger.warning(f"⚠️ EXIT order {order_id} filled but no open position found for {strategy_id}/{instrument}")
+            elif position['status'] == STATUS_CLOSED:
+                logger.info(f"✅ Closed position {strategy_id}/{instrument}: {position['quantity']} shares @ ${avg_fill_price:.2f}")
+            else:
+                logger.info(f"✅ Reduced position {strategy_id}/{instrument}: {position['quantity'] + filled_qty} → {position['quantity']} shares")
 
     except Exception as e:
         logger.error(f"❌ Error creating/updating position: {e}", exc_info=True)
@@ -676,12 +651,17 @@ def cancel_order(order_id: str) -> bool:
         broker_order_id = active_ibkr_orders[order_id]
         logger.info(f"🚫 Cancelling order {order_id} (broker order ID: {broker_order_id})...")
 
+        broker = get_broker_for_account(active_order_accounts.get(order_id))
+        if not broker:
+            return False
+
         # Use broker library to cancel order
         success = broker.cancel_order(broker_order_id)
 
         if success:
             # Remove from tracking
             del active_ibkr_orders[order_id]
+            active_order_accounts.pop(order_id, None)
             logger.info(f"✅ Order {order_id} cancelled successfully")
             return True
         else:
@@ -696,7 +676,7 @@ def cancel_order(order_id: str) -> bool:
 def order_commands_callback(message):
     """
     Callback for order commands (cancel, modify, etc.) from Pub/Sub
-    Runs in thread pool - adds commands to queue for main thread processing
+    Runs in thread pool - hands commands to the dispatcher (routed to the order's account)
     """
     try:
         command_data = json.loads(message.data.decode('utf-8'))
@@ -705,8 +685,7 @@ def order_commands_callback(message):
 
         logger.info(f"Received order command: {command_type} for {order_id}")
 
-        # Add command to queue for main thread processing
-        command_queue.put({
+        order_dispatcher.submit_command({
             'command_data': command_data,
             'message': message
         })
@@ -718,7 +697,7 @@ def order_commands_callback(message):
 
 def process_command_from_queue(command_item: Dict[str, Any]):
     """
-    Process a single command from the queue in the main thread
+    Process a single command on the account worker that placed the order
     """
     command_data = command_item['command_data']
     message = command_item['message']
@@ -749,17 +728,16 @@ def process_command_from_queue(command_item: Dict[str, Any]):
 def trading_orders_callback(message):
     """
     Callback for trading orders from Pub/Sub
-    Runs in thread pool - adds orders to queue for main thread processing
+    Runs in thread pool - hands orders to the dispatcher (routed to the order's account)
     """
     try:
         order_data = json.loads(message.data.decode('utf-8'))
         order_id = order_data.get('order_id')
 
-        logger.debug(f"Received trading order: {order_id} - adding to queue")
+        logger.debug(f"Received trading order: {order_id} - dispatching")
 
-        # Add order to queue for main thread processing
         # Include the message so we can ack/nack it later
-        order_queue.put({
+        order_dispatcher.submit_order({
             'order_data': order_data,
             'message': message
         })
@@ -771,8 +749,8 @@ def trading_orders_callback(message):
 
 def process_order_from_queue(order_item: Dict[str, Any]):
     """
-    Process a single order from the queue in the main thread
-    This runs in the main thread where IBKR's event loop is available
+    Process a single order on its account's worker thread
+    Each account worker has its own event loop (for IBKR) and runs its orders in arrival order
     """
     order_data = order_item['order_data']
     message = order_item['message']
@@ -785,14 +763,16 @@ def process_order_from_queue(order_item: Dict[str, Any]):
         logger.debug(f"Processing order from queue: {order_id}")
 
         # 🚨 CRITICAL FAILSAFE: Check if signal already processed
-        if signal_id in processed_signal_ids:
+        with processed_signal_ids_lock:
+            is_duplicate = signal_id in processed_signal_ids
+            # Add to processed set
+            processed_signal_ids.add(signal_id)
+        if is_duplicate:
             logger.critical(f"🚨 DUPLICATE SIGNAL BLOCKED! Signal {signal_id} already processed - REJECTING to prevent duplicate execution!")
             signal_logger.critical(f"ORDER: {signal_id} | DUPLICATE_BLOCKED | This signal was already processed - order rejected for safety")
             message.ack()  # ACK the message to prevent redelivery
             return
 
-        # Add to processed set
-        processed_signal_ids.add(signal_id)
         logger.debug(f"Signal {signal_id} marked as processed (total tracked: {len(processed_signal_ids)})")
 
         # Log to signal_processing.log - Order received (concise)
@@ -800,7 +780,7 @@ def process_order_from_queue(order_item: Dict[str, Any]):
         logger.info(f"📥 ORDER RECEIVED: {order_data.get('instrument')} | {order_data.get('direction')} | Qty: {order_data.get('quantity')} | OrderID: {order_id}")
         signal_logger.info(f"ORDER: {signal_id} | ORDER_RECEIVED | OrderID={order_id} | Instrument={order_data.get('instrument')} | Direction={order_data.get('direction')} | Quantity={order_data.get('quantity')}")
 
-        # Submit order to broker (now safe - we're in main thread)
+        # Submit order to broker (safe - we're on the account's worker thread)
         logger.debug(f"Submitting order {order_id} to broker...")
         result = submit_order_to_broker(order_data)
 
@@ -902,12 +882,25 @@ def process_order_from_queue(order_item: Dict[str, Any]):
         message.nack()
 
 
+# ========================================================================
+# ORDER DISPATCH - one serialized worker per account
+# ========================================================================
+
+order_dispatcher = AccountOrderDispatcher(
+    order_handler=process_order_from_queue,
+    command_handler=process_command_from_queue,
+    # Orders: the (mock-overridden) account; commands: the account that placed the order
+    order_router=lambda item: resolve_order_account(item['order_data']),
+    command_router=lambda item: active_order_accounts.get(item['command_data'].get('order_id'))
+)
+
+
 def start_trading_orders_subscriber():
     """
     Start Pub/Sub subscriber for trading orders
     Runs in background thread
     """
-    streaming_pull_future = subscriber.subscribe(trading_orders_subscription, callback=trading_orders_callback)
+    streaming_pull_future = transport.subscribe(trading_orders_subscription, callback=trading_orders_callback)
     logger.debug("Trading orders subscriber started")
 
     try:
@@ -922,7 +915,7 @@ def start_order_commands_subscriber():
     Start Pub/Sub subscriber for order commands (cancel, modify, etc.)
     Runs in background thread
     """
-    streaming_pull_future = subscriber.subscribe(order_commands_subscription, callback=order_commands_callback)
+    streaming_pull_future = transport.subscribe(order_commands_subscription, callback=order_commands_callback)
     logger.debug("Order commands subscriber started")
 
     try:
@@ -950,6 +943,9 @@ def periodic_account_updates():
 if __name__ == "__main__":
     logger.info("🚀 Execution Service Starting")
 
+    # One serialized worker per account in the broker pool
+    order_dispatcher.start_workers(broker_pool.keys())
+
     # Connect to all brokers in pool (continue even if some fail - orders will route to available brokers)
     if not connect_all_brokers():
         logger.warning("⚠️  No brokers connected - orders will queue until brokers available")
@@ -959,19 +955,15 @@ if __name__ == "__main__":
     # Initialize Mock broker with empty positions
     if args.use_mock_broker:
         account_id = "Mock_Paper"
+        position_store.clear_account(account_id)
         trading_accounts_collection.update_one(
             {'account_id': account_id},
-            {
-                '$set': {
-                    'open_positions': [],
-                    'updated_at': datetime.utcnow()
-                }
-            },
+            {'$set': {'updated_at': datetime.utcnow()}},
             upsert=True
         )
         logger.info(f"✅ Mock broker account '{account_id}' initialized with empty positions")
 
-    # Start Pub/Sub subscribers in background threads
+    # Start Pub/Sub subscribers in background threads (callbacks feed the dispatcher)
     orders_subscriber_thread = threading.Thread(target=start_trading_orders_subscriber, daemon=True)
     orders_subscriber_thread.start()
 
@@ -981,23 +973,9 @@ if __name__ == "__main__":
     logger.info("✅ Execution Service ready - listening for orders")
     logger.info("*" * 50)
     try:
-        while True:
-            # Check if there are orders in the queue (non-blocking)
-            try:
-                order_item = order_queue.get(timeout=0.1)
-                process_order_from_queue(order_item)
-            except queue.Empty:
-                pass
-
-            # Check if there are commands in the queue (non-blocking)
-            try:
-                command_item = command_queue.get(timeout=0.1)
-                process_command_from_queue(command_item)
-            except queue.Empty:
-                pass
-
-            # Small sleep to prevent CPU spinning
-            time.sleep(0.1)
+        # Dispatch loop: wakes on each order/command and hands it to its account worker
+        order_dispatcher.run_forever()
     except KeyboardInterrupt:
         logger.info("Shutting down Execution Service")
-        broker.disconnect()
+        disconnect_all_brokers()
+        order_dispatcher.shutdown_workers(wait=False)
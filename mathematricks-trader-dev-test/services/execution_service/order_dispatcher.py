@@ -0,0 +1,186 @@
+"""
+Order Dispatcher Module
+Event-loop dispatcher with one serialized worker per trading account.
+
+The execution service main loop used to poll order_queue and command_queue with 0.1s
+timeouts plus a 0.1s sleep (up to ~300ms added per order) and executed every order on
+the main thread, one at a time across all accounts. AccountOrderDispatcher:
+- Runs an asyncio loop on the main thread; Pub/Sub callbacks hand items to it with
+  call_soon_threadsafe, so it wakes the moment an order or command arrives
+- Routes each item to its account's worker: a single thread with its own event loop
+  (ib_insync needs one), so orders for different accounts/brokers go out concurrently
+  while each account keeps strict arrival order
+- Runs broker calls that must share a thread with the account's orders (connect,
+  disconnect) on the same worker via run_on_account()
+"""
+from typing import Dict, Any, Callable, Hashable, Optional, Iterable
+from concurrent.futures import ThreadPoolExecutor, Future
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+ORDER = 'order'
+COMMAND = 'command'
+_STOP = 'stop'
+
+
+def _init_worker_event_loop():
+    """Give each account worker thread its own asyncio event loop (ib_insync uses it)"""
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+class AccountOrderDispatcher:
+    """
+    Routes orders/commands to per-account single-thread workers.
+
+    Key responsibilities:
+    - Thread-safe submit_order() / submit_command() for Pub/Sub callbacks
+    - One worker (thread + event loop) per account, created on demand
+    - run_forever() blocks the main thread on the dispatch loop until stop()
+    """
+
+    def __init__(self,
+                 order_handler: Callable[[Dict[str, Any]], None],
+                 command_handler: Callable[[Dict[str, Any]], None],
+                 order_router: Callable[[Dict[str, Any]], Hashable],
+                 command_router: Callable[[Dict[str, Any]], Hashable]):
+        """
+        Initialize AccountOrderDispatcher.
+
+        Args:
+            order_handler: Processes one order item (runs on the account worker)
+            command_handler: Processes one command item (runs on the account worker)
+            order_router: Returns the account key for an order item
+            command_router: Returns the account key for a command item
+        """
+        self.order_handler = order_handler
+        self.command_handler = command_handler
+        self.order_router = order_router
+        self.command_router = command_router
+
+        self._loop = asyncio.new_event_loop()
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self._workers: Dict[Hashable, ThreadPoolExecutor] = {}
+        self._workers_lock = threading.Lock()
+        self._in_flight: Dict[Hashable, int] = {}
+
+        self.dispatched = 0
+        self.failed = 0
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _worker(self, account_key: Hashable) -> ThreadPoolExecutor:
+        with self._workers_lock:
+            worker = self._workers.get(account_key)
+            if worker is None:
+                worker = ThreadPoolExecutor(
+                    max_workers=1,
+                    thread_name_prefix=f"exec-{account_key}",
+                    initializer=_init_worker_event_loop
+                )
+                self._workers[account_key] = worker
+                self._in_flight[account_key] = 0
+                logger.info(f"🧵 Started order worker for account: {account_key}")
+            return worker
+
+    def start_workers(self, account_keys: Iterable[Hashable]):
+        """Create workers up front (e.g. one per account in the broker pool)"""
+        for account_key in account_keys:
+            self._worker(account_key)
+
+    def run_on_account(self, account_key: Hashable, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Run fn on the account's worker thread (after anything already queued there).
+
+        Returns:
+            concurrent.futures.Future with fn's result
+        """
+        return self._worker(account_key).submit(fn, *args, **kwargs)
+
+    # ------------------------------------------------------------------
+    # Submission (any thread)
+    # ------------------------------------------------------------------
+
+    def _post(self, kind: str, item: Optional[Dict[str, Any]]):
+        self._loop.call_soon_threadsafe(self._inbox.put_nowait, (kind, item))
+
+    def submit_order(self, order_item: Dict[str, Any]):
+        """Queue an order item ({'order_data', 'message'}) for dispatch"""
+        self._post(ORDER, order_item)
+
+    def submit_command(self, command_item: Dict[str, Any]):
+        """Queue a command item ({'command_data', 'message'}) for dispatch"""
+        self._post(COMMAND, command_item)
+
+    # ------------------------------------------------------------------
+    # Dispatch loop (main thread)
+    # ------------------------------------------------------------------
+
+    def _dispatch(self, kind: str, item: Dict[str, Any]):
+        if kind == ORDER:
+            handler, router = self.order_handler, self.order_router
+        else:
+            handler, router = self.command_handler, self.command_router
+
+        try:
+            account_key = router(item)
+        except Exception as e:
+            logger.error(f"❌ Failed to route {kind}: {e} - using default worker", exc_info=True)
+            account_key = None
+
+        worker = self._worker(account_key)
+        with self._workers_lock:
+            self._in_flight[account_key] += 1
+            self.dispatched += 1
+
+        future = worker.submit(handler, item)
+        future.add_done_callback(lambda f, key=account_key: self._on_done(key, kind, f))
+
+    def _on_done(self, account_key: Hashable, kind: str, future: Future):
+        with self._workers_lock:
+            self._in_flight[account_key] -= 1
+            error = future.exception()
+            if error is not None:
+                self.failed += 1
+        if error is not None:
+            logger.error(f"❌ Unhandled error in {kind} worker for {account_key}: {error}")
+
+    async def _dispatch_loop(self):
+        while True:
+            kind, item = await self._inbox.get()
+            if kind == _STOP:
+                return
+            self._dispatch(kind, item)
+
+    def run_forever(self):
+        """Run the dispatch loop on the calling thread until stop() is called"""
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._dispatch_loop())
+        finally:
+            asyncio.set_event_loop(None)
+
+    def stop(self):
+        """Stop the dispatch loop (thread-safe); queued worker items still run"""
+        self._post(_STOP, None)
+
+    def shutdown_workers(self, wait: bool = True):
+        """Shut down all account workers"""
+        with self._workers_lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and per-account in-flight items (for monitoring)"""
+        with self._workers_lock:
+            return {
+                'dispatched': self.dispatched,
+                'failed': self.failed,
+                'accounts': len(self._workers),
+                'in_flight': dict(self._in_flight)
+            }
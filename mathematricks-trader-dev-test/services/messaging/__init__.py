@@ -0,0 +1,71 @@
+"""
+Shared Pub/Sub Transport Library for Mathematricks Trading System
+
+Every service publishes and subscribes through a PubSubTransport instead of using
+google.cloud.pubsub_v1 directly, so the pipeline can run against:
+- gcp: Google Cloud Pub/Sub (or its emulator) - the default
+- memory: an in-process stand-in (all services in one process share it), for local
+  runs and the pipeline benchmark (tools/benchmark_signal_pipeline.py)
+
+Usage:
+    from messaging import get_transport
+
+    transport = get_transport()  # PUBSUB_TRANSPORT=gcp|memory
+    topic = transport.topic_path(project_id, 'trading-orders')
+    transport.publish(topic, b'{...}').result(timeout=5)
+
+    subscription = transport.subscription_path(project_id, 'trading-orders-sub')
+    future = transport.subscribe(subscription, callback, max_messages=256)
+    future.result()  # Blocks until cancelled
+"""
+import os
+import threading
+from typing import Optional
+
+from .base import PubSubTransport
+from .memory import InMemoryTransport, DEFAULT_SUBSCRIPTIONS
+
+_transport: Optional[PubSubTransport] = None
+_transport_lock = threading.Lock()
+
+
+def create_transport(kind: str) -> PubSubTransport:
+    """
+    Create a transport by name ('gcp' or 'memory').
+
+    Raises:
+        ValueError: If the transport name is unknown
+    """
+    kind = kind.lower()
+    if kind == 'gcp':
+        from .gcp import GcpPubSubTransport
+        return GcpPubSubTransport()
+    if kind == 'memory':
+        return InMemoryTransport()
+    raise ValueError(f"Unknown PUBSUB_TRANSPORT: {kind} (expected 'gcp' or 'memory')")
+
+
+def get_transport() -> PubSubTransport:
+    """Process-wide transport selected by PUBSUB_TRANSPORT (default: gcp)"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = create_transport(os.getenv('PUBSUB_TRANSPORT', 'gcp'))
+        return _transport
+
+
+def set_transport(transport: PubSubTransport):
+    """Install a transport for this process (e.g. a benchmark's InMemoryTransport)"""
+    global _transport
+    with _transport_lock:
+        _transport = transport
+
+
+__all__ = [
+    'PubSubTransport',
+    'InMemoryTransport',
+    'DEFAULT_SUBSCRIPTIONS',
+    'create_transport',
+    'get_transport',
+    'set_transport',
+]
@@ -0,0 +1,67 @@
+"""
+Base Pub/Sub Transport Interface
+All message transports used by the services must implement this interface
+"""
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+
+class PubSubTransport(ABC):
+    """
+    Publish/subscribe transport used by signal_ingestion, cerebro and execution_service.
+
+    The surface mirrors the parts of google.cloud.pubsub_v1 the services use
+    (topic_path / subscription_path / publish / subscribe), so swapping the transport
+    does not change the message flow:
+    - publish() returns a Future whose result() is the message ID
+    - subscribe() calls callback(message) from a background thread; the callback must
+      message.ack() or message.nack()
+    - subscribe() returns a streaming future: result() blocks until the stream stops,
+      cancel() stops it
+    """
+
+    name = "abstract"
+
+    @abstractmethod
+    def topic_path(self, project_id: str, topic: str) -> str:
+        """Fully qualified topic path"""
+        pass
+
+    @abstractmethod
+    def subscription_path(self, project_id: str, subscription: str) -> str:
+        """Fully qualified subscription path"""
+        pass
+
+    @abstractmethod
+    def publish(self, topic_path: str, data: bytes, **attributes: str) -> Future:
+        """
+        Publish one message.
+
+        Args:
+            topic_path: Path from topic_path()
+            data: Message payload
+            **attributes: Optional string attributes
+
+        Returns:
+            Future resolving to the message ID
+        """
+        pass
+
+    @abstractmethod
+    def subscribe(self,
+                  subscription_path: str,
+                  callback: Callable,
+                  max_messages: Optional[int] = None):
+        """
+        Start delivering messages from a subscription.
+
+        Args:
+            subscription_path: Path from subscription_path()
+            callback: Called with each message (needs .data, .attributes, .ack(), .nack())
+            max_messages: Flow control - maximum unacknowledged messages outstanding
+
+        Returns:
+            Streaming future with result() and cancel()
+        """
+        pass
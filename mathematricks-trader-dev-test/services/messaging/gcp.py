@@ -0,0 +1,58 @@
+"""
+Google Cloud Pub/Sub Transport
+Production transport (also works against the Pub/Sub emulator via PUBSUB_EMULATOR_HOST)
+"""
+import logging
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+from .base import PubSubTransport
+
+logger = logging.getLogger(__name__)
+
+
+class GcpPubSubTransport(PubSubTransport):
+    """
+    Thin wrapper around google.cloud.pubsub_v1 publisher and subscriber clients.
+    Clients are created lazily, so a service that only publishes never opens a
+    subscriber channel (and vice versa).
+    """
+
+    name = "gcp"
+
+    def __init__(self):
+        # Imported here so the in-memory transport works without google-cloud-pubsub
+        from google.cloud import pubsub_v1
+        self._pubsub_v1 = pubsub_v1
+        self._publisher = None
+        self._subscriber = None
+
+    @property
+    def publisher(self):
+        if self._publisher is None:
+            self._publisher = self._pubsub_v1.PublisherClient()
+        return self._publisher
+
+    @property
+    def subscriber(self):
+        if self._subscriber is None:
+            self._subscriber = self._pubsub_v1.SubscriberClient()
+        return self._subscriber
+
+    def topic_path(self, project_id: str, topic: str) -> str:
+        return self._pubsub_v1.PublisherClient.topic_path(project_id, topic)
+
+    def subscription_path(self, project_id: str, subscription: str) -> str:
+        return self._pubsub_v1.SubscriberClient.subscription_path(project_id, subscription)
+
+    def publish(self, topic_path: str, data: bytes, **attributes: str) -> Future:
+        return self.publisher.publish(topic_path, data, **attributes)
+
+    def subscribe(self,
+                  subscription_path: str,
+                  callback: Callable,
+                  max_messages: Optional[int] = None):
+        kwargs = {}
+        if max_messages:
+            kwargs['flow_control'] = self._pubsub_v1.types.FlowControl(max_messages=max_messages)
+        return self.subscriber.subscribe(subscription_path, callback=callback, **kwargs)
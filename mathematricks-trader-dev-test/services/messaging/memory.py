@@ -0,0 +1,270 @@
+"""
+In-Memory Pub/Sub Transport
+In-process stand-in for Google Cloud Pub/Sub, for local runs and benchmarks.
+
+Follows the Pub/Sub semantics the services rely on:
+- A topic fans out to every subscription attached to it; messages published to a topic
+  without subscriptions are dropped
+- Messages are retained on a subscription until a subscriber acks them; nack()
+  redelivers
+- Flow control (max_messages) bounds unacknowledged messages per subscriber
+- Callbacks run on a per-subscriber thread pool, like the streaming pull client
+
+All services in one process share the same instance (see get_transport()), so the whole
+signal pipeline can run without GCP.
+"""
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Optional, List
+import itertools
+import logging
+import threading
+import time
+
+from .base import PubSubTransport
+
+logger = logging.getLogger(__name__)
+
+# subscription -> topic (mirrors services/setup_pubsub.sh, plus order-commands)
+DEFAULT_SUBSCRIPTIONS = {
+    'standardized-signals-sub': 'standardized-signals',
+    'trading-orders-sub': 'trading-orders',
+    'order-commands-sub': 'order-commands',
+    'execution-confirmations-sub': 'execution-confirmations',
+    'account-updates-sub': 'account-updates',
+}
+
+CALLBACK_THREADS = 10  # Same default as the streaming pull client's callback pool
+
+
+def _short_name(path: str) -> str:
+    """'projects/p/topics/t' -> 't' (plain names pass through)"""
+    return path.rsplit('/', 1)[-1]
+
+
+class InMemoryMessage:
+    """Message delivered to subscriber callbacks"""
+
+    def __init__(self, subscription: "_Subscription", data: bytes, attributes: Dict[str, str],
+                 message_id: str, publish_time: datetime, published_at: float):
+        self._subscription = subscription
+        self.data = data
+        self.attributes = attributes
+        self.message_id = message_id
+        self.publish_time = publish_time
+        self.published_at = published_at  # time.perf_counter() at publish (for latency)
+        self.delivery_attempt = 0
+        self._settled = False
+        self._settle_lock = threading.Lock()
+
+    def _settle(self) -> bool:
+        with self._settle_lock:
+            if self._settled:
+                return False
+            self._settled = True
+            return True
+
+    def ack(self):
+        if self._settle():
+            self._subscription.on_ack(self)
+
+    def nack(self):
+        if self._settle():
+            self._subscription.on_nack(self)
+
+
+class _StreamingFuture:
+    """Returned by subscribe(): result() blocks until cancel()"""
+
+    def __init__(self, subscription: "_Subscription"):
+        self._subscription = subscription
+        self._done = threading.Event()
+
+    def result(self, timeout: Optional[float] = None):
+        if not self._done.wait(timeout):
+            raise TimeoutError("Streaming pull still running")
+        return None
+
+    def cancel(self):
+        self._subscription.stop(self)
+        self._done.set()
+
+    def cancelled(self) -> bool:
+        return self._done.is_set()
+
+
+class _Subscription:
+    """Backlog and delivery loop for one subscription"""
+
+    def __init__(self, name: str, topic: str):
+        self.name = name
+        self.topic = topic
+        self._backlog = deque()
+        self._cond = threading.Condition()
+        self._outstanding = 0
+        self._max_messages = None
+        self._callback = None
+        self._executor = None
+        self._stream = None
+
+        self.published = 0
+        self.delivered = 0
+        self.acked = 0
+        self.nacked = 0
+
+    def enqueue(self, message: InMemoryMessage):
+        with self._cond:
+            self.published += 1
+            self._backlog.append(message)
+            self._cond.notify_all()
+
+    def start(self, callback: Callable, max_messages: Optional[int]) -> _StreamingFuture:
+        with self._cond:
+            if self._stream is not None:
+                raise RuntimeError(f"Subscription {self.name} already has an active subscriber")
+            self._callback = callback
+            self._max_messages = max_messages
+            self._executor = ThreadPoolExecutor(max_workers=CALLBACK_THREADS,
+                                                thread_name_prefix=f"pubsub-{self.name}")
+            stream = self._stream = _StreamingFuture(self)
+        threading.Thread(target=self._deliver_loop, args=(stream,),
+                         name=f"pubsub-{self.name}-deliver", daemon=True).start()
+        return stream
+
+    def stop(self, stream: _StreamingFuture):
+        with self._cond:
+            if self._stream is not stream:
+                return
+            self._stream = None
+            executor, self._executor = self._executor, None
+            self._cond.notify_all()
+        executor.shutdown(wait=False)
+
+    def _deliver_loop(self, stream: _StreamingFuture):
+        while True:
+            with self._cond:
+                while self._stream is stream and (
+                    not self._backlog
+                    or (self._max_messages and self._outstanding >= self._max_messages)
+                ):
+                    self._cond.wait()
+                if self._stream is not stream:
+                    return
+                message = self._backlog.popleft()
+                message._settled = False
+                message.delivery_attempt += 1
+                self._outstanding += 1
+                self.delivered += 1
+                callback, executor = self._callback, self._executor
+            executor.submit(self._run_callback, callback, message)
+
+    def _run_callback(self, callback: Callable, message: InMemoryMessage):
+        try:
+            callback(message)
+        except Exception as e:
+            # The GCP client logs and drops callback errors; the message is redelivered
+            # when its ack deadline expires - here it is nacked right away
+            logger.error(f"Unhandled error in {self.name} callback: {e}", exc_info=True)
+            message.nack()
+
+    def on_ack(self, message: InMemoryMessage):
+        with self._cond:
+            self.acked += 1
+            self._outstanding -= 1
+            self._cond.notify_all()
+
+    def on_nack(self, message: InMemoryMessage):
+        with self._cond:
+            self.nacked += 1
+            self._outstanding -= 1
+            self._backlog.append(message)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'topic': self.topic,
+                'published': self.published,
+                'delivered': self.delivered,
+                'acked': self.acked,
+                'nacked': self.nacked,
+                'backlog': len(self._backlog),
+                'outstanding': self._outstanding
+            }
+
+
+class InMemoryTransport(PubSubTransport):
+    """
+    Process-local Pub/Sub.
+
+    Subscriptions from DEFAULT_SUBSCRIPTIONS exist up front (like after running
+    setup_pubsub.sh); create_subscription() attaches more, e.g. benchmark probes.
+    """
+
+    name = "memory"
+
+    def __init__(self, subscriptions: Optional[Dict[str, str]] = None):
+        """
+        Initialize InMemoryTransport.
+
+        Args:
+            subscriptions: {subscription: topic} to create (default: DEFAULT_SUBSCRIPTIONS)
+        """
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._topic_subscriptions: Dict[str, List[_Subscription]] = {}
+        self._message_ids = itertools.count(1)
+
+        for subscription, topic in (subscriptions if subscriptions is not None else DEFAULT_SUBSCRIPTIONS).items():
+            self.create_subscription(subscription, topic)
+
+    def create_subscription(self, subscription: str, topic: str):
+        """Attach a subscription to a topic (receives messages published from now on)"""
+        subscription, topic = _short_name(subscription), _short_name(topic)
+        with self._lock:
+            if subscription in self._subscriptions:
+                return
+            sub = _Subscription(subscription, topic)
+            self._subscriptions[subscription] = sub
+            self._topic_subscriptions.setdefault(topic, []).append(sub)
+
+    def topic_path(self, project_id: str, topic: str) -> str:
+        return f"projects/{project_id}/topics/{topic}"
+
+    def subscription_path(self, project_id: str, subscription: str) -> str:
+        return f"projects/{project_id}/subscriptions/{subscription}"
+
+    def publish(self, topic_path: str, data: bytes, **attributes: str) -> Future:
+        if not isinstance(data, bytes):
+            raise TypeError("Message data must be bytes")
+
+        published_at = time.perf_counter()
+        publish_time = datetime.now(timezone.utc)
+        message_id = str(next(self._message_ids))
+
+        with self._lock:
+            subscriptions = list(self._topic_subscriptions.get(_short_name(topic_path), []))
+        for sub in subscriptions:
+            sub.enqueue(InMemoryMessage(sub, data, dict(attributes), message_id, publish_time, published_at))
+
+        future = Future()
+        future.set_result(message_id)
+        return future
+
+    def subscribe(self,
+                  subscription_path: str,
+                  callback: Callable,
+                  max_messages: Optional[int] = None):
+        name = _short_name(subscription_path)
+        with self._lock:
+            sub = self._subscriptions.get(name)
+        if sub is None:
+            raise KeyError(f"Subscription not found: {name}")
+        return sub.start(callback, max_messages)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-subscription counters"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+        return {sub.name: sub.stats() for sub in subscriptions}
@@ -0,0 +1,39 @@
+"""
+Shared list-endpoint helpers for Mathematricks services
+
+Keyset (cursor) pagination over MongoDB collections and streaming JSON responses, used by
+the strategy developer API (DashboardCreator) and the Activity APIs (PortfolioBuilder).
+
+Usage:
+    from pagination import KeysetPage, InvalidCursorError, stream_json_list
+
+    page = KeysetPage(db['signal_store'], {"strategy_id": strategy_id}, "created_at",
+                      limit=100, cursor=request_cursor, projection={"signal_id": 1})
+    chunks = stream_json_list({"strategy_id": strategy_id}, "signals", page,
+                              tail=lambda count: {"count": count, "next_cursor": page.next_cursor})
+"""
+from .keyset import (
+    KeysetPage,
+    InvalidCursorError,
+    encode_cursor,
+    decode_cursor,
+    keyset_query,
+    query_digest,
+)
+from .json_stream import (
+    stream_json_list,
+    json_default,
+    dumps,
+)
+
+__all__ = [
+    'KeysetPage',
+    'InvalidCursorError',
+    'encode_cursor',
+    'decode_cursor',
+    'keyset_query',
+    'query_digest',
+    'stream_json_list',
+    'json_default',
+    'dumps',
+]
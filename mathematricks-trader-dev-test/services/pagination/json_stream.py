@@ -0,0 +1,62 @@
+"""
+Streaming JSON
+Serialize a list response incrementally, one item at a time.
+
+List endpoints used to build the whole response in memory: every document was copied by a
+recursive ObjectId/datetime conversion and then encoded at once. stream_json_list() instead
+yields the response in chunks while the database cursor is read, so memory stays flat in
+the page size and the first bytes go out before the last document is fetched.
+"""
+import json
+from datetime import date, datetime
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional
+
+from bson import ObjectId
+
+
+def json_default(value: Any) -> Any:
+    """json.dumps default= hook for MongoDB values (ObjectId -> str, datetime -> ISO 8601)"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> str:
+    """json.dumps with MongoDB value support"""
+    return json.dumps(value, default=json_default, separators=(",", ":"))
+
+
+def stream_json_list(head: Dict[str, Any], items_key: str, items: Iterable[Dict[str, Any]],
+                     tail: Optional[Callable[[int], Dict[str, Any]]] = None,
+                     chunk_items: int = 50) -> Iterator[bytes]:
+    """
+    Yield a JSON object {**head, items_key: [...items], **tail(count)} in chunks.
+
+    Args:
+        head: Fields written before the list
+        items_key: Name of the list field
+        items: Items to serialize (consumed lazily)
+        tail: Called with the item count once items are exhausted; its fields are written
+            after the list (e.g. count, next_cursor - only known at the end)
+        chunk_items: Items per yielded chunk
+
+    Yields:
+        UTF-8 encoded JSON fragments
+    """
+    prefix = dumps(head)[:-1]
+    yield f"{prefix}{',' if head else ''}{dumps(items_key)}:[".encode()
+
+    count = 0
+    buffer = []
+    for item in items:
+        buffer.append(("," if count else "") + dumps(item))
+        count += 1
+        if len(buffer) >= chunk_items:
+            yield "".join(buffer).encode()
+            buffer = []
+
+    closing = dumps(tail(count) if tail else {})
+    buffer.append("]" + ("," + closing[1:] if closing != "{}" else "}"))
+    yield "".join(buffer).encode()
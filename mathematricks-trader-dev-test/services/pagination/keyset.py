@@ -0,0 +1,203 @@
+"""
+Keyset Pagination
+Cursor-based paging over a (sort_field, _id) ordering for MongoDB list endpoints.
+
+skip/limit paging makes MongoDB walk and discard every skipped document, so deep pages of
+a large history get slower and slower (and shift when new documents arrive). A keyset
+page instead starts right after the last document of the previous page - an indexed range
+scan whatever the depth. The position is handed to clients as an opaque cursor token.
+
+_id breaks ties between documents with equal sort values, so the backing index should end
+in (sort_field, _id), e.g. (strategy_id, created_at, _id).
+
+A cursor also carries a digest of the filter it was issued for; using it with another
+filter (e.g. a different status or environment) is rejected rather than silently
+starting mid-way through an unrelated result set.
+"""
+import base64
+import binascii
+import hashlib
+import itertools
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from bson import json_util
+from pymongo import DESCENDING
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token is malformed or was issued for a different ordering or filter"""
+
+
+def query_digest(query: Optional[Dict[str, Any]]) -> str:
+    """Short, key-order independent digest of a filter (binds a cursor to it)"""
+    canonical = json_util.dumps(query or {}, sort_keys=True)
+    return hashlib.sha1(canonical.encode()).hexdigest()[:12]
+
+
+def encode_cursor(sort_field: str, sort_value: Any, doc_id: Any,
+                  query: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Opaque cursor token for the position right after a document.
+
+    Args:
+        sort_field: Field the page is ordered by (checked again when the cursor is decoded)
+        sort_value: The document's value of sort_field (None if missing)
+        doc_id: The document's _id
+        query: Filter of the page (checked again when the cursor is decoded)
+
+    Returns:
+        URL-safe token
+    """
+    payload = json_util.dumps({"f": sort_field, "q": query_digest(query), "v": sort_value, "id": doc_id})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort_field: str,
+                  query: Optional[Dict[str, Any]] = None) -> Tuple[Any, Any]:
+    """
+    Decode a cursor token.
+
+    Args:
+        token: Token from encode_cursor
+        sort_field: Field the page is ordered by
+        query: Filter of the page (without the keyset range)
+
+    Returns:
+        (sort_value, _id) of the last document of the previous page
+
+    Raises:
+        InvalidCursorError: If the token is malformed or was issued for another sort field
+            or filter
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if payload["f"] != sort_field:
+            raise InvalidCursorError(f"Cursor was issued for ordering by {payload['f']}, not {sort_field}")
+        if payload.get("q") != query_digest(query):
+            raise InvalidCursorError("Cursor was issued for a different filter")
+        return payload["v"], payload["id"]
+    except InvalidCursorError:
+        raise
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {e}")
+
+
+def keyset_query(query: Dict[str, Any], sort_field: str, sort_value: Any, doc_id: Any,
+                 direction: int = DESCENDING) -> Dict[str, Any]:
+    """
+    Restrict a query to the documents after (sort_value, doc_id) in (sort_field, _id) order.
+
+    Documents without sort_field sort before every value, so in descending order they
+    come last (after the dated ones) and in ascending order first.
+    """
+    after = "$lt" if direction == DESCENDING else "$gt"
+    if sort_value is None:
+        if direction == DESCENDING:
+            condition = {sort_field: None, "_id": {after: doc_id}}
+        else:
+            condition = {"$or": [
+                {sort_field: None, "_id": {after: doc_id}},
+                {sort_field: {"$ne": None}}
+            ]}
+    else:
+        branches = [
+            {sort_field: {after: sort_value}},
+            {sort_field: sort_value, "_id": {after: doc_id}}
+        ]
+        if direction == DESCENDING:
+            branches.append({sort_field: None})
+        condition = {"$or": branches}
+
+    if not query:
+        return condition
+    return {"$and": [query, condition]}
+
+
+class KeysetPage:
+    """
+    One page of a keyset-paginated query, iterated lazily from the database cursor.
+
+    Key responsibilities:
+    - Build the range query and (sort_field, _id) sort from an optional cursor token
+    - Stream documents without materializing the page (limit + 1 are fetched to detect
+      whether another page exists)
+    - next_cursor: token for the following page once iteration finished (None on the last page)
+    """
+
+    def __init__(self, collection, query: Dict[str, Any], sort_field: str, limit: int,
+                 cursor: Optional[str] = None, projection: Optional[Dict[str, Any]] = None,
+                 direction: int = DESCENDING, batch_size: int = 100):
+        """
+        Initialize KeysetPage.
+
+        Args:
+            collection: pymongo Collection
+            query: Filter (without the keyset range)
+            sort_field: Field to order by (ties broken by _id in the same direction)
+            limit: Page size
+            cursor: Token from a previous page's next_cursor with the same query (None = first page)
+            projection: Fields to return; sort_field and _id are always included
+            direction: DESCENDING (newest first) or ASCENDING
+            batch_size: Documents per round-trip to MongoDB
+
+        Raises:
+            InvalidCursorError: If cursor can't be decoded or was issued for another query
+        """
+        self.sort_field = sort_field
+        self.limit = limit
+        self.next_cursor: Optional[str] = None
+        self._query = query
+
+        if cursor:
+            sort_value, doc_id = decode_cursor(cursor, sort_field, query)
+            query = keyset_query(query, sort_field, sort_value, doc_id, direction)
+
+        if projection is not None and not any(projection.values()):
+            projection = dict(projection)  # Exclusion projection: keep the keyset fields
+            projection.pop(sort_field, None)
+            projection.pop("_id", None)
+        elif projection is not None:
+            projection = {**projection, sort_field: 1, "_id": 1}
+
+        self._cursor = (
+            collection.find(query, projection)
+            .sort([(sort_field, direction), ("_id", direction)])
+            .limit(limit + 1)
+            .batch_size(min(batch_size, limit + 1))
+        )
+
+        self._docs: Optional[Iterator[Dict[str, Any]]] = None
+
+    def open(self) -> "KeysetPage":
+        """
+        Run the query now, so connection and query errors surface before a streaming
+        response has started (iteration opens the page itself otherwise)
+        """
+        if self._docs is None:
+            docs = iter(self._cursor)
+            first = next(docs, None)
+            self._docs = itertools.chain([first], docs) if first is not None else iter(())
+        return self
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        self.open()
+        last = None
+        for count, doc in enumerate(self._docs):
+            if count == self.limit:
+                self.next_cursor = encode_cursor(self.sort_field, _get_path(last, self.sort_field), last["_id"],
+                                                 self._query)
+                break
+            last = doc
+            yield doc
+        self._cursor.close()
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    """Value of a dotted field path in a document (None if missing)"""
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
@@ -9,31 +9,40 @@ Port: 8003
 
 import os
 import sys
+import json
+import asyncio
 import logging
-import subprocess
 import shutil
-import glob
-import re
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 
 import pandas as pd
 import numpy as np
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pymongo import MongoClient
 from dotenv import load_dotenv
 
+from portfolio_test_runner import PortfolioTestRunner, FINISHED_STATES, JOB_COMPLETED
+
+# Shared service packages (pagination) live in services/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pagination import KeysetPage, InvalidCursorError, stream_json_list
+from backtest_series import BacktestSeriesError, pack_backtest_records, present_backtest_series
+
 # Load environment variables
 load_dotenv()
 
 # Determine project root dynamically
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))  # services/portfolio_builder
 PROJECT_ROOT = os.path.dirname(os.path.dirname(SCRIPT_DIR))  # mathematricks-trader/
-PYTHON_PATH = os.path.join(PROJECT_ROOT, 'venv', 'bin', 'python')
 RESEARCH_OUTPUTS_DIR = os.path.join(SCRIPT_DIR, 'research', 'outputs')
 LOG_FILE = os.path.join(PROJECT_ROOT, 'logs', 'portfolio_builder.log')
+BACKTEST_N_JOBS = int(os.getenv('BACKTEST_N_JOBS', '1'))  # Walk-forward worker processes (1 = in-process, 0 = one per CPU)
+PORTFOLIO_TEST_WORKERS = int(os.getenv('PORTFOLIO_TEST_WORKERS', '1'))  # Portfolio tests run concurrently
+PORTFOLIO_TEST_TIMEOUT = float(os.getenv('PORTFOLIO_TEST_TIMEOUT', '300'))  # Seconds /run waits for a result
+ACTIVITY_MAX_PAGE_SIZE = int(os.getenv('ACTIVITY_MAX_PAGE_SIZE', '1000'))  # Largest Activity list page
 
 # Ensure directories exist
 os.makedirs(RESEARCH_OUTPUTS_DIR, exist_ok=True)
@@ -84,6 +93,16 @@ logger.info("=" * 80)
 logger.info("PortfolioBuilder Service Starting")
 logger.info("=" * 80)
 
+# In-process Research Lab job queue (warm workers, cached strategy data)
+portfolio_test_runner = PortfolioTestRunner(
+    strategies_collection=strategies_collection,
+    portfolio_tests_collection=portfolio_tests_collection,
+    output_root=RESEARCH_OUTPUTS_DIR,
+    max_workers=PORTFOLIO_TEST_WORKERS,
+    n_jobs=BACKTEST_N_JOBS
+)
+portfolio_test_runner.start()
+
 
 # ============================================================================
 # Health Check
@@ -113,9 +132,10 @@ async def get_all_strategies():
     try:
         strategies = list(strategies_collection.find({}))
 
-        # Remove MongoDB _id
+        # Remove MongoDB _id; backtest_series (binary columns) goes out as the record list
         for strategy in strategies:
             strategy.pop('_id', None)
+            present_backtest_series(strategy)
 
         return {
             "status": "success",
@@ -140,8 +160,9 @@ async def get_strategy(strategy_id: str):
         if not strategy:
             raise HTTPException(status_code=404, detail=f"Strategy {strategy_id} not found")
 
-        # Remove MongoDB _id
+        # Remove MongoDB _id; backtest_series (binary columns) goes out as the record list
         strategy.pop('_id', None)
+        present_backtest_series(strategy)
 
         return {
             "status": "success",
@@ -180,6 +201,12 @@ async def create_strategy(strategy_data: Dict[str, Any]):
         strategy_data['updated_at'] = datetime.utcnow()
         strategy_data['status'] = strategy_data.get('status', 'ACTIVE')
 
+        # Store a raw_data_backtest_full record list in the columnar layout
+        try:
+            pack_backtest_records(strategy_data)
+        except BacktestSeriesError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         # Insert into MongoDB
         strategies_collection.insert_one(strategy_data)
 
@@ -213,10 +240,18 @@ async def update_strategy(strategy_id: str, updates: Dict[str, Any]):
         # Add updated timestamp
         updates['updated_at'] = datetime.utcnow()
 
+        # Store a raw_data_backtest_full record list in the columnar layout
+        update = {"$set": updates}
+        try:
+            if pack_backtest_records(updates):
+                update["$unset"] = {"raw_data_backtest_full": ""}
+        except BacktestSeriesError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         # Update in MongoDB
         result = strategies_collection.update_one(
             {"strategy_id": strategy_id},
-            {"$set": updates}
+            update
         )
 
         if result.modified_count == 0:
@@ -316,17 +351,30 @@ async def sync_strategy_backtest(strategy_id: str, backtest_data: Dict[str, Any]
 async def refresh_strategy_cache(strategy_id: str):
     """
     Refresh strategy cache
-    Placeholder for future cache invalidation logic
+    Bumps updated_at / history_version on the strategy document so Cerebro's
+    StrategyHistoryCache (change stream or version poll) reloads this strategy.
     """
     try:
         logger.info(f"Cache refresh requested for strategy: {strategy_id}")
 
+        result = strategies_collection.update_one(
+            {"strategy_id": strategy_id},
+            {
+                "$set": {"updated_at": datetime.utcnow()},
+                "$inc": {"history_version": 1}
+            }
+        )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail=f"Strategy {strategy_id} not found")
+
         return {
             "status": "success",
             "message": f"Cache refreshed for {strategy_id}",
             "strategy_id": strategy_id
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error refreshing cache for {strategy_id}: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
@@ -469,6 +517,9 @@ async def delete_portfolio_test(test_id: str):
         if not test:
             raise HTTPException(status_code=404, detail=f"Test {test_id} not found")
 
+        # Drop it from the job queue if it has not started yet
+        portfolio_test_runner.cancel(test_id)
+
         # Delete archived files from research/outputs
         test_archive_dir = f"{RESEARCH_OUTPUTS_DIR}/{test_id}"
 
@@ -520,128 +571,133 @@ async def get_tearsheet(test_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _submit_portfolio_test(request: Dict[str, Any]):
+    """Validate a Research Lab request and queue it on the portfolio test runner"""
+    strategies = request.get('strategies', [])
+    constructor = request.get('constructor', 'max_hybrid')
+
+    if not strategies or len(strategies) == 0:
+        raise HTTPException(status_code=400, detail="At least one strategy must be selected")
+
+    config = {
+        key: request[key]
+        for key in ('train_days', 'test_days', 'walk_forward_type')
+        if key in request
+    }
+
+    job = portfolio_test_runner.submit(strategies, constructor, config)
+
+    logger.info(f"🔬 Running portfolio test: {job.test_id}")
+    logger.info(f"   Constructor: {constructor}")
+    logger.info(f"   Strategies: {strategies}")
+
+    return job
+
+
+@app.post("/api/v1/portfolio-tests/jobs", status_code=202)
+async def submit_portfolio_test_job(request: Dict[str, Any]):
+    """
+    Queue a portfolio optimization test (Research Lab) and return immediately.
+    Poll GET /api/v1/portfolio-tests/jobs/{test_id} or stream .../events for progress.
+    """
+    try:
+        job = _submit_portfolio_test(request)
+        return {
+            "status": job.status,
+            "test_id": job.test_id,
+            "events_url": f"/api/v1/portfolio-tests/jobs/{job.test_id}/events"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error queueing portfolio test: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/v1/portfolio-tests/jobs")
+async def list_portfolio_test_jobs():
+    """
+    List portfolio test jobs known to this process (queued, running and recent)
+    """
+    jobs = portfolio_test_runner.list_jobs()
+    return {
+        "status": "success",
+        "count": len(jobs),
+        "jobs": [job.to_dict(include_result=False) for job in jobs]
+    }
+
+
+@app.get("/api/v1/portfolio-tests/jobs/{test_id}")
+async def get_portfolio_test_job(test_id: str):
+    """
+    Get status, progress events and (once completed) structured results of a job
+    """
+    job = portfolio_test_runner.get_job(test_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {test_id} not found")
+    return {"status": "success", "job": job.to_dict()}
+
+
+@app.get("/api/v1/portfolio-tests/jobs/{test_id}/events")
+async def stream_portfolio_test_events(test_id: str):
+    """
+    Stream a job's progress events as Server-Sent Events until it finishes.
+    The final event carries the job snapshot including results.
+    """
+    job = portfolio_test_runner.get_job(test_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {test_id} not found")
+
+    async def event_stream():
+        sent = 0
+        while True:
+            events = job.events[sent:]
+            for event in events:
+                yield f"event: progress\ndata: {json.dumps(event, default=str)}\n\n"
+            sent += len(events)
+
+            if job.status in FINISHED_STATES and sent >= len(job.events):
+                yield f"event: {job.status}\ndata: {json.dumps(job.to_dict(), default=str)}\n\n"
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/api/v1/portfolio-tests/run")
 async def run_portfolio_test(request: Dict[str, Any]):
     """
     Run a new portfolio optimization test (Research Lab)
-    Runs construct_portfolio.py with selected strategies and saves results to MongoDB
+    Queues the test on the in-process runner and waits (without blocking the event
+    loop) for its allocations and performance metrics
     """
     try:
-        strategies = request.get('strategies', [])
-        constructor = request.get('constructor', 'max_hybrid')
-
-        if not strategies or len(strategies) == 0:
-            raise HTTPException(status_code=400, detail="At least one strategy must be selected")
-
-        # Generate test ID
-        test_id = f"test_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
-
-        logger.info(f"🔬 Running portfolio test: {test_id}")
-        logger.info(f"   Constructor: {constructor}")
-        logger.info(f"   Strategies: {strategies}")
-
-        # Create output directory for this test in research/outputs
-        test_output_dir = f"{RESEARCH_OUTPUTS_DIR}/{test_id}"
-        os.makedirs(test_output_dir, exist_ok=True)
-
-        # Run construct_portfolio.py with output directory set to test folder
-        cmd = [
-            PYTHON_PATH,
-            f"{PROJECT_ROOT}/services/portfolio_builder/research/construct_portfolio.py",
-            "--constructor", constructor,
-            "--strategies", ",".join(strategies),
-            "--output-dir", test_output_dir
-        ]
-
-        logger.info(f"Executing: {' '.join(cmd)}")
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-
-        if result.returncode != 0:
-            logger.error(f"Portfolio construction failed: {result.stderr}")
-            raise HTTPException(status_code=500, detail=f"Portfolio construction failed: {result.stderr}")
-
-        logger.info(f"Portfolio construction output:\n{result.stdout}")
-
-        # Files are already in the correct location - just need to find them
-        allocation_files = glob.glob(f"{test_output_dir}/*_allocations.csv")
-        equity_files = glob.glob(f"{test_output_dir}/*_equity.csv")
-        correlation_files = glob.glob(f"{test_output_dir}/*_correlation.csv")
-        tearsheet_files = glob.glob(f"{test_output_dir}/*_tearsheet.html")
-
-        if not allocation_files:
-            raise HTTPException(status_code=500, detail="No allocation file generated")
-
-        # Get file paths
-        archived_files = {
-            'allocation_csv': allocation_files[0] if allocation_files else None,
-            'equity_csv': equity_files[0] if equity_files else None,
-            'correlation_csv': correlation_files[0] if correlation_files else None,
-            'tearsheet_html': tearsheet_files[0] if tearsheet_files else None
-        }
-
-        logger.info(f"Test files saved to: {test_output_dir}")
-        logger.info(f"Files: {list(archived_files.values())}")
-
-        # Parse allocations from CSV (last row has final allocations)
-        allocations_df = pd.read_csv(archived_files['allocation_csv'])
-
-        # Get final window's allocation (last row)
-        final_row = allocations_df.iloc[-1]
-        allocations = {}
-        for strategy_id in strategies:
-            if strategy_id in allocations_df.columns:
-                value = final_row[strategy_id]
-                # Handle NaN/Inf values - replace with 0.0
-                if pd.isna(value) or not np.isfinite(value):
-                    allocations[strategy_id] = 0.0
-                else:
-                    allocations[strategy_id] = float(value)
-
-        # Parse performance metrics from QuantStats tearsheet HTML
-        performance_metrics = {}
-        if 'tearsheet_html' in archived_files and archived_files['tearsheet_html'] and os.path.exists(archived_files['tearsheet_html']):
-            with open(archived_files['tearsheet_html'], 'r') as f:
-                html_content = f.read()
-
-            # Extract metrics using regex patterns
-            cagr_match = re.search(r'CAGR[^<]*</td>\s*<td[^>]*>([-\d.]+)%', html_content)
-            sharpe_match = re.search(r'<td[^>]*>Sharpe</td>\s*<td[^>]*>([-\d.]+)</td>', html_content)
-            max_dd_match = re.search(r'<td[^>]*>Max Drawdown</td>\s*<td[^>]*>([-\d.]+)%', html_content)
-            volatility_match = re.search(r'<td[^>]*>Volatility \(ann\.\)</td>\s*<td[^>]*>([-\d.]+)%', html_content)
-
-            performance_metrics = {
-                "cagr": float(cagr_match.group(1)) if cagr_match else 0.0,
-                "sharpe": float(sharpe_match.group(1)) if sharpe_match else 0.0,
-                "max_drawdown": float(max_dd_match.group(1)) if max_dd_match else 0.0,
-                "volatility": float(volatility_match.group(1)) if volatility_match else 0.0
-            }
+        job = _submit_portfolio_test(request)
 
-            logger.info(f"Performance metrics from tearsheet: {performance_metrics}")
-        else:
-            logger.warning("No tearsheet HTML file found - cannot extract performance metrics")
+        loop = asyncio.get_running_loop()
+        finished = await loop.run_in_executor(None, job.done.wait, PORTFOLIO_TEST_TIMEOUT)
 
-        # Save test record to MongoDB
-        test_record = {
-            "test_id": test_id,
-            "constructor": constructor,
-            "strategies": strategies,
-            "allocations": allocations,
-            "performance": performance_metrics,
-            "files": archived_files,
-            "created_at": datetime.utcnow(),
-            "status": "completed"
-        }
+        if not finished:
+            raise HTTPException(
+                status_code=504,
+                detail=f"Portfolio test {job.test_id} still {job.status} after {PORTFOLIO_TEST_TIMEOUT:.0f}s - "
+                       f"poll /api/v1/portfolio-tests/jobs/{job.test_id}"
+            )
 
-        portfolio_tests_collection.insert_one(test_record)
+        if job.status != JOB_COMPLETED:
+            logger.error(f"Portfolio construction failed: {job.error}")
+            raise HTTPException(status_code=500, detail=f"Portfolio construction failed: {job.error}")
 
-        logger.info(f"✅ Portfolio test {test_id} saved to MongoDB")
+        logger.info(f"✅ Portfolio test {job.test_id} saved to MongoDB")
 
         return {
             "status": "success",
-            "test_id": test_id,
-            "allocations": allocations,
-            "performance": performance_metrics,
-            "files": archived_files
+            "test_id": job.test_id,
+            "allocations": job.result['allocations'],
+            "performance": job.result['performance'],
+            "windows": job.result['windows'],
+            "files": job.result['files']
         }
 
     except HTTPException:
@@ -655,120 +711,151 @@ async def run_portfolio_test(request: Dict[str, Any]):
 # Activity Tab APIs (Read-Only)
 # ============================================================================
 
-def serialize_mongo_document(doc):
-    """Recursively convert MongoDB document to JSON-serializable format"""
-    from bson import ObjectId
-
-    if isinstance(doc, dict):
-        return {k: serialize_mongo_document(v) for k, v in doc.items()}
-    elif isinstance(doc, list):
-        return [serialize_mongo_document(item) for item in doc]
-    elif isinstance(doc, ObjectId):
-        return str(doc)
-    elif isinstance(doc, datetime):
-        return doc.isoformat()
-    else:
-        return doc
+# Activity list projections (full signal_data and decision blobs are not sent to list views)
+ACTIVITY_SIGNAL_PROJECTION = {
+    'signal_id': 1, 'received_at': 1, 'created_at': 1, 'environment': 1, 'receive_lag_ms': 1,
+    'cerebro_decision': 1, 'signal_data.strategy_name': 1, 'signal_data.signalID': 1,
+    'signal_data.signal_id': 1, 'signal_data.signal': 1
+}
+ACTIVITY_DECISION_PROJECTION = {
+    'signal_id': 1, 'cerebro_decision': 1, 'signal_data.signalID': 1, 'signal_data.signal_id': 1
+}
 
-@app.get("/api/v1/activity/signals")
-async def get_recent_signals(limit: int = 50, environment: str = None):
-    """Get recent signals from signal_store - filtered by environment if specified"""
+
+def _activity_page(collection, query: Dict[str, Any], sort_field: str, limit: int,
+                   cursor: Optional[str], projection: Dict[str, Any]) -> KeysetPage:
+    """Open a newest-first keyset page for an Activity list (400 on a bad cursor)"""
     try:
-        query = {}
-        if environment:
-            query['environment'] = environment
-
-        # Query signal_store - serialize all documents to handle ObjectIds and datetimes
-        signal_store_docs = list(signal_store_collection.find(query).sort('received_at', -1).limit(limit))
-
-        # Serialize all documents to handle ObjectIds and datetimes
-        signal_store_docs = [serialize_mongo_document(doc) for doc in signal_store_docs]
-
-        # Format signals for frontend
-        signals = []
-        for doc in signal_store_docs:
-            signal_data = doc.get('signal_data', {})
-            signal_details = signal_data.get('signal', {})
-
-            # Handle both single-leg and multi-leg signals
-            if isinstance(signal_details, list) and len(signal_details) > 0:
-                signal_details = signal_details[0]  # Use first leg for display
-
-            # Extract cerebro decision and remove any _id fields
-            cerebro_decision = doc.get('cerebro_decision')
-            decision_status = None
-            if cerebro_decision:
-                # Remove _id from cerebro_decision if present
-                if isinstance(cerebro_decision, dict) and '_id' in cerebro_decision:
-                    cerebro_decision.pop('_id', None)
-                decision_status = cerebro_decision.get('decision', 'PENDING')
-
-            formatted_signal = {
-                'signal_id': doc.get('signal_id') or signal_data.get('signalID') or signal_data.get('signal_id'),
-                'strategy_id': signal_data.get('strategy_name', 'Unknown'),
-                'timestamp': doc.get('received_at'),
-                'created_at': doc.get('received_at'),
-                'instrument': signal_details.get('ticker') or signal_details.get('instrument'),
-                'action': signal_details.get('action'),
-                'direction': signal_details.get('direction'),
-                'price': signal_details.get('price') or signal_details.get('entry_price'),
-                'quantity': signal_details.get('quantity'),
-                'environment': doc.get('environment', 'production'),
-                'processed_by_cerebro': cerebro_decision is not None,
-                'receive_lag_ms': doc.get('receive_lag_ms', 0),
-                'cerebro_decision': cerebro_decision,
-                'decision_status': decision_status
-            }
-            signals.append(formatted_signal)
+        return KeysetPage(collection, query, sort_field, limit, cursor=cursor, projection=projection).open()
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _stream_activity(items_key: str, items, page: KeysetPage) -> StreamingResponse:
+    """Stream an Activity list response ({status, <items_key>, count, next_cursor})"""
+    return StreamingResponse(
+        stream_json_list(
+            {"status": "success"}, items_key, items,
+            tail=lambda count: {"count": count, "next_cursor": page.next_cursor}
+        ),
+        media_type="application/json"
+    )
+
+
+def _format_activity_signal(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Activity list view of one signal_store document"""
+    signal_data = doc.get('signal_data', {})
+    signal_details = signal_data.get('signal', {})
+
+    # Handle both single-leg and multi-leg signals
+    if isinstance(signal_details, list):
+        signal_details = signal_details[0] if signal_details else {}  # Use first leg for display
+
+    # Extract cerebro decision and remove any _id fields
+    cerebro_decision = doc.get('cerebro_decision')
+    decision_status = None
+    if cerebro_decision:
+        if isinstance(cerebro_decision, dict):
+            cerebro_decision.pop('_id', None)
+        decision_status = cerebro_decision.get('decision', 'PENDING')
+
+    received_at = doc.get('received_at') or doc.get('created_at')
+    return {
+        'signal_id': doc.get('signal_id') or signal_data.get('signalID') or signal_data.get('signal_id'),
+        'strategy_id': signal_data.get('strategy_name', 'Unknown'),
+        'timestamp': received_at,
+        'created_at': received_at,
+        'instrument': signal_details.get('ticker') or signal_details.get('instrument'),
+        'action': signal_details.get('action'),
+        'direction': signal_details.get('direction'),
+        'price': signal_details.get('price') or signal_details.get('entry_price'),
+        'quantity': signal_details.get('quantity'),
+        'environment': doc.get('environment', 'production'),
+        'processed_by_cerebro': cerebro_decision is not None,
+        'receive_lag_ms': doc.get('receive_lag_ms', 0),
+        'cerebro_decision': cerebro_decision,
+        'decision_status': decision_status
+    }
+
 
-        return {"status": "success", "count": len(signals), "signals": signals}
+@app.get("/api/v1/activity/signals")
+async def get_recent_signals(limit: int = Query(50, ge=1, le=ACTIVITY_MAX_PAGE_SIZE),
+                             environment: str = None, cursor: Optional[str] = None):
+    """
+    Get recent signals from signal_store (newest first) - filtered by environment if specified
+
+    Keyset-paginated on created_at: pass the returned next_cursor to get older signals.
+    """
+    query = {}
+    if environment:
+        query['environment'] = environment
+
+    try:
+        page = _activity_page(signal_store_collection, query, 'created_at', limit, cursor,
+                              ACTIVITY_SIGNAL_PROJECTION)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching signals: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    return _stream_activity("signals", (_format_activity_signal(doc) for doc in page), page)
+
 
 @app.get("/api/v1/activity/orders")
-async def get_recent_orders(limit: int = 50, environment: str = None):
-    """Get recent orders - filtered by environment if specified"""
-    try:
-        query = {}
-        if environment:
-            query['environment'] = environment
+async def get_recent_orders(limit: int = Query(50, ge=1, le=ACTIVITY_MAX_PAGE_SIZE),
+                            environment: str = None, cursor: Optional[str] = None):
+    """Get recent orders (newest first, keyset-paginated on timestamp) - filtered by environment if specified"""
+    query = {}
+    if environment:
+        query['environment'] = environment
 
-        orders = list(trading_orders_collection.find(query, {'_id': 0}).sort('timestamp', -1).limit(limit))
-        return {"status": "success", "count": len(orders), "orders": orders}
+    try:
+        page = _activity_page(trading_orders_collection, query, 'timestamp', limit, cursor, None)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching orders: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    orders = ({k: v for k, v in order.items() if k != '_id'} for order in page)
+    return _stream_activity("orders", orders, page)
+
 
 @app.get("/api/v1/activity/decisions")
-async def get_cerebro_decisions(limit: int = 50, environment: str = None):
-    """Get recent Cerebro decisions from signal_store (embedded decisions)"""
-    try:
-        query = {
-            'cerebro_decision': {'$ne': None}  # Only get signals with decisions
-        }
-        if environment:
-            query['environment'] = environment
+async def get_cerebro_decisions(limit: int = Query(50, ge=1, le=ACTIVITY_MAX_PAGE_SIZE),
+                                environment: str = None, cursor: Optional[str] = None):
+    """
+    Get recent Cerebro decisions from signal_store (embedded decisions, newest first)
 
-        # Query signal_store and extract embedded decisions
-        signal_store_docs = list(signal_store_collection.find(query, {'_id': 0}).sort('received_at', -1).limit(limit))
+    Keyset-paginated on created_at: pass the returned next_cursor to get older decisions.
+    """
+    query = {
+        'cerebro_decision': {'$ne': None}  # Only get signals with decisions
+    }
+    if environment:
+        query['environment'] = environment
 
-        # Extract decisions from signal_store documents
-        decisions = []
-        for doc in signal_store_docs:
+    try:
+        page = _activity_page(signal_store_collection, query, 'created_at', limit, cursor,
+                              ACTIVITY_DECISION_PROJECTION)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching decisions: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    def decisions():
+        for doc in page:
             decision = doc.get('cerebro_decision', {})
             if decision:
                 # Add signal_id from signal_data for consistency with old format
                 signal_data = doc.get('signal_data', {})
+                decision.pop('_id', None)
                 decision['signal_id'] = doc.get('signal_id') or signal_data.get('signalID') or signal_data.get('signal_id')
-                decisions.append(decision)
+                yield decision
 
-        return {"status": "success", "count": len(decisions), "decisions": decisions}
-    except Exception as e:
-        logger.error(f"Error fetching decisions: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return _stream_activity("decisions", decisions(), page)
 
 
 # ============================================================================
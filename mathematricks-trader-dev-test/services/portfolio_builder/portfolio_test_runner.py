@@ -0,0 +1,403 @@
+"""
+Portfolio Test Runner Module
+In-process job queue for Research Lab portfolio tests.
+
+Each test used to shell out to research/construct_portfolio.py, paying interpreter
+start-up, pandas/scipy imports and a fresh MongoDB connection per run, and then
+re-parsing the CSV/HTML outputs to get allocations and metrics. The runner keeps warm
+worker threads in the PortfolioBuilder process, reuses parsed strategy data across
+tests (keyed by the strategy document version), records progress events while the
+backtest runs and returns allocations/metrics as structured objects.
+"""
+import os
+import sys
+import uuid
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+from pymongo.errors import PyMongoError
+
+# construct_portfolio / WalkForwardBacktest live in the cerebro_service package
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from services.cerebro_service.research.backtest_engine import WalkForwardBacktest
+from services.cerebro_service.research.construct_portfolio import parse_strategy_document, get_constructor
+
+logger = logging.getLogger(__name__)
+
+# Fields needed to decide whether cached strategy data is stale (no backtest payload)
+VERSION_PROJECTION = {"strategy_id": 1, "updated_at": 1, "history_version": 1}
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+
+def _to_float(value) -> float:
+    """Convert numpy/float values to a JSON/BSON safe float (NaN/Inf -> 0.0)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return value if np.isfinite(value) else 0.0
+
+
+@dataclass
+class PortfolioTestJob:
+    """One queued Research Lab portfolio test"""
+    test_id: str
+    constructor: str
+    strategies: List[str]
+    config: Dict[str, Any] = field(default_factory=dict)
+    status: str = JOB_QUEUED
+    progress_pct: float = 0.0
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def add_event(self, stage: str, message: str, **info):
+        """Append a progress event (events are only ever appended)"""
+        self.events.append({
+            'seq': len(self.events),
+            'time': datetime.utcnow().isoformat(),
+            'stage': stage,
+            'message': message,
+            'progress_pct': self.progress_pct,
+            **info
+        })
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        """JSON-serializable snapshot of the job"""
+        snapshot = {
+            'test_id': self.test_id,
+            'constructor': self.constructor,
+            'strategies': self.strategies,
+            'status': self.status,
+            'progress_pct': self.progress_pct,
+            'events': list(self.events),
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if include_result:
+            snapshot['result'] = self.result
+        return snapshot
+
+
+class PortfolioTestRunner:
+    """
+    Queue + warm worker threads for WalkForwardBacktest runs.
+
+    Key responsibilities:
+    - Accept test submissions and run them in order on a fixed set of worker threads
+    - Cache parsed strategy data across tests, reloading a strategy only when its
+      document version (updated_at / history_version) changes
+    - Track per-job progress and persist results to the portfolio_tests collection
+    """
+
+    def __init__(self,
+                 strategies_collection,
+                 portfolio_tests_collection,
+                 output_root: str,
+                 max_workers: int = 1,
+                 n_jobs: int = 1,
+                 max_finished_jobs: int = 200):
+        """
+        Initialize PortfolioTestRunner.
+
+        Args:
+            strategies_collection: MongoDB strategies collection
+            portfolio_tests_collection: MongoDB portfolio_tests collection
+            output_root: Directory under which each test writes its output folder
+            max_workers: Number of tests run concurrently
+            n_jobs: WalkForwardBacktest worker processes per test (0 = one per CPU)
+            max_finished_jobs: Finished jobs kept in memory for status queries
+        """
+        self.strategies_collection = strategies_collection
+        self.portfolio_tests_collection = portfolio_tests_collection
+        self.output_root = output_root
+        self.max_workers = max(1, max_workers)
+        self.n_jobs = n_jobs
+        self.max_finished_jobs = max_finished_jobs
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._jobs: Dict[str, PortfolioTestJob] = {}
+        self._jobs_lock = threading.Lock()
+        self._strategy_cache: Dict[str, Dict[str, Any]] = {}  # strategy_id -> {version, data}
+        self._strategy_cache_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    # ------------------------------------------------------------------
+    # Worker lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the worker threads (idempotent)"""
+        if any(worker.is_alive() for worker in self._workers):
+            return
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"portfolio-test-worker-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+        logger.info(f"✅ Portfolio test runner started ({self.max_workers} worker(s))")
+
+    def stop(self):
+        """Ask the worker threads to exit once the queue is drained"""
+        for _ in self._workers:
+            self._queue.put(None)
+
+    def _worker_loop(self):
+        while True:
+            test_id = self._queue.get()
+            if test_id is None:
+                return
+            job = self.get_job(test_id)
+            if job is None or job.status != JOB_QUEUED:
+                continue
+            self._run_job(job)
+
+    # ------------------------------------------------------------------
+    # Job API
+    # ------------------------------------------------------------------
+
+    def submit(self, strategies: List[str], constructor: str,
+               config: Optional[Dict[str, Any]] = None) -> PortfolioTestJob:
+        """
+        Queue a portfolio test.
+
+        Returns:
+            The queued job (test_id doubles as the job id)
+        """
+        test_id = f"test_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        job = PortfolioTestJob(
+            test_id=test_id,
+            constructor=constructor,
+            strategies=list(strategies),
+            config=dict(config or {})
+        )
+        job.add_event(JOB_QUEUED, f"Queued ({self._queue.qsize()} test(s) ahead)")
+
+        with self._jobs_lock:
+            self._jobs[test_id] = job
+            self._prune_finished_jobs()
+
+        self.portfolio_tests_collection.insert_one({
+            "test_id": test_id,
+            "constructor": constructor,
+            "strategies": job.strategies,
+            "created_at": job.created_at,
+            "status": JOB_QUEUED
+        })
+
+        self._queue.put(test_id)
+        logger.info(f"🔬 Queued portfolio test {test_id} ({constructor}, {len(job.strategies)} strategies)")
+        return job
+
+    def get_job(self, test_id: str) -> Optional[PortfolioTestJob]:
+        with self._jobs_lock:
+            return self._jobs.get(test_id)
+
+    def list_jobs(self) -> List[PortfolioTestJob]:
+        with self._jobs_lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, test_id: str) -> bool:
+        """
+        Cancel a job that has not started yet.
+
+        Returns:
+            True if the job was queued and is now cancelled
+        """
+        job = self.get_job(test_id)
+        if job is None or job.status != JOB_QUEUED:
+            return False
+        job.status = JOB_CANCELLED
+        job.finished_at = datetime.utcnow()
+        job.add_event(JOB_CANCELLED, "Cancelled before start")
+        job.done.set()
+        return True
+
+    def _prune_finished_jobs(self):
+        """Drop the oldest finished jobs beyond max_finished_jobs (caller holds _jobs_lock)"""
+        finished = sorted(
+            (job for job in self._jobs.values() if job.status in FINISHED_STATES),
+            key=lambda job: job.created_at
+        )
+        for job in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job.test_id]
+
+    # ------------------------------------------------------------------
+    # Strategy data
+    # ------------------------------------------------------------------
+
+    def load_strategies(self, strategy_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Backtest input for the requested strategies, parsing only documents whose
+        version changed since they were last loaded.
+
+        Returns:
+            Dict of {strategy_id: {dates, returns, margin_used, notional, account_equity}}
+        """
+        versions = {
+            doc['strategy_id']: f"{doc.get('updated_at')}:{doc.get('history_version', 0)}"
+            for doc in self.strategies_collection.find(
+                {"strategy_id": {"$in": strategy_ids}}, VERSION_PROJECTION
+            )
+            if doc.get('strategy_id')
+        }
+
+        with self._strategy_cache_lock:
+            stale = [
+                sid for sid, version in versions.items()
+                if self._strategy_cache.get(sid, {}).get('version') != version
+            ]
+
+        if stale:
+            for doc in self.strategies_collection.find({"strategy_id": {"$in": stale}}):
+                parsed = parse_strategy_document(doc)
+                sid = doc.get('strategy_id')
+                with self._strategy_cache_lock:
+                    if parsed is None:
+                        self._strategy_cache.pop(sid, None)
+                        continue
+                    self._strategy_cache[sid] = {'version': versions.get(sid), 'data': parsed[1]}
+
+        with self._strategy_cache_lock:
+            return {
+                sid: self._strategy_cache[sid]['data']
+                for sid in strategy_ids
+                if sid in versions and sid in self._strategy_cache
+            }
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    def _update_record(self, test_id: str, fields: Dict[str, Any]):
+        try:
+            self.portfolio_tests_collection.update_one({"test_id": test_id}, {"$set": fields})
+        except PyMongoError as e:
+            logger.error(f"Failed to update portfolio test record {test_id}: {e}")
+
+    def _run_job(self, job: PortfolioTestJob):
+        job.status = JOB_RUNNING
+        job.started_at = datetime.utcnow()
+        job.add_event(JOB_RUNNING, "Loading strategy data")
+        self._update_record(job.test_id, {"status": JOB_RUNNING, "started_at": job.started_at})
+
+        try:
+            strategies_data = self.load_strategies(job.strategies)
+            if not strategies_data:
+                raise ValueError("No backtest data found for the selected strategies")
+            job.progress_pct = 5.0
+            job.add_event('loaded', f"Loaded {len(strategies_data)} strategies")
+
+            test_output_dir = os.path.join(self.output_root, job.test_id)
+            os.makedirs(test_output_dir, exist_ok=True)
+
+            def on_progress(stage: str, info: Dict[str, Any]):
+                if stage == 'window':
+                    job.progress_pct = 10.0 + 80.0 * info['window_num'] / max(info['total_windows'], 1)
+                    message = f"Window {info['window_num']}/{info['total_windows']} complete"
+                    info = {'window_num': info['window_num'], 'total_windows': info['total_windows']}
+                elif stage == 'windows':
+                    job.progress_pct = 10.0
+                    message = f"Running {info['total_windows']} walk-forward windows"
+                elif stage == 'saved':
+                    job.progress_pct = 99.0
+                    message = "Outputs saved"
+                    info = {}
+                else:
+                    message = stage.capitalize()
+                    info = {key: _to_float(value) if isinstance(value, (float, np.floating)) else value
+                            for key, value in info.items()}
+                job.add_event(stage, message, **info)
+
+            backtest = WalkForwardBacktest(
+                constructor=get_constructor(job.constructor),
+                train_days=job.config.get('train_days', 252),
+                test_days=job.config.get('test_days', 63),
+                walk_forward_type=job.config.get('walk_forward_type', 'anchored'),
+                output_dir=test_output_dir,
+                n_jobs=self.n_jobs,
+                progress_callback=on_progress
+            )
+            results = backtest.run(strategies_data)
+
+            job.result = self._summarize(job, results)
+            job.status = JOB_COMPLETED
+            job.progress_pct = 100.0
+            job.finished_at = datetime.utcnow()
+            job.add_event(JOB_COMPLETED, "Portfolio test completed")
+
+            self._update_record(job.test_id, {
+                "status": JOB_COMPLETED,
+                "allocations": job.result['allocations'],
+                "performance": job.result['performance'],
+                "windows": job.result['windows'],
+                "files": job.result['files'],
+                "finished_at": job.finished_at
+            })
+            logger.info(f"✅ Portfolio test {job.test_id} completed in "
+                        f"{(job.finished_at - job.started_at).total_seconds():.1f}s")
+
+        except Exception as e:
+            logger.error(f"❌ Portfolio test {job.test_id} failed: {e}", exc_info=True)
+            job.status = JOB_FAILED
+            job.error = str(e)
+            job.finished_at = datetime.utcnow()
+            job.add_event(JOB_FAILED, str(e))
+            self._update_record(job.test_id, {"status": JOB_FAILED, "error": str(e), "finished_at": job.finished_at})
+
+        finally:
+            job.done.set()
+
+    @staticmethod
+    def _summarize(job: PortfolioTestJob, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Structured allocations/metrics/windows from WalkForwardBacktest.run() output"""
+        windows = results.get('window_allocations', [])
+        final_allocations = windows[-1]['allocations'] if windows else {}
+        metrics = results.get('metrics', {})
+
+        return {
+            # Final window's allocation (%) for every requested strategy
+            'allocations': {sid: _to_float(final_allocations.get(sid, 0.0)) for sid in job.strategies},
+            'performance': {
+                'cagr': _to_float(metrics.get('cagr_pct')),
+                'sharpe': _to_float(metrics.get('sharpe_ratio')),
+                'max_drawdown': _to_float(metrics.get('max_drawdown_pct')),
+                'volatility': _to_float(metrics.get('annual_volatility_pct')),
+                'total_return': _to_float(metrics.get('total_return_pct')),
+                'total_days': int(metrics.get('total_days', 0))
+            },
+            'windows': [
+                {
+                    'window_num': window['window_num'],
+                    'test_start': window['test_start'].isoformat(),
+                    'test_end': window['test_end'].isoformat(),
+                    'allocations': {sid: _to_float(pct) for sid, pct in window['allocations'].items()},
+                    'oos_cagr': _to_float(window['oos_cagr']),
+                    'oos_sharpe': _to_float(window['oos_sharpe']),
+                    'oos_max_dd': _to_float(window['oos_max_dd'])
+                }
+                for window in windows
+            ],
+            'files': results.get('output_files', {})
+        }
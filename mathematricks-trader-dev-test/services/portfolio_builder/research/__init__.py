@@ -1,7 +1,7 @@
 """
 Research Tools for Portfolio Construction
 """
-from .backtest_engine import WalkForwardBacktest
+from services.cerebro_service.research.backtest_engine import WalkForwardBacktest
 from .tearsheet_generator import generate_tearsheet
 
 __all__ = ['WalkForwardBacktest', 'generate_tearsheet']
@@ -0,0 +1,32 @@
+"""
+Shared Position Store for Mathematricks Trading System
+
+ExecutionService writes fills, CerebroService (PositionManager), AccountDataService and
+MockBroker read positions - all through PositionStore, backed by the `positions`
+collection (one document per position).
+
+Usage:
+    from positions import PositionStore
+
+    store = PositionStore(mongo_client['mathematricks_trading'])
+    store.ensure_indexes()
+    store.apply_entry_fill('Mock_Paper', 'SPX_1-D_Opt', 'AAPL', 'LONG', 10, 150.0, 'SIG_ORD')
+    position = store.get_open_position('Mock_Paper', 'SPX_1-D_Opt', 'AAPL', 'LONG')
+"""
+from .store import (
+    PositionStore,
+    POSITIONS_COLLECTION,
+    STATUS_OPEN,
+    STATUS_CLOSED,
+    opposite_direction,
+    position_direction_for_exit,
+)
+
+__all__ = [
+    'PositionStore',
+    'POSITIONS_COLLECTION',
+    'STATUS_OPEN',
+    'STATUS_CLOSED',
+    'opposite_direction',
+    'position_direction_for_exit',
+]
@@ -0,0 +1,237 @@
+"""
+Position Store
+One document per position in the `positions` collection, keyed by
+(account_id, strategy_id, instrument, direction).
+
+Positions used to live in trading_accounts.{account}.open_positions: every fill loaded the
+whole account document, scanned the array in Python and wrote back by array index (a
+read-modify-write race between concurrent fills), and readers fetched the full account
+document to find one position. Here:
+- A fill is one atomic upsert/update (quantity and weighted average price are computed
+  server-side in an update pipeline), so concurrent fills cannot lose updates
+- A partial unique index allows at most one OPEN position per key; CLOSED positions
+  stay in the collection as history
+- Lookups by key, by account and by strategy are single indexed queries
+"""
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import logging
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+POSITIONS_COLLECTION = 'positions'
+
+STATUS_OPEN = 'OPEN'
+STATUS_CLOSED = 'CLOSED'
+
+
+def opposite_direction(direction: str) -> str:
+    """LONG <-> SHORT"""
+    return 'SHORT' if direction == 'LONG' else 'LONG'
+
+
+def position_direction_for_exit(exit_direction: str, exit_action: str) -> str:
+    """
+    Direction of the position an EXIT order closes.
+
+    SELL closes a LONG and BUY closes a SHORT. Without a BUY/SELL action, EXIT signals carry
+    the opposite of the entry direction (e.g. EXIT SHORT closes the LONG entry).
+    """
+    if exit_action == 'SELL':
+        return 'LONG'
+    if exit_action == 'BUY':
+        return 'SHORT'
+    return opposite_direction(exit_direction)
+
+
+class PositionStore:
+    """
+    Atomic, indexed position storage shared by ExecutionService (writes fills),
+    CerebroService (PositionManager) and AccountDataService / MockBroker (reads).
+
+    Key responsibilities:
+    - Apply ENTRY fills (open / scale in) and EXIT fills (reduce / close) atomically
+    - Resolve a position by (account, strategy, instrument, direction) in one query
+    - List open positions by account and/or strategy
+    """
+
+    def __init__(self, db, collection_name: str = POSITIONS_COLLECTION):
+        """
+        Initialize PositionStore.
+
+        Args:
+            db: pymongo Database (mathematricks_trading)
+            collection_name: Positions collection name
+        """
+        self.collection = db[collection_name]
+
+    def ensure_indexes(self):
+        """Create the position indexes (idempotent)"""
+        # At most one OPEN position per key; also serves every keyed lookup and fill
+        self.collection.create_index(
+            [("account_id", ASCENDING), ("strategy_id", ASCENDING),
+             ("instrument", ASCENDING), ("direction", ASCENDING)],
+            name="open_position_key",
+            unique=True,
+            partialFilterExpression={"status": STATUS_OPEN}
+        )
+        # Account-level listings (account state, MockBroker positions)
+        self.collection.create_index(
+            [("account_id", ASCENDING), ("status", ASCENDING)],
+            name="account_status"
+        )
+        # Strategy-level listings (deployed capital across accounts)
+        self.collection.create_index(
+            [("strategy_id", ASCENDING), ("status", ASCENDING)],
+            name="strategy_status"
+        )
+
+    # ------------------------------------------------------------------
+    # Fills
+    # ------------------------------------------------------------------
+
+    def apply_entry_fill(self, account_id: str, strategy_id: str, instrument: str, direction: str,
+                         quantity: float, price: float, order_id: str) -> Dict[str, Any]:
+        """
+        Open a position or scale into the open one (weighted average entry price).
+
+        Args:
+            account_id: Account the order was filled in
+            strategy_id: Strategy identifier
+            instrument: Instrument symbol
+            direction: Position direction ("LONG" or "SHORT")
+            quantity: Filled quantity (> 0)
+            price: Average fill price
+            order_id: Order that produced the fill
+
+        Returns:
+            Position document after the fill
+        """
+        now = datetime.utcnow()
+        key = {
+            'account_id': account_id,
+            'strategy_id': strategy_id,
+            'instrument': instrument,
+            'direction': direction,
+            'status': STATUS_OPEN
+        }
+        current_qty = {'$ifNull': ['$quantity', 0]}
+        update = [{
+            '$set': {
+                'quantity': {'$add': [current_qty, quantity]},
+                'avg_entry_price': {'$divide': [
+                    {'$add': [
+                        {'$multiply': [current_qty, {'$ifNull': ['$avg_entry_price', 0]}]},
+                        quantity * price
+                    ]},
+                    {'$add': [current_qty, quantity]}
+                ]},
+                'current_price': {'$ifNull': ['$current_price', price]},
+                'unrealized_pnl': {'$ifNull': ['$unrealized_pnl', 0.0]},
+                'entry_order_id': {'$ifNull': ['$entry_order_id', {'$literal': order_id}]},
+                'last_order_id': {'$literal': order_id},
+                'created_at': {'$ifNull': ['$created_at', {'$literal': now}]},
+                'updated_at': {'$literal': now}
+            }
+        }]
+
+        try:
+            return self.collection.find_one_and_update(
+                key, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent fill inserted the position first - now it matches
+            return self.collection.find_one_and_update(
+                key, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+
+    def apply_exit_fill(self, account_id: str, strategy_id: str, instrument: str, direction: str,
+                        quantity: float, price: float, order_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Reduce the open position, closing it when the fill covers the remaining quantity.
+
+        Args:
+            account_id: Account the order was filled in
+            strategy_id: Strategy identifier
+            instrument: Instrument symbol
+            direction: Direction of the position being exited (see position_direction_for_exit)
+            quantity: Filled quantity (> 0)
+            price: Average fill price
+            order_id: Order that produced the fill
+
+        Returns:
+            Position document after the fill (status CLOSED when fully exited), or None if
+            no open position exists for the key
+        """
+        now = datetime.utcnow()
+        key = {
+            'account_id': account_id,
+            'strategy_id': strategy_id,
+            'instrument': instrument,
+            'direction': direction,
+            'status': STATUS_OPEN
+        }
+        closing = {'$gte': [quantity, '$quantity']}
+        update = [{
+            '$set': {
+                # A full exit keeps the last open quantity on the closed document
+                'quantity': {'$cond': [closing, '$quantity', {'$subtract': ['$quantity', quantity]}]},
+                'status': {'$cond': [closing, STATUS_CLOSED, STATUS_OPEN]},
+                'exit_order_id': {'$cond': [closing, {'$literal': order_id}, '$exit_order_id']},
+                'avg_exit_price': {'$cond': [closing, price, '$avg_exit_price']},
+                'closed_at': {'$cond': [closing, {'$literal': now}, '$closed_at']},
+                'last_order_id': {'$literal': order_id},
+                'updated_at': {'$literal': now}
+            }
+        }]
+        return self.collection.find_one_and_update(key, update, return_document=ReturnDocument.AFTER)
+
+    def clear_account(self, account_id: str) -> int:
+        """Delete every position (open and closed) for an account, e.g. resetting Mock_Paper"""
+        return self.collection.delete_many({'account_id': account_id}).deleted_count
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def get_open_position(self, account_id: str, strategy_id: str, instrument: str,
+                          direction: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Open position for a key (any direction if direction is None).
+
+        Returns:
+            Position document or None
+        """
+        query = {
+            'account_id': account_id,
+            'strategy_id': strategy_id,
+            'instrument': instrument,
+            'status': STATUS_OPEN
+        }
+        if direction:
+            query['direction'] = direction
+        return self.collection.find_one(query)
+
+    def get_open_positions(self, account_id: Optional[str] = None,
+                           strategy_id: Optional[str] = None,
+                           projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Open positions, optionally filtered by account and/or strategy.
+
+        Args:
+            account_id: Only this account's positions
+            strategy_id: Only this strategy's positions
+            projection: Optional MongoDB projection (e.g. {'_id': 0} for JSON responses)
+
+        Returns:
+            List of position documents (oldest first)
+        """
+        query = {'status': STATUS_OPEN}
+        if account_id:
+            query['account_id'] = account_id
+        if strategy_id:
+            query['strategy_id'] = strategy_id
+        return list(self.collection.find(query, projection).sort('_id', ASCENDING))
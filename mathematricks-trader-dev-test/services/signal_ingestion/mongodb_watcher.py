@@ -3,16 +3,20 @@ MongoDB Change Stream Watcher
 Monitors MongoDB for new signals and processes them
 """
 
+import os
 import time
 import logging
 import datetime
-from typing import Optional, Callable
+from typing import Optional, Callable, Dict, List
 from dateutil import parser
 from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from pymongo.errors import PyMongoError, BulkWriteError
 
 logger = logging.getLogger('signal_ingestion.mongodb_watcher')
 
+# Missed signals stored/published/marked per round-trip during catch-up
+CATCHUP_BATCH_SIZE = int(os.getenv('SIGNAL_CATCHUP_BATCH_SIZE', '500'))
+
 
 class MongoDBWatcher:
     """
@@ -20,15 +24,18 @@ class MongoDBWatcher:
     Handles connection resilience and retry logic
     """
 
-    def __init__(self, mongodb_url: str, environment: str = 'production'):
+    def __init__(self, mongodb_url: str, environment: str = 'production',
+                 catchup_batch_size: int = CATCHUP_BATCH_SIZE):
         self.mongodb_url = mongodb_url
         self.environment = environment
+        self.catchup_batch_size = catchup_batch_size
         self.mongodb_client = None
         self.mongodb_collection = None
         self.signal_store_collection = None
         self.resume_token = None
         self.last_signal_timestamp = None
         self.signal_callback = None
+        self.signal_batch_callback = None
 
         # Connect to MongoDB
         self.connect()
@@ -64,8 +71,92 @@ class MongoDBWatcher:
         """Set the callback function to process new signals"""
         self.signal_callback = callback
 
+    def set_signal_batch_callback(self, callback: Callable):
+        """
+        Set the callback used for catch-up batches
+
+        The callback receives a list of (signal_data, received_time, mongodb_object_id)
+        tuples in received_at order and must process them in that order. Without it,
+        catch-up calls the per-signal callback for each signal.
+        """
+        self.signal_batch_callback = callback
+
+    # ------------------------------------------------------------------
+    # Signal documents
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _is_valid_signal(raw_signal_doc: Dict) -> bool:
+        """Raw signal has a non-empty signal array (new format)"""
+        signal_array = raw_signal_doc.get('signal', [])
+        return bool(signal_array) and isinstance(signal_array, list)
+
+    @staticmethod
+    def _build_signal_store_doc(raw_signal_doc: Dict) -> Dict:
+        """signal_store document for a raw signal (lifecycle fields are populated later)"""
+        first_leg = raw_signal_doc['signal'][0]
+        now = datetime.datetime.utcnow()
+        return {
+            "raw_signal_id": raw_signal_doc['_id'],
+            "signal_id": raw_signal_doc['signalID'],
+            "strategy_id": raw_signal_doc['strategy_name'],
+            "instrument": first_leg.get('instrument') or first_leg.get('ticker'),
+            "direction": first_leg.get('direction', 'UNKNOWN'),
+            "action": first_leg.get('action', 'UNKNOWN'),
+            "signal_data": raw_signal_doc,  # Full raw signal
+
+            # Lifecycle fields (populated later by cerebro/execution)
+            "cerebro_decision": None,
+            "execution": None,
+            "position_status": None,
+            "exit_signals": [],
+            "pnl_realized": None,
+
+            # Timestamps
+            "created_at": now,
+            "updated_at": now,
+            "environment": raw_signal_doc.get('environment', 'production')
+        }
+
+    @staticmethod
+    def _received_time(raw_signal_doc: Dict) -> datetime.datetime:
+        """received_at as a timezone-aware datetime (assume UTC if naive)"""
+        received_time = raw_signal_doc['received_at']
+        if isinstance(received_time, str):
+            received_time = parser.parse(received_time)
+        if received_time.tzinfo is None:
+            received_time = received_time.replace(tzinfo=datetime.timezone.utc)
+        return received_time
+
+    @staticmethod
+    def _callback_signal_data(raw_signal_doc: Dict, mathematricks_signal_id) -> Dict:
+        """Convert a raw signal document to the signal format passed to the callbacks"""
+        return {
+            'timestamp': raw_signal_doc.get('timestamp'),
+            'signalID': raw_signal_doc.get('signalID'),
+            'signal_sent_EPOCH': raw_signal_doc.get('signal_sent_EPOCH'),
+            'strategy_name': raw_signal_doc.get('strategy_name', 'Unknown Strategy'),
+            'signal': raw_signal_doc.get('signal', {}),
+            'signal_type': raw_signal_doc.get('signal_type'),
+            'entry_signal_id': raw_signal_doc.get('entry_signal_id'),  # For EXIT signals
+            'environment': raw_signal_doc.get('environment', 'production'),
+            'mathematricks_signal_id': str(mathematricks_signal_id)  # Pass to signal_ingestion
+        }
+
+    # ------------------------------------------------------------------
+    # Catch-up mode
+    # ------------------------------------------------------------------
+
     def fetch_missed_signals(self):
-        """Fetch missed signals directly from MongoDB (catch-up mode)"""
+        """
+        Fetch missed signals directly from MongoDB (catch-up mode)
+
+        Streams unprocessed signals in received_at order, catchup_batch_size at a time
+        (the cursor is never materialized). Per batch: one insert_many into signal_store,
+        one batch callback (which publishes the whole batch before returning) and one
+        update_many linking the raw signals and marking them processed. Batches run
+        strictly in order, so every strategy's signals are published in received order.
+        """
         if self.mongodb_collection is None:
             logger.error("❌ MongoDB not available - cannot fetch missed signals")
             return
@@ -86,92 +177,27 @@ class MongoDBWatcher:
                 except Exception as e:
                     logger.warning(f"⚠️ Invalid timestamp format: {self.last_signal_timestamp}")
 
-            # Query trading_signals_raw for unprocessed signals
-            missed_signals_cursor = self.mongodb_collection.find(query_filter).sort('received_at', 1)
-            missed_signals = list(missed_signals_cursor)
-
-            if missed_signals:
-                logger.info(f"📥 Found {len(missed_signals)} missed signals in MongoDB")
-
-                for raw_signal_doc in missed_signals:
-                    # Get signal array
-                    signal_array = raw_signal_doc.get('signal', [])
-                    if not signal_array or not isinstance(signal_array, list) or len(signal_array) == 0:
-                        logger.warning(f"⚠️ Invalid signal array for {raw_signal_doc.get('signalID')}, skipping")
-                        continue
-
-                    first_leg = signal_array[0]
-
-                    # CREATE NEW DOCUMENT IN signal_store
-                    signal_store_doc = {
-                        "raw_signal_id": raw_signal_doc['_id'],
-                        "signal_id": raw_signal_doc['signalID'],
-                        "strategy_id": raw_signal_doc['strategy_name'],
-                        "instrument": first_leg.get('instrument') or first_leg.get('ticker'),
-                        "direction": first_leg.get('direction', 'UNKNOWN'),
-                        "action": first_leg.get('action', 'UNKNOWN'),
-                        "signal_data": raw_signal_doc,
-
-                        # Lifecycle fields (populated later)
-                        "cerebro_decision": None,
-                        "execution": None,
-                        "position_status": None,
-                        "exit_signals": [],
-                        "pnl_realized": None,
-
-                        # Timestamps
-                        "created_at": datetime.datetime.utcnow(),
-                        "updated_at": datetime.datetime.utcnow(),
-                        "environment": raw_signal_doc.get('environment', 'production')
-                    }
-
-                    # Insert into signal_store
-                    result = self.signal_store_collection.insert_one(signal_store_doc)
-                    mathematricks_signal_id = result.inserted_id
-
-                    logger.info(f"📝 Created signal_store document: {mathematricks_signal_id} for signal {raw_signal_doc['signalID']}")
-
-                    # UPDATE trading_signals_raw with link
-                    self.mongodb_collection.update_one(
-                        {"_id": raw_signal_doc['_id']},
-                        {"$set": {"mathematricks_signal_id": mathematricks_signal_id}}
-                    )
-
-                    # Convert MongoDB document to signal format
-                    received_time = raw_signal_doc['received_at']
-                    if isinstance(received_time, str):
-                        received_time = parser.parse(received_time)
-
-                    # Ensure received_time is timezone-aware (assume UTC if naive)
-                    if received_time.tzinfo is None:
-                        import datetime as dt
-                        received_time = received_time.replace(tzinfo=dt.timezone.utc)
-
-                    signal_data = {
-                        'timestamp': raw_signal_doc.get('timestamp'),
-                        'signalID': raw_signal_doc.get('signalID'),
-                        'signal_sent_EPOCH': raw_signal_doc.get('signal_sent_EPOCH'),
-                        'strategy_name': raw_signal_doc.get('strategy_name', 'Unknown Strategy'),
-                        'signal': raw_signal_doc.get('signal', {}),
-                        'signal_type': raw_signal_doc.get('signal_type'),
-                        'entry_signal_id': raw_signal_doc.get('entry_signal_id'),  # For EXIT signals
-                        'environment': raw_signal_doc.get('environment', 'production'),
-                        'mathematricks_signal_id': str(mathematricks_signal_id)
-                    }
-
-                    # Process via callback
-                    if self.signal_callback:
-                        self.signal_callback(
-                            signal_data,
-                            received_time,
-                            is_catchup=True,
-                            mongodb_object_id=raw_signal_doc['_id']
-                        )
-
-                    # Mark signal as processed (updates trading_signals_raw)
-                    self.mark_signal_processed(raw_signal_doc['_id'])
+            # Stream trading_signals_raw for unprocessed signals
+            missed_signals_cursor = (
+                self.mongodb_collection.find(query_filter)
+                .sort('received_at', 1)
+                .batch_size(self.catchup_batch_size)
+            )
 
-                logger.info(f"✅ Successfully caught up with {len(missed_signals)} signals from MongoDB")
+            started = time.perf_counter()
+            total = 0
+            batch = []
+            for raw_signal_doc in missed_signals_cursor:
+                batch.append(raw_signal_doc)
+                if len(batch) >= self.catchup_batch_size:
+                    total += self._process_catchup_batch(batch)
+                    batch = []
+            if batch:
+                total += self._process_catchup_batch(batch)
+
+            if total:
+                elapsed = time.perf_counter() - started
+                logger.info(f"✅ Successfully caught up with {total} signals from MongoDB in {elapsed:.2f}s")
             else:
                 logger.info("✅ No missed signals found in MongoDB")
 
@@ -179,6 +205,67 @@ class MongoDBWatcher:
             logger.error(f"❌ Error fetching from MongoDB: {e}")
             logger.error("💡 Check MongoDB connection or restart collector")
 
+    def _process_catchup_batch(self, raw_signal_docs: List[Dict]) -> int:
+        """
+        Store, publish and mark one batch of missed signals
+
+        Catch-up signal_store documents reuse the raw signal's _id, which makes a replay
+        idempotent: if a previous pass stopped after inserting but before marking the batch,
+        the re-insert hits duplicate keys (ignored) and the signals are published again
+        (at-least-once) instead of being lost.
+
+        Returns:
+            Number of signals processed
+        """
+        valid_docs = []
+        for raw_signal_doc in raw_signal_docs:
+            if self._is_valid_signal(raw_signal_doc):
+                valid_docs.append(raw_signal_doc)
+            else:
+                logger.warning(f"⚠️ Invalid signal array for {raw_signal_doc.get('signalID')}, skipping")
+        if not valid_docs:
+            return 0
+
+        # CREATE signal_store DOCUMENTS (one round-trip)
+        signal_store_docs = [
+            {'_id': raw_signal_doc['_id'], **self._build_signal_store_doc(raw_signal_doc)}
+            for raw_signal_doc in valid_docs
+        ]
+        try:
+            self.signal_store_collection.insert_many(signal_store_docs, ordered=False)
+        except BulkWriteError as e:
+            write_errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != 11000 for error in write_errors):
+                raise
+            logger.info(f"♻️ {len(write_errors)} signal_store documents already existed (replayed batch)")
+        logger.info(f"📝 Created {len(signal_store_docs)} signal_store documents "
+                    f"({valid_docs[0]['signalID']} … {valid_docs[-1]['signalID']})")
+
+        # Process via callback (in received_at order)
+        items = [
+            (self._callback_signal_data(raw_signal_doc, raw_signal_doc['_id']),
+             self._received_time(raw_signal_doc),
+             raw_signal_doc['_id'])
+            for raw_signal_doc in valid_docs
+        ]
+        if self.signal_batch_callback:
+            self.signal_batch_callback(items)
+        elif self.signal_callback:
+            for signal_data, received_time, mongodb_object_id in items:
+                self.signal_callback(
+                    signal_data,
+                    received_time,
+                    is_catchup=True,
+                    mongodb_object_id=mongodb_object_id
+                )
+
+        # UPDATE trading_signals_raw: link to signal_store (same _id) and mark processed
+        self.mongodb_collection.update_many(
+            {'_id': {'$in': [raw_signal_doc['_id'] for raw_signal_doc in valid_docs]}},
+            [{'$set': {'mathematricks_signal_id': '$_id', 'signal_processed': True}}]
+        )
+        return len(valid_docs)
+
     def mark_signal_processed(self, signal_id):
         """Mark a signal as processed in MongoDB (async, low priority)"""
         if self.mongodb_collection is None:
@@ -194,6 +281,10 @@ class MongoDBWatcher:
             # Silently fail - this is low priority
             pass
 
+    # ------------------------------------------------------------------
+    # Real-time mode
+    # ------------------------------------------------------------------
+
     def watch_for_new_signals(self) -> str:
         """
         Watch for new signals using MongoDB Change Streams
@@ -245,36 +336,13 @@ class MongoDBWatcher:
                             logger.debug("⏭️ Skipping document without signalID")
                             continue
 
-                        # Get signal array (new format)
-                        signal_array = raw_signal_doc.get('signal', [])
-                        if not signal_array or not isinstance(signal_array, list) or len(signal_array) == 0:
+                        # Must have a signal array (new format)
+                        if not self._is_valid_signal(raw_signal_doc):
                             logger.warning(f"⚠️ Invalid signal array for {raw_signal_doc.get('signalID')}")
                             continue
 
-                        first_leg = signal_array[0]
-
                         # CREATE NEW DOCUMENT IN signal_store
-                        signal_store_doc = {
-                            "raw_signal_id": raw_signal_doc['_id'],
-                            "signal_id": raw_signal_doc['signalID'],
-                            "strategy_id": raw_signal_doc['strategy_name'],
-                            "instrument": first_leg.get('instrument') or first_leg.get('ticker'),
-                            "direction": first_leg.get('direction', 'UNKNOWN'),
-                            "action": first_leg.get('action', 'UNKNOWN'),
-                            "signal_data": raw_signal_doc,  # Full raw signal
-
-                            # Lifecycle fields (populated later by cerebro/execution)
-                            "cerebro_decision": None,
-                            "execution": None,
-                            "position_status": None,
-                            "exit_signals": [],
-                            "pnl_realized": None,
-
-                            # Timestamps
-                            "created_at": datetime.datetime.utcnow(),
-                            "updated_at": datetime.datetime.utcnow(),
-                            "environment": raw_signal_doc.get('environment', 'production')
-                        }
+                        signal_store_doc = self._build_signal_store_doc(raw_signal_doc)
 
                         # Insert into signal_store
                         result = self.signal_store_collection.insert_one(signal_store_doc)
@@ -289,26 +357,8 @@ class MongoDBWatcher:
                         )
 
                         # Convert to signal format for callback
-                        received_time = raw_signal_doc['received_at']
-                        if isinstance(received_time, str):
-                            received_time = parser.parse(received_time)
-
-                        # Ensure received_time is timezone-aware (assume UTC if naive)
-                        if received_time.tzinfo is None:
-                            import datetime as dt
-                            received_time = received_time.replace(tzinfo=dt.timezone.utc)
-
-                        signal_data = {
-                            'timestamp': raw_signal_doc.get('timestamp'),
-                            'signalID': raw_signal_doc.get('signalID'),
-                            'signal_sent_EPOCH': raw_signal_doc.get('signal_sent_EPOCH'),
-                            'strategy_name': raw_signal_doc.get('strategy_name', 'Unknown Strategy'),
-                            'signal': raw_signal_doc.get('signal', {}),
-                            'signal_type': raw_signal_doc.get('signal_type'),
-                            'entry_signal_id': raw_signal_doc.get('entry_signal_id'),  # For EXIT signals
-                            'environment': raw_signal_doc.get('environment', 'production'),
-                            'mathematricks_signal_id': str(mathematricks_signal_id)  # Pass to signal_ingestion
-                        }
+                        received_time = self._received_time(raw_signal_doc)
+                        signal_data = self._callback_signal_data(raw_signal_doc, mathematricks_signal_id)
 
                         # Process via callback
                         if self.signal_callback:
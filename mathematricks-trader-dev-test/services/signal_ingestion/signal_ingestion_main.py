@@ -9,6 +9,9 @@ import sys
 import logging
 import threading
 import datetime
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
 from dateutil import parser
 from dotenv import load_dotenv
 from pymongo import MongoClient
@@ -25,12 +28,10 @@ sys.path.insert(0, PROJECT_ROOT)
 from services.signal_ingestion.mongodb_watcher import MongoDBWatcher
 from services.signal_ingestion.signal_standardizer import SignalStandardizer
 
-# Try to import Pub/Sub for MVP microservices bridge
-try:
-    from google.cloud import pubsub_v1
-    PUBSUB_AVAILABLE = True
-except ImportError:
-    PUBSUB_AVAILABLE = False
+# Pub/Sub transport for MVP microservices bridge (services/messaging, imported like the
+# other services do so every service in a process shares one transport)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'services'))
+from messaging import get_transport
 
 # Setup logging
 LOG_FILE = os.path.join(PROJECT_ROOT, 'logs', 'signal_ingestion.log')
@@ -93,6 +94,7 @@ class SignalIngestionService:
         # Initialize MongoDB watcher
         self.watcher = MongoDBWatcher(mongodb_url, environment)
         self.watcher.set_signal_callback(self.process_signal)
+        self.watcher.set_signal_batch_callback(self.process_signal_batch)
 
         # Connect to signal_store collection
         try:
@@ -112,15 +114,15 @@ class SignalIngestionService:
         # Initialize Pub/Sub publisher
         self.pubsub_publisher = None
         self.pubsub_topic_path = None
-        if PUBSUB_AVAILABLE:
-            try:
-                project_id = os.getenv('GCP_PROJECT_ID', 'mathematricks-trader')
-                self.pubsub_publisher = pubsub_v1.PublisherClient()
-                self.pubsub_topic_path = self.pubsub_publisher.topic_path(project_id, 'standardized-signals')
-                logger.info("✅ Pub/Sub bridge enabled - signals will route to microservices")
-            except Exception as e:
-                logger.warning(f"⚠️ Pub/Sub initialization failed: {e}")
-                self.pubsub_publisher = None
+        try:
+            project_id = os.getenv('GCP_PROJECT_ID', 'mathematricks-trader')
+            self.pubsub_publisher = get_transport()
+            self.pubsub_topic_path = self.pubsub_publisher.topic_path(project_id, 'standardized-signals')
+            logger.info(f"✅ Pub/Sub bridge enabled ({self.pubsub_publisher.name}) - signals will route to microservices")
+        except Exception as e:
+            # Includes ImportError when google-cloud-pubsub is not installed
+            logger.warning(f"⚠️ Pub/Sub initialization failed: {e}")
+            self.pubsub_publisher = None
 
         logger.info("=" * 80)
         logger.info(f"SignalIngestionService Starting ({environment.upper()})")
@@ -197,6 +199,71 @@ class SignalIngestionService:
 
     def process_signal(self, signal_data: dict, received_time: datetime.datetime, is_catchup: bool = False, mongodb_object_id = None):
         """Process and route received signal"""
+        mathematricks_signal_id = self.record_signal(signal_data, received_time, is_catchup, mongodb_object_id)
+
+        # Publish to microservices via Pub/Sub
+        if self.pubsub_publisher:
+            try:
+                self.publish_to_pubsub(signal_data, mathematricks_signal_id)
+            except Exception as e:
+                logger.error(f"⚠️ Error publishing to microservices: {e}")
+
+    def process_signal_batch(self, signals: List[Tuple[dict, datetime.datetime, Any]]):
+        """
+        Process and route a catch-up batch of signals
+
+        Signals are grouped by strategy and published in rounds: each round publishes the
+        next signal of every strategy back to back and awaits them together, so the
+        Pub/Sub client batches across strategies while a strategy's signals still reach
+        Cerebro in received order (its next signal is only published once the previous
+        one is accepted). Returns once the whole batch is published.
+
+        Args:
+            signals: (signal_data, received_time, mongodb_object_id) tuples in received order
+        """
+        by_strategy: Dict[str, deque] = {}
+        for signal_data, received_time, mongodb_object_id in signals:
+            mathematricks_signal_id = self.record_signal(signal_data, received_time, True, mongodb_object_id)
+            if self.pubsub_publisher:
+                strategy = signal_data.get('strategy_name', 'Unknown')
+                by_strategy.setdefault(strategy, deque()).append((signal_data, mathematricks_signal_id))
+
+        published = 0
+        while by_strategy:
+            pending = []
+            for strategy in list(by_strategy):
+                queue = by_strategy[strategy]
+                signal_data, mathematricks_signal_id = queue.popleft()
+                if not queue:
+                    del by_strategy[strategy]
+                try:
+                    started = self.start_publish(signal_data, mathematricks_signal_id)
+                    if started:
+                        pending.append(started)
+                except Exception as e:
+                    logger.error(f"⚠️ Error publishing to microservices: {e}")
+
+            for standardized_signal, future in pending:
+                try:
+                    message_id = future.result(timeout=5.0)
+                    published += 1
+                    logger.info(f"✅ Signal published to Cerebro: {message_id} "
+                                f"({standardized_signal['signal_id']}, {standardized_signal['instrument']} "
+                                f"{standardized_signal['action']})")
+                except Exception as e:
+                    logger.error(f"⚠️ Error publishing {standardized_signal['signal_id']} to microservices: {e}")
+
+        if published:
+            logger.info(f"🚀 Routed {published} caught-up signals to MVP microservices (Cerebro → Execution)")
+            logger.info("-" * 50)
+
+    def record_signal(self, signal_data: dict, received_time: datetime.datetime, is_catchup: bool = False, mongodb_object_id = None) -> str:
+        """
+        Record, log and notify a received signal (everything except publishing)
+
+        Returns:
+            mathematricks_signal_id (signal_store document ID) or None
+        """
         signal_id = mongodb_object_id if is_catchup else len(self.collected_signals) + 1
 
         # Extract signal information
@@ -288,17 +355,17 @@ class SignalIngestionService:
         except Exception as e:
             logger.warning(f"⚠️ Error sending Telegram notification: {e}")
 
-        # Publish to microservices via Pub/Sub
-        if self.pubsub_publisher:
-            try:
-                self.publish_to_pubsub(signal_data, mathematricks_signal_id)
-            except Exception as e:
-                logger.error(f"⚠️ Error publishing to microservices: {e}")
+        return mathematricks_signal_id
 
-    def publish_to_pubsub(self, signal_data: dict, mathematricks_signal_id: str = None):
-        """Publish signal to MVP microservices via Pub/Sub"""
+    def start_publish(self, signal_data: dict, mathematricks_signal_id: str = None) -> Optional[Tuple[dict, Future]]:
+        """
+        Standardize a signal and publish it without waiting
+
+        Returns:
+            (standardized_signal, publish future), or None if Pub/Sub is not configured
+        """
         if not self.pubsub_publisher or not self.pubsub_topic_path:
-            return
+            return None
 
         # Standardize signal format
         standardized_signal = SignalStandardizer.standardize(signal_data)
@@ -309,7 +376,15 @@ class SignalIngestionService:
 
         # Publish to Pub/Sub
         message_data = SignalStandardizer.to_json(standardized_signal)
-        future = self.pubsub_publisher.publish(self.pubsub_topic_path, message_data)
+        return standardized_signal, self.pubsub_publisher.publish(self.pubsub_topic_path, message_data)
+
+    def publish_to_pubsub(self, signal_data: dict, mathematricks_signal_id: str = None):
+        """Publish signal to MVP microservices via Pub/Sub"""
+        started = self.start_publish(signal_data, mathematricks_signal_id)
+        if started is None:
+            return
+
+        standardized_signal, future = started
         message_id = future.result(timeout=5.0)
 
         logger.info("\n🚀 Routing to MVP microservices (Cerebro → Execution)")
@@ -0,0 +1,35 @@
+"""
+Shared Strategy CSV loading for Mathematricks research tools
+
+dev/portfolio_combiner and tools/load_strategies_from_folder.py read developer backtest
+CSVs through this package: typed single-pass parsing onto canonical columns, parallel
+loading of whole folders with a Parquet cache, and margin step analysis.
+
+Usage:
+    from strategy_csv import load_strategy_csvs, detect_position_count_from_margin_steps
+
+    frames, failures = load_strategy_csvs(glob.glob('strategies/*.csv'))
+    frame = frames['SPX_Condors']  # columns: date, return (fraction), pnl, notional_value, margin_used
+    sizing = detect_position_count_from_margin_steps(frame['margin_used'])
+"""
+from .loader import (
+    STRATEGY_COLUMNS,
+    PARQUET_AVAILABLE,
+    StrategyCSVError,
+    strategy_name_from_path,
+    match_columns,
+    read_strategy_csv,
+    load_strategy_csvs,
+)
+from .margin_steps import detect_position_count_from_margin_steps
+
+__all__ = [
+    'STRATEGY_COLUMNS',
+    'PARQUET_AVAILABLE',
+    'StrategyCSVError',
+    'strategy_name_from_path',
+    'match_columns',
+    'read_strategy_csv',
+    'load_strategy_csvs',
+    'detect_position_count_from_margin_steps',
+]
@@ -0,0 +1,286 @@
+"""
+Strategy CSV Loader
+Typed, parallel reading of strategy backtest CSVs with a Parquet cache.
+
+Developers deliver one CSV per strategy with columns like:
+
+    Date,Daily P&L ($),Daily Returns (%),Daily Return on Notional (%),Maximum Daily Notional Value,Maximum Daily Margin Utilization ($)
+    2021-04-26,8930.13,0.8930%,1.8479%,483261,51409
+
+read_strategy_csv() maps the header onto canonical columns (STRATEGY_COLUMNS) and types
+every column explicitly: '%' and '$' are stripped from the raw bytes and the rows go
+through NumPy's C reader as float64/datetime64 in one pass, so no value is handled by
+per-cell Python string code. Files it can't type directly (thousand separators, blanks,
+non-ISO dates) fall back to pandas with coercion. Returns come back as fractions
+(0.8930% -> 0.008930).
+
+load_strategy_csvs() reads many files on a thread pool and keeps each parsed frame as
+Parquet (keyed by the file's size and mtime), so unchanged files are not parsed again.
+The cache is skipped when no Parquet engine (pyarrow/fastparquet) is installed.
+"""
+import csv
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401 - pandas' default Parquet engine
+    PARQUET_AVAILABLE = True
+except ImportError:
+    try:
+        import fastparquet  # noqa: F401
+        PARQUET_AVAILABLE = True
+    except ImportError:
+        PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Canonical column -> dtype of the parsed frame
+STRATEGY_COLUMNS: Dict[str, str] = {
+    'date': 'datetime64[ns]',
+    'return': 'float64',
+    'pnl': 'float64',
+    'notional_value': 'float64',
+    'margin_used': 'float64',
+    'account_equity': 'float64',
+}
+
+# Bump when parsing changes, so cached frames from older versions are not reused
+CACHE_VERSION = 1
+CACHE_DIR = os.getenv('STRATEGY_CSV_CACHE_DIR', os.path.expanduser('~/.cache/mathematricks/strategy_csv'))
+MAX_WORKERS = int(os.getenv('STRATEGY_CSV_WORKERS', str(min(8, os.cpu_count() or 1))))
+
+# Rows inspected to decide which columns are written as percentages
+SNIFF_ROWS = 50
+
+
+class StrategyCSVError(ValueError):
+    """Raised when a strategy CSV lacks required columns or can't be parsed"""
+
+
+def strategy_name_from_path(path: str) -> str:
+    """Strategy name of a CSV file (e.g. '.../SPX_Condors.csv' -> 'SPX_Condors')"""
+    return os.path.basename(path).replace('.csv', '')
+
+
+def match_columns(header: Iterable[str]) -> Dict[str, str]:
+    """
+    Map CSV header names onto canonical columns (first match wins).
+
+    'Daily Return on Notional (%)' is neither the return nor the notional column.
+
+    Returns:
+        {canonical column: CSV column} for the columns present
+    """
+    matchers = {
+        'date': lambda name: 'date' in name,
+        'return': lambda name: 'return' in name and 'notional' not in name,
+        'pnl': lambda name: 'p&l' in name or 'pnl' in name,
+        'notional_value': lambda name: 'notional' in name and 'return' not in name,
+        'margin_used': lambda name: 'margin' in name,
+        'account_equity': lambda name: 'account' in name and 'equity' in name,
+    }
+    columns = {}
+    for canonical, matches in matchers.items():
+        for name in header:
+            if matches(str(name).lower()):
+                columns[canonical] = name
+                break
+    return columns
+
+
+def _returns_to_fraction(values: np.ndarray, is_percent: bool) -> np.ndarray:
+    """
+    Returns as fractions: '%' columns are divided by 100, unsuffixed columns only when
+    they look like percentages (a value above 1, i.e. above 100% as a fraction)
+    """
+    if is_percent or (len(values) and np.nanmax(np.abs(values), initial=0.0) > 1):
+        return values / 100
+    return values
+
+
+def _parse_fast(body: bytes, positions: Dict[str, int]) -> Dict[str, np.ndarray]:
+    """
+    Parse the data rows with NumPy's C reader (unit symbols already stripped).
+
+    Raises:
+        ValueError: On anything it can't type directly (thousand separators, blanks,
+            stray text, non-ISO dates) - the caller falls back to pandas
+    """
+    options = dict(delimiter=',', quotechar='"', comments=None)
+    value_names = [name for name in positions if name != 'date']
+    parsed = {}
+    if 'date' in positions:
+        parsed['date'] = np.loadtxt(io.BytesIO(body), usecols=positions['date'],
+                                    dtype='datetime64[ns]', ndmin=1, **options)
+    if value_names:
+        values = np.loadtxt(io.BytesIO(body), usecols=[positions[name] for name in value_names],
+                            dtype=np.float64, ndmin=2, **options)
+        for i, name in enumerate(value_names):
+            parsed[name] = np.ascontiguousarray(values[:, i])
+    return parsed
+
+
+def _parse_fallback(raw: bytes, columns: Dict[str, str]) -> Dict[str, np.ndarray]:
+    """Parse as strings with pandas and coerce (unparseable values become NaN)"""
+    frame = pd.read_csv(io.BytesIO(raw), usecols=list(set(columns.values())), dtype=str)
+    parsed = {}
+    for name, col in columns.items():
+        if name == 'date':
+            parsed[name] = pd.to_datetime(frame[col], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        else:
+            cleaned = frame[col].str.replace(r'[%$,\s]', '', regex=True)
+            parsed[name] = pd.to_numeric(cleaned, errors='coerce').to_numpy(dtype=np.float64)
+    return parsed
+
+
+def read_strategy_csv(path: str, required: Iterable[str] = ('date', 'return')) -> pd.DataFrame:
+    """
+    Parse one strategy CSV.
+
+    Args:
+        path: CSV file path
+        required: Canonical columns the file must have
+
+    Returns:
+        DataFrame with the canonical columns present in the file (in STRATEGY_COLUMNS
+        order, dtypes from STRATEGY_COLUMNS); returns as fractions. Unparseable values
+        become NaN (NaT for dates).
+
+    Raises:
+        StrategyCSVError: If a required column is missing
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    header_line, _, body = raw.partition(b'\n')
+    header = next(csv.reader([header_line.decode('utf-8-sig').rstrip('\r')]), [])
+    columns = match_columns(header)
+    missing = [name for name in required if name not in columns]
+    if missing:
+        raise StrategyCSVError(
+            f"{os.path.basename(path)} has no {', '.join(missing)} column "
+            f"(available: {', '.join(header)})"
+        )
+    positions = {name: header.index(col) for name, col in columns.items()}
+
+    # Columns written as percentages, judged from the first rows
+    head = body.split(b'\n', SNIFF_ROWS)[:SNIFF_ROWS]
+    sample = list(csv.reader(line.decode('utf-8', errors='replace') for line in head))
+    percent = {
+        name for name, position in positions.items()
+        if name != 'date' and any(position < len(row) and '%' in row[position] for row in sample)
+    }
+
+    if body.strip():
+        try:
+            parsed = _parse_fast(body.replace(b'%', b'').replace(b'$', b''), positions)
+        except ValueError:
+            parsed = _parse_fallback(raw, columns)
+    else:
+        parsed = {name: np.array([], dtype=STRATEGY_COLUMNS[name]) for name in columns}
+
+    if 'return' in parsed:
+        parsed['return'] = _returns_to_fraction(parsed['return'], 'return' in percent)
+    return pd.DataFrame({name: parsed[name] for name in STRATEGY_COLUMNS if name in parsed})
+
+
+# ==============================================================================
+# Parquet cache
+# ==============================================================================
+
+def _cache_path(path: str, cache_dir: str) -> Tuple[str, str]:
+    """(cache file for the current file contents, prefix shared by all its versions)"""
+    stat = os.stat(path)
+    prefix = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    key = hashlib.sha1(f"{CACHE_VERSION}|{stat.st_size}|{stat.st_mtime_ns}".encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{prefix}-{key}.parquet"), prefix
+
+
+def _read_cached(cache_file: str) -> Optional[pd.DataFrame]:
+    """Cached frame, or None if absent or unreadable"""
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        frame = pd.read_parquet(cache_file)
+    except Exception as e:
+        logger.warning(f"⚠️  Ignoring unreadable strategy CSV cache {cache_file}: {e}")
+        return None
+    return frame.astype({name: STRATEGY_COLUMNS[name] for name in frame.columns})
+
+
+def _write_cached(frame: pd.DataFrame, cache_file: str, prefix: str):
+    """Store a parsed frame and drop cached versions of older file contents"""
+    cache_dir = os.path.dirname(cache_file)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        frame.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+        for name in os.listdir(cache_dir):
+            stale = os.path.join(cache_dir, name)
+            if name.startswith(f"{prefix}-") and name.endswith('.parquet') and stale != cache_file:
+                os.remove(stale)
+    except Exception as e:
+        logger.warning(f"⚠️  Could not cache parsed strategy CSV at {cache_file}: {e}")
+
+
+def _load_one(path: str, required: Iterable[str], cache_dir: Optional[str]) -> pd.DataFrame:
+    """Parse one file, through the cache when enabled"""
+    if cache_dir is None:
+        return read_strategy_csv(path, required)
+
+    cache_file, prefix = _cache_path(path, cache_dir)
+    frame = _read_cached(cache_file)
+    if frame is None:
+        frame = read_strategy_csv(path, required)
+        _write_cached(frame, cache_file, prefix)
+        return frame
+
+    missing = [name for name in required if name not in frame.columns]
+    if missing:
+        raise StrategyCSVError(f"{os.path.basename(path)} has no {', '.join(missing)} column")
+    return frame
+
+
+def load_strategy_csvs(paths: List[str], required: Iterable[str] = ('date', 'return'),
+                       max_workers: int = MAX_WORKERS, use_cache: bool = True,
+                       cache_dir: Optional[str] = None) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
+    """
+    Parse strategy CSVs in parallel.
+
+    Args:
+        paths: CSV file paths
+        required: Canonical columns every file must have
+        max_workers: Parser threads
+        use_cache: Reuse/store parsed frames as Parquet (ignored without a Parquet engine)
+        cache_dir: Cache directory (default: STRATEGY_CSV_CACHE_DIR or
+            ~/.cache/mathematricks/strategy_csv)
+
+    Returns:
+        ({strategy name: frame}, {strategy name: exception}) - both in the order of paths
+    """
+    required = tuple(required)
+    if use_cache and PARQUET_AVAILABLE:
+        cache_dir = cache_dir or CACHE_DIR
+    else:
+        cache_dir = None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(paths) or 1)),
+                            thread_name_prefix='strategy-csv') as executor:
+        futures = [(path, executor.submit(_load_one, path, required, cache_dir)) for path in paths]
+
+        frames, failures = {}, {}
+        for path, future in futures:
+            name = strategy_name_from_path(path)
+            try:
+                frames[name] = future.result()
+            except Exception as e:
+                failures[name] = e
+    return frames, failures
@@ -0,0 +1,90 @@
+"""
+Margin Step Detection
+Estimate how many positions a strategy typically holds from its daily margin series.
+
+Margin usage moves in steps of roughly one position's margin, so the most common gap
+between sorted non-zero margin values approximates the margin per position.
+"""
+import numpy as np
+
+
+def detect_position_count_from_margin_steps(margin_data):
+    """
+    Detect estimated average position count by analyzing margin usage patterns.
+
+    The logic:
+    1. Get all non-zero margin values
+    2. Calculate differences between consecutive sorted values (step sizes)
+    3. Find the most common step size (this represents typical position margin)
+    4. Estimate avg positions = median(margin) / typical_position_margin
+
+    All steps are array operations on the whole series (no per-value Python loop).
+
+    Args:
+        margin_data: Array-like of margin_used values from backtest
+
+    Returns:
+        dict with:
+            - estimated_avg_positions: Estimated typical number of open positions
+            - estimated_position_margin: Estimated margin per position
+            - confidence: "high", "medium", or "low" based on data quality
+            - reason: How the estimate was reached
+    """
+    margin = np.asarray(margin_data, dtype=np.float64)
+
+    # Filter out zero margin days (no positions); NaN compares False and is dropped too
+    non_zero_margin = margin[margin > 0]
+
+    if len(non_zero_margin) < 10:
+        # Not enough data points
+        return {
+            "estimated_avg_positions": 3.0,  # Default assumption
+            "estimated_position_margin": np.median(non_zero_margin) / 3.0 if len(non_zero_margin) else 1000.0,
+            "confidence": "low",
+            "reason": "Insufficient data (less than 10 non-zero margin days)"
+        }
+
+    # Sorted step sizes
+    sorted_margin = np.sort(non_zero_margin)
+    diffs = np.diff(sorted_margin)
+
+    # Remove very small differences (noise) - keep diffs > 1% of median margin
+    median_margin = np.median(sorted_margin)
+    noise_threshold = median_margin * 0.01
+    significant_diffs = diffs[diffs > noise_threshold]
+
+    if len(significant_diffs) == 0:
+        # All diffs are tiny - likely single position strategy
+        return {
+            "estimated_avg_positions": 1.0,
+            "estimated_position_margin": median_margin,
+            "confidence": "medium",
+            "reason": "No significant margin steps detected - likely single position"
+        }
+
+    # Most common step size: center of the fullest histogram bin
+    hist, bin_edges = np.histogram(significant_diffs, bins=20)
+    most_common_bin_idx = np.argmax(hist)
+    estimated_position_margin = (bin_edges[most_common_bin_idx] + bin_edges[most_common_bin_idx + 1]) / 2
+
+    # Calculate estimated average positions, capped at reasonable bounds (1-20 positions)
+    estimated_avg_positions = median_margin / estimated_position_margin if estimated_position_margin > 0 else 1.0
+    estimated_avg_positions = max(1.0, min(20.0, estimated_avg_positions))
+
+    # Determine confidence based on data consistency (coefficient of variation of the steps)
+    mean_step = np.mean(significant_diffs)
+    cv = np.std(significant_diffs) / mean_step if mean_step > 0 else 1.0
+
+    if cv < 0.3:
+        confidence = "high"
+    elif cv < 0.6:
+        confidence = "medium"
+    else:
+        confidence = "low"
+
+    return {
+        "estimated_avg_positions": round(estimated_avg_positions, 1),
+        "estimated_position_margin": round(estimated_position_margin, 2),
+        "confidence": confidence,
+        "reason": f"Detected from {len(non_zero_margin)} margin data points, CV={cv:.2f}"
+    }
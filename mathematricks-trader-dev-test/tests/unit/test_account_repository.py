@@ -0,0 +1,125 @@
+"""
+Unit tests for TradingAccountRepository's diff-aware poll writes.
+
+The broker positions snapshot is stored as a map keyed by position (instrument|side|
+strategy_id) and read back as a list. After the first full write, a poll only $sets
+the entries that changed and $unsets the ones that disappeared.
+"""
+import mongomock
+import pytest
+
+from services.account_data_service.repository import TradingAccountRepository
+
+ACCOUNT = "IBKR_Main"
+
+
+class RecordingCollection:
+    """Pass-through collection that keeps the update documents sent to update_one"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.updates = []
+
+    def update_one(self, query, update, *args, **kwargs):
+        self.updates.append(update)
+        return self._collection.update_one(query, update, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+@pytest.fixture
+def collection():
+    return RecordingCollection(mongomock.MongoClient()['mathematricks_trading']['trading_accounts'])
+
+
+@pytest.fixture
+def repo(collection):
+    repository = TradingAccountRepository(collection)
+    repository.create_account({"_id": ACCOUNT, "broker": "IBKR", "status": "ACTIVE"})
+    return repository
+
+
+def position(symbol, quantity, side="LONG", **extra):
+    return {"symbol": symbol, "side": side, "quantity": quantity, **extra}
+
+
+def stored_snapshot(collection):
+    return collection.find_one({"_id": ACCOUNT})["broker_positions_snapshot"]
+
+
+def test_first_write_stores_full_map(repo, collection):
+    assert repo.update_broker_positions_snapshot(ACCOUNT, [position("AAPL", 10), position("MSFT", 5)])
+
+    update = collection.updates[-1]
+    assert set(update["$set"]["broker_positions_snapshot"]) == {"AAPL|LONG|", "MSFT|LONG|"}
+    assert "$unset" not in update
+    assert stored_snapshot(collection)["AAPL|LONG|"]["quantity"] == 10
+
+
+def test_unchanged_snapshot_is_not_written(repo, collection):
+    positions = [position("AAPL", 10), position("MSFT", 5)]
+    repo.update_broker_positions_snapshot(ACCOUNT, positions)
+    writes = len(collection.updates)
+
+    assert not repo.update_broker_positions_snapshot(ACCOUNT, list(reversed(positions)))
+    assert len(collection.updates) == writes
+    assert repo.write_stats()["snapshots_skipped"] == 1
+
+
+def test_changed_snapshot_sets_and_unsets_only_the_diff(repo, collection):
+    repo.update_broker_positions_snapshot(ACCOUNT, [position("AAPL", 10), position("MSFT", 5), position("TSLA", 1)])
+
+    assert repo.update_broker_positions_snapshot(ACCOUNT, [position("AAPL", 12), position("MSFT", 5), position("NVDA", 3)])
+
+    update = collection.updates[-1]
+    snapshot_sets = {k for k in update["$set"] if k.startswith("broker_positions_snapshot")}
+    assert snapshot_sets == {"broker_positions_snapshot.AAPL|LONG|", "broker_positions_snapshot.NVDA|LONG|"}
+    assert set(update["$unset"]) == {"broker_positions_snapshot.TSLA|LONG|"}
+
+    stored = stored_snapshot(collection)
+    assert set(stored) == {"AAPL|LONG|", "MSFT|LONG|", "NVDA|LONG|"}
+    assert stored["AAPL|LONG|"]["quantity"] == 12
+    assert repo.write_stats()["snapshot_entries_written"] == 3 + 3
+
+
+def test_dotted_symbols_and_repeated_keys_get_safe_fields(repo, collection):
+    repo.update_broker_positions_snapshot(ACCOUNT, [position("BRK.B", 1), position("AAPL", 1), position("AAPL", 2)])
+
+    assert set(stored_snapshot(collection)) == {"BRK．B|LONG|", "AAPL|LONG|", "AAPL|LONG|#2"}
+
+
+def test_forget_makes_next_write_full(repo, collection):
+    repo.update_broker_positions_snapshot(ACCOUNT, [position("AAPL", 10)])
+    repo.forget(ACCOUNT)
+
+    repo.update_broker_positions_snapshot(ACCOUNT, [position("MSFT", 5)])
+
+    assert "broker_positions_snapshot" in collection.updates[-1]["$set"]
+    assert set(stored_snapshot(collection)) == {"MSFT|LONG|"}
+
+
+def test_reads_present_snapshot_as_list(repo, collection):
+    positions = [position("AAPL", 10), position("BRK.B", 1, side="SHORT")]
+    repo.update_broker_positions_snapshot(ACCOUNT, positions)
+
+    account = repo.get_account(ACCOUNT)
+    assert sorted(account["broker_positions_snapshot"], key=lambda p: p["symbol"]) == positions
+    assert repo.list_accounts(broker="IBKR")[0]["broker_positions_snapshot"] == account["broker_positions_snapshot"]
+
+
+def test_present_leaves_legacy_list_snapshot_alone():
+    legacy = {"_id": ACCOUNT, "broker_positions_snapshot": [position("AAPL", 10)]}
+
+    assert TradingAccountRepository._present(legacy)["broker_positions_snapshot"] == [position("AAPL", 10)]
+    assert TradingAccountRepository._present(None) is None
+
+
+def test_balances_within_tolerance_are_skipped(collection):
+    repo = TradingAccountRepository(collection, balance_tolerance_pct=0.01)
+    repo.create_account({"_id": ACCOUNT, "broker": "IBKR", "status": "ACTIVE"})
+
+    assert repo.update_balances(ACCOUNT, {"equity": 100000.0})
+    assert not repo.update_balances(ACCOUNT, {"equity": 100500.0})
+    assert repo.update_balances(ACCOUNT, {"equity": 102000.0})
+    assert collection.find_one({"_id": ACCOUNT})["balances"]["equity"] == 102000.0
@@ -0,0 +1,86 @@
+"""
+Unit tests for MaxHybridConstructor's allocation memo.
+
+Verifies:
+1. A burst of signals with the same inputs runs the optimizer once (hit/miss counters)
+2. Changed strategy histories and explicit invalidation re-run it
+3. cerebro invalidates the memo when a strategy document changes and reports its counters
+"""
+import os
+import sys
+
+import mongomock
+import numpy as np
+import pandas as pd
+import pymongo
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/cerebro_service'))
+
+from portfolio_constructor.context import PortfolioContext
+from portfolio_constructor.max_hybrid.strategy import MaxHybridConstructor
+
+
+@pytest.fixture
+def constructor(monkeypatch):
+    """Dynamic-mode constructor whose optimizer records its calls"""
+    hybrid = MaxHybridConstructor(use_cached_allocations=False)
+    hybrid.solves = 0
+
+    def allocate_portfolio(context):
+        hybrid.solves += 1
+        return {"A": 50.0}
+    monkeypatch.setattr(hybrid, "allocate_portfolio", allocate_portfolio)
+    return hybrid
+
+
+def make_context(returns):
+    history = pd.DataFrame({"returns": returns, "margin_used": np.full(len(returns), 1000.0)})
+    return PortfolioContext(account_equity=100000.0, margin_used=0.0, margin_available=100000.0,
+                            cash_balance=100000.0, open_positions=[], open_orders=[],
+                            current_allocations={}, strategy_histories={"A": history})
+
+
+def test_same_inputs_run_the_optimizer_once(constructor):
+    context = make_context([0.01, -0.02, 0.03])
+
+    assert constructor.get_allocations(context) == {"A": 50.0}
+    assert constructor.get_allocations(make_context([0.01, -0.02, 0.03])) == {"A": 50.0}
+
+    assert constructor.solves == 1
+    assert constructor.allocation_memo_stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_changed_history_or_invalidation_runs_it_again(constructor):
+    constructor.get_allocations(make_context([0.01, -0.02, 0.03]))
+
+    constructor.get_allocations(make_context([0.01, -0.02, 0.04]))
+    assert constructor.solves == 2
+
+    constructor.invalidate_allocation_cache()
+    constructor.get_allocations(make_context([0.01, -0.02, 0.04]))
+    assert constructor.solves == 3
+
+
+@pytest.fixture(scope="module")
+def cerebro_main():
+    """cerebro_main imported against an in-memory MongoDB"""
+    patcher = pytest.MonkeyPatch()
+    patcher.setenv("MONGODB_URI", "mongodb://localhost:27017")
+    patcher.setattr(pymongo, "MongoClient", mongomock.MongoClient)
+    import cerebro_main
+    yield cerebro_main
+    patcher.undo()
+
+
+def test_strategy_change_invalidates_the_memo(cerebro_main, constructor, monkeypatch):
+    monkeypatch.setattr(cerebro_main, "PORTFOLIO_CONSTRUCTOR", constructor)
+    context = make_context([0.01, -0.02, 0.03])
+    constructor.get_allocations(context)
+
+    cerebro_main.strategy_history_cache._notify_change("A")
+    constructor.get_allocations(context)
+
+    assert constructor.solves == 2
+    assert cerebro_main.get_lookup_cache_stats()["allocation_memo"]["misses"] == 2
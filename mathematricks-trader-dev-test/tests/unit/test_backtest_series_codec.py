@@ -0,0 +1,135 @@
+"""
+Unit tests for the columnar backtest_series codec.
+
+Verifies:
+1. Legacy raw_data_backtest_full records survive encode/decode (dates in mixed ISO forms,
+   missing values and defaults)
+2. Stored documents are presented back as strict-JSON record lists
+3. Corrupt or unsupported documents are rejected
+"""
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services'))
+
+from backtest_series import (
+    SERIES_FIELD, LEGACY_FIELD, BacktestSeriesError,
+    encode_backtest_series, decode_backtest_series, records_to_columns, columns_to_records,
+    load_backtest_columns, pack_backtest_records, present_backtest_series, backtest_digest
+)
+
+RECORDS = [
+    {"date": "2024-01-02", "return": 0.01, "pnl": 1000.0, "margin_used": 5000.0, "account_equity": 101000.0},
+    {"date": "2024-01-03T00:00:00", "return": None, "pnl": None},
+    {"date": "2024-01-04 00:00:00", "return": -0.005, "pnl": -505.0, "notional_value": 20000.0},
+    {"date": datetime(2024, 1, 5), "return": "0.002"},
+]
+
+
+def test_mixed_iso_dates_are_parsed():
+    columns = records_to_columns(RECORDS)
+
+    assert columns["date"].dtype == np.dtype("datetime64[ns]")
+    assert [str(d)[:10] for d in columns["date"]] == ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"]
+
+
+def test_utc_offsets_are_converted_to_utc():
+    columns = records_to_columns([
+        {"date": "2024-01-02T00:00:00Z", "return": 0.0},
+        {"date": "2024-01-03T02:00:00+02:00", "return": 0.0},
+        {"date": "2024-01-04", "return": 0.0},
+    ])
+
+    assert list(columns["date"]) == list(np.array(["2024-01-02T00", "2024-01-03T00", "2024-01-04T00"],
+                                                  dtype="datetime64[ns]"))
+
+
+def test_missing_values_get_defaults_except_returns():
+    columns = records_to_columns(RECORDS)
+
+    assert np.isnan(columns["return"][1])
+    assert columns["return"][3] == 0.002
+    assert columns["pnl"][1] == 0.0
+    assert list(columns["account_equity"]) == [101000.0, 100000.0, 100000.0, 100000.0]
+    assert list(columns["notional_value"]) == [0.0, 0.0, 20000.0, 0.0]
+
+
+def test_encode_decode_round_trip():
+    columns = records_to_columns(RECORDS)
+
+    decoded = decode_backtest_series(encode_backtest_series(columns))
+
+    assert decoded.keys() == columns.keys()
+    for name, values in columns.items():
+        if name == "date":
+            assert np.array_equal(decoded[name], values)
+        else:
+            assert np.array_equal(decoded[name], values, equal_nan=True)
+
+
+def test_encode_accepts_date_strings():
+    series = encode_backtest_series({"date": ["2024-01-02", "2024-01-03T12:00:00"], "return": [0.1, 0.2]})
+
+    assert series["length"] == 2
+    assert str(decode_backtest_series(series)["date"][1]) == "2024-01-03T12:00:00.000000000"
+
+
+def test_presented_records_are_strict_json():
+    doc = {"strategy_id": "S1", SERIES_FIELD: encode_backtest_series(records_to_columns(RECORDS))}
+
+    present_backtest_series(doc)
+
+    assert SERIES_FIELD not in doc
+    records = doc[LEGACY_FIELD]
+    assert records[1]["return"] is None
+    assert records[0]["date"] == "2024-01-02"
+    json.dumps(records, allow_nan=False)
+
+
+def test_presented_records_pack_back_to_the_same_columns():
+    columns = records_to_columns(RECORDS)
+
+    fields = {LEGACY_FIELD: columns_to_records(columns)}
+    assert pack_backtest_records(fields)
+
+    repacked = decode_backtest_series(fields[SERIES_FIELD])
+    for name, values in columns.items():
+        if name != "date":
+            assert np.array_equal(repacked[name], values, equal_nan=True)
+
+
+def test_load_reads_either_layout():
+    columns = records_to_columns(RECORDS)
+    packed = {SERIES_FIELD: encode_backtest_series(columns)}
+    legacy = {LEGACY_FIELD: RECORDS}
+
+    assert np.array_equal(load_backtest_columns(packed)["return"], columns["return"], equal_nan=True)
+    assert np.array_equal(load_backtest_columns(legacy)["return"], columns["return"], equal_nan=True)
+    assert load_backtest_columns({}) is None
+    assert backtest_digest(packed) != backtest_digest({SERIES_FIELD: encode_backtest_series(
+        {**columns, "return": np.zeros(len(RECORDS))})})
+
+
+def test_invalid_input_is_rejected():
+    with pytest.raises(BacktestSeriesError):
+        encode_backtest_series({"date": ["2024-01-02"]})
+    with pytest.raises(BacktestSeriesError):
+        encode_backtest_series({"date": ["2024-01-02"], "return": [0.1], "sharpe": [1.0]})
+    with pytest.raises(BacktestSeriesError):
+        encode_backtest_series({"date": ["2024-01-02", "2024-01-03"], "return": [0.1]})
+    with pytest.raises(BacktestSeriesError):
+        load_backtest_columns({LEGACY_FIELD: [{"return": 0.1}]})
+
+
+def test_corrupt_or_unknown_series_is_rejected():
+    series = encode_backtest_series(records_to_columns(RECORDS))
+
+    with pytest.raises(BacktestSeriesError):
+        decode_backtest_series({**series, "schema_version": 99})
+    with pytest.raises(BacktestSeriesError):
+        decode_backtest_series({**series, "length": series["length"] + 1})
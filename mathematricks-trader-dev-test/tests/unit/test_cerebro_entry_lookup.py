@@ -0,0 +1,104 @@
+"""
+Unit tests for cerebro's ENTRY lookups behind EXIT signals.
+
+The entry fill index is fed by the signal_store change stream a moment after each write.
+An EXIT queued right behind its ENTRY must still find the APPROVE (or fill) cerebro has
+just written while the index hasn't caught up: an index miss falls through to
+signal_store.
+"""
+import os
+import sys
+
+import mongomock
+import pymongo
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/cerebro_service'))
+
+from entry_fill_index import EntryFillIndex
+from signal_executor import DeferSignal
+
+STRATEGY = "TestStrategy"
+
+
+@pytest.fixture(scope="module")
+def cerebro_main():
+    """cerebro_main imported against an in-memory MongoDB"""
+    patcher = pytest.MonkeyPatch()
+    patcher.setenv("MONGODB_URI", "mongodb://localhost:27017")
+    patcher.setattr(pymongo, "MongoClient", mongomock.MongoClient)
+    import cerebro_main
+    yield cerebro_main
+    patcher.undo()
+
+
+@pytest.fixture
+def signal_store(cerebro_main, monkeypatch):
+    collection = mongomock.MongoClient()['mathematricks_trading']['signal_store']
+    monkeypatch.setattr(cerebro_main, "signal_store_collection", collection)
+    return collection
+
+
+@pytest.fixture
+def index(cerebro_main, signal_store, monkeypatch):
+    """Live index that has not seen any change event yet"""
+    entry_index = EntryFillIndex(signal_store)
+    entry_index._live = True
+    monkeypatch.setattr(cerebro_main, "entry_fill_index", entry_index)
+    return entry_index
+
+
+def entry(signal_id, direction="LONG", filled=False):
+    doc = {
+        "_id": signal_id, "signal_id": signal_id, "strategy_id": STRATEGY, "instrument": "AAPL",
+        "direction": direction, "cerebro_decision": {"decision": "APPROVE"},
+        "position_status": None, "execution": None,
+    }
+    if filled:
+        doc.update(position_status="OPEN", execution={"status": "FILLED"})
+    return doc
+
+
+def test_pending_entry_not_indexed_yet_is_found_in_signal_store(cerebro_main, signal_store, index):
+    signal_store.insert_one(entry("ENTRY_1"))
+
+    found = cerebro_main.find_pending_entry_signal(STRATEGY, "AAPL", "LONG")
+
+    assert found["signal_id"] == "ENTRY_1"
+
+
+def test_indexed_pending_entry_is_served_from_the_index(cerebro_main, signal_store, index):
+    index.apply_document(entry("ENTRY_1"))
+
+    assert cerebro_main.find_pending_entry_signal(STRATEGY, "AAPL", "LONG")["signal_id"] == "ENTRY_1"
+
+
+def test_open_entry_not_indexed_yet_is_found_in_signal_store(cerebro_main, signal_store, index):
+    signal_store.insert_one(entry("ENTRY_1", filled=True))
+
+    found = cerebro_main.find_open_entry_signal(STRATEGY, "AAPL", "SHORT")
+
+    assert found["signal_id"] == "ENTRY_1"
+
+
+def test_no_entry_anywhere_is_not_found(cerebro_main, signal_store, index):
+    signal_store.insert_one(entry("ENTRY_1", direction="SHORT"))
+
+    assert cerebro_main.find_pending_entry_signal(STRATEGY, "AAPL", "LONG") is None
+    assert cerebro_main.find_open_entry_signal(STRATEGY, "AAPL", "SHORT") is None
+
+
+def test_exit_right_behind_its_entry_waits_instead_of_rejecting(cerebro_main, signal_store, index):
+    signal_store.insert_one(entry("ENTRY_1"))
+    retry_state = {}
+
+    with pytest.raises(DeferSignal):
+        cerebro_main.wait_for_entry_fill(STRATEGY, "AAPL", "SHORT", retry_state=retry_state)
+
+    assert retry_state["pending_entry_signal_id"] == "ENTRY_1"
+
+    # The fill reaches the index: the registered listener wakes the EXIT and it proceeds
+    index.apply_document(entry("ENTRY_1", filled=True))
+    found = cerebro_main.wait_for_entry_fill(STRATEGY, "AAPL", "SHORT", retry_state=retry_state)
+    assert found["signal_id"] == "ENTRY_1"
@@ -0,0 +1,110 @@
+"""
+Unit tests for keyset (cursor) pagination.
+
+Walks every page of a mongomock collection whose sort field has duplicates and missing
+values, and checks the pages add up to the full (sort_field, _id) ordering exactly once.
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services'))
+
+from pagination import KeysetPage, InvalidCursorError, encode_cursor, decode_cursor
+
+T0 = datetime(2025, 1, 6, 14, 30)
+
+
+@pytest.fixture
+def orders():
+    """Orders with repeated timestamps, missing timestamps and two environments"""
+    collection = mongomock.MongoClient()['mathematricks_trading']['trading_orders']
+    for i in range(23):
+        doc = {"_id": ObjectId(), "order_id": f"ORD_{i}", "environment": "staging" if i % 3 else "production"}
+        if i % 5 == 0:
+            pass  # legacy order without a timestamp
+        elif i % 5 == 1:
+            doc["timestamp"] = None
+        else:
+            doc["timestamp"] = T0 + timedelta(minutes=i // 4)  # four orders per minute
+        collection.insert_one(doc)
+    return collection
+
+
+def expected_order(collection, query, direction):
+    """Full ordering as MongoDB sorts it (missing/null timestamps before every date)"""
+    docs = list(collection.find(query))
+    dated = sorted((d for d in docs if d.get("timestamp") is not None), key=lambda d: (d["timestamp"], d["_id"]))
+    undated = sorted((d for d in docs if d.get("timestamp") is None), key=lambda d: d["_id"])
+    ordered = undated + dated
+    return [d["order_id"] for d in (reversed(ordered) if direction == DESCENDING else ordered)]
+
+
+def walk(collection, query, limit, direction):
+    """order_ids of every page, following next_cursor until the last page"""
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = KeysetPage(collection, query, "timestamp", limit, cursor=cursor,
+                          projection={"order_id": 1}, direction=direction)
+        seen.extend(doc["order_id"] for doc in page)
+        pages += 1
+        cursor = page.next_cursor
+        if cursor is None:
+            return seen, pages
+
+
+@pytest.mark.parametrize("direction", [DESCENDING, ASCENDING])
+@pytest.mark.parametrize("limit", [1, 3, 4, 7, 50])
+def test_pages_cover_every_document_once(orders, direction, limit):
+    seen, pages = walk(orders, {}, limit, direction)
+
+    assert seen == expected_order(orders, {}, direction)
+    assert pages == max(1, -(-len(seen) // limit))
+
+
+@pytest.mark.parametrize("direction", [DESCENDING, ASCENDING])
+def test_pages_respect_the_filter(orders, direction):
+    query = {"environment": "staging"}
+
+    seen, _ = walk(orders, query, 4, direction)
+
+    assert seen == expected_order(orders, query, direction)
+
+
+@pytest.mark.parametrize("sort_value", [None, T0, "2025-01-06", 42])
+def test_cursor_round_trip(sort_value):
+    doc_id = ObjectId()
+    query = {"environment": "staging", "status": {"$ne": "CANCELLED"}}
+
+    token = encode_cursor("timestamp", sort_value, doc_id, query)
+
+    assert decode_cursor(token, "timestamp", {"status": {"$ne": "CANCELLED"}, "environment": "staging"}) == \
+        (sort_value, doc_id)
+
+
+def test_cursor_for_another_filter_is_rejected(orders):
+    first = KeysetPage(orders, {"environment": "staging"}, "timestamp", 3)
+    list(first)
+
+    with pytest.raises(InvalidCursorError, match="different filter"):
+        KeysetPage(orders, {"environment": "production"}, "timestamp", 3, cursor=first.next_cursor)
+    with pytest.raises(InvalidCursorError, match="different filter"):
+        KeysetPage(orders, {}, "timestamp", 3, cursor=first.next_cursor)
+
+
+def test_cursor_for_another_sort_field_is_rejected():
+    token = encode_cursor("timestamp", T0, ObjectId())
+
+    with pytest.raises(InvalidCursorError, match="ordering"):
+        decode_cursor(token, "created_at")
+
+
+@pytest.mark.parametrize("token", ["not-a-cursor", "", "e30"])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, "timestamp")
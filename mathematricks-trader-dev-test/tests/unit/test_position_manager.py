@@ -0,0 +1,130 @@
+"""
+Unit tests for signal type inference against the positions collection.
+
+PositionManager.determine_signal_type() looks up the open position in the signal's
+direction and in the opposite direction (PositionStore.get_open_position filters on
+direction). Positions are written with the same PositionStore fills ExecutionService
+uses, on an in-memory mongomock database.
+"""
+import os
+import sys
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/cerebro_service'))
+
+from positions import position_direction_for_exit
+from position_manager import PositionManager
+
+ACCOUNT = "Mock_Paper"
+STRATEGY = "TestStrategy"
+
+
+@pytest.fixture
+def manager():
+    return PositionManager(mongomock.MongoClient(), default_account_id=ACCOUNT)
+
+
+@pytest.fixture
+def store(manager):
+    return manager.position_store
+
+
+def make_signal(direction, action, **extra):
+    signal = {
+        "strategy_id": STRATEGY,
+        "instrument": "AAPL",
+        "direction": direction,
+        "action": action,
+    }
+    signal.update(extra)
+    return signal
+
+
+def test_no_position_is_entry(manager):
+    result = manager.determine_signal_type(make_signal("LONG", "BUY"))
+
+    assert result["signal_type"] == "ENTRY"
+    assert result["method"] == "inferred"
+    assert result["current_position"] is None
+    assert result["opposite_position"] is None
+
+
+def test_closed_position_is_ignored(manager, store):
+    store.apply_entry_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 100.0, "ORD_1")
+    store.apply_exit_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 105.0, "ORD_2")
+
+    assert manager.determine_signal_type(make_signal("LONG", "BUY"))["signal_type"] == "ENTRY"
+
+
+def test_same_direction_buy_scales_in(manager, store):
+    store.apply_entry_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 100.0, "ORD_1")
+
+    result = manager.determine_signal_type(make_signal("LONG", "BUY"))
+
+    assert result["signal_type"] == "SCALE_IN"
+    assert result["current_position"]["quantity"] == 10
+    assert result["opposite_position"] is None
+
+
+def test_same_direction_sell_scales_out(manager, store):
+    store.apply_entry_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 100.0, "ORD_1")
+
+    result = manager.determine_signal_type(make_signal("LONG", "SELL"))
+
+    assert result["signal_type"] == "SCALE_OUT"
+    assert result["current_position"]["direction"] == "LONG"
+
+
+def test_opposite_direction_closes_the_open_position(manager, store):
+    """EXIT signals carry the opposite direction (EXIT SHORT closes the LONG entry)"""
+    store.apply_entry_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 100.0, "ORD_1")
+
+    result = manager.determine_signal_type(make_signal("SHORT", "SELL"))
+
+    assert result["signal_type"] == "EXIT"
+    assert result["current_position"] is None
+    assert result["opposite_position"]["direction"] == "LONG"
+    assert position_direction_for_exit("SHORT", "SELL") == "LONG"
+
+
+def test_reversal_after_exit_is_entry_in_new_direction(manager, store):
+    """Once the LONG is closed, a SHORT signal opens a new position instead of exiting"""
+    store.apply_entry_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 100.0, "ORD_1")
+    store.apply_exit_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 105.0, "ORD_2")
+
+    result = manager.determine_signal_type(make_signal("SHORT", "SELL"))
+    assert result["signal_type"] == "ENTRY"
+
+    store.apply_entry_fill(ACCOUNT, STRATEGY, "AAPL", "SHORT", 5, 104.0, "ORD_3")
+
+    result = manager.determine_signal_type(make_signal("SHORT", "SELL"))
+    assert result["signal_type"] == "SCALE_IN"
+    assert result["current_position"]["direction"] == "SHORT"
+    assert result["opposite_position"] is None
+
+
+def test_positions_of_other_accounts_and_strategies_are_ignored(manager, store):
+    store.apply_entry_fill("IBKR_Main", STRATEGY, "AAPL", "LONG", 10, 100.0, "ORD_1")
+    store.apply_entry_fill(ACCOUNT, "OtherStrategy", "AAPL", "LONG", 10, 100.0, "ORD_2")
+
+    assert manager.determine_signal_type(make_signal("LONG", "BUY"))["signal_type"] == "ENTRY"
+
+
+def test_explicit_signal_type_skips_position_lookup(manager, store):
+    store.apply_entry_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 100.0, "ORD_1")
+
+    result = manager.determine_signal_type(make_signal("LONG", "BUY", signal_type="exit"))
+
+    assert result["signal_type"] == "EXIT"
+    assert result["method"] == "explicit"
+
+
+def test_store_lookup_filters_on_direction(store):
+    store.apply_entry_fill(ACCOUNT, STRATEGY, "AAPL", "LONG", 10, 100.0, "ORD_1")
+
+    assert store.get_open_position(ACCOUNT, STRATEGY, "AAPL", "LONG")["quantity"] == 10
+    assert store.get_open_position(ACCOUNT, STRATEGY, "AAPL", "SHORT") is None
+    assert store.get_open_position(ACCOUNT, STRATEGY, "AAPL")["direction"] == "LONG"
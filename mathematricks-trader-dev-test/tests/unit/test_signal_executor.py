@@ -0,0 +1,183 @@
+"""
+Unit tests for cerebro's OrderedSignalExecutor.
+
+Verifies:
+1. Signals for the same key run one at a time, in submission order
+2. Signals for different keys run concurrently
+3. Deferred signals keep their key reserved and are re-run by the timer or wake()
+4. submit() applies back-pressure at max_pending
+5. shutdown() stops the timer thread and waits for running signals
+"""
+import threading
+import time
+
+import pytest
+
+from services.cerebro_service.signal_executor import OrderedSignalExecutor, DeferSignal
+
+
+@pytest.fixture
+def make_executor():
+    """Build executors that are shut down after the test"""
+    executors = []
+
+    def _make(handler, **kwargs):
+        executor = OrderedSignalExecutor(handler, **kwargs)
+        executors.append(executor)
+        return executor
+
+    yield _make
+    for executor in executors:
+        executor.shutdown(wait=True)
+
+
+def submit_and_wait(executor, items, timeout=5.0):
+    """Submit (key, payload) pairs and wait until all of them are done"""
+    done = threading.Semaphore(0)
+    for key, payload in items:
+        assert executor.submit(key, payload, on_done=done.release)
+    for _ in items:
+        assert done.acquire(timeout=timeout), "signal did not finish"
+
+
+def test_same_key_runs_in_submission_order(make_executor):
+    """Signals sharing a key never overlap and finish in the order they were submitted"""
+    lock = threading.Lock()
+    order = {"A": [], "B": []}
+    active = {"A": 0, "B": 0}
+    overlaps = []
+
+    def handler(task):
+        key = task.key
+        with lock:
+            active[key] += 1
+            if active[key] > 1:
+                overlaps.append(key)
+        time.sleep(0.002)
+        with lock:
+            order[key].append(task.payload["seq"])
+            active[key] -= 1
+
+    executor = make_executor(handler, max_workers=4)
+    items = [(key, {"seq": i}) for i in range(20) for key in ("A", "B")]
+    submit_and_wait(executor, items)
+
+    assert overlaps == []
+    assert order["A"] == list(range(20))
+    assert order["B"] == list(range(20))
+    assert executor.stats()["completed"] == 40
+
+
+def test_different_keys_run_in_parallel(make_executor):
+    """Each key's signal blocks until all keys are running - only possible concurrently"""
+    keys = ["K1", "K2", "K3"]
+    barrier = threading.Barrier(len(keys), timeout=5.0)
+
+    def handler(task):
+        barrier.wait()
+
+    executor = make_executor(handler, max_workers=len(keys))
+    submit_and_wait(executor, [(key, {}) for key in keys])
+
+    assert not barrier.broken
+    assert executor.stats()["failed"] == 0
+
+
+def test_failed_signal_does_not_block_its_key(make_executor):
+    """A handler error is counted and the next signal for the key still runs"""
+    seen = []
+
+    def handler(task):
+        seen.append(task.payload["seq"])
+        if task.payload["seq"] == 0:
+            raise RuntimeError("boom")
+
+    executor = make_executor(handler, max_workers=2)
+    submit_and_wait(executor, [("A", {"seq": 0}), ("A", {"seq": 1})])
+
+    assert seen == [0, 1]
+    assert executor.stats()["failed"] == 1
+    assert executor.stats()["completed"] == 2
+
+
+def test_deferred_signal_keeps_key_reserved(make_executor):
+    """A signal queued behind a deferred one waits for it, and state survives the deferral"""
+    order = []
+
+    def handler(task):
+        if task.payload["seq"] == 0 and task.attempts == 1:
+            task.state["deferred"] = True
+            raise DeferSignal(0.05, "waiting for fill")
+        order.append((task.payload["seq"], task.attempts, task.state.get("deferred", False)))
+
+    executor = make_executor(handler, max_workers=2)
+    submit_and_wait(executor, [("A", {"seq": 0}), ("A", {"seq": 1})])
+
+    assert order == [(0, 2, True), (1, 1, False)]
+    assert executor.stats()["deferrals"] == 1
+
+
+def test_wake_reruns_deferred_signal_before_its_delay(make_executor):
+    """wake() dispatches a deferred signal immediately instead of waiting for the timer"""
+    deferred = threading.Event()
+    done = threading.Event()
+
+    def handler(task):
+        if task.attempts == 1:
+            deferred.set()
+            raise DeferSignal(60.0)
+
+    executor = make_executor(handler, max_workers=1)
+    executor.submit("A", {}, on_done=done.set)
+    assert deferred.wait(5.0)
+
+    # The deferral is registered right after the handler raises
+    deadline = time.monotonic() + 5.0
+    while executor.stats()["deferred"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    assert executor.wake("A")
+    assert done.wait(5.0)
+    assert not executor.wake("A")  # nothing left to wake
+
+
+def test_submit_blocks_at_max_pending(make_executor):
+    """Beyond max_pending unfinished signals submit() times out instead of queueing"""
+    release = threading.Event()
+
+    def handler(task):
+        release.wait(5.0)
+
+    executor = make_executor(handler, max_workers=1, max_pending=2)
+    assert executor.submit("A", {})
+    assert executor.submit("B", {})
+    assert not executor.submit("C", {}, timeout=0.05)
+
+    release.set()
+    assert executor.submit("C", {}, timeout=5.0)
+
+
+def test_shutdown_waits_for_running_signals_and_stops_timer(make_executor):
+    """shutdown(wait=True) returns after running signals finish; deferred ones are dropped"""
+    started = threading.Event()
+    finished = []
+
+    def handler(task):
+        if task.key == "deferred":
+            raise DeferSignal(60.0)
+        started.set()
+        time.sleep(0.05)
+        finished.append(task.key)
+
+    executor = make_executor(handler, max_workers=2)
+    executor.submit("deferred", {})
+    executor.submit("running", {})
+    assert started.wait(5.0)
+
+    executor.shutdown(wait=True)
+
+    assert finished == ["running"]
+    executor._timer_thread.join(5.0)
+    assert not executor._timer_thread.is_alive()
+    with pytest.raises(RuntimeError):
+        executor.submit("late", {})
@@ -0,0 +1,188 @@
+"""
+Unit tests for the incrementally maintained dashboard strategy aggregates.
+
+Verifies that the counters StrategyAggregator maintains from signal_store changes:
+1. Follow new, edited and cleared decisions by their difference only
+2. Are not double counted by overlap re-reads
+3. Are completed exactly once after a pass dies between its writes
+4. Are applied by a single process at a time (apply lease)
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services/dashboard_creator'))
+
+from generators import strategy_aggregates
+from generators.strategy_aggregates import StrategyAggregator, LEASE_ID
+
+T0 = datetime(2025, 1, 6, 14, 30)
+
+
+class CrashingCollection:
+    """Pass-through collection whose `method` raises on its `nth` call (a process dying)"""
+
+    def __init__(self, collection, method, nth=1):
+        self._collection = collection
+        self._method = method
+        self._calls = 0
+        self._nth = nth
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name != self._method:
+            return attr
+
+        def call(*args, **kwargs):
+            self._calls += 1
+            if self._calls == self._nth:
+                raise RuntimeError("simulated crash")
+            return attr(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()['mathematricks_trading']
+
+
+def decision(strategy_id, approved=True, capital=1000.0, reason="NO ALLOCATION"):
+    if approved:
+        return {"strategy_id": strategy_id, "decision": "APPROVED", "allocated_capital": capital}
+    return {"strategy_id": strategy_id, "decision": "REJECTED", "reason": reason}
+
+
+def put_signal(db, signal_id, cerebro_decision, minutes):
+    db['signal_store'].update_one(
+        {"_id": signal_id},
+        {"$set": {"cerebro_decision": cerebro_decision, "updated_at": T0 + timedelta(minutes=minutes)}},
+        upsert=True
+    )
+
+
+def test_new_decisions_are_counted(db):
+    put_signal(db, "s1", decision("A", capital=1000.0), 0)
+    put_signal(db, "s2", decision("A", approved=False), 1)
+    put_signal(db, "s3", decision("B", capital=500.0), 2)
+    put_signal(db, "s4", None, 3)
+
+    aggregator = StrategyAggregator(db)
+    assert aggregator.apply_new_events() == {"A", "B"}
+
+    assert aggregator.get_aggregate("A") == {
+        "total_signals": 2, "signals_executed": 1, "executed_capital_sum": 1000.0,
+        "rejection_counts": {"NO_ALLOCATION": 1}
+    }
+    assert aggregator.get_aggregate("B")["executed_capital_sum"] == 500.0
+
+
+def test_rereading_is_a_no_op(db):
+    put_signal(db, "s1", decision("A"), 0)
+    aggregator = StrategyAggregator(db)
+    aggregator.apply_new_events()
+
+    # Inside the overlap window behind the high-water mark: read again, not counted again
+    assert aggregator.apply_new_events() == set()
+    assert aggregator.get_aggregate("A")["total_signals"] == 1
+
+
+def test_edited_decision_moves_counters_by_the_difference(db):
+    put_signal(db, "s1", decision("A", capital=1000.0), 0)
+    put_signal(db, "s2", decision("A", capital=200.0), 1)
+    aggregator = StrategyAggregator(db)
+    aggregator.apply_new_events()
+
+    put_signal(db, "s1", decision("A", approved=False, reason="MARGIN limit"), 5)
+    put_signal(db, "s2", decision("B", capital=200.0), 6)
+
+    assert aggregator.apply_new_events() == {"A", "B"}
+    assert aggregator.get_aggregate("A") == {
+        "total_signals": 1, "signals_executed": 0, "executed_capital_sum": 0.0,
+        "rejection_counts": {"MARGIN_EXCEEDED": 1}
+    }
+    assert aggregator.get_aggregate("B")["signals_executed"] == 1
+
+
+def test_cleared_decision_removes_its_fact(db):
+    put_signal(db, "s1", decision("A"), 0)
+    put_signal(db, "s2", decision("A"), 1)
+    aggregator = StrategyAggregator(db)
+    aggregator.apply_new_events()
+
+    put_signal(db, "s1", None, 5)
+
+    assert aggregator.apply_new_events() == {"A"}
+    assert aggregator.get_aggregate("A")["total_signals"] == 1
+    assert db[strategy_aggregates.FACTS_COLLECTION].find_one({"_id": "s1"}) is None
+
+
+@pytest.mark.parametrize("collection, method, nth", [
+    ("aggregates", "update_one", 1),   # died after journaling the facts, before any $inc
+    ("aggregates", "update_one", 2),   # died after the first strategy's $inc
+    ("facts", "update_one", 4),        # died after every $inc, while committing the facts
+    ("aggregates", "update_many", 1),  # died after committing the facts, markers left behind
+])
+def test_pass_that_died_is_completed_exactly_once(db, collection, method, nth):
+    put_signal(db, "s1", decision("A", capital=1000.0), 0)
+    put_signal(db, "s2", decision("B", capital=500.0), 1)
+    put_signal(db, "s3", decision("A", approved=False), 2)
+
+    crashing = StrategyAggregator(db)
+    setattr(crashing, collection, CrashingCollection(getattr(crashing, collection), method, nth))
+    with pytest.raises(RuntimeError):
+        crashing.apply_new_events()
+
+    aggregator = StrategyAggregator(db)
+    aggregator.apply_new_events()
+    aggregator.apply_new_events()
+
+    assert aggregator.get_aggregate("A") == {
+        "total_signals": 2, "signals_executed": 1, "executed_capital_sum": 1000.0,
+        "rejection_counts": {"NO_ALLOCATION": 1}
+    }
+    assert aggregator.get_aggregate("B")["total_signals"] == 1
+    assert db[strategy_aggregates.FACTS_COLLECTION].count_documents({"pending": {"$exists": True}}) == 0
+
+
+def test_edit_interrupted_mid_batch_is_completed_once(db):
+    put_signal(db, "s1", decision("A", capital=1000.0), 0)
+    StrategyAggregator(db).apply_new_events()
+
+    put_signal(db, "s1", decision("B", capital=300.0), 5)
+    crashing = StrategyAggregator(db)
+    crashing.aggregates = CrashingCollection(crashing.aggregates, "update_one", 2)
+    with pytest.raises(RuntimeError):
+        crashing.apply_new_events()
+
+    aggregator = StrategyAggregator(db)
+    aggregator.apply_new_events()
+
+    assert aggregator.get_aggregate("A")["total_signals"] == 0
+    assert aggregator.get_aggregate("B")["executed_capital_sum"] == 300.0
+
+
+def test_lease_held_by_another_process_skips_the_pass(db):
+    put_signal(db, "s1", decision("A"), 0)
+    db[strategy_aggregates.WATERMARKS_COLLECTION].insert_one(
+        {"_id": LEASE_ID, "owner": "other-host:1", "expires_at": datetime.utcnow() + timedelta(minutes=5)}
+    )
+
+    aggregator = StrategyAggregator(db)
+    assert aggregator.apply_new_events() == set()
+    assert aggregator.get_aggregate("A")["total_signals"] == 0
+
+
+def test_expired_lease_is_taken_over_and_released(db):
+    put_signal(db, "s1", decision("A"), 0)
+    watermarks = db[strategy_aggregates.WATERMARKS_COLLECTION]
+    watermarks.insert_one(
+        {"_id": LEASE_ID, "owner": "other-host:1", "expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    )
+
+    aggregator = StrategyAggregator(db)
+    assert aggregator.apply_new_events() == {"A"}
+    assert aggregator.get_aggregate("A")["total_signals"] == 1
+    assert watermarks.find_one({"_id": LEASE_ID}) is None
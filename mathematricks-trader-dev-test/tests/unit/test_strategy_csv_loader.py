@@ -0,0 +1,169 @@
+"""
+Unit tests for the shared strategy CSV loader.
+
+Verifies:
+1. Clean developer CSVs are typed by the NumPy fast path (percent/dollar columns)
+2. Files the fast path can't type fall back to pandas with the same results
+3. Parsed frames are cached as Parquet and re-parsed only when the file changes
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../services'))
+
+from strategy_csv import (
+    PARQUET_AVAILABLE, StrategyCSVError, match_columns, read_strategy_csv, load_strategy_csvs
+)
+from strategy_csv import loader
+
+HEADER = ("Date,Daily P&L ($),Daily Returns (%),Daily Return on Notional (%),"
+          "Maximum Daily Notional Value,Maximum Daily Margin Utilization ($)")
+
+
+def write_csv(tmp_path, name, rows, header=HEADER):
+    path = tmp_path / f"{name}.csv"
+    path.write_text("\n".join([header] + rows) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def no_fallback(monkeypatch):
+    """Fail if the pandas fallback is used"""
+    def fallback(raw, columns):
+        raise AssertionError("fast path expected")
+    monkeypatch.setattr(loader, '_parse_fallback', fallback)
+
+
+def test_header_names_map_onto_canonical_columns():
+    assert match_columns(HEADER.split(",")) == {
+        'date': 'Date',
+        'return': 'Daily Returns (%)',
+        'pnl': 'Daily P&L ($)',
+        'notional_value': 'Maximum Daily Notional Value',
+        'margin_used': 'Maximum Daily Margin Utilization ($)',
+    }
+
+
+def test_fast_path_types_percent_and_dollar_columns(tmp_path, no_fallback):
+    path = write_csv(tmp_path, "SPX_Condors", [
+        "2021-04-26,$8930.13,0.8930%,1.8479%,483261,$51409",
+        "2021-04-27,-120.5,-0.0120%,-0.0250%,480000,51000",
+    ])
+
+    frame = read_strategy_csv(path, required=('date', 'pnl', 'return', 'notional_value', 'margin_used'))
+
+    assert list(frame.columns) == ['date', 'return', 'pnl', 'notional_value', 'margin_used']
+    assert frame['date'].dtype == np.dtype('datetime64[ns]')
+    assert np.allclose(frame['return'], [0.008930, -0.000120])
+    assert list(frame['pnl']) == [8930.13, -120.5]
+    assert list(frame['margin_used']) == [51409.0, 51000.0]
+
+
+def test_unsuffixed_returns_are_read_as_percent_only_above_one(tmp_path, no_fallback):
+    fractions = write_csv(tmp_path, "Fractions", ["2021-04-26,0.01", "2021-04-27,-0.02"], header="Date,Return")
+    percents = write_csv(tmp_path, "Percents", ["2021-04-26,1.5", "2021-04-27,-0.5"], header="Date,Return")
+
+    assert list(read_strategy_csv(fractions)['return']) == [0.01, -0.02]
+    assert list(read_strategy_csv(percents)['return']) == [0.015, -0.005]
+
+
+def test_fallback_matches_fast_path(tmp_path):
+    rows = [
+        "2021-04-26,$8930.13,0.8930%,1.8479%,483261,$51409",
+        "2021-04-27,-120.5,-0.0120%,-0.0250%,480000,51000",
+    ]
+    clean = read_strategy_csv(write_csv(tmp_path, "Clean", rows))
+    # Thousand separators need the pandas fallback
+    messy = read_strategy_csv(write_csv(tmp_path, "Messy", [
+        '2021-04-26,"$8,930.13",0.8930%,1.8479%,"483,261","$51,409"',
+        rows[1],
+    ]))
+
+    assert messy.equals(clean)
+
+
+def test_fallback_turns_unparseable_values_into_nan(tmp_path):
+    path = write_csv(tmp_path, "Gaps", [
+        "04/26/2021,100,1.0%,,1000,10",
+        "04/27/2021,,n/a,,1000,10",
+        "foo,5,0.5%,,1000,10",
+    ])
+
+    frame = read_strategy_csv(path)
+
+    assert [str(d)[:10] for d in frame['date'][:2]] == ["2021-04-26", "2021-04-27"]
+    assert np.isnat(frame['date'].to_numpy()[2])
+    assert frame['return'][0] == 0.01 and np.isnan(frame['return'][1])
+    assert np.isnan(frame['pnl'][1])
+    assert frame['return'][2] == 0.005
+
+
+def test_missing_required_column_is_rejected(tmp_path):
+    path = write_csv(tmp_path, "NoReturns", ["2021-04-26,100"], header="Date,Daily P&L ($)")
+
+    with pytest.raises(StrategyCSVError, match="return"):
+        read_strategy_csv(path)
+
+    frames, failures = load_strategy_csvs([path], use_cache=False)
+    assert frames == {} and isinstance(failures["NoReturns"], StrategyCSVError)
+
+
+def test_load_keeps_path_order_and_isolates_failures(tmp_path):
+    good = [write_csv(tmp_path, f"S{i}", [f"2021-04-26,{i},{i}.0%,0%,1,1"]) for i in range(5)]
+    bad = write_csv(tmp_path, "Bad", ["2021-04-26"], header="Date")
+
+    frames, failures = load_strategy_csvs(good[:2] + [bad] + good[2:], max_workers=3, use_cache=False)
+
+    assert list(frames) == ["S0", "S1", "S2", "S3", "S4"]
+    assert list(failures) == ["Bad"]
+    assert frames["S3"]['return'][0] == 0.03
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="no Parquet engine (pyarrow/fastparquet) installed")
+def test_cache_is_reused_until_the_file_changes(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    path = write_csv(tmp_path, "SPX_Condors", ["2021-04-26,8930.13,0.8930%,1.8479%,483261,51409"])
+    parsed = []
+    parse = loader.read_strategy_csv
+    monkeypatch.setattr(loader, 'read_strategy_csv', lambda *args: parsed.append(args) or parse(*args))
+
+    first, _ = load_strategy_csvs([path], cache_dir=cache_dir)
+    second, _ = load_strategy_csvs([path], cache_dir=cache_dir)
+
+    assert len(parsed) == 1
+    assert second["SPX_Condors"].equals(first["SPX_Condors"])
+    assert second["SPX_Condors"]['date'].dtype == np.dtype('datetime64[ns]')
+
+    write_csv(tmp_path, "SPX_Condors", ["2021-04-26,8930.13,0.5000%,1.8479%,483261,51409",
+                                        "2021-04-27,1.0,0.1000%,0.1%,1,1"])
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10**9))
+    third, _ = load_strategy_csvs([path], cache_dir=cache_dir)
+
+    assert len(parsed) == 2
+    assert list(third["SPX_Condors"]['return']) == [0.005, 0.001]
+    assert len(os.listdir(cache_dir)) == 1  # the older version's entry was dropped
+
+
+@pytest.mark.skipif(not PARQUET_AVAILABLE, reason="no Parquet engine (pyarrow/fastparquet) installed")
+def test_cached_frame_still_checks_required_columns(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    path = write_csv(tmp_path, "NoMargin", ["2021-04-26,1.0%"], header="Date,Return")
+    load_strategy_csvs([path], cache_dir=cache_dir)
+
+    frames, failures = load_strategy_csvs([path], required=('date', 'return', 'margin_used'), cache_dir=cache_dir)
+
+    assert frames == {}
+    assert isinstance(failures["NoMargin"], StrategyCSVError)
+
+
+def test_cache_is_skipped_when_disabled(tmp_path):
+    cache_dir = tmp_path / "cache"
+    path = write_csv(tmp_path, "SPX_Condors", ["2021-04-26,8930.13,0.8930%,1.8479%,483261,51409"])
+
+    frames, failures = load_strategy_csvs([path], use_cache=False, cache_dir=str(cache_dir))
+
+    assert not failures and len(frames["SPX_Condors"]) == 1
+    assert not cache_dir.exists()
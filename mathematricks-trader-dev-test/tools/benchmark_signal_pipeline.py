@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Signal Pipeline Benchmark
+
+Drives synthetic signals through all three services in one process:
+
+    trading_signals_raw -> signal_ingestion -> standardized-signals
+                        -> cerebro          -> trading-orders
+                        -> execution (Mock) -> execution-confirmations
+
+Services talk over the in-memory Pub/Sub transport (PUBSUB_TRANSPORT=memory) and run
+against a local Mongo stand-in (mongomock) unless --mongo-uri is given. Orders go to
+the existing MockBroker (execution_service --use-mock-broker). AccountDataService is
+replaced by a static account state.
+
+Probe subscriptions on each topic timestamp every message, giving per-stage latency:
+- ingestion: raw document inserted -> standardized signal published
+- cerebro:   standardized signal published -> trading order published
+- execution: trading order published -> execution confirmation published
+- end_to_end: raw document inserted -> execution confirmation published
+
+Usage:
+    python tools/benchmark_signal_pipeline.py --signals 2000 --batch-size 50
+    python tools/benchmark_signal_pipeline.py --signals 5000 --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES_DIR = os.path.join(PROJECT_ROOT, 'services')
+
+STAGES = ['ingestion', 'cerebro', 'execution', 'end_to_end']
+ACCOUNT_ID = 'Mock_Paper'
+ENVIRONMENT = 'production'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the signal pipeline end to end')
+    parser.add_argument('--signals', type=int, default=2000, help='Number of synthetic signals')
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help='Raw signals inserted per ingestion catch-up pass')
+    parser.add_argument('--strategies', type=int, default=10, help='Number of synthetic strategies')
+    parser.add_argument('--instruments', type=int, default=50,
+                        help='Instruments per strategy (signals cycle through them)')
+    parser.add_argument('--timeout', type=float, default=300.0,
+                        help='Seconds to wait for all execution confirmations')
+    parser.add_argument('--mongo-uri', default=None,
+                        help='Real MongoDB to use (default: in-process mongomock). '
+                             'Use a throwaway database - collections are dropped!')
+    parser.add_argument('--log-level', default='WARNING', help='Service log level during the run')
+    return parser.parse_args()
+
+
+# ============================================================================
+# ENVIRONMENT (must run before the services are imported)
+# ============================================================================
+
+def prepare_environment(args):
+    """Point every service at the in-memory transport and the benchmark database"""
+    os.environ['PUBSUB_TRANSPORT'] = 'memory'
+    os.environ['ALLOCATIONS_CACHE_PATH'] = os.path.join(
+        tempfile.mkdtemp(prefix='pipeline_bench_'), 'current_portfolio_allocation_approved.json'
+    )
+    # Unreachable AccountDataService: execution falls back to a single Mock_Paper broker
+    os.environ['ACCOUNT_DATA_SERVICE_URL'] = 'http://127.0.0.1:9'
+
+    if args.mongo_uri:
+        os.environ['MONGODB_URI'] = args.mongo_uri
+        return
+
+    try:
+        import mongomock
+    except ImportError:
+        print("❌ mongomock is not installed (pip install mongomock) - or pass --mongo-uri")
+        sys.exit(1)
+
+    # Every service creates its own MongoClient - hand them all the same in-memory server
+    import pymongo
+    shared_client = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *a, **kw: shared_client
+    os.environ['MONGODB_URI'] = 'mongodb://localhost:27017'
+
+
+def import_services():
+    """Import the three services (each configures itself at import time)"""
+    for path in (PROJECT_ROOT, SERVICES_DIR,
+                 os.path.join(SERVICES_DIR, 'cerebro_service'),
+                 os.path.join(SERVICES_DIR, 'execution_service')):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    import cerebro_main
+
+    # execution_main parses its own command line at import
+    argv = sys.argv
+    sys.argv = [argv[0], '--use-mock-broker']
+    try:
+        import execution_main
+    finally:
+        sys.argv = argv
+
+    from services.signal_ingestion.signal_ingestion_main import SignalIngestionService
+
+    return cerebro_main, execution_main, SignalIngestionService
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+def seed_database(db, num_strategies: int, positions_per_strategy: int):
+    """
+    Reset the benchmark collections and create ACTIVE strategies + allocation.
+
+    Every signal is an ENTRY, so each strategy's position sizing is set to hold all of
+    its entries - otherwise cerebro rejects late signals with "No capital remaining".
+    """
+    for name in ('strategies', 'signal_store', 'trading_signals_raw', 'trading_orders',
+                 'trading_accounts', 'positions', 'current_allocation', 'portfolio_allocations'):
+        db[name].drop()
+
+    from backtest_series import encode_backtest_series
+
+    rng = np.random.default_rng(7)
+    dates = np.datetime64('2022-01-03') + np.arange(500)
+    strategy_ids = [f"BENCH_STRATEGY_{i:02d}" for i in range(num_strategies)]
+
+    for strategy_id in strategy_ids:
+        returns = rng.normal(0.0008, 0.01, len(dates))
+        db['strategies'].insert_one({
+            'strategy_id': strategy_id,
+            'strategy_name': strategy_id,
+            'status': 'ACTIVE',
+            'trading_mode': 'PAPER',
+            'accounts': [ACCOUNT_ID],
+            'include_in_optimization': True,
+            'backtest_series': encode_backtest_series({
+                'date': dates, 'return': returns, 'pnl': returns * 100000,
+                'notional_value': np.full(len(dates), 30000.0),
+                'margin_used': np.full(len(dates), 10000.0),
+                'account_equity': np.full(len(dates), 100000.0)
+            }),
+            'position_sizing': {
+                'estimated_avg_positions': float(positions_per_strategy),
+                'estimated_position_margin': 10000.0,
+                'median_margin_pct': 10.0
+            }
+        })
+
+    allocations = {strategy_id: round(100.0 / num_strategies, 4) for strategy_id in strategy_ids}
+    now = datetime.datetime.utcnow()
+    db['current_allocation'].insert_one({'allocations': allocations, 'approved_at': now})
+    db['portfolio_allocations'].insert_one({
+        'allocation_id': 'BENCH_ALLOCATION', 'status': 'ACTIVE',
+        'allocations': allocations, 'approved_at': now
+    })
+    return strategy_ids
+
+
+def static_account_state(account_name: str):
+    """Stand-in for AccountDataService /api/v1/account/{account}/state"""
+    return {
+        'account': account_name,
+        'equity': 10_000_000.0,
+        'cash_balance': 10_000_000.0,
+        'margin_used': 0.0,
+        'margin_available': 10_000_000.0,
+        'open_positions': [],
+        'open_orders': []
+    }
+
+
+def build_raw_signals(run_id: str, count: int, strategy_ids, num_instruments: int):
+    """Synthetic ENTRY signals in the webhook's trading_signals_raw format"""
+    signals = []
+    for i in range(count):
+        strategy_id = strategy_ids[i % len(strategy_ids)]
+        instrument = f"SYM{(i // len(strategy_ids)) % num_instruments:03d}"
+        signals.append({
+            'signalID': f"BENCH_{run_id}_{i:06d}",
+            'strategy_name': strategy_id,
+            'signal_type': 'ENTRY',
+            'environment': ENVIRONMENT,
+            'signal': [{
+                'instrument': instrument,
+                'instrument_type': 'STOCK',
+                'action': 'BUY',
+                'direction': 'LONG',
+                'quantity': 10,
+                'order_type': 'MARKET',
+                'price': 100.0
+            }]
+        })
+    return signals
+
+
+# ============================================================================
+# PROBES
+# ============================================================================
+
+class StageProbe:
+    """Records when each signal's message was published to a topic"""
+
+    def __init__(self, transport, project_id: str, topic: str, id_field: str):
+        import json
+        self._json = json
+        self.id_field = id_field
+        self.published_at = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+        subscription = f"benchmark-{topic}-probe"
+        transport.create_subscription(subscription, topic)
+        transport.subscribe(transport.subscription_path(project_id, subscription), self._on_message)
+
+    def _on_message(self, message):
+        payload = self._json.loads(message.data.decode('utf-8'))
+        signal_id = payload.get(self.id_field, '')
+        if signal_id.endswith('_ORD'):
+            signal_id = signal_id[:-4]
+        with self._changed:
+            self.published_at.setdefault(signal_id, message.published_at)
+            self._changed.notify_all()
+        message.ack()
+
+    def wait_for(self, count: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while len(self.published_at) < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+        return True
+
+
+def percentile_summary(latencies_ms):
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        'count': int(values.size),
+        'p50': float(np.percentile(values, 50)),
+        'p99': float(np.percentile(values, 99)),
+        'max': float(values.max())
+    }
+
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    args = parse_args()
+    prepare_environment(args)
+    cerebro_main, execution_main, SignalIngestionService = import_services()
+
+    level = getattr(logging, args.log_level.upper(), logging.WARNING)
+    logging.getLogger().setLevel(level)
+    for name in ('cerebro_main', 'execution_main', 'signal_ingestion', 'signal_processing'):
+        logging.getLogger(name).setLevel(level)
+
+    from messaging import get_transport
+    transport = get_transport()
+    project_id = os.getenv('GCP_PROJECT_ID', 'mathematricks-trader')
+
+    print("=" * 80)
+    print("SIGNAL PIPELINE BENCHMARK")
+    print("=" * 80)
+    print(f"Signals: {args.signals} | Batch: {args.batch_size} | Strategies: {args.strategies}")
+    print(f"Transport: {transport.name} | Mongo: {args.mongo_uri or 'mongomock (in-process)'}")
+
+    # Fixtures
+    positions_per_strategy = -(-args.signals // args.strategies) + 1
+    strategy_ids = seed_database(cerebro_main.db, args.strategies, positions_per_strategy)
+    cerebro_main.fetch_account_state = static_account_state
+    raw_signals = build_raw_signals(uuid.uuid4().hex[:8], args.signals, strategy_ids, args.instruments)
+
+    # Probes attach before any service publishes
+    ingested = StageProbe(transport, project_id, 'standardized-signals', 'signal_id')
+    ordered = StageProbe(transport, project_id, 'trading-orders', 'order_id')
+    executed = StageProbe(transport, project_id, 'execution-confirmations', 'order_id')
+
+    # Cerebro startup (same sequence as cerebro_main __main__, without the change stream
+    # watchers - mongomock has no change streams; lookups fall back to direct queries)
+    cerebro_main.init_pubsub()
+    cerebro_main.download_allocations_from_mongo_to_cache(update_action="cerebro_restart")
+    cerebro_main.initialize_portfolio_constructor()
+    cerebro_main.reload_allocations()
+    cerebro_main.strategy_history_cache.warm()
+    threading.Thread(target=cerebro_main.start_signal_subscriber, daemon=True).start()
+
+    # Execution startup (same sequence as execution_main __main__)
+    dispatcher = execution_main.order_dispatcher
+    dispatcher.start_workers(execution_main.broker_pool.keys())
+    execution_main.connect_all_brokers()
+    threading.Thread(target=execution_main.start_trading_orders_subscriber, daemon=True).start()
+    threading.Thread(target=dispatcher.run_forever, daemon=True).start()
+
+    # Ingestion: insert raw signals in batches, then run a catch-up pass over each batch
+    ingestion = SignalIngestionService(environment=ENVIRONMENT)
+    raw_collection = ingestion.watcher.mongodb_collection
+    inserted_at = {}
+
+    started = time.perf_counter()
+    for offset in range(0, len(raw_signals), args.batch_size):
+        batch = raw_signals[offset:offset + args.batch_size]
+        now = datetime.datetime.utcnow()
+        for doc in batch:
+            doc['received_at'] = now
+        batch_time = time.perf_counter()
+        raw_collection.insert_many(batch)
+        for doc in batch:
+            inserted_at[doc['signalID']] = batch_time
+        ingestion.watcher.fetch_missed_signals()
+
+    completed = executed.wait_for(len(raw_signals), args.timeout)
+    elapsed = time.perf_counter() - started
+
+    # Latencies (ms) for signals that made it through each stage
+    stage_latencies = {stage: [] for stage in STAGES}
+    for signal_id, t_insert in inserted_at.items():
+        t_ingested = ingested.published_at.get(signal_id)
+        t_ordered = ordered.published_at.get(signal_id)
+        t_executed = executed.published_at.get(signal_id)
+        if t_ingested is not None:
+            stage_latencies['ingestion'].append((t_ingested - t_insert) * 1000)
+        if t_ingested is not None and t_ordered is not None:
+            stage_latencies['cerebro'].append((t_ordered - t_ingested) * 1000)
+        if t_ordered is not None and t_executed is not None:
+            stage_latencies['execution'].append((t_executed - t_ordered) * 1000)
+        if t_executed is not None:
+            stage_latencies['end_to_end'].append((t_executed - t_insert) * 1000)
+
+    print("\n" + "-" * 80)
+    print(f"{'Stage':<12} {'Count':>8} {'p50 (ms)':>12} {'p99 (ms)':>12} {'max (ms)':>12}")
+    print("-" * 80)
+    for stage in STAGES:
+        if not stage_latencies[stage]:
+            print(f"{stage:<12} {0:>8} {'-':>12} {'-':>12} {'-':>12}")
+            continue
+        s = percentile_summary(stage_latencies[stage])
+        print(f"{stage:<12} {s['count']:>8} {s['p50']:>12.2f} {s['p99']:>12.2f} {s['max']:>12.2f}")
+    print("-" * 80)
+
+    executed_count = len(stage_latencies['end_to_end'])
+    print(f"Executed: {executed_count}/{len(raw_signals)} signals in {elapsed:.2f}s")
+    print(f"Throughput: {executed_count / elapsed:,.1f} signals/sec")
+    if not completed:
+        print(f"⚠️  Timed out after {args.timeout:.0f}s - check service logs for rejected signals")
+    print(f"Cerebro executor: {cerebro_main.signal_executor.stats()}")
+    print(f"Order dispatcher: {dispatcher.stats()}")
+    print("=" * 80)
+
+    dispatcher.stop()
+    return 0 if completed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@ Create MongoDB indexes for signal-centric refactoring
 Creates indexes on:
 - trading_signals_raw: For efficient query of unprocessed signals
 - signal_store: For efficient position tracking and PnL queries
+- trading_orders: For keyset pagination of the Activity orders list
 """
 import os
 import sys
@@ -146,6 +147,65 @@ def create_indexes():
     ], name="cerebro_action_idx")
     print(f"  ✅ Created index: {index_name}")
 
+    # Index 10: Incremental dashboard aggregation (updated_at high-water mark)
+    index_name = signal_store.create_index([
+        ("updated_at", ASCENDING)
+    ], name="updated_at_idx")
+    print(f"  ✅ Created index: {index_name}")
+
+    # Index 11: Recent decisions per strategy (signal sender dashboards)
+    index_name = signal_store.create_index([
+        ("cerebro_decision.strategy_id", ASCENDING),
+        ("cerebro_decision.timestamp", DESCENDING)
+    ], name="strategy_decision_time_idx")
+    print(f"  ✅ Created index: {index_name}")
+
+    # Index 12: Keyset pagination of a strategy's signal history (strategy developer API)
+    index_name = signal_store.create_index([
+        ("strategy_id", ASCENDING),
+        ("created_at", DESCENDING),
+        ("_id", DESCENDING)
+    ], name="strategy_created_idx")
+    print(f"  ✅ Created index: {index_name}")
+
+    # Index 13: Keyset pagination of the Activity feed (all environments)
+    index_name = signal_store.create_index([
+        ("created_at", DESCENDING),
+        ("_id", DESCENDING)
+    ], name="created_idx")
+    print(f"  ✅ Created index: {index_name}")
+
+    # Index 14: Keyset pagination of the Activity feed (one environment)
+    index_name = signal_store.create_index([
+        ("environment", ASCENDING),
+        ("created_at", DESCENDING),
+        ("_id", DESCENDING)
+    ], name="environment_created_id_idx")
+    print(f"  ✅ Created index: {index_name}")
+
+    # =========================================================================
+    # TRADING_ORDERS INDEXES
+    # =========================================================================
+
+    print("\n📋 Creating indexes for trading_orders collection...")
+
+    trading_orders = db['trading_orders']
+
+    # Index 1: Keyset pagination of the Activity orders list (all environments)
+    index_name = trading_orders.create_index([
+        ("timestamp", DESCENDING),
+        ("_id", DESCENDING)
+    ], name="timestamp_id_idx")
+    print(f"  ✅ Created index: {index_name}")
+
+    # Index 2: Keyset pagination of the Activity orders list (one environment)
+    index_name = trading_orders.create_index([
+        ("environment", ASCENDING),
+        ("timestamp", DESCENDING),
+        ("_id", DESCENDING)
+    ], name="environment_timestamp_id_idx")
+    print(f"  ✅ Created index: {index_name}")
+
     print("\n" + "="*80)
     print("✅ All indexes created successfully!")
     print("="*80)
@@ -159,6 +219,10 @@ def create_indexes():
     for index in signal_store.list_indexes():
         print(f"  - {index['name']}")
 
+    print("\n📊 Trading Orders Indexes:")
+    for index in trading_orders.list_indexes():
+        print(f"  - {index['name']}")
+
     print("\n")
     client.close()
 
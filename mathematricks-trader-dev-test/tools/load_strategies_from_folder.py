@@ -13,115 +13,26 @@ Synthetic Data Generation Logic (Excel-based):
 """
 import os
 import sys
-import pandas as pd
 import numpy as np
 from datetime import datetime
 from pymongo import MongoClient
 from dotenv import load_dotenv
-from scipy import stats
 
 # Load environment
 PROJECT_ROOT = "/Users/vandanchopra/Vandan_Personal_Folder/CODE_STUFF/Projects/MathematricksTrader"
 load_dotenv(f'{PROJECT_ROOT}/.env')
 
+# Shared backtest series encoding and strategy CSV loading (services/backtest_series, services/strategy_csv)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'services'))
+from backtest_series import encode_backtest_series, COLUMN_DEFAULTS
+from strategy_csv import load_strategy_csvs, StrategyCSVError, detect_position_count_from_margin_steps
+
 # MongoDB connection
 mongo_uri = os.getenv('MONGODB_URI')
 client = MongoClient(mongo_uri, tls=True, tlsAllowInvalidCertificates=True)
 db = client['mathematricks_trading']
 
 
-def detect_position_count_from_margin_steps(margin_data):
-    """
-    Detect estimated average position count by analyzing margin usage patterns.
-
-    The logic:
-    1. Get all non-zero margin values
-    2. Calculate differences between consecutive sorted values (step sizes)
-    3. Find the most common step size (this represents typical position margin)
-    4. Estimate avg positions = median(margin) / typical_position_margin
-
-    Args:
-        margin_data: List of margin_used values from backtest
-
-    Returns:
-        dict with:
-            - estimated_avg_positions: Estimated typical number of open positions
-            - estimated_position_margin: Estimated margin per position
-            - margin_pct_median: Median margin as % of equity
-            - confidence: "high", "medium", or "low" based on data quality
-    """
-    # Filter out zero margin days (no positions)
-    non_zero_margin = [m for m in margin_data if m > 0]
-
-    if len(non_zero_margin) < 10:
-        # Not enough data points
-        return {
-            "estimated_avg_positions": 3.0,  # Default assumption
-            "estimated_position_margin": np.median(non_zero_margin) / 3.0 if non_zero_margin else 1000.0,
-            "confidence": "low",
-            "reason": "Insufficient data (less than 10 non-zero margin days)"
-        }
-
-    # Sort margin values
-    sorted_margin = np.sort(non_zero_margin)
-
-    # Calculate differences (step sizes)
-    diffs = np.diff(sorted_margin)
-
-    # Remove very small differences (noise) - keep diffs > 1% of median margin
-    median_margin = np.median(sorted_margin)
-    noise_threshold = median_margin * 0.01
-    significant_diffs = diffs[diffs > noise_threshold]
-
-    if len(significant_diffs) == 0:
-        # All diffs are tiny - likely single position strategy
-        return {
-            "estimated_avg_positions": 1.0,
-            "estimated_position_margin": median_margin,
-            "confidence": "medium",
-            "reason": "No significant margin steps detected - likely single position"
-        }
-
-    # Find the most common step size using histogram
-    # Bin the diffs to find the mode
-    hist, bin_edges = np.histogram(significant_diffs, bins=20)
-    most_common_bin_idx = np.argmax(hist)
-    typical_step = (bin_edges[most_common_bin_idx] + bin_edges[most_common_bin_idx + 1]) / 2
-
-    # Alternative: use mode from scipy.stats
-    try:
-        mode_result = stats.mode(np.round(significant_diffs / 1000) * 1000, keepdims=False)  # Round to nearest 1000
-        typical_step_alt = float(mode_result.mode) if hasattr(mode_result, 'mode') else typical_step
-    except:
-        typical_step_alt = typical_step
-
-    # Use the histogram-based approach (more robust)
-    estimated_position_margin = typical_step
-
-    # Calculate estimated average positions
-    estimated_avg_positions = median_margin / estimated_position_margin if estimated_position_margin > 0 else 1.0
-
-    # Cap at reasonable bounds (1-20 positions)
-    estimated_avg_positions = max(1.0, min(20.0, estimated_avg_positions))
-
-    # Determine confidence based on data consistency
-    cv = np.std(significant_diffs) / np.mean(significant_diffs) if np.mean(significant_diffs) > 0 else 1.0  # Coefficient of variation
-
-    if cv < 0.3:
-        confidence = "high"
-    elif cv < 0.6:
-        confidence = "medium"
-    else:
-        confidence = "low"
-
-    return {
-        "estimated_avg_positions": round(estimated_avg_positions, 1),
-        "estimated_position_margin": round(estimated_position_margin, 2),
-        "confidence": confidence,
-        "reason": f"Detected from {len(non_zero_margin)} margin data points, CV={cv:.2f}"
-    }
-
-
 def load_strategies_from_folder(folder_path, starting_capital=1_000_000):
     """
     Load all CSV files in folder as strategy backtest data.
@@ -150,71 +61,35 @@ def load_strategies_from_folder(folder_path, starting_capital=1_000_000):
 
     loaded_count = 0
 
+    # Parse every file in one parallel pass (typed columns, returns as fractions)
+    frames, failures = load_strategy_csvs([os.path.join(folder_path, f) for f in sorted(csv_files)])
+
     for csv_file in sorted(csv_files):
         strategy_id = csv_file.replace('.csv', '')
-        csv_path = os.path.join(folder_path, csv_file)
 
         print(f"\n📊 Processing: {strategy_id}")
         print("-" * 60)
 
         try:
-            # Read CSV
-            df = pd.read_csv(csv_path)
-
-            # Find date column (try different names)
-            date_col = None
-            for col in df.columns:
-                if 'date' in col.lower():
-                    date_col = col
-                    break
-
-            if date_col is None:
-                print(f"⚠️  Skipping - no date column found")
-                print(f"   Available columns: {', '.join(df.columns)}")
-                continue
-
-            # Find returns column (try different names)
-            returns_col = None
-            for col in df.columns:
-                if 'return' in col.lower():
-                    returns_col = col
-                    break
-
-            if returns_col is None:
-                print(f"⚠️  Skipping - no returns column found")
-                print(f"   Available columns: {', '.join(df.columns)}")
-                continue
-
-            # Parse dates
-            df[date_col] = pd.to_datetime(df[date_col])
-
-            # Clean returns data: strip % signs and convert to decimal
-            if df[returns_col].dtype == 'object':
-                df[returns_col] = df[returns_col].astype(str).str.rstrip('%,').str.strip()
-            df[returns_col] = pd.to_numeric(df[returns_col], errors='coerce')
-
-            # Check if returns are in percentage format (like 0.5 meaning 0.5%)
-            if df[returns_col].abs().max() > 1:
-                df[returns_col] = df[returns_col] / 100
+            if strategy_id in failures:
+                if isinstance(failures[strategy_id], StrategyCSVError):
+                    print(f"⚠️  Skipping - {failures[strategy_id]}")
+                    continue
+                raise failures[strategy_id]
 
             # Remove rows with NaN returns
-            df = df[df[returns_col].notna()]
+            df = frames[strategy_id]
+            df = df[df['return'].notna()].reset_index(drop=True)
 
             if len(df) == 0:
                 print(f"⚠️  Skipping - no valid data after cleaning")
                 continue
 
             # Check which columns exist vs need to be synthesized
-            has_pnl = any('p&l' in col.lower() or 'pnl' in col.lower() for col in df.columns)
-            has_notional = any('notional' in col.lower() for col in df.columns)
-            has_margin = any('margin' in col.lower() for col in df.columns)
-            has_account_equity = any('account' in col.lower() and 'equity' in col.lower() for col in df.columns)
-
-            # Extract existing columns if they exist
-            pnl_col = [col for col in df.columns if 'p&l' in col.lower() or 'pnl' in col.lower()][0] if has_pnl else None
-            notional_col = [col for col in df.columns if 'notional' in col.lower()][0] if has_notional else None
-            margin_col = [col for col in df.columns if 'margin' in col.lower()][0] if has_margin else None
-            equity_col = [col for col in df.columns if 'account' in col.lower() and 'equity' in col.lower()][0] if has_account_equity else None
+            has_pnl = 'pnl' in df.columns
+            has_notional = 'notional_value' in df.columns
+            has_margin = 'margin_used' in df.columns
+            has_account_equity = 'account_equity' in df.columns
 
             synthetic_columns = []
             if not has_pnl:
@@ -232,80 +107,67 @@ def load_strategies_from_folder(folder_path, starting_capital=1_000_000):
                 print(f"   ✓ All columns provided by strategy developer")
 
             # =====================================================================
-            # EXCEL-BASED SYNTHETIC DATA GENERATION
+            # EXCEL-BASED SYNTHETIC DATA GENERATION (whole columns at once)
             # =====================================================================
 
             # Step 1: Get all returns for MAX calculation (needed for margin formula)
-            returns_array = df[returns_col].values
-            max_return = abs(returns_array).max() if len(returns_array) > 0 else 1.0
+            returns_array = df['return'].to_numpy()
+            max_return = abs(returns_array).max()
 
             # Avoid division by zero
             if max_return < 0.0001:
                 max_return = 1.0
 
-            # Step 2: Build the full data with Excel formulas
-            raw_data_backtest_full = []
-            equity = starting_capital  # Initial equity (Row 1: C2 = 1000000)
-
-            for idx, row in df.iterrows():
-                daily_return_pct = float(row[returns_col]) * 100  # Convert to percentage (e.g., 0.01 → 1%)
-
-                # --- Account_Equity (C column) ---
-                # Row 1: starting_capital
-                # Row N: previous_equity * (1 + previous_return/100)
-                if not has_account_equity:
-                    if idx == df.index[0]:  # First row
-                        account_equity = starting_capital
-                    else:
-                        # Already updated from previous iteration
-                        account_equity = equity
-                else:
-                    account_equity = float(str(row[equity_col]).replace('$', '').replace(',', '').strip())
-                    equity = account_equity  # Track for next iteration
-
-                # --- Daily_PnL (D column) ---
-                # Row 1: 0
-                # Row N: current_equity - previous_equity
-                if not has_pnl:
-                    if idx == df.index[0]:  # First row
-                        daily_pnl = 0.0
-                    else:
-                        daily_pnl = account_equity - equity_before_pnl
-                else:
-                    daily_pnl = float(str(row[pnl_col]).replace('$', '').replace(',', '').strip())
-
-                # Store equity before P&L for next iteration's calculation
-                equity_before_pnl = equity
-
-                # Update equity for next iteration (C3 = C2 * (1 + B2/100))
-                if not has_account_equity:
-                    equity = account_equity * (1 + daily_return_pct / 100)
-
-                # --- Max_Margin_Used (E column) ---
-                # Formula: ABS(return) / MAX(returns) * equity * 0.8
-                if not has_margin:
-                    margin_used = (abs(daily_return_pct / 100) / max_return) * account_equity * 0.8
-                else:
-                    margin_used = float(str(row[margin_col]).replace('$', '').replace(',', '').strip())
-
-                # --- Max_Notional_Value (F column) ---
-                # Formula: margin * 3
-                if not has_notional:
-                    notional_value = margin_used * 3
-                else:
-                    notional_value = float(str(row[notional_col]).replace('$', '').replace(',', '').strip())
-
-                raw_data_backtest_full.append({
-                    'date': row[date_col].strftime('%Y-%m-%d'),
-                    'return': float(row[returns_col]),  # Store as decimal (0.01 = 1%)
-                    'pnl': daily_pnl,
-                    'notional_value': notional_value,
-                    'margin_used': margin_used,
-                    'account_equity': account_equity
-                })
+            daily_return_pct = returns_array * 100  # Percentage (e.g., 0.01 → 1%)
+
+            # --- Account_Equity (C column) ---
+            # Row 1: starting_capital
+            # Row N: previous_equity * (1 + previous_return/100)
+            if not has_account_equity:
+                growth = 1 + daily_return_pct / 100
+                account_equity = np.multiply.accumulate(np.concatenate([[float(starting_capital)], growth[:-1]]))
+                equity = account_equity[-1] * growth[-1]  # After the last day's return
+            else:
+                account_equity = df['account_equity'].to_numpy()
+                equity = account_equity[-1]
+
+            # --- Daily_PnL (D column) ---
+            # Row 1: 0
+            # Row N: current_equity - previous_equity
+            if not has_pnl:
+                daily_pnl = np.concatenate([[0.0], np.diff(account_equity)])
+            else:
+                daily_pnl = df['pnl'].to_numpy()
+
+            # --- Max_Margin_Used (E column) ---
+            # Formula: ABS(return) / MAX(returns) * equity * 0.8
+            if not has_margin:
+                margin_used = np.abs(daily_return_pct / 100) / max_return * account_equity * 0.8
+            else:
+                margin_used = df['margin_used'].to_numpy()
+
+            # --- Max_Notional_Value (F column) ---
+            # Formula: margin * 3
+            if not has_notional:
+                notional_value = margin_used * 3
+            else:
+                notional_value = df['notional_value'].to_numpy()
+
+            # Columnar backtest series (packed float64/datetime64 arrays, see services/backtest_series);
+            # missing values get the backtest series defaults
+            columns = {
+                'date': df['date'].dt.normalize().to_numpy(dtype='datetime64[ns]'),
+                'return': returns_array,  # Stored as decimal (0.01 = 1%)
+                'pnl': daily_pnl,
+                'notional_value': notional_value,
+                'margin_used': margin_used,
+                'account_equity': account_equity
+            }
+            for name, default in COLUMN_DEFAULTS.items():
+                columns[name] = np.where(np.isnan(columns[name]), default, columns[name])
 
             # Calculate metrics from returns
-            returns_series = df[returns_col]
+            returns_series = df['return']
             mean_return_daily = returns_series.mean()
             volatility_daily = returns_series.std()
 
@@ -319,11 +181,11 @@ def load_strategies_from_folder(folder_path, starting_capital=1_000_000):
             max_drawdown = drawdown.min()
 
             # Get date range
-            start_date = df[date_col].min().strftime('%Y-%m-%d')
-            end_date = df[date_col].max().strftime('%Y-%m-%d')
+            start_date = df['date'].min().strftime('%Y-%m-%d')
+            end_date = df['date'].max().strftime('%Y-%m-%d')
 
             # Display metrics
-            print(f"   Data points: {len(raw_data_backtest_full)}")
+            print(f"   Data points: {len(df)}")
             print(f"   Date range: {start_date} to {end_date}")
             print(f"   Mean return: {mean_return_daily*100:.4f}% daily")
             print(f"   Volatility: {volatility_daily*100:.4f}% daily")
@@ -332,11 +194,12 @@ def load_strategies_from_folder(folder_path, starting_capital=1_000_000):
             print(f"   Final Equity: ${equity:,.0f} (from ${starting_capital:,.0f})")
 
             # Show margin statistics
-            margin_pcts = [(d['margin_used'] / d['account_equity'] * 100) for d in raw_data_backtest_full if d['account_equity'] > 0]
-            margin_dollars = [d['margin_used'] for d in raw_data_backtest_full]
+            has_equity = columns['account_equity'] > 0
+            margin_pcts = columns['margin_used'][has_equity] / columns['account_equity'][has_equity] * 100
+            margin_dollars = columns['margin_used']
 
-            if margin_pcts:
-                print(f"   Margin Used: min={min(margin_pcts):.1f}%, max={max(margin_pcts):.1f}%, avg={sum(margin_pcts)/len(margin_pcts):.1f}%")
+            if len(margin_pcts):
+                print(f"   Margin Used: min={margin_pcts.min():.1f}%, max={margin_pcts.max():.1f}%, avg={margin_pcts.mean():.1f}%")
 
             # Detect position count from margin steps
             position_analysis = detect_position_count_from_margin_steps(margin_dollars)
@@ -347,7 +210,7 @@ def load_strategies_from_folder(folder_path, starting_capital=1_000_000):
             print(f"      Reason: {position_analysis['reason']}")
 
             # Calculate median margin percentage
-            median_margin_pct = np.median(margin_pcts) if margin_pcts else 0.0
+            median_margin_pct = np.median(margin_pcts) if len(margin_pcts) else 0.0
 
             if synthetic_columns:
                 print(f"   📝 Synthetic columns: {', '.join(synthetic_columns)}")
@@ -367,7 +230,7 @@ def load_strategies_from_folder(folder_path, starting_capital=1_000_000):
                 "include_in_optimization": True,
 
                 # Backtest data
-                "raw_data_backtest_full": raw_data_backtest_full,
+                "backtest_series": encode_backtest_series(columns),
                 "raw_data_developer_live": [],  # Empty initially
                 "raw_data_mathematricks_live": [],  # Empty initially
 
@@ -379,7 +242,7 @@ def load_strategies_from_folder(folder_path, starting_capital=1_000_000):
                     "max_drawdown": float(max_drawdown),
                     "start_date": start_date,
                     "end_date": end_date,
-                    "total_days": len(raw_data_backtest_full)
+                    "total_days": len(df)
                 },
 
                 # Metadata
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Migrate strategy backtest data from raw_data_backtest_full to backtest_series
+
+Strategy documents now store their backtest history as packed columns (backtest_series,
+see services/backtest_series) instead of one dict per day. This encodes the legacy
+record lists, checks that the encoded columns decode back to the values of the original
+records (parsed one record at a time, independently of the codec), and optionally
+removes the old lists. Readers accept both layouts, so the migration can run
+while services are up. Safe to re-run: documents that already have backtest_series
+are skipped.
+
+Usage:
+    python tools/migrate_backtest_series.py --dry-run        # Show what would be converted
+    python tools/migrate_backtest_series.py                  # Add backtest_series
+    python tools/migrate_backtest_series.py --unset-legacy   # Also drop raw_data_backtest_full
+"""
+import argparse
+import os
+import sys
+import math
+import numpy as np
+import pandas as pd
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+# Load environment variables
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV_PATH = os.path.join(PROJECT_ROOT, '.env')
+load_dotenv(ENV_PATH)
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'services'))
+from backtest_series import (
+    SERIES_FIELD, LEGACY_FIELD, COLUMN_DEFAULTS, BacktestSeriesError,
+    encode_backtest_series, decode_backtest_series, records_to_columns
+)
+
+
+def _record_date(value) -> np.datetime64:
+    """One record's date as stored (tz-aware dates in UTC)"""
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(None)
+    return timestamp.to_datetime64().astype('datetime64[ns]')
+
+
+def _mismatch(records, decoded):
+    """
+    First difference between the original records and the decoded columns, or None
+
+    Values a record doesn't carry are expected to decode to the codec's default
+    (COLUMN_DEFAULTS; a missing return stays NaN unless no record has one).
+    """
+    if len(decoded.get('date', [])) != len(records):
+        return f"{len(decoded.get('date', []))} days decoded from {len(records)} records"
+
+    present = {name for record in records for name, value in record.items()}
+    for i, record in enumerate(records):
+        if decoded['date'][i] != _record_date(record['date']):
+            return f"day {i}: date {decoded['date'][i]} != {record['date']!r}"
+        for name, default in COLUMN_DEFAULTS.items():
+            value = record.get(name)
+            if value is None:
+                value = float('nan') if name == 'return' and name in present else default
+            value = float(value)
+            got = float(decoded[name][i])
+            if not (got == value or (math.isnan(got) and math.isnan(value))):
+                return f"day {i}: {name} {got} != {record.get(name)!r}"
+    return None
+
+
+def migrate(unset_legacy: bool, dry_run: bool):
+    """Encode raw_data_backtest_full record lists into backtest_series"""
+    mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/?replicaSet=rs0')
+
+    try:
+        # Only use TLS for remote MongoDB Atlas connections
+        use_tls = 'mongodb+srv' in mongodb_uri or 'mongodb.net' in mongodb_uri
+        if use_tls:
+            client = MongoClient(mongodb_uri, tls=True, tlsAllowInvalidCertificates=True)
+        else:
+            client = MongoClient(mongodb_uri)
+
+        # Test connection
+        client.server_info()
+        print("✅ Connected to MongoDB")
+    except Exception as e:
+        print(f"❌ Failed to connect to MongoDB: {e}")
+        sys.exit(1)
+
+    strategies = client['mathematricks_trading']['strategies']
+
+    converted = skipped = failed = 0
+    for doc in strategies.find({LEGACY_FIELD: {'$exists': True}}):
+        strategy_id = doc.get('strategy_id') or doc['_id']
+        records = doc.get(LEGACY_FIELD)
+
+        if SERIES_FIELD in doc:
+            skipped += 1
+            print(f"  ⏭️  {strategy_id}: already has {SERIES_FIELD}")
+            if unset_legacy and not dry_run:
+                strategies.update_one({'_id': doc['_id']}, {'$unset': {LEGACY_FIELD: ''}})
+                print(f"  🗑️  {strategy_id}: Removed legacy {LEGACY_FIELD}")
+            continue
+
+        if not (isinstance(records, list) and records and isinstance(records[0], dict)):
+            skipped += 1
+            print(f"  ⏭️  {strategy_id}: {LEGACY_FIELD} is empty or not a record list")
+            continue
+
+        try:
+            series = encode_backtest_series(records_to_columns(records))
+            mismatch = _mismatch(records, decode_backtest_series(series))
+            if mismatch:
+                raise BacktestSeriesError(f"decoded columns differ from the records ({mismatch})")
+        except (BacktestSeriesError, KeyError, ValueError, TypeError) as e:
+            failed += 1
+            print(f"  ❌ {strategy_id}: {e}")
+            continue
+
+        size_kb = sum(len(payload) for payload in series['columns'].values()) / 1024
+        if not dry_run:
+            update = {'$set': {SERIES_FIELD: series}}
+            if unset_legacy:
+                update['$unset'] = {LEGACY_FIELD: ''}
+            strategies.update_one({'_id': doc['_id']}, update)
+        converted += 1
+        print(f"  ✅ {strategy_id}: {series['length']} days → {len(series['columns'])} columns ({size_kb:.1f} KB)"
+              f"{' [legacy removed]' if unset_legacy else ''}")
+
+    print("\n" + "=" * 80)
+    print(f"{'[DRY RUN] ' if dry_run else ''}Converted: {converted} | Skipped: {skipped} | Failed: {failed}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Migrate strategies.raw_data_backtest_full to columnar backtest_series')
+    parser.add_argument('--unset-legacy', action='store_true', help='Remove raw_data_backtest_full after converting')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would be converted without writing')
+    args = parser.parse_args()
+
+    migrate(args.unset_legacy, args.dry_run)
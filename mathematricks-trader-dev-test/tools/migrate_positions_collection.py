@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Migrate positions from trading_accounts.open_positions to the positions collection
+
+ExecutionService now writes one document per position to `positions` (see
+services/positions). This copies the legacy embedded positions across and creates the
+positions indexes. Safe to re-run: an OPEN position that already exists in `positions`
+for the same (account, strategy, instrument, direction) is skipped.
+
+Usage:
+    python tools/migrate_positions_collection.py                  # OPEN positions only
+    python tools/migrate_positions_collection.py --include-closed # Also copy CLOSED history
+    python tools/migrate_positions_collection.py --unset-legacy   # Then drop the old arrays
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+# Load environment variables
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV_PATH = os.path.join(PROJECT_ROOT, '.env')
+load_dotenv(ENV_PATH)
+
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'services'))
+from positions import PositionStore, STATUS_OPEN
+
+
+def migrate(include_closed: bool, unset_legacy: bool, dry_run: bool):
+    """Copy trading_accounts.open_positions entries into the positions collection"""
+    mongodb_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017/?replicaSet=rs0')
+
+    try:
+        # Only use TLS for remote MongoDB Atlas connections
+        use_tls = 'mongodb+srv' in mongodb_uri or 'mongodb.net' in mongodb_uri
+        if use_tls:
+            client = MongoClient(mongodb_uri, tls=True, tlsAllowInvalidCertificates=True)
+        else:
+            client = MongoClient(mongodb_uri)
+
+        # Test connection
+        client.server_info()
+        print("✅ Connected to MongoDB")
+    except Exception as e:
+        print(f"❌ Failed to connect to MongoDB: {e}")
+        sys.exit(1)
+
+    db = client['mathematricks_trading']
+    trading_accounts = db['trading_accounts']
+    store = PositionStore(db)
+
+    if not dry_run:
+        store.ensure_indexes()
+        print("✅ Positions indexes ready")
+
+    copied = skipped = 0
+    for account_doc in trading_accounts.find({'open_positions.0': {'$exists': True}}):
+        account_id = account_doc.get('account_id') or account_doc.get('_id')
+        legacy_positions = account_doc.get('open_positions', [])
+        print(f"\n📋 {account_id}: {len(legacy_positions)} legacy position(s)")
+
+        for pos in legacy_positions:
+            status = pos.get('status', STATUS_OPEN)
+            if status != STATUS_OPEN and not include_closed:
+                continue
+
+            position_doc = {**pos, 'account_id': account_id, 'status': status}
+            position_doc.setdefault('direction', 'LONG')
+            position_doc.setdefault('updated_at', datetime.utcnow())
+
+            if status == STATUS_OPEN and store.get_open_position(
+                account_id, pos.get('strategy_id'), pos.get('instrument'), position_doc['direction']
+            ):
+                skipped += 1
+                print(f"  ⏭️  {pos.get('strategy_id')}/{pos.get('instrument')} already in positions")
+                continue
+
+            if not dry_run:
+                store.collection.insert_one(position_doc)
+            copied += 1
+            print(f"  ✅ {pos.get('strategy_id')}/{pos.get('instrument')} "
+                  f"{position_doc['direction']} {pos.get('quantity', 0)} [{status}]")
+
+        if unset_legacy and not dry_run:
+            trading_accounts.update_one({'_id': account_doc['_id']}, {'$unset': {'open_positions': ''}})
+            print("  🗑️  Removed legacy open_positions array")
+
+    print("\n" + "=" * 80)
+    print(f"{'[DRY RUN] ' if dry_run else ''}Copied: {copied} | Skipped (already migrated): {skipped}")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Migrate trading_accounts.open_positions to the positions collection')
+    parser.add_argument('--include-closed', action='store_true', help='Also copy CLOSED positions (history)')
+    parser.add_argument('--unset-legacy', action='store_true', help='Remove the open_positions arrays after copying')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would be copied without writing')
+    args = parser.parse_args()
+
+    migrate(args.include_closed, args.unset_legacy, args.dry_run)